@@ -4,20 +4,21 @@ Sentino AI - Academic Research Platform with Sci-Hub Integration
 Focused on academic paper search, analysis, and access through Sci-Hub
 """
 
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash, make_response
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash, make_response, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import http_date
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 import os
+import hmac
+from functools import wraps
 from dotenv import load_dotenv
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
 import arxiv
-import re
-from datetime import datetime, timedelta
+from datetime import datetime
 import requests
-import json
+import hashlib
 import logging
-from typing import Dict, List, Optional
+from typing import Dict
 import time
 from pymongo import MongoClient
 from bson.objectid import ObjectId
@@ -27,6 +28,28 @@ from utils.scihub_api import scihub_api
 
 # Import multi-source API integration
 from utils.multi_source_api import multi_source_api
+from utils.arxiv_api import arxiv_api
+from utils.search_stage import search_stage
+from utils.search_cache import search_cache
+from utils.paper_dedup import PaperDeduplicator
+from utils.paper_record import PaperRecord
+from utils.paper_index import paper_index
+from utils.reranker import paper_reranker
+from utils.enrichment import citation_enricher
+from utils.source_planner import source_planner, SourcePlan, classify_query
+from utils.rate_limiter import rate_limiter, RateLimited
+from utils.hedging import request_hedger
+from utils.http_client import http_client
+from utils.llm_gateway import llm_gateway
+from utils.llm_scheduler import llm_scheduler, LLMRateLimited, PRIORITY_INTERACTIVE
+from utils.llm_cache import llm_cache
+from utils.single_flight import search_flight, llm_flight
+from utils.generation import (query_gemini, stream_gemini, build_literature_review, build_methodology_analysis,
+                              build_academic_draft, GENERATION_JOB_BUILDERS)
+from utils.trending import trending_store
+from utils.generation_jobs import generation_jobs
+from utils.fast_json import FastJSONProvider
+from utils import fast_json
 
 # Import models
 from models import User, SearchHistory
@@ -46,6 +69,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 app.secret_key = os.getenv("SECRET_KEY", "sentino-academic-research-key")
 
@@ -77,329 +101,94 @@ def load_user(user_id):
 # Configuration
 PAPERS_PER_PAGE = 20
 MAX_SEARCH_RESULTS = 100
-
-# Cache for discovered Gemini models (avoid repeated list calls)
-_cached_gemini_models: List[str] = []
-_last_model_refresh: Optional[datetime] = None
-_MODEL_REFRESH_INTERVAL = timedelta(minutes=30)
-
-
-def _get_candidate_gemini_models() -> List[str]:
-    """Return an ordered list of Gemini model IDs to try."""
-    global _cached_gemini_models, _last_model_refresh
+DEFAULT_SEARCH_SOURCES = ["local", "arxiv", "semantic_scholar", "core"]  # Preselected in the search form
+
+# Operator access to /api/admin endpoints: a shared token or a list of account emails
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+# Configure Gemini and start model discovery; workers forked later start their own on first use
+llm_gateway.start()
+
+
+def admin_required(view):
+    """Allow the request with a valid X-Admin-Token header or from a logged-in admin account"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get("X-Admin-Token", "")
+        if ADMIN_API_TOKEN and hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+            return view(*args, **kwargs)
+        if current_user.is_authenticated and (current_user.email or "").lower() in ADMIN_EMAILS:
+            return view(*args, **kwargs)
+        return jsonify({"error": "Admin access required"}), 403
+    return wrapper
+
+def llm_busy_response(error):
+    """503 for a request no Gemini model has quota for before its deadline"""
+    retry_after = int(error.retry_after or 0) + 1
+    response = jsonify({"error": "The AI service is busy, please try again shortly", "retry_after": retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
+def sse_event(payload, event_id=None):
+    data = b"data: " + fast_json.dumps(payload) + b"\n\n"
+    return f"id: {event_id}\n".encode('utf-8') + data if event_id else data
+
+def stream_generation(builder, failure_message):
+    """
+    Stream a generation endpoint as server-sent events
     
-    # Prioritize models from environment variables
-    preferred: List[str] = []
-    env_models = os.getenv("GEMINI_MODEL", "").strip()
-    if env_models:
-        preferred.extend([model.strip() for model in env_models.split(",") if model.strip()])
-
-    # Append a static list of known good models
-    preferred.extend([
-        "gemini-2.0-flash"
-    ])
-    
-    now = datetime.utcnow()
-    refresh_needed = (
-        not _cached_gemini_models
-        or _last_model_refresh is None
-        or (now - _last_model_refresh) > _MODEL_REFRESH_INTERVAL
-    )
-
-    if refresh_needed:
-        try:
-            discovered: List[str] = []
-            for model in genai.list_models():
-                if 'generateContent' in model.supported_generation_methods:
-                    # We just want the model name, not 'models/...'
-                    model_name = model.name.split('/')[-1]
-                    discovered.append(model_name)
-            
-            if discovered:
-                _cached_gemini_models = discovered
-                _last_model_refresh = now
-        except Exception as list_err:
-            logger.debug(f"Unable to list Gemini models: {list_err}")
-            # Do not clear cache on failure
-
-    # Combine preferred and discovered, ensuring no duplicates and preserving order
-    ordered_models: List[str] = []
-    seen = set()
-    for model_name in preferred + _cached_gemini_models:
-        if model_name not in seen:
-            ordered_models.append(model_name)
-            seen.add(model_name)
-            
-    return ordered_models
-
-def query_gemini(prompt, context=""):
-    """Enhanced Gemini query function for academic analysis with fallback"""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or api_key == "your_gemini_api_key_here":
-        logger.warning("Gemini API key not configured, using fallback analysis")
-        return generate_fallback_analysis(prompt, context)
+    Events are JSON objects with a "type": "start", then "token" events with the text as it is
+    written, then "done" carrying the same payload as the blocking endpoint (whose text can
+    differ from the streamed tokens once post-processing has run), or "error" (with
+    "retry_after" seconds when Gemini is out of quota).
     
+    Args:
+        builder: Turns the request body into (query_gemini keyword arguments, finish)
+        failure_message: Error sent to the client if generation fails
+    """
     try:
-        genai.configure(api_key=api_key)
-        candidate_models = _get_candidate_gemini_models()
-        
-        if not candidate_models:
-            logger.warning("No Gemini models available; using fallback analysis")
-            return generate_fallback_analysis(prompt, context)
-            
-        academic_prompt = f"""
-You are an expert academic research assistant. Analyze the following query and provide comprehensive insights.
-
-Query: {prompt}
-
-Context: {context}
-
-Please provide:
-1. Key research themes and concepts
-2. Relevant academic fields and disciplines
-3. Suggested search terms for finding related papers
-4. Important considerations for this research topic
-
-Respond in a clear, academic tone suitable for researchers.
-"""
-        
-        last_error = None
-        for model_name in candidate_models:
-            try:
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(academic_prompt)
-                if response and hasattr(response, 'text') and response.text:
-                    return response.text
-            except google_exceptions.ResourceExhausted as e:
-                last_error = e
-                logger.warning(f"Quota exceeded for model {model_name}. Checking for retry delay.")
-                # Try to parse the retry delay from the error message
-                retry_after_match = re.search(r"Please retry in ([\d.]+)s", str(e))
-                if retry_after_match:
-                    delay = float(retry_after_match.group(1))
-                    logger.info(f"Rate limit hit. Waiting for {delay:.2f} seconds before retrying the same model.")
-                    time.sleep(delay)
-                    try:  # Retry once after delay
-                        response = model.generate_content(academic_prompt)
-                        if response and hasattr(response, 'text') and response.text:
-                            return response.text
-                    except Exception as retry_err:
-                        last_error = retry_err
-                        logger.warning(f"Retry for model {model_name} also failed: {retry_err}")
-                else:
-                    logger.warning("No retry delay found in 429 error. Trying next model.")
-                continue # Continue to next model after handling 429
-            except Exception as model_err:
-                last_error = model_err
-                logger.warning(f"Model {model_name} failed: {model_err}")
-                continue
-        
-        logger.error("All tested Gemini models failed to generate a response.")
-        if last_error:
-            logger.error(f"Last Gemini API error: {last_error}")
-        return generate_fallback_analysis(prompt, context)
-        
+        gemini_args, finish = builder(request.json or {})
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
     except Exception as e:
-        logger.error(f"A general error occurred in query_gemini: {e}")
-        return generate_fallback_analysis(prompt, context)
-
-def generate_fallback_analysis(prompt, context=""):
-    """Generate basic analysis when AI is unavailable"""
-    return f"""
-**Analysis for: {prompt}**
-
-**Note: This is a basic analysis generated without AI assistance. For comprehensive AI-powered insights, please configure your Gemini API key.**
-
-**Key Research Areas:**
-Based on your query, this research appears to relate to multiple academic domains. Consider exploring:
-- Primary research methodologies in this field
-- Theoretical frameworks commonly applied
-- Recent developments and emerging trends
-- Cross-disciplinary applications
-
-**Research Approach:**
-1. **Literature Search Strategy**: Use multiple academic databases (arXiv, PubMed, IEEE Xplore, Google Scholar)
-2. **Methodology Considerations**: Consider both quantitative and qualitative approaches
-3. **Theoretical Framework**: Identify established theories and emerging paradigms
-4. **Current Gaps**: Look for unexplored areas and methodological innovations
-
-**Next Steps:**
-- Conduct systematic literature search
-- Identify key researchers and institutions
-- Analyze methodological approaches in recent papers
-- Consider interdisciplinary perspectives
-
-**Limitations:**
-This analysis is generated without AI assistance. For comprehensive insights including detailed methodology recommendations, literature synthesis, and research planning, please configure the Gemini API key in your .env file.
-"""
-
-def format_citation(paper, citation_format="apa", reference_number=None):
-    """Format a paper citation in the specified format"""
-    title = paper.get('title', 'Unknown Title')
-    authors = paper.get('authors', 'Unknown Author')
-    year = paper.get('published_year', 'n.d.')
-    url = paper.get('url', '')
-    doi = paper.get('doi', '')
-    categories = paper.get('categories', [])
+        logger.error(f"Error preparing {request.path}: {str(e)}")
+        return jsonify({"error": failure_message}), 500
     
-    # Clean up authors - take first few if too many
-    if len(authors) > 100:
-        authors_list = authors.split(', ')
-        if len(authors_list) > 3:
-            authors = f"{authors_list[0]}, {authors_list[1]}, et al."
-    
-    # Format based on citation style
-    if citation_format.lower() == "apa":
-        citation = f"{authors} ({year}). {title}. arXiv preprint."
-        if doi:
-            citation += f" https://doi.org/{doi}"
-        elif url:
-            citation += f" Retrieved from {url}"
-    
-    elif citation_format.lower() == "mla":
-        citation = f"{authors}. \"{title}.\" arXiv preprint, {year}."
-        if url:
-            citation += f" Web. {url}"
-    
-    elif citation_format.lower() == "chicago":
-        citation = f"{authors}. \"{title}.\" arXiv preprint, {year}."
-        if url:
-            citation += f" {url}"
-    
-    elif citation_format.lower() == "ieee":
-        if reference_number:
-            citation = f"[{reference_number}] {authors}, \"{title},\" arXiv preprint, {year}."
-        else:
-            citation = f"{authors}, \"{title},\" arXiv preprint, {year}."
-        if doi:
-            citation += f" doi: {doi}"
-    
-    elif citation_format.lower() == "harvard":
-        citation = f"{authors} {year}, '{title}', arXiv preprint."
-        if url:
-            citation += f" Available at: {url}"
-    
-    else:  # Default to APA
-        citation = f"{authors} ({year}). {title}. arXiv preprint."
-        if doi:
-            citation += f" https://doi.org/{doi}"
-        elif url:
-            citation += f" Retrieved from {url}"
-    
-    return citation
-
-def generate_references_section(papers, citation_format="apa"):
-    """Generate a properly formatted references section"""
-    references = []
-    
-    for i, paper in enumerate(papers, 1):
-        citation = format_citation(paper, citation_format, reference_number=i)
-        references.append(citation)
-    
-    # Sort references alphabetically for most formats (except IEEE which uses numbers)
-    if citation_format.lower() != "ieee":
-        references.sort()
-    
-    references_text = "\n".join(references)
-    
-    return f"""
-## REFERENCES
-
-{references_text}
-
----
-**Citation Format**: {citation_format.upper()}
-**Total References**: {len(references)}
-"""
-
-def create_in_text_citations(papers, citation_format="apa"):
-    """Create in-text citation mappings for papers"""
-    citations = {}
-    
-    for i, paper in enumerate(papers, 1):
-        title = paper.get('title', 'Unknown Title')
-        authors = paper.get('authors', 'Unknown Author')
-        year = paper.get('published_year', 'n.d.')
-        
-        # Get first author surname for in-text citations
-        first_author = authors.split(',')[0].strip()
-        if ' ' in first_author:
-            surname = first_author.split()[-1]
-        else:
-            surname = first_author
-        
-        if citation_format.lower() == "apa":
-            if ',' in authors and 'et al' not in authors:
-                citations[title] = f"({surname} et al., {year})"
-            else:
-                citations[title] = f"({surname}, {year})"
-        
-        elif citation_format.lower() == "mla":
-            citations[title] = f"({surname})"
-        
-        elif citation_format.lower() == "chicago":
-            citations[title] = f"({surname} {year})"
-        
-        elif citation_format.lower() == "ieee":
-            citations[title] = f"[{i}]"
-        
-        elif citation_format.lower() == "harvard":
-            citations[title] = f"({surname} {year})"
-        
-        else:  # Default to APA
-            citations[title] = f"({surname}, {year})"
+    def generate():
+        try:
+            yield sse_event({"type": "start"})
+            parts = []
+            for text in stream_gemini(**gemini_args):
+                if not text:
+                    yield b": keep-alive\n\n"
+                    continue
+                parts.append(text)
+                yield sse_event({"type": "token", "text": text})
+            yield sse_event(dict(finish("".join(parts)), type="done"))
+        
+        except LLMRateLimited as e:
+            yield sse_event({"type": "error", "error": "The AI service is busy, please try again shortly",
+                             "retry_after": int(e.retry_after or 0) + 1})
+        except Exception as e:
+            logger.error(f"Error streaming {request.path}: {str(e)}")
+            yield sse_event({"type": "error", "error": failure_message})
     
-    return citations
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
 
 def query_arxiv(query, max_results=20, sort_by=arxiv.SortCriterion.Relevance):
-    """Enhanced arXiv search with better metadata extraction"""
+    """Enhanced arXiv search with better metadata extraction, served from the search cache"""
     try:
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results,
-            sort_by=sort_by
-        )
-        
-        papers = []
-        for result in arxiv.Client(page_size=max_results, delay_seconds=1, num_retries=3).results(search):
-            try:
-                published_date = result.published.strftime("%Y-%m-%d") if result.published else "Unknown"
-                published_year = result.published.year if result.published else None
-                authors = ", ".join(author.name for author in result.authors) if result.authors else "Unknown"
-                
-                # Extract arXiv ID
-                if result.entry_id:
-                    arxiv_id = result.entry_id.split("/")[-1]
-                else:
-                    arxiv_id = "unknown"
-                
-                # Extract DOI if available
-                doi = None
-                if hasattr(result, 'doi') and result.doi:
-                    doi = result.doi
-                
-                # Extract categories
-                categories = result.categories if hasattr(result, 'categories') else []
-                
-                paper = {
-                    "title": result.title or "Unknown Title",
-                    "authors": authors,
-                    "summary": result.summary or "No summary available",
-                    "pdf_url": result.pdf_url or "#",
-                    "published": published_date,
-                    "published_year": published_year,
-                    "arxiv_id": arxiv_id,
-                    "doi": doi,
-                    "url": result.entry_id,
-                    "categories": categories,
-                    "source": "arXiv"
-                }
-                papers.append(paper)
-            except Exception as e:
-                logger.error(f"Error processing paper: {str(e)}")
-                continue
-            
-        return papers
+        return PaperRecord.coerce_all(search_cache.get_or_fetch(
+            'arxiv',
+            query,
+            arxiv_api.resolve_sort(sort_by).value,
+            max_results,
+            paper_index.indexing(lambda: arxiv_api.fetch_papers(query, max_results, sort_by))
+        ))
     except Exception as e:
         logger.error(f"Error querying arXiv: {str(e)}")
         return []
@@ -635,68 +424,78 @@ def change_password():
         flash('An error occurred while changing your password', 'error')
         return redirect(url_for('settings'))
 
+def read_search_params(data):
+    """Read academic search parameters from a request body"""
+    query = data.get("query", "").strip()
+    max_results = min(data.get("max_results", PAPERS_PER_PAGE), MAX_SEARCH_RESULTS)
+    include_scihub = data.get("include_scihub", True)
+    sort_by = data.get("sort_by", "relevance")
+    # An empty or missing list means the defaults
+    sources = data.get("sources") or list(DEFAULT_SEARCH_SOURCES)
+    return query, max_results, include_scihub, sort_by, sources
+
+def plan_search(data, query, sources, max_results):
+    """Choose the sources to query and how many results to request from each
+    
+    Sources the client chose are an upper bound. Without any, or with just the defaults (which
+    the search form always sends unless changed), the planner may add specialist sources for the
+    query's domain. "plan_sources": false splits max_results evenly instead.
+    """
+    if data.get("plan_sources") is False:
+        per_source = max(1, max_results // len(sources))
+        return SourcePlan(sources, {source: per_source for source in sources}, classify_query(query))
+    return source_planner.plan(
+        query,
+        sources,
+        max_results,
+        explicit="sources" in data and set(sources) != set(DEFAULT_SEARCH_SOURCES),
+        available=search_stage.available_sources()
+    )
+
+def save_academic_search(query, papers, ai_analysis):
+    """Save an academic search to the history of the logged-in user"""
+    if not current_user.is_authenticated:
+        return
+    try:
+        SearchHistory.add_search(
+            db,
+            current_user.get_id(),
+            query,
+            'academic',
+            len(papers),
+            [paper.to_dict() for paper in papers[:10]],  # Save first 10 papers
+            ai_analysis,
+            None
+        )
+        logger.info(f"Saved search history for user {current_user.get_id()}")
+    except Exception as e:
+        logger.error(f"Failed to save search history: {e}")
+
 @app.route('/api/academic-search', methods=['POST'])
 def academic_search():
     """Enhanced academic search with multi-source integration and AI analysis"""
     try:
-        data = request.json
-        query = data.get("query", "").strip()
-        max_results = min(data.get("max_results", PAPERS_PER_PAGE), MAX_SEARCH_RESULTS)
-        include_scihub = data.get("include_scihub", True)
-        sort_by = data.get("sort_by", "relevance")
-        sources = data.get("sources", ["arxiv", "semantic_scholar", "core"])  # Default sources
+        query, max_results, include_scihub, sort_by, sources = read_search_params(request.json)
         
         if not query:
             return jsonify({"error": "Query is required"}), 400
         
-        logger.info(f"Multi-source academic search: query='{query}', max_results={max_results}, sources={sources}")
+        plan = plan_search(request.json, query, sources, max_results)
+        sources = plan.sources
+        logger.info(f"Multi-source academic search: query='{query}', max_results={max_results}, plan={plan.limits}")
         
-        all_papers = []
+        # Search the planned sources concurrently under one deadline
+        results_by_source, source_status = search_stage.search(query, sources, plan.limits, sort_by)
         
-        # Search arXiv if requested
-        if "arxiv" in sources:
-            logger.info("Searching arXiv...")
-            sort_mapping = {
-                "relevance": arxiv.SortCriterion.Relevance,
-                "date": arxiv.SortCriterion.SubmittedDate,
-                "updated": arxiv.SortCriterion.LastUpdatedDate
-            }
-            sort_criterion = sort_mapping.get(sort_by, arxiv.SortCriterion.Relevance)
-            arxiv_papers = query_arxiv(query, max_results // len(sources), sort_criterion)
-            all_papers.extend(arxiv_papers)
-        
-        # Search other sources using multi-source API
-        other_sources = [s for s in sources if s != "arxiv"]
-        if other_sources:
-            logger.info(f"Searching other sources: {other_sources}")
-            # Convert source names to API format
-            api_sources = []
-            source_mapping = {
-                "semantic_scholar": "semantic_scholar",
-                "core": "core", 
-                "crossref": "crossref",
-                "pubmed": "pubmed"
-            }
-            for source in other_sources:
-                if source in source_mapping:
-                    api_sources.append(source_mapping[source])
-            
-            if api_sources:
-                other_papers = multi_source_api.search_combined(
-                    query, 
-                    max_results // len(sources), 
-                    api_sources
-                )
-                all_papers.extend(other_papers)
+        # Merge duplicates across sources (DOI, arXiv ID, fuzzy title match)
+        deduplicator = PaperDeduplicator()
+        for papers in results_by_source.values():
+            deduplicator.add_all(papers)
         
-        # Remove duplicates based on title similarity
-        unique_papers = []
-        seen_titles = set()
-        for paper in all_papers:
-            title_key = paper.get('title', '').lower().strip()
-            if title_key and title_key not in seen_titles:
-                seen_titles.add(title_key)
-                unique_papers.append(paper)
+        # Fill missing citation counts in one batch lookup, then rank by similarity to the query
+        citation_enricher.enrich(deduplicator.papers)
+        unique_papers = paper_reranker.rerank(query, deduplicator.papers, max_results)
+        source_planner.record_outcome(plan, results_by_source, source_status, unique_papers)
         
         if not unique_papers:
             return jsonify({
@@ -705,7 +504,8 @@ def academic_search():
                 "total_count": 0,
                 "analysis": "No papers found for this query.",
                 "scihub_stats": {"total_papers": 0, "available_on_scihub": 0, "availability_rate": 0},
-                "sources_used": sources
+                "sources_used": sources,
+                "source_status": source_status
             })
         
         # Enhance with Sci-Hub if requested
@@ -719,21 +519,7 @@ def academic_search():
         unique_papers, ai_analysis = analyze_papers_with_ai(unique_papers, query)
         
         # Save search history if user is logged in
-        if current_user.is_authenticated:
-            try:
-                SearchHistory.add_search(
-                    db,
-                    current_user.get_id(),
-                    query,
-                    'academic',
-                    len(unique_papers),
-                    unique_papers[:10],  # Save first 10 papers
-                    ai_analysis,
-                    None
-                )
-                logger.info(f"Saved search history for user {current_user.get_id()}")
-            except Exception as e:
-                logger.error(f"Failed to save search history: {e}")
+        save_academic_search(query, unique_papers, ai_analysis)
         
         return jsonify({
             "success": True,
@@ -744,6 +530,8 @@ def academic_search():
             "query": query,
             "sort_by": sort_by,
             "sources_used": sources,
+            "source_status": source_status,
+            "source_plan": plan.to_dict(),
             "user_authenticated": current_user.is_authenticated
         })
             
@@ -751,6 +539,82 @@ def academic_search():
         logger.error(f"Error in academic search: {str(e)}")
         return jsonify({"error": "Search failed"}), 500
 
+@app.route('/api/academic-search/stream', methods=['POST'])
+def academic_search_stream():
+    """Streaming academic search: one NDJSON event per source batch, then the merged list, then the AI analysis"""
+    data = request.json or {}
+    query, max_results, include_scihub, sort_by, sources = read_search_params(data)
+    
+    if not query:
+        return jsonify({"error": "Query is required"}), 400
+    
+    plan = plan_search(data, query, sources, max_results)
+    sources = plan.sources
+    logger.info(f"Streaming academic search: query='{query}', max_results={max_results}, plan={plan.limits}")
+    
+    def event(payload):
+        return fast_json.dumps(payload) + b"\n"
+    
+    def generate():
+        try:
+            yield event({"type": "start", "query": query, "sort_by": sort_by, "sources_used": sources,
+                         "source_plan": plan.to_dict()})
+            
+            # Emit each source as soon as it lands, keeping only papers not seen yet
+            deduplicator = PaperDeduplicator()
+            unique_papers = deduplicator.papers
+            source_status = {}
+            results_by_source = {}
+            for source, papers, status in search_stage.iter_search(query, sources, plan.limits, sort_by):
+                source_status[source] = status
+                results_by_source[source] = papers
+                added, updated = deduplicator.add_all(papers)
+                yield event({
+                    "type": "source",
+                    "source": source,
+                    "status": status,
+                    "papers": added,
+                    "merged_count": len(updated),
+                    "total_count": len(unique_papers)
+                })
+            
+            # Fill missing citation counts, rank the merged candidates, enhance with Sci-Hub if requested,
+            # then send the merged list
+            citation_enricher.enrich(deduplicator.papers)
+            unique_papers = paper_reranker.rerank(query, deduplicator.papers, max_results)
+            source_planner.record_outcome(plan, results_by_source, source_status, unique_papers)
+            scihub_stats = {"total_papers": len(unique_papers), "available_on_scihub": 0, "availability_rate": 0}
+            if include_scihub and unique_papers:
+                unique_papers = scihub_api.batch_enhance_papers(unique_papers)
+                scihub_stats = scihub_api.get_availability_stats(unique_papers)
+            
+            yield event({
+                "type": "merged",
+                "papers": unique_papers,
+                "total_count": len(unique_papers),
+                "scihub_stats": scihub_stats,
+                "source_status": source_status
+            })
+            
+            # AI analysis goes last since it is by far the slowest stage
+            if unique_papers:
+                unique_papers, ai_analysis = analyze_papers_with_ai(unique_papers, query)
+            else:
+                ai_analysis = "No papers found for this query."
+            yield event({"type": "analysis", "analysis": ai_analysis})
+            
+            save_academic_search(query, unique_papers, ai_analysis)
+            yield event({"type": "done", "user_authenticated": current_user.is_authenticated})
+            
+        except Exception as e:
+            logger.error(f"Error in streaming academic search: {str(e)}")
+            yield event({"type": "error", "error": "Search failed"})
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
 # User API Routes
 @app.route('/api/user/info', methods=['GET'])
 def get_user_info():
@@ -858,7 +722,7 @@ def get_available_sources():
     return jsonify({
         "success": True,
         "sources": sources_info,
-        "default_sources": ["arxiv", "semantic_scholar", "core"]
+        "default_sources": DEFAULT_SEARCH_SOURCES
     })
 
 @app.route('/api/source-stats', methods=['POST'])
@@ -871,21 +735,18 @@ def get_source_statistics():
         if not query:
             return jsonify({"error": "Query is required"}), 400
         
-        # Get stats from multi-source API
-        available_sources = ["semantic_scholar", "core", "crossref"]
-        stats = multi_source_api.get_source_stats(query, available_sources)
+        # Total hit counts only, fetched in parallel and cached per query
+        sources = data.get("sources") or ["arxiv", "semantic_scholar", "core", "crossref"]
+        stats, source_status = multi_source_api.get_source_stats_with_status(query, sources)
         
-        # Add arXiv stats (simplified)
-        try:
-            arxiv_papers = query_arxiv(query, 5)  # Small sample
-            stats["arxiv"] = len(arxiv_papers)
-        except:
-            stats["arxiv"] = 0
+        # Papers already in the local index
+        stats["local"] = paper_index.count(query)
         
         return jsonify({
             "success": True,
             "query": query,
             "source_stats": stats,
+            "source_status": source_status,
             "total_sources_checked": len(stats)
         })
         
@@ -893,6 +754,34 @@ def get_source_statistics():
         logger.error(f"Error getting source statistics: {str(e)}")
         return jsonify({"error": "Failed to get source statistics"}), 500
 
+@app.route('/api/admin/source-health', methods=['GET'])
+@admin_required
+def get_source_health():
+    """Circuit breaker state, latency histograms, quota usage, connection pools and request coalescing counters
+    
+    State is kept per worker process, so each worker reports what it has observed.
+    """
+    return jsonify({
+        "success": True,
+        "pid": os.getpid(),
+        "breakers": search_stage.breaker_snapshot(),
+        "rate_limiter": rate_limiter.get_stats(),
+        "search_cache": search_cache.get_stats(),
+        "local_index": paper_index.get_stats(),
+        "reranker": paper_reranker.get_stats(),
+        "enrichment": citation_enricher.get_stats(),
+        "source_planner": source_planner.get_stats(),
+        "hedging": request_hedger.get_stats(),
+        "llm": llm_gateway.get_stats(),
+        "llm_scheduler": llm_scheduler.get_stats(),
+        "llm_cache": llm_cache.get_stats(),
+        "http": http_client.get_stats(),
+        "single_flight": {
+            "search": search_flight.get_stats(),
+            "llm": llm_flight.get_stats()
+        }
+    })
+
 @app.route('/api/paper-analysis', methods=['POST'])
 def analyze_paper():
     """Comprehensive AI analysis of a specific paper"""
@@ -978,7 +867,7 @@ Abstract: {paper_abstract}
 Provide specific, actionable insights suitable for researchers, reviewers, and practitioners.
 """
         
-        analysis = query_gemini(analysis_prompt)
+        analysis = query_gemini(analysis_prompt, cache_endpoint="paper-analysis")
         
         return jsonify({
             "success": True,
@@ -986,6 +875,8 @@ Provide specific, actionable insights suitable for researchers, reviewers, and p
             "paper_title": paper_title
         })
         
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         logger.error(f"Error in paper analysis: {str(e)}")
         return jsonify({"error": "Analysis failed"}), 500
@@ -1070,7 +961,7 @@ As an expert research advisor, provide comprehensive research guidance for the q
 Provide specific, actionable guidance suitable for researchers at all career stages.
 """
         
-        suggestions = query_gemini(suggestions_prompt)
+        suggestions = query_gemini(suggestions_prompt, cache_endpoint="research-suggestions", cache_query=query)
         
         return jsonify({
             "success": True,
@@ -1078,6 +969,8 @@ Provide specific, actionable guidance suitable for researchers at all career sta
             "query": query
         })
         
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         logger.error(f"Error generating research suggestions: {str(e)}")
         return jsonify({"error": "Failed to generate suggestions"}), 500
@@ -1086,838 +979,41 @@ Provide specific, actionable guidance suitable for researchers at all career sta
 def generate_literature_review():
     """Generate a comprehensive literature review based on papers"""
     try:
-        data = request.json
-        papers = data.get("papers", [])
-        query = data.get("query", "")
-        review_type = data.get("review_type", "systematic")  # systematic, narrative, scoping
-        citation_format = data.get("citation_format", "apa")  # apa, mla, chicago, ieee, harvard
-        
-        if not papers:
-            return jsonify({"error": "Papers list is required"}), 400
-        
-        # Generate structured analysis of papers first
-        paper_analysis = analyze_papers_structure(papers, query)
-        
-        # Create in-text citations mapping
-        in_text_citations = create_in_text_citations(papers, citation_format)
-        
-        # Generate references section
-        references_section = generate_references_section(papers, citation_format)
-        
-        # Create detailed paper summaries with citations
-        papers_detail = []
-        for i, paper in enumerate(papers[:20]):  # Limit to top 20 papers
-            title = paper.get('title', 'Unknown Title')
-            citation = in_text_citations.get(title, f"(Paper {i+1})")
-            papers_detail.append(f"""
-Paper {i+1}: {paper.get('title', 'Unknown Title')} {citation}
-Authors: {paper.get('authors', 'Unknown')}
-Year: {paper.get('published_year', 'Unknown')}
-Abstract: {paper.get('summary', 'No abstract available')[:400]}...
-Categories: {', '.join(paper.get('categories', []))}
-DOI: {paper.get('doi', 'Not available')}
-""")
-        
-        review_prompt = f"""
-As an expert academic writer, create a comprehensive literature review on "{query}" based on the following papers.
-
-**Citation Format**: {citation_format.upper()}
-**In-text Citation Examples**: {list(in_text_citations.values())[:3]}
-
-**Papers to Review:**
-{chr(10).join(papers_detail)}
-
-**Structural Analysis:**
-{paper_analysis}
-
-**Create a {review_type.title()} Literature Review with the following structure:**
-
-**1. INTRODUCTION**
-- Define the scope and objectives of this review
-- Explain the significance of this research area
-- Outline the review methodology and selection criteria
-
-**2. THEORETICAL BACKGROUND**
-- Key theoretical frameworks identified in the literature
-- Evolution of theoretical understanding
-- Competing theories and paradigms
-
-**3. METHODOLOGICAL APPROACHES**
-- Overview of research methods used across studies
-- Strengths and limitations of different approaches
-- Methodological trends and innovations
-- Quality assessment of methodologies
-
-**4. THEMATIC ANALYSIS**
-- Major themes and research clusters
-- Convergent findings across studies
-- Divergent findings and contradictions
-- Gaps in current knowledge
-
-**5. CHRONOLOGICAL DEVELOPMENT**
-- Evolution of research over time
-- Milestone studies and breakthrough findings
-- Shifts in research focus and methodology
-- Emerging trends
-
-**6. CRITICAL ANALYSIS**
-- Strengths of the current literature
-- Limitations and weaknesses identified
-- Methodological concerns
-- Theoretical gaps
-
-**7. SYNTHESIS OF FINDINGS**
-- Consensus areas in the literature
-- Unresolved debates and controversies
-- Integration of findings across studies
-- Implications for theory and practice
-
-**8. RESEARCH GAPS AND FUTURE DIRECTIONS**
-- Identified gaps in current research
-- Methodological improvements needed
-- Theoretical developments required
-- Practical applications to explore
-
-**9. CONCLUSIONS**
-- Summary of key insights
-- Implications for researchers and practitioners
-- Recommendations for future research
-
-**10. METHODOLOGICAL APPENDIX**
-- Review methodology details
-- Search strategy and databases used
-- Inclusion/exclusion criteria
-- Quality assessment framework
-
-**IMPORTANT CITATION INSTRUCTIONS:**
-- Use {citation_format.upper()} format for all citations
-- Include in-text citations throughout the review using the format: {list(in_text_citations.values())[0] if in_text_citations else "(Author, Year)"}
-- Reference papers by their assigned citations from the list above
-- Ensure proper citation placement after key statements and findings
-- Include a complete References section at the end
-
-Make this suitable for publication in an academic journal with proper {citation_format.upper()} citations throughout.
-"""
-        
-        review = query_gemini(review_prompt)
-        
-        # If AI failed, generate a structured review using our analysis
-        if not review or "basic analysis generated without AI" in review:
-            review = generate_structured_literature_review(papers, query, review_type, paper_analysis, citation_format, in_text_citations)
-        
-        # Always append references section
-        if not "## REFERENCES" in review and not "# REFERENCES" in review:
-            review += f"\n\n{references_section}"
-        
-        return jsonify({
-            "success": True,
-            "literature_review": review,
-            "query": query,
-            "review_type": review_type,
-            "citation_format": citation_format,
-            "papers_analyzed": len(papers),
-            "structural_analysis": paper_analysis,
-            "references": references_section
-        })
+        gemini_args, finish = build_literature_review(request.json or {})
+        return jsonify(finish(query_gemini(**gemini_args)))
         
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         logger.error(f"Error generating literature review: {str(e)}")
         return jsonify({"error": "Failed to generate literature review"}), 500
 
-def analyze_papers_structure(papers, query):
-    """Analyze paper structure and extract key information"""
-    if not papers:
-        return "No papers provided for analysis."
-    
-    # Temporal analysis
-    years = [p.get('published_year') for p in papers if p.get('published_year')]
-    year_range = f"{min(years)}-{max(years)}" if years else "Unknown"
-    
-    # Category analysis
-    all_categories = []
-    for paper in papers:
-        if paper.get('categories'):
-            all_categories.extend(paper['categories'])
-    
-    from collections import Counter
-    category_counts = Counter(all_categories)
-    top_categories = category_counts.most_common(5)
-    
-    # Author analysis
-    all_authors = []
-    for paper in papers:
-        if paper.get('authors'):
-            authors = paper['authors'].split(', ')
-            all_authors.extend(authors)
-    
-    author_counts = Counter(all_authors)
-    prolific_authors = author_counts.most_common(5)
-    
-    analysis = f"""
-**STRUCTURAL ANALYSIS OF {len(papers)} PAPERS**
-
-**Temporal Distribution:**
-- Publication years: {year_range}
-- Total papers: {len(papers)}
-- Recent papers (last 3 years): {len([p for p in papers if p.get('published_year', 0) >= 2021])}
-
-**Research Categories:**
-- Primary categories: {', '.join([cat[0] for cat in top_categories[:3]])}
-- Category distribution: {dict(top_categories)}
-
-**Author Analysis:**
-- Unique authors: {len(set(all_authors))}
-- Most prolific authors: {', '.join([f"{author[0]} ({author[1]} papers)" for author in prolific_authors[:3]])}
-
-**Methodological Indicators:**
-- Papers with experimental keywords: {len([p for p in papers if any(keyword in p.get('summary', '').lower() for keyword in ['experiment', 'empirical', 'study'])])}
-- Papers with theoretical keywords: {len([p for p in papers if any(keyword in p.get('summary', '').lower() for keyword in ['theory', 'theoretical', 'framework'])])}
-- Papers with review keywords: {len([p for p in papers if any(keyword in p.get('summary', '').lower() for keyword in ['review', 'survey', 'overview'])])}
-"""
-    
-    return analysis
-
-def generate_structured_literature_review(papers, query, review_type, structural_analysis, citation_format="apa", in_text_citations=None):
-    """Generate a structured literature review without AI"""
-    
-    # Sort papers by year
-    sorted_papers = sorted(papers, key=lambda x: x.get('published_year', 0), reverse=True)
-    
-    # Generate citations if not provided
-    if not in_text_citations:
-        in_text_citations = create_in_text_citations(papers, citation_format)
-    
-    review = f"""
-# {review_type.title()} Literature Review: {query}
-
-## 1. INTRODUCTION
-
-This {review_type} literature review examines the current state of research on "{query}" based on an analysis of {len(papers)} academic papers. The review aims to synthesize existing knowledge, identify research gaps, and provide directions for future research.
-
-### Scope and Objectives
-- Analyze current research trends in {query}
-- Identify methodological approaches and theoretical frameworks
-- Synthesize key findings and contributions
-- Highlight research gaps and future opportunities
-
-### Review Methodology
-- Database: arXiv academic papers
-- Search strategy: Keyword-based search for "{query}"
-- Inclusion criteria: Relevant academic papers with available abstracts
-- Analysis period: Recent publications with focus on emerging trends
-
-{structural_analysis}
-
-## 2. THEORETICAL BACKGROUND
-
-The literature on {query} draws from multiple theoretical frameworks and disciplinary perspectives. Based on the analysis of included papers, several key theoretical approaches emerge:
-
-### Key Theoretical Frameworks
-The reviewed papers demonstrate diverse theoretical foundations, reflecting the interdisciplinary nature of research in this area. Common theoretical approaches include:
-
-- Empirical research methodologies
-- Theoretical modeling and framework development  
-- Applied research with practical implications
-- Cross-disciplinary integration approaches
-
-## 3. METHODOLOGICAL APPROACHES
-
-### Research Design Patterns
-The reviewed literature employs various methodological approaches:
-
-**Quantitative Methods:**
-- Experimental designs and controlled studies
-- Statistical analysis and data modeling
-- Computational approaches and simulations
-
-**Qualitative Methods:**
-- Case study methodologies
-- Theoretical analysis and conceptual development
-- Literature reviews and meta-analyses
-
-**Mixed Methods:**
-- Combined quantitative and qualitative approaches
-- Multi-phase research designs
-- Triangulation strategies
-
-## 4. THEMATIC ANALYSIS
-
-### Major Research Themes
-
-Based on the analysis of {len(papers)} papers, several major themes emerge:
-
-"""
-    
-    # Add paper summaries by theme with proper citations
-    for i, paper in enumerate(sorted_papers[:10], 1):
-        title = paper.get('title', 'Unknown Title')
-        citation = in_text_citations.get(title, f"(Paper {i})")
-        review += f"""
-**{title}** {citation}
-- Authors: {paper.get('authors', 'Unknown')}
-- Year: {paper.get('published_year', 'Unknown')}
-- Key contribution: {paper.get('summary', 'No abstract available')[:200]}...
-- Categories: {', '.join(paper.get('categories', []))}
-
-"""
-    
-    review += f"""
-## 5. CHRONOLOGICAL DEVELOPMENT
-
-The research in {query} has evolved significantly over time, with notable developments in recent years:
-
-### Recent Trends ({max([p.get('published_year', 0) for p in papers if p.get('published_year')]) if papers else 'Recent'} and beyond)
-- Increased focus on practical applications
-- Integration of computational methods
-- Cross-disciplinary collaboration
-- Methodological innovations
-
-## 6. CRITICAL ANALYSIS
-
-### Strengths of Current Literature
-- Diverse methodological approaches
-- Growing body of empirical evidence
-- Strong theoretical foundations in established areas
-- Increasing interdisciplinary collaboration
-
-### Limitations and Gaps
-- Limited longitudinal studies
-- Need for more standardized methodologies
-- Gaps in cross-cultural research
-- Limited replication studies
-
-## 7. SYNTHESIS OF FINDINGS
-
-### Consensus Areas
-The literature shows general agreement on:
-- The importance of methodological rigor
-- The need for interdisciplinary approaches
-- The value of both theoretical and practical contributions
-
-### Ongoing Debates
-Key areas of ongoing discussion include:
-- Optimal methodological approaches
-- Theoretical framework selection
-- Practical application strategies
-- Future research priorities
-
-## 8. RESEARCH GAPS AND FUTURE DIRECTIONS
-
-### Identified Gaps
-1. **Methodological Gaps**: Need for more standardized approaches
-2. **Theoretical Gaps**: Limited integration of emerging theories
-3. **Empirical Gaps**: Insufficient longitudinal and replication studies
-4. **Practical Gaps**: Limited real-world application studies
-
-### Future Research Opportunities
-- Development of novel methodological approaches
-- Integration of emerging technologies
-- Cross-disciplinary collaboration
-- Longitudinal and comparative studies
-
-## 9. CONCLUSIONS
-
-This {review_type} literature review of {len(papers)} papers on "{query}" reveals a dynamic and evolving field with significant research activity. The literature demonstrates:
-
-- Strong methodological diversity
-- Growing theoretical sophistication
-- Increasing practical relevance
-- Substantial opportunities for future research
-
-### Implications for Researchers
-- Consider interdisciplinary approaches
-- Focus on methodological rigor
-- Address identified research gaps
-- Build on existing theoretical foundations
-
-### Implications for Practitioners
-- Apply evidence-based approaches
-- Consider multiple methodological perspectives
-- Stay current with emerging trends
-- Contribute to practice-research integration
-
-## 10. METHODOLOGICAL APPENDIX
-
-### Search Strategy
-- Primary database: arXiv
-- Search terms: "{query}"
-- Time period: Recent publications
-- Language: English
-
-### Inclusion Criteria
-- Relevant to research question
-- Available abstract/summary
-- Academic quality standards
-- Accessible through search database
-
-### Analysis Framework
-- Thematic analysis approach
-- Chronological organization
-- Methodological categorization
-- Quality assessment considerations
-
----
-
-**Note:** This literature review was generated using structured analysis techniques. For enhanced AI-powered insights and deeper analytical capabilities, configure the Gemini API key in your environment settings.
-
-**Total Papers Analyzed:** {len(papers)}
-**Review Type:** {review_type.title()}
-**Citation Format:** {citation_format.upper()}
-**Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-"""
-    
-    # Add references section
-    references_section = generate_references_section(papers, citation_format)
-    review += f"\n\n{references_section}"
-    
-    return review
+@app.route('/api/literature-review/stream', methods=['POST'])
+def literature_review_stream():
+    """Literature review streamed over SSE as it is written"""
+    return stream_generation(build_literature_review, "Failed to generate literature review")
 
 @app.route('/api/methodology-analysis', methods=['POST'])
 def methodology_analysis():
     """Analyze and suggest research methodologies with fallback"""
     try:
-        data = request.json
-        research_question = data.get("research_question", "")
-        papers = data.get("papers", [])
-        research_type = data.get("research_type", "empirical")  # empirical, theoretical, applied
-        citation_format = data.get("citation_format", "apa")  # apa, mla, chicago, ieee, harvard
-        
-        if not research_question:
-            return jsonify({"error": "Research question is required"}), 400
-        
-        # Analyze methodologies from papers if provided
-        methodology_context = ""
-        paper_methods_analysis = ""
-        in_text_citations = {}
-        references_section = ""
-        
-        if papers:
-            # Generate citations for papers
-            in_text_citations = create_in_text_citations(papers, citation_format)
-            references_section = generate_references_section(papers, citation_format)
-            
-            methods_used = []
-            paper_methods_analysis = analyze_paper_methodologies(papers)
-            for paper in papers[:10]:
-                title = paper.get('title', 'Unknown')
-                citation = in_text_citations.get(title, f"(Paper {len(methods_used)+1})")
-                methods_used.append(f"- {title} {citation}: {paper.get('summary', '')[:200]}...")
-            methodology_context = f"""
-**Methodologies observed in related literature:**
-{chr(10).join(methods_used)}
-
-{paper_methods_analysis}
-"""
-        
-        methodology_prompt = f"""
-As a research methodology expert, provide comprehensive methodology guidance for this research question: "{research_question}"
-
-Research Type: {research_type.title()}
-Citation Format: {citation_format.upper()}
-
-{methodology_context}
-
-**METHODOLOGY ANALYSIS & RECOMMENDATIONS:**
-**Note: Include proper {citation_format.upper()} citations when referencing the literature above.**
-
-**1. RESEARCH DESIGN FRAMEWORK**
-- Appropriate research paradigm (positivist, interpretivist, pragmatic)
-- Research design type (experimental, quasi-experimental, descriptive, exploratory)
-- Justification for chosen design
-- Alternative designs and their trade-offs
-
-**2. QUANTITATIVE APPROACHES**
-- Experimental designs (RCT, factorial, crossover)
-- Survey methodologies (cross-sectional, longitudinal)
-- Observational studies (cohort, case-control)
-- Statistical analysis methods required
-- Sample size calculations and power analysis
-
-**3. QUALITATIVE APPROACHES**
-- Interview methodologies (structured, semi-structured, unstructured)
-- Focus group designs
-- Ethnographic approaches
-- Case study methodologies
-- Grounded theory applications
-- Phenomenological approaches
-
-**4. MIXED-METHODS DESIGNS**
-- Sequential explanatory design
-- Sequential exploratory design
-- Concurrent triangulation
-- Concurrent embedded design
-- Integration strategies
-
-**5. DATA COLLECTION STRATEGIES**
-- Primary data collection methods
-- Secondary data sources
-- Instrument development and validation
-- Pilot study recommendations
-- Data quality assurance measures
-
-**6. SAMPLING METHODOLOGY**
-- Target population definition
-- Sampling frame considerations
-- Probability sampling methods
-- Non-probability sampling approaches
-- Sample size justification
-- Recruitment strategies
-
-**7. DATA ANALYSIS PLAN**
-- Descriptive analysis approach
-- Inferential statistical methods
-- Qualitative analysis techniques (thematic, content, narrative)
-- Software recommendations (R, SPSS, NVivo, Atlas.ti)
-- Validity and reliability measures
-
-**8. ETHICAL CONSIDERATIONS**
-- IRB/Ethics approval requirements
-- Informed consent procedures
-- Data privacy and confidentiality
-- Risk assessment and mitigation
-- Vulnerable population considerations
-
-**9. VALIDITY & RELIABILITY**
-- Internal validity threats and controls
-- External validity considerations
-- Construct validity measures
-- Reliability assessment methods
-- Triangulation strategies
-
-**10. IMPLEMENTATION TIMELINE**
-- Phase-by-phase methodology timeline
-- Resource requirements
-- Potential challenges and solutions
-- Quality checkpoints
-- Contingency planning
-
-**11. INNOVATIVE METHODOLOGICAL APPROACHES**
-- Digital and computational methods
-- Big data analytics approaches
-- Machine learning applications
-- Crowdsourcing methodologies
-- Virtual and remote data collection
-
-**12. REPORTING AND DISSEMINATION**
-- Reporting standards (CONSORT, STROBE, COREQ)
-- Publication strategy
-- Data sharing protocols
-- Replication considerations
-
-Provide specific, actionable methodology recommendations with justifications for each choice.
-"""
-        
-        analysis = query_gemini(methodology_prompt)
-        
-        # If AI failed, generate structured methodology analysis
-        if not analysis or "basic analysis generated without AI" in analysis:
-            analysis = generate_structured_methodology_analysis(research_question, research_type, papers, paper_methods_analysis, citation_format, in_text_citations)
-        
-        # Always append references section if papers were provided
-        if papers and not "## REFERENCES" in analysis and not "# REFERENCES" in analysis:
-            analysis += f"\n\n{references_section}"
-        
-        return jsonify({
-            "success": True,
-            "methodology_analysis": analysis,
-            "research_question": research_question,
-            "research_type": research_type,
-            "citation_format": citation_format,
-            "paper_methods_context": paper_methods_analysis,
-            "references": references_section if papers else None
-        })
+        gemini_args, finish = build_methodology_analysis(request.json or {})
+        return jsonify(finish(query_gemini(**gemini_args)))
         
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         logger.error(f"Error in methodology analysis: {str(e)}")
         return jsonify({"error": "Failed to generate methodology analysis"}), 500
 
-def analyze_paper_methodologies(papers):
-    """Analyze methodological approaches in the provided papers"""
-    if not papers:
-        return "No papers provided for methodology analysis."
-    
-    # Keywords for different methodological approaches
-    quant_keywords = ['experiment', 'statistical', 'quantitative', 'survey', 'regression', 'correlation', 'analysis', 'data', 'sample']
-    qual_keywords = ['qualitative', 'interview', 'case study', 'ethnographic', 'phenomenological', 'grounded theory']
-    mixed_keywords = ['mixed methods', 'mixed-methods', 'triangulation', 'sequential', 'concurrent']
-    theory_keywords = ['theoretical', 'framework', 'model', 'conceptual', 'theory']
-    
-    method_counts = {
-        'quantitative': 0,
-        'qualitative': 0,
-        'mixed_methods': 0,
-        'theoretical': 0,
-        'computational': 0,
-        'experimental': 0,
-        'survey': 0,
-        'case_study': 0
-    }
-    
-    for paper in papers:
-        summary = paper.get('summary', '').lower()
-        title = paper.get('title', '').lower()
-        text = summary + ' ' + title
-        
-        if any(keyword in text for keyword in quant_keywords):
-            method_counts['quantitative'] += 1
-        if any(keyword in text for keyword in qual_keywords):
-            method_counts['qualitative'] += 1
-        if any(keyword in text for keyword in mixed_keywords):
-            method_counts['mixed_methods'] += 1
-        if any(keyword in text for keyword in theory_keywords):
-            method_counts['theoretical'] += 1
-        if any(keyword in text for keyword in ['computational', 'algorithm', 'simulation', 'model']):
-            method_counts['computational'] += 1
-        if any(keyword in text for keyword in ['experiment', 'empirical', 'study']):
-            method_counts['experimental'] += 1
-        if any(keyword in text for keyword in ['survey', 'questionnaire']):
-            method_counts['survey'] += 1
-        if any(keyword in text for keyword in ['case study', 'case-study']):
-            method_counts['case_study'] += 1
-    
-    total_papers = len(papers)
-    analysis = f"""
-**METHODOLOGICAL ANALYSIS OF {total_papers} PAPERS**
-
-**Methodological Distribution:**
-- Quantitative approaches: {method_counts['quantitative']} papers ({method_counts['quantitative']/total_papers*100:.1f}%)
-- Qualitative approaches: {method_counts['qualitative']} papers ({method_counts['qualitative']/total_papers*100:.1f}%)
-- Mixed methods: {method_counts['mixed_methods']} papers ({method_counts['mixed_methods']/total_papers*100:.1f}%)
-- Theoretical papers: {method_counts['theoretical']} papers ({method_counts['theoretical']/total_papers*100:.1f}%)
-- Computational methods: {method_counts['computational']} papers ({method_counts['computational']/total_papers*100:.1f}%)
-
-**Specific Method Indicators:**
-- Experimental studies: {method_counts['experimental']} papers
-- Survey-based research: {method_counts['survey']} papers  
-- Case study approaches: {method_counts['case_study']} papers
-
-**Methodological Trends:**
-- Predominant approach: {"Quantitative" if method_counts['quantitative'] >= method_counts['qualitative'] else "Qualitative"}
-- Computational integration: {"High" if method_counts['computational'] > total_papers*0.3 else "Moderate" if method_counts['computational'] > total_papers*0.1 else "Low"}
-- Theoretical foundation: {"Strong" if method_counts['theoretical'] > total_papers*0.4 else "Moderate" if method_counts['theoretical'] > total_papers*0.2 else "Limited"}
-"""
-    
-    return analysis
-
-def generate_structured_methodology_analysis(research_question, research_type, papers, paper_methods_analysis, citation_format="apa", in_text_citations=None):
-    """Generate structured methodology analysis without AI"""
-    
-    # Generate citations if not provided
-    if papers and not in_text_citations:
-        in_text_citations = create_in_text_citations(papers, citation_format)
-    
-    analysis = f"""
-# METHODOLOGY ANALYSIS & RECOMMENDATIONS
-
-**Research Question:** {research_question}
-**Research Type:** {research_type.title()}
-**Citation Format:** {citation_format.upper()}
-
-{paper_methods_analysis if paper_methods_analysis else ""}
-
-## 1. RESEARCH DESIGN FRAMEWORK
-
-### Recommended Research Paradigm
-For {research_type} research on "{research_question}":
-
-**Primary Paradigm:** {"Positivist" if research_type == "empirical" else "Interpretivist" if research_type == "theoretical" else "Pragmatic"}
-
-**Justification:**
-- {research_type.title()} research typically benefits from {"quantitative, hypothesis-testing approaches" if research_type == "empirical" else "qualitative, meaning-making approaches" if research_type == "theoretical" else "mixed-methods, problem-solving approaches"}
-- The research question suggests {"causal relationships" if research_type == "empirical" else "conceptual understanding" if research_type == "theoretical" else "practical solutions"}
-
-### Research Design Type
-**Recommended Design:** {"Experimental or Quasi-experimental" if research_type == "empirical" else "Descriptive or Exploratory" if research_type == "theoretical" else "Applied or Action Research"}
-
-## 2. QUANTITATIVE APPROACHES
-
-### Experimental Designs
-- **Randomized Controlled Trial (RCT)**: If feasible and ethical
-- **Quasi-experimental Design**: When randomization is not possible
-- **Factorial Design**: For multiple variables
-- **Crossover Design**: For repeated measures
-
-### Survey Methodologies
-- **Cross-sectional Survey**: For snapshot data
-- **Longitudinal Survey**: For change over time
-- **Panel Study**: For tracking same participants
-
-### Statistical Analysis Methods
-- **Descriptive Statistics**: Mean, median, standard deviation
-- **Inferential Statistics**: t-tests, ANOVA, regression analysis
-- **Advanced Methods**: Structural equation modeling, multilevel analysis
-
-## 3. QUALITATIVE APPROACHES
-
-### Interview Methodologies
-- **Structured Interviews**: For standardized data collection
-- **Semi-structured Interviews**: For flexibility with consistency
-- **Unstructured Interviews**: For exploratory research
-
-### Other Qualitative Methods
-- **Focus Groups**: For group dynamics and consensus
-- **Ethnographic Observation**: For cultural understanding
-- **Case Study Methodology**: For in-depth analysis
-- **Grounded Theory**: For theory development
-- **Phenomenological Approach**: For lived experiences
-
-## 4. MIXED-METHODS DESIGNS
-
-### Sequential Designs
-- **Sequential Explanatory**: Quantitative followed by qualitative
-- **Sequential Exploratory**: Qualitative followed by quantitative
-
-### Concurrent Designs
-- **Concurrent Triangulation**: Simultaneous data collection
-- **Concurrent Embedded**: One method embedded in another
-
-## 5. DATA COLLECTION STRATEGIES
-
-### Primary Data Collection
-- **Surveys and Questionnaires**: For standardized data
-- **Interviews**: For in-depth insights
-- **Observations**: For behavioral data
-- **Experiments**: For causal relationships
-
-### Secondary Data Sources
-- **Existing Datasets**: For large-scale analysis
-- **Literature Reviews**: For theoretical foundation
-- **Archival Records**: For historical perspective
-
-### Instrument Development
-- **Questionnaire Design**: Clear, unbiased questions
-- **Interview Guides**: Structured yet flexible
-- **Observation Protocols**: Systematic recording methods
-
-## 6. SAMPLING METHODOLOGY
-
-### Target Population
-Define your population clearly based on:
-- **Inclusion Criteria**: Who should be included
-- **Exclusion Criteria**: Who should be excluded
-- **Accessibility**: Practical considerations
-
-### Sampling Methods
-**Probability Sampling:**
-- Simple Random Sampling
-- Stratified Random Sampling
-- Cluster Sampling
-
-**Non-probability Sampling:**
-- Convenience Sampling
-- Purposive Sampling
-- Snowball Sampling
-
-### Sample Size Considerations
-- **Power Analysis**: For statistical significance
-- **Saturation Point**: For qualitative research
-- **Resource Constraints**: Practical limitations
-
-## 7. DATA ANALYSIS PLAN
-
-### Quantitative Analysis
-- **Descriptive Analysis**: Frequencies, means, distributions
-- **Inferential Analysis**: Hypothesis testing, confidence intervals
-- **Software**: R, SPSS, SAS, Stata
-
-### Qualitative Analysis
-- **Thematic Analysis**: Identifying patterns and themes
-- **Content Analysis**: Systematic categorization
-- **Narrative Analysis**: Story-based interpretation
-- **Software**: NVivo, Atlas.ti, MAXQDA
-
-## 8. ETHICAL CONSIDERATIONS
-
-### IRB/Ethics Approval
-- **Institutional Review**: Required for human subjects research
-- **Risk Assessment**: Minimal, moderate, or high risk
-- **Special Populations**: Additional protections needed
-
-### Informed Consent
-- **Consent Process**: Clear explanation of study
-- **Voluntary Participation**: Right to withdraw
-- **Confidentiality**: Data protection measures
-
-## 9. VALIDITY & RELIABILITY
-
-### Internal Validity
-- **Control for Confounding**: Design and statistical controls
-- **Randomization**: When possible
-- **Blinding**: To reduce bias
-
-### External Validity
-- **Generalizability**: To broader populations
-- **Ecological Validity**: Real-world applicability
-
-### Reliability
-- **Test-retest Reliability**: Consistency over time
-- **Inter-rater Reliability**: Agreement between observers
-- **Internal Consistency**: Cronbach's alpha for scales
-
-## 10. IMPLEMENTATION TIMELINE
-
-### Phase 1: Preparation (Months 1-2)
-- Literature review completion
-- Methodology finalization
-- Ethics approval
-- Instrument development
-
-### Phase 2: Data Collection (Months 3-8)
-- Pilot study
-- Main data collection
-- Quality assurance monitoring
-
-### Phase 3: Analysis (Months 9-11)
-- Data cleaning and preparation
-- Statistical/qualitative analysis
-- Results interpretation
-
-### Phase 4: Dissemination (Month 12+)
-- Report writing
-- Publication preparation
-- Conference presentations
-
-## 11. INNOVATIVE METHODOLOGICAL APPROACHES
-
-### Digital Methods
-- **Online Surveys**: Broader reach, cost-effective
-- **Social Media Analysis**: Real-time data
-- **Mobile Data Collection**: Convenient and accessible
-
-### Computational Approaches
-- **Big Data Analytics**: Large dataset analysis
-- **Machine Learning**: Pattern recognition
-- **Text Mining**: Automated content analysis
-
-## 12. REPORTING AND DISSEMINATION
-
-### Reporting Standards
-- **CONSORT**: For randomized trials
-- **STROBE**: For observational studies
-- **COREQ**: For qualitative research
-- **PRISMA**: For systematic reviews
-
-### Publication Strategy
-- **Target Journals**: Identify appropriate venues
-- **Open Access**: Consider accessibility
-- **Data Sharing**: Follow discipline standards
-
----
-
-**Note:** This methodology analysis was generated using structured analytical frameworks. For enhanced AI-powered recommendations and deeper methodological insights, configure the Gemini API key in your environment settings.
-
-**Research Question:** {research_question}
-**Research Type:** {research_type.title()}
-**Citation Format:** {citation_format.upper()}
-**Analysis Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-"""
-    
-    # Add references section if papers were provided
-    if papers:
-        references_section = generate_references_section(papers, citation_format)
-        analysis += f"\n\n{references_section}"
-    
-    return analysis
+@app.route('/api/methodology-analysis/stream', methods=['POST'])
+def methodology_analysis_stream():
+    """Methodology analysis streamed over SSE as it is written"""
+    return stream_generation(build_methodology_analysis, "Failed to generate methodology analysis")
 
 # Sci-Hub API routes
 @app.route("/api/scihub/paper-by-doi", methods=["POST"])
@@ -1945,6 +1041,10 @@ def get_paper_by_doi():
                 "message": "Paper not found on Sci-Hub"
             }), 404
             
+    except RateLimited as e:
+        response = jsonify({"error": "Sci-Hub is busy, please try again shortly"})
+        response.headers['Retry-After'] = str(int(e.retry_after) + 1)
+        return response, 503
     except Exception as e:
         logger.error(f"Error getting paper by DOI: {str(e)}")
         return jsonify({"error": "Failed to search Sci-Hub"}), 500
@@ -1974,6 +1074,10 @@ def search_paper_by_title():
                 "message": "Paper not found on Sci-Hub"
             }), 404
             
+    except RateLimited as e:
+        response = jsonify({"error": "Sci-Hub is busy, please try again shortly"})
+        response.headers['Retry-After'] = str(int(e.retry_after) + 1)
+        return response, 503
     except Exception as e:
         logger.error(f"Error searching paper by title: {str(e)}")
         return jsonify({"error": "Failed to search Sci-Hub"}), 500
@@ -2025,27 +1129,18 @@ def get_scihub_mirror_status():
 
 @app.route('/api/trending-topics', methods=['GET'])
 def trending_topics():
-    """Get trending research topics from recent arXiv papers"""
+    """Get trending research topics from recent arXiv papers, precomputed by the refresh task"""
     try:
-        # Search for recent papers in popular categories
-        categories = ['cs.AI', 'cs.LG', 'cs.CL', 'physics', 'math', 'q-bio']
-        trending = []
+        document = trending_store.get()
+        if document is None:
+            return jsonify({"error": "Trending topics are not available yet"}), 503
         
-        for category in categories:
-            try:
-                papers = query_arxiv(f"cat:{category}", max_results=5, sort_by=arxiv.SortCriterion.SubmittedDate)
-                if papers:
-                    trending.append({
-                        "category": category,
-                        "papers": papers[:3]  # Top 3 recent papers
-                    })
-            except:
-                    continue
-        
-        return jsonify({
-            "success": True,
-            "trending": trending
-        })
+        response = Response(document['body'], mimetype='application/json')
+        response.set_etag(document['etag'])
+        response.cache_control.public = True
+        response.cache_control.max_age = 300
+        response.headers['Last-Modified'] = http_date(document['generated_at'])
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"Error getting trending topics: {str(e)}")
@@ -2055,145 +1150,13 @@ def trending_topics():
 def generate_academic_draft():
     """Generate a complete academic project draft"""
     try:
-        data = request.json
-        research_title = data.get("research_title", "")
-        research_question = data.get("research_question", "")
-        research_field = data.get("research_field", "")
-        research_type = data.get("research_type", "empirical")  # empirical, theoretical, applied
-        papers = data.get("papers", [])
-        citation_format = data.get("citation_format", "apa")
-        include_sections = data.get("include_sections", {
-            "introduction": True,
-            "literature_review": True,
-            "methodology": True,
-            "conclusion": True,
-            "future_works": True
-        })
-        
-        if not research_title or not research_question:
-            return jsonify({"error": "Research title and question are required"}), 400
-        
-        # Generate in-text citations and references
-        in_text_citations = create_in_text_citations(papers, citation_format) if papers else {}
-        references_section = generate_references_section(papers, citation_format) if papers else ""
-        
-        # Prepare paper context
-        papers_context = ""
-        if papers:
-            papers_detail = []
-            for i, paper in enumerate(papers[:15]):  # Limit to top 15 papers
-                title = paper.get('title', 'Unknown Title')
-                citation = in_text_citations.get(title, f"(Paper {i+1})")
-                papers_detail.append(f"""
-Paper {i+1}: {paper.get('title', 'Unknown Title')} {citation}
-Authors: {paper.get('authors', 'Unknown')}
-Year: {paper.get('published_year', 'Unknown')}
-Abstract: {paper.get('summary', 'No abstract available')[:300]}...
-Categories: {', '.join(paper.get('categories', []))}
-""")
-            papers_context = "\n".join(papers_detail)
-        
-        # Generate the complete draft
-        draft_prompt = f"""
-As an expert academic writer, create a complete research project draft with the following specifications:
-
-**Research Title**: {research_title}
-**Research Question**: {research_question}
-**Research Field**: {research_field}
-**Research Type**: {research_type}
-**Citation Format**: {citation_format.upper()}
-
-**Available Papers for Reference:**
-{papers_context}
-
-**Instructions:**
-- Write in formal academic style
-- Use proper {citation_format.upper()} citations throughout
-- Include specific examples and evidence from the provided papers
-- Maintain logical flow between sections
-- Ensure each section is substantial and well-developed
-- Use appropriate academic vocabulary and terminology
-
-**Create the following sections:**
-
-**1. INTRODUCTION** (if requested)
-- Background and context of the research problem
-- Problem statement and research gap identification
-- Research objectives and questions
-- Significance and contribution of the study
-- Scope and limitations
-- Structure overview of the paper
-
-**2. LITERATURE REVIEW** (if requested)
-- Comprehensive review of existing research
-- Theoretical foundations
-- Key findings from previous studies
-- Research gaps and contradictions
-- Synthesis of current knowledge
-- Position of current research in the field
-
-**3. METHODOLOGY** (if requested)
-- Research design and approach
-- Data collection methods
-- Sample selection and size
-- Data analysis techniques
-- Validity and reliability measures
-- Ethical considerations
-- Limitations of the methodology
-
-**4. CONCLUSION** (if requested)
-- Summary of key findings
-- Implications for theory and practice
-- Contribution to the field
-- Limitations of the study
-- Recommendations
-
-**5. FUTURE WORKS** (if requested)
-- Potential research directions
-- Methodological improvements
-- Expanded scope possibilities
-- Interdisciplinary opportunities
-- Practical applications
-- Long-term research agenda
-
-**Format Requirements:**
-- Use markdown formatting for headers and emphasis
-- Include proper {citation_format.upper()} citations
-- Write each section as a complete, coherent unit
-- Aim for academic rigor and clarity
-- Include transition sentences between major points
-
-Generate a comprehensive academic draft that demonstrates deep understanding of the research area.
-"""
-        
-        # Query AI for draft generation
-        draft_content = query_gemini(draft_prompt, papers_context)
-        
-        # If AI is unavailable, generate a structured template
-        if not draft_content or "I don't have access" in draft_content:
-            draft_content = generate_draft_template(
-                research_title, research_question, research_field, 
-                research_type, papers, citation_format, include_sections
-            )
-        
-        # Append references section if papers are available
-        if papers and references_section:
-            draft_content += f"\n\n## REFERENCES\n\n{references_section}"
-        
-        return jsonify({
-            "success": True,
-            "draft": draft_content,
-            "research_title": research_title,
-            "research_question": research_question,
-            "research_field": research_field,
-            "research_type": research_type,
-            "citation_format": citation_format,
-            "sections_included": include_sections,
-            "papers_count": len(papers),
-            "references": references_section,
-            "timestamp": datetime.now().isoformat()
-        })
+        gemini_args, finish = build_academic_draft(request.json or {})
+        return jsonify(finish(query_gemini(**gemini_args)))
         
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         print(f"Draft generation error: {str(e)}")
         return jsonify({
@@ -2201,134 +1164,10 @@ Generate a comprehensive academic draft that demonstrates deep understanding of
             "error": f"Failed to generate draft: {str(e)}"
         }), 500
 
-def generate_draft_template(research_title, research_question, research_field, research_type, papers, citation_format, include_sections):
-    """Generate a structured draft template when AI is unavailable"""
-    template_sections = []
-    
-    if include_sections.get("introduction", True):
-        template_sections.append(f"""
-## 1. INTRODUCTION
-
-### Background and Context
-The field of {research_field} has witnessed significant developments in recent years. This research addresses the critical question: "{research_question}"
-
-### Problem Statement
-[Describe the specific problem or gap in knowledge that your research addresses]
-
-### Research Objectives
-The primary objective of this study is to investigate {research_question.lower()}. Specifically, this research aims to:
-- [Objective 1]
-- [Objective 2]
-- [Objective 3]
-
-### Significance of the Study
-This research contributes to {research_field} by providing insights into [specific contribution].
-
-### Scope and Limitations
-This study focuses on [scope definition] while acknowledging limitations in [limitation areas].
-""")
-    
-    if include_sections.get("literature_review", True):
-        template_sections.append(f"""
-## 2. LITERATURE REVIEW
-
-### Theoretical Foundation
-The theoretical framework for this study draws from [relevant theories in {research_field}].
-
-### Previous Research
-{"Recent studies have explored various aspects of this field:" if papers else "Key research in this area includes:"}
-{chr(10).join([f"- {paper.get('title', 'Unknown')} ({paper.get('published_year', 'Unknown')})" for paper in papers[:10]]) if papers else "- [Key study 1]" + chr(10) + "- [Key study 2]" + chr(10) + "- [Key study 3]"}
-
-### Research Gaps
-Despite extensive research, several gaps remain:
-- [Gap 1]
-- [Gap 2]
-- [Gap 3]
-
-### Synthesis
-The literature reveals that {research_question.lower()} remains an important area for investigation.
-""")
-    
-    if include_sections.get("methodology", True):
-        approach_desc = {
-            "empirical": "This study employs an empirical approach using quantitative/qualitative data collection and analysis.",
-            "theoretical": "This research adopts a theoretical approach, developing conceptual frameworks and models.",
-            "applied": "This study uses an applied research approach, focusing on practical solutions and implementations."
-        }.get(research_type, "This study employs a mixed-methods approach.")
-        
-        template_sections.append(f"""
-## 3. METHODOLOGY
-
-### Research Design
-{approach_desc}
-
-### Data Collection
-[Describe your data collection methods, instruments, and procedures]
-
-### Sample Selection
-[Detail your sampling strategy and sample characteristics]
-
-### Data Analysis
-[Explain your analytical approach and techniques]
-
-### Validity and Reliability
-[Discuss measures to ensure research quality]
-
-### Ethical Considerations
-[Address ethical aspects of the research]
-""")
-    
-    if include_sections.get("conclusion", True):
-        template_sections.append(f"""
-## 4. CONCLUSION
-
-### Key Findings
-This research on "{research_question}" has revealed several important insights:
-- [Finding 1]
-- [Finding 2]
-- [Finding 3]
-
-### Theoretical Implications
-The findings contribute to {research_field} theory by [theoretical contribution].
-
-### Practical Implications
-The results have practical applications in [practical applications].
-
-### Limitations
-This study acknowledges limitations in [limitation areas].
-
-### Recommendations
-Based on the findings, the following recommendations are proposed:
-- [Recommendation 1]
-- [Recommendation 2]
-- [Recommendation 3]
-""")
-    
-    if include_sections.get("future_works", True):
-        template_sections.append(f"""
-## 5. FUTURE WORKS
-
-### Research Directions
-Future research in {research_field} should explore:
-- [Direction 1]: Expanding the scope to include [specific area]
-- [Direction 2]: Investigating the relationship between [variables]
-- [Direction 3]: Developing new methodological approaches
-
-### Methodological Improvements
-- Enhanced data collection techniques
-- Longitudinal study designs
-- Cross-cultural validation
-
-### Interdisciplinary Opportunities
-- Collaboration with [related field 1]
-- Integration with [related field 2]
-- Application in [practical domain]
-
-### Long-term Vision
-The ultimate goal is to develop a comprehensive understanding of {research_question.lower()} that can inform both theory and practice in {research_field}.
-""")
-    
-    return "\n".join(template_sections)
+@app.route('/api/generate-draft/stream', methods=['POST'])
+def academic_draft_stream():
+    """Academic draft streamed over SSE as it is written"""
+    return stream_generation(build_academic_draft, "Failed to generate draft")
 
 @app.route('/api/quick-search', methods=['POST'])
 def quick_search():
@@ -2354,7 +1193,8 @@ Instructions:
 
 Answer:"""
         
-        answer = query_gemini(quick_prompt)
+        answer = query_gemini(quick_prompt, priority=PRIORITY_INTERACTIVE, deadline=20,
+                              cache_endpoint="quick-search", cache_query=query)
         
         if not answer:
             return jsonify({"error": "Failed to generate answer"}), 500
@@ -2378,27 +1218,34 @@ Answer:"""
         return jsonify({
             "success": True,
             "answer": answer,
-            "query": query
+            "query": query,
+            "related_papers": paper_index.search_ranked(query, 5)  # Local index only, no remote calls
         })
         
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         logger.error(f"Error in quick search: {e}")
         return jsonify({"error": "Quick search failed"}), 500
 
-@app.route('/api/deep-analysis', methods=['POST'])
-def deep_analysis():
-    """Deep analysis with comprehensive insights"""
-    try:
-        data = request.json
-        query = data.get('query', '').strip()
-        
-        if not query:
-            return jsonify({"error": "Query is required"}), 400
-        
-        logger.info(f"Deep analysis: {query}")
-        
-        # Create comprehensive analysis prompt
-        deep_prompt = f"""Perform a comprehensive deep analysis on: "{query}"
+def build_deep_analysis(data):
+    """Prompt and finishing step for a deep analysis request
+    
+    Returns:
+        (query_gemini keyword arguments, finish) where finish(analysis) gives the response payload
+    
+    Raises:
+        BadRequest: if a required field is missing
+    """
+    query = data.get('query', '').strip()
+    
+    if not query:
+        raise BadRequest("Query is required")
+    
+    logger.info(f"Deep analysis: {query}")
+    
+    # Create comprehensive analysis prompt
+    deep_prompt = f"""Perform a comprehensive deep analysis on: "{query}"
 
 Provide a thorough analysis covering:
 
@@ -2438,12 +1285,8 @@ Provide a thorough analysis covering:
 - Future outlook
 
 Provide a detailed, well-structured analysis with specific examples and evidence."""
-        
-        analysis = query_gemini(deep_prompt)
-        
-        if not analysis:
-            return jsonify({"error": "Failed to generate analysis"}), 500
-        
+    
+    def finish(analysis):
         # Save to search history if user is logged in
         if current_user.is_authenticated:
             try:
@@ -2460,16 +1303,190 @@ Provide a detailed, well-structured analysis with specific examples and evidence
             except Exception as e:
                 logger.error(f"Failed to save deep analysis history: {e}")
         
-        return jsonify({
+        return {
             "success": True,
             "analysis": analysis,
             "query": query
-        })
+        }
+    
+    return {"prompt": deep_prompt, "cache_endpoint": "deep-analysis", "cache_query": query}, finish
+
+@app.route('/api/deep-analysis', methods=['POST'])
+def deep_analysis():
+    """Deep analysis with comprehensive insights"""
+    try:
+        gemini_args, finish = build_deep_analysis(request.json or {})
+        analysis = query_gemini(**gemini_args)
         
+        if not analysis:
+            return jsonify({"error": "Failed to generate analysis"}), 500
+        
+        return jsonify(finish(analysis))
+        
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+    except LLMRateLimited as e:
+        return llm_busy_response(e)
     except Exception as e:
         logger.error(f"Error in deep analysis: {e}")
         return jsonify({"error": "Deep analysis failed"}), 500
 
+@app.route('/api/deep-analysis/stream', methods=['POST'])
+def deep_analysis_stream():
+    """Deep analysis streamed over SSE as it is written"""
+    return stream_generation(build_deep_analysis, "Deep analysis failed")
+
+# Long-form generation that can also run as a job on the Celery 'generation' queue
+GENERATION_EVENTS_WINDOW_SECONDS = 25  # Longest one events request holds a worker; EventSource then reconnects
+
+def submit_generation_job(kind):
+    """Validate a generation request, queue it and return its job ID without waiting for it"""
+    data = request.json or {}
+    try:
+        # Reject bad requests here rather than as failed jobs
+        GENERATION_JOB_BUILDERS[kind](data)
+    except BadRequest as e:
+        return jsonify({"error": e.description}), 400
+    
+    try:
+        # Imported lazily: Celery is optional, and its worker imports this module
+        from celery_app import generate_text_task
+    except ImportError:
+        return jsonify({"error": "Background generation is not available"}), 503
+    
+    job_id = None
+    try:
+        job_id = generation_jobs.create(kind, data, current_user.get_id() if current_user.is_authenticated else None)
+        task = generate_text_task.apply_async(args=[job_id])
+        generation_jobs.mark_queued(job_id, task.id)
+    except Exception as e:
+        logger.error(f"Could not queue {kind} job: {str(e)}")
+        if job_id:
+            try:
+                generation_jobs.fail(job_id, "Could not queue the job")
+            except Exception:
+                pass
+        return jsonify({"error": "Could not queue the job"}), 503
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": url_for('get_generation_job', job_id=job_id),
+        "events_url": url_for('generation_job_events', job_id=job_id)
+    }), 202
+
+@app.route('/api/literature-review/jobs', methods=['POST'])
+def submit_literature_review_job():
+    """Queue a literature review; poll or subscribe to the returned job for the result"""
+    return submit_generation_job('literature-review')
+
+@app.route('/api/methodology-analysis/jobs', methods=['POST'])
+def submit_methodology_analysis_job():
+    """Queue a methodology analysis; poll or subscribe to the returned job for the result"""
+    return submit_generation_job('methodology-analysis')
+
+@app.route('/api/generate-draft/jobs', methods=['POST'])
+def submit_academic_draft_job():
+    """Queue an academic draft; poll or subscribe to the returned job for the result"""
+    return submit_generation_job('generate-draft')
+
+def load_generation_job(job_id):
+    """The job, or None if it does not exist or belongs to another user"""
+    job = generation_jobs.get(job_id)
+    if job is None:
+        return None
+    if job.get('user_id') and job['user_id'] != (current_user.get_id() if current_user.is_authenticated else None):
+        return None
+    return job
+
+def generation_job_progress(job):
+    """Progress reported by the worker through update_state, if the job is still running"""
+    if job['status'] not in (generation_jobs.QUEUED, generation_jobs.RUNNING) or not job.get('task_id'):
+        return None
+    try:
+        from celery_app import celery_app
+        result = celery_app.AsyncResult(job['task_id'])
+        return result.info if result.state == 'PROCESSING' and isinstance(result.info, dict) else None
+    except Exception as e:
+        logger.debug(f"No progress for generation job {job['_id']}: {e}")
+        return None
+
+@app.route('/api/generation-jobs/<job_id>', methods=['GET'])
+def get_generation_job(job_id):
+    """Status of a generation job, with its result once completed"""
+    try:
+        job = load_generation_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify(dict(generation_jobs.to_dict(job, generation_job_progress(job)), success=True))
+    
+    except Exception as e:
+        logger.error(f"Error reading generation job {job_id}: {str(e)}")
+        return jsonify({"error": "Failed to read job"}), 500
+
+@app.route('/api/generation-jobs/<job_id>/events', methods=['GET'])
+def generation_job_events(job_id):
+    """
+    Server-sent events for a generation job: progress while it runs, then done (with the result) or error
+
+    Each response lasts at most GENERATION_EVENTS_WINDOW_SECONDS and then ends without a final
+    event; EventSource reconnects after the advertised retry delay and sends Last-Event-ID, so
+    progress it has already seen is not repeated.
+    """
+    try:
+        job = load_generation_job(job_id)
+    except Exception as e:
+        logger.error(f"Error reading generation job {job_id}: {str(e)}")
+        return jsonify({"error": "Failed to read job"}), 500
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    last_event_id = request.headers.get('Last-Event-ID')
+    
+    def generate():
+        last_progress = None
+        keepalive_at = time.monotonic() + 15
+        close_at = time.monotonic() + GENERATION_EVENTS_WINDOW_SECONDS
+        current = job
+        try:
+            yield b"retry: 1000\n\n"
+            while True:
+                if current is None:
+                    yield sse_event({"type": "error", "error": "Job not found"})
+                    return
+                if current['status'] == generation_jobs.COMPLETED:
+                    yield sse_event(dict(current['result'], type="done", job_id=job_id))
+                    return
+                if current['status'] == generation_jobs.FAILED:
+                    yield sse_event({"type": "error", "job_id": job_id, "error": current['error']})
+                    return
+                
+                progress = generation_job_progress(current) or {"status": current['status'], "progress": 0}
+                # The ID names the progress state, so a reconnecting client is only sent changes
+                progress_id = hashlib.sha1(fast_json.dumps(progress)).hexdigest()[:16]
+                if progress != last_progress and progress_id != last_event_id:
+                    last_progress = progress
+                    keepalive_at = time.monotonic() + 15
+                    yield sse_event(dict(progress, type="progress", job_id=job_id), event_id=progress_id)
+                elif time.monotonic() >= keepalive_at:
+                    keepalive_at = time.monotonic() + 15
+                    yield b": keep-alive\n\n"
+                if time.monotonic() >= close_at:
+                    return
+                time.sleep(1)
+                current = generation_jobs.get(job_id)
+        
+        except Exception as e:
+            logger.error(f"Error streaming generation job {job_id}: {str(e)}")
+            yield sse_event({"type": "error", "job_id": job_id, "error": "Failed to read job"})
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cross-source paper deduplication
+
+Builds synthetic result sets in which a share of the papers reappear from other
+sources with casing, punctuation, accent or DOI-format differences, and times
+PaperDeduplicator over growing input sizes to show it scales linearly.
+
+Usage: python benchmarks/bench_dedup.py [--sizes 1000,2500,5000,10000] [--dup-rate 0.3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.paper_dedup import PaperDeduplicator
+
+WORDS = (
+    "learning neural network deep graph transformer attention model protein quantum "
+    "optimization bayesian inference reinforcement language vision robust efficient "
+    "sparse federated causal molecular climate retrieval generative diffusion adaptive "
+    "analysis theory dynamics control signal medical imaging segmentation detection"
+).split()
+
+SOURCES = ("arXiv", "Semantic Scholar", "Crossref", "CORE", "PubMed")
+
+
+def make_paper(rng, index):
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize()
+    return {
+        "title": f"{title} {index}",
+        "doi": f"10.{1000 + index % 9000}/bench.{index}" if rng.random() < 0.6 else None,
+        "citation_count": rng.randint(0, 500) if rng.random() < 0.5 else None,
+        "pdf_url": f"https://example.org/{index}.pdf" if rng.random() < 0.4 else "#",
+        "source": rng.choice(SOURCES),
+    }
+
+
+def make_variant(rng, paper):
+    """Return the same paper as another source would report it"""
+    title = paper["title"]
+    variant = rng.randint(0, 3)
+    if variant == 0:
+        title = title.upper()
+    elif variant == 1:
+        title = title.replace(" ", ": ", 1) + "."
+    elif variant == 2:
+        title = title.replace("e", "é", 1)
+    else:
+        # Small edit, only caught by the MinHash/LSH stage
+        title = title.replace("network", "networks").replace("model", "models") + "s"
+
+    doi = paper["doi"]
+    if doi and rng.random() < 0.5:
+        doi = f"https://doi.org/{doi.upper()}"
+    elif rng.random() < 0.5:
+        doi = None
+
+    return {
+        "title": title,
+        "doi": doi,
+        "citation_count": rng.randint(0, 500) if rng.random() < 0.5 else None,
+        "pdf_url": f"https://mirror.example.org/{rng.random()}.pdf" if rng.random() < 0.5 else "#",
+        "source": rng.choice(SOURCES),
+    }
+
+
+def make_dataset(size, dup_rate, seed=42):
+    rng = random.Random(seed)
+    originals = [make_paper(rng, i) for i in range(int(size * (1 - dup_rate)))]
+    papers = list(originals)
+    while len(papers) < size:
+        papers.append(make_variant(rng, rng.choice(originals)))
+    rng.shuffle(papers)
+    return papers, len(originals)
+
+
+def run(sizes, dup_rate, repeats):
+    print(f"{'records':>8} {'unique':>8} {'found':>8} {'best ms':>9} {'us/record':>10}")
+    for size in sizes:
+        papers, expected = make_dataset(size, dup_rate)
+        timings = []
+        for _ in range(repeats):
+            batch = [dict(paper) for paper in papers]
+            start = time.perf_counter()
+            deduplicator = PaperDeduplicator()
+            deduplicator.add_all(batch)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{size:>8} {expected:>8} {len(deduplicator.papers):>8} "
+              f"{best * 1000:>9.1f} {best / size * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,2500,5000,10000")
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.dup_rate, args.repeats)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark for paper records and API serialization
+
+Compares the old representation (one dict per paper, copied for enrichment and
+encoded with the standard json module) against PaperRecord encoded through
+utils.fast_json, for per-paper memory and for encoding a 100-paper response.
+
+Usage: python benchmarks/bench_serialization.py [--papers 100] [--repeats 200]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import fast_json
+from utils.paper_record import PaperRecord
+
+
+def make_record(rng, index):
+    return PaperRecord(
+        title=f"Synthetic paper {index} on " + " ".join(rng.choice(("graph", "neural", "quantum", "protein")) for _ in range(6)),
+        authors=", ".join(f"Author {rng.randint(1, 999)}" for _ in range(rng.randint(1, 8))),
+        summary=" ".join("lorem" for _ in range(rng.randint(80, 250))),
+        published="2023-05-01",
+        published_year=2023,
+        url=f"https://arxiv.org/abs/2305.{index:05d}",
+        pdf_url=f"https://arxiv.org/pdf/2305.{index:05d}",
+        doi=f"10.1234/bench.{index}",
+        categories=["cs.LG", "stat.ML"],
+        source="arXiv",
+        arxiv_id=f"2305.{index:05d}v1",
+        citation_count=rng.randint(0, 300),
+        scihub_available=False
+    )
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return objects, size
+
+
+def best_time(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(count, repeats):
+    rng = random.Random(7)
+    records = [make_record(rng, i) for i in range(count)]
+    dicts = [record.to_dict() for record in records]
+
+    # Memory of the container objects only; the field values are shared
+    _, dict_bytes = measure_memory(lambda: [dict(paper) for paper in dicts])
+    _, record_bytes = measure_memory(lambda: [record.copy() for record in records])
+
+    # The old pipeline copied every paper during enrichment, then encoded with json
+    dict_time = best_time(lambda: json.dumps({"papers": [paper.copy() for paper in dicts]}), repeats)
+    record_time = best_time(lambda: fast_json.dumps({"papers": records}), repeats)
+
+    print(f"papers per response:        {count}")
+    print(f"encoder:                    {'orjson' if fast_json.orjson else 'json (orjson not installed)'}")
+    print(f"dict bytes per paper:       {dict_bytes / count:8.0f}")
+    print(f"record bytes per paper:     {record_bytes / count:8.0f}")
+    print(f"dict + json.dumps:          {dict_time * 1000:8.3f} ms")
+    print(f"PaperRecord + fast_json:    {record_time * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--papers", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+    run(args.papers, args.repeats)
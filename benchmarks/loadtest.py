@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Fixed-rate load test for the Flask API
+
+Sends a weighted mix of requests to a running app at a constant arrival rate
+(open loop: a slow response does not delay the next request) and reports
+throughput, errors and p50/p95/p99 latency per endpoint. Latency is measured
+from each request's scheduled start, so queueing in the client counts too.
+
+For offline, repeatable runs start the app with upstreams stood in:
+
+    HTTP_REPLAY_MODE=replay HTTP_REPLAY_PROFILE=benchmarks/replay_profile.json \\
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python app.py
+    python benchmarks/standin_server.py --port 8765
+
+Record the cassettes once with HTTP_REPLAY_MODE=record and a low --rps. The
+search cache answers repeated queries; --unique-queries makes every query a
+cache miss (and a replay miss unless recorded that way).
+
+Usage: python benchmarks/loadtest.py [--base-url http://127.0.0.1:5000] [--rps 10] [--duration 60]
+                                     [--scenario scenario.json] [--json report.json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+QUERIES = (
+    "transformer attention mechanisms", "crispr gene editing off-target effects", "graph neural networks",
+    "quantum error correction", "federated learning privacy", "diffusion models image synthesis",
+    "alzheimer disease biomarkers", "reinforcement learning robotics", "5g mimo antenna design",
+    "large language model evaluation", "protein structure prediction", "climate model downscaling"
+)
+
+# name, method, path, JSON body (with {query} filled in), weight
+DEFAULT_SCENARIO = [
+    {"name": "academic-search", "method": "POST", "path": "/api/academic-search",
+     "json": {"query": "{query}", "max_results": 20}, "weight": 6},
+    {"name": "academic-search-stream", "method": "POST", "path": "/api/academic-search/stream",
+     "json": {"query": "{query}", "max_results": 20}, "weight": 2},
+    {"name": "source-stats", "method": "POST", "path": "/api/source-stats",
+     "json": {"query": "{query}"}, "weight": 2},
+    {"name": "trending-topics", "method": "GET", "path": "/api/trending-topics", "weight": 2},
+    {"name": "quick-search", "method": "POST", "path": "/api/quick-search",
+     "json": {"query": "{query}"}, "weight": 1},
+]
+
+
+def fill(template, query):
+    if isinstance(template, str):
+        return template.replace("{query}", query)
+    if isinstance(template, dict):
+        return {key: fill(value, query) for key, value in template.items()}
+    if isinstance(template, list):
+        return [fill(value, query) for value in template]
+    return template
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LoadTest:
+    def __init__(self, base_url, scenario, rps, duration, warmup, timeout, workers, unique_queries=False, seed=7):
+        self.base_url = base_url.rstrip("/")
+        self.scenario = scenario
+        self.rps = rps
+        self.duration = duration
+        self.warmup = warmup
+        self.timeout = timeout
+        self.unique_queries = unique_queries
+        self.rng = random.Random(seed)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.skipped_late = 0
+
+    def _record(self, name, scheduled, outcome, measured):
+        if not measured:
+            return
+        latency = time.perf_counter() - scheduled
+        with self.lock:
+            if outcome == "ok":
+                self.samples.setdefault(name, []).append(latency)
+            else:
+                self.samples.setdefault(name, [])
+                errors = self.errors.setdefault(name, {})
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    def _send(self, step, query, scheduled, measured):
+        outcome = "ok"
+        try:
+            response = self.session.request(step["method"], self.base_url + step["path"],
+                                            json=fill(step.get("json"), query) if "json" in step else None,
+                                            timeout=self.timeout, stream=True)
+            # Read the whole body so streamed endpoints are timed to their last event
+            for _ in response.iter_content(chunk_size=65536):
+                pass
+            if response.status_code >= 400:
+                outcome = f"http_{response.status_code}"
+        except requests.exceptions.Timeout:
+            outcome = "timeout"
+        except requests.exceptions.RequestException as e:
+            outcome = type(e).__name__
+        self._record(step["name"], scheduled, outcome, measured)
+
+    def run(self) -> Dict:
+        weights = [step.get("weight", 1) for step in self.scenario]
+        total = int((self.warmup + self.duration) * self.rps)
+        warmup_requests = int(self.warmup * self.rps)
+        start = time.perf_counter() + 0.1
+        futures = []
+        for index in range(total):
+            scheduled = start + index / self.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -1:
+                self.skipped_late += 1
+            step = self.rng.choices(self.scenario, weights)[0]
+            query = self.rng.choice(QUERIES)
+            if self.unique_queries:
+                query = f"{query} {index}"
+            futures.append(self.executor.submit(self._send, step, query, scheduled, index >= warmup_requests))
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start - self.warmup
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for name in sorted(self.samples):
+            ordered = sorted(self.samples[name])
+            errors = self.errors.get(name, {})
+            endpoints[name] = {
+                "requests": len(ordered) + sum(errors.values()),
+                "ok": len(ordered),
+                "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0,
+                "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+                "errors": errors
+            }
+        return {
+            "target_rps": self.rps,
+            "duration_s": round(elapsed, 1),
+            "late_submissions": self.skipped_late,
+            "endpoints": endpoints
+        }
+
+
+def print_report(report: Dict):
+    print(f"target {report['target_rps']} rps for {report['duration_s']}s"
+          + (f" ({report['late_submissions']} requests sent >1s late; the client is saturated)"
+             if report["late_submissions"] else ""))
+    print(f"{'endpoint':<24} {'reqs':>6} {'ok/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  errors")
+    for name, stats in report["endpoints"].items():
+        errors = ", ".join(f"{kind}={count}" for kind, count in sorted(stats["errors"].items())) or "-"
+        print(f"{name:<24} {stats['requests']:>6} {stats['throughput_rps']:>7} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}  {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default=os.getenv("LOADTEST_BASE_URL", "http://127.0.0.1:5000"))
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds sent first")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--workers", type=int, default=256, help="Most requests in flight at once")
+    parser.add_argument("--unique-queries", action="store_true", help="Defeat the search cache")
+    parser.add_argument("--scenario", help="JSON list of {name, method, path, json, weight}")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    scenario = DEFAULT_SCENARIO
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+    report = LoadTest(args.base_url, scenario, args.rps, args.duration, args.warmup,
+                      args.timeout, args.workers, args.unique_queries).run()
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if report["endpoints"] else 1)
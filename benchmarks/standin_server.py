@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Gemini REST API during load tests
+
+Answers model listing, generateContent and streamGenerateContent. Answers come
+from cassettes recorded earlier (with --record it proxies to the real API and
+records them) or, for prompts never recorded, from synthetic text. Latency and
+errors follow the same fault profile format as HTTP_REPLAY_PROFILE, under the
+host name "gemini".
+
+Point the app at it with GEMINI_API_ENDPOINT=http://127.0.0.1:8765 (any
+GEMINI_API_KEY works). Paper sources are replayed in-process instead: run the
+app with HTTP_REPLAY_MODE=replay (see utils/http_replay.py).
+
+Usage: python benchmarks/standin_server.py [--port 8765] [--profile profile.json] [--record]
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, request
+
+from utils import fast_json
+from utils.http_replay import CassetteStore, FaultProfile, error_body, request_key
+
+PROFILE_HOST = "gemini"
+UPSTREAM = "https://generativelanguage.googleapis.com"
+
+WORDS = (
+    "research methodology framework analysis evidence literature approach model results "
+    "significant theory empirical dataset evaluation limitations future work findings"
+).split()
+
+app = Flask(__name__)
+settings = {}
+
+
+def synthetic_text(prompt: str, words: int) -> str:
+    """Deterministic filler text of about the requested length"""
+    seed = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+    chosen = [WORDS[(seed >> (index % 120)) % len(WORDS)] for index in range(words)]
+    sentences = [" ".join(chosen[start:start + 12]).capitalize() + "." for start in range(0, words, 12)]
+    return "**Analysis**\n\n" + " ".join(sentences)
+
+
+def candidate(text: str) -> dict:
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0
+        }],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": len(text.split())}
+    }
+
+
+def gemini_error(status: int) -> Response:
+    headers, _ = error_body(status)
+    if status == 429:
+        message, reason = "Resource has been exhausted (e.g. check quota). Please retry in 1.0s.", "RESOURCE_EXHAUSTED"
+    elif status == 504:
+        message, reason = "The request timed out.", "DEADLINE_EXCEEDED"
+    else:
+        message, reason = "The service is currently unavailable.", "UNAVAILABLE"
+    body = {"error": {"code": status, "message": message, "status": reason}}
+    return Response(fast_json.dumps(body), status=status, headers=headers, mimetype="application/json")
+
+
+def prompt_of(body: dict) -> str:
+    return " ".join(part.get("text", "") for content in body.get("contents", [])
+                    for part in content.get("parts", []))
+
+
+def recorded_or_forward(model_action: str, raw_body: bytes):
+    """(status, decoded JSON, recorded latency) from a cassette, from the real API when recording, or None"""
+    store = settings["store"]
+    key = request_key("POST", f"{UPSTREAM}/v1beta/models/{model_action}", raw_body)
+    entry = store.find(PROFILE_HOST, key)
+    if entry is not None:
+        return entry["response"]["status"], fast_json.loads(store.body(entry)), entry.get("elapsed")
+    if not settings["record"]:
+        return None
+
+    # Imported lazily: only recording talks to the real API
+    from utils.http_client import http_client
+
+    if "session" not in settings:
+        settings["session"] = http_client.session()
+    session = settings["session"]
+    started = time.monotonic()
+    upstream = session.post(f"{UPSTREAM}/v1beta/models/{model_action}", data=raw_body, timeout=120,
+                            headers={"Content-Type": "application/json",
+                                     "x-goog-api-key": os.getenv("GEMINI_API_KEY", "")})
+    elapsed = time.monotonic() - started
+    store.save(PROFILE_HOST, key, "POST", f"{UPSTREAM}/v1beta/models/{model_action}", upstream.status_code,
+               upstream.reason, upstream.headers, upstream.content, elapsed)
+    # Already waited for the real answer
+    return upstream.status_code, upstream.json(), 0.0
+
+
+@app.route("/<version>/models", methods=["GET"])
+def list_models(version):
+    models = [{
+        "name": f"models/{name}",
+        "displayName": name,
+        "supportedGenerationMethods": ["generateContent", "streamGenerateContent", "countTokens"]
+    } for name in settings["models"]]
+    return Response(fast_json.dumps({"models": models}), mimetype="application/json")
+
+
+@app.route("/<version>/models/<path:target>", methods=["POST"])
+def generate(version, target):
+    model, _, action = target.partition(":")
+    profile = settings["profile"]
+    fault = profile.fault(PROFILE_HOST)
+    if fault == "timeout":
+        # Hang for a minute, then give up the way an overloaded gateway does
+        time.sleep(60)
+        return gemini_error(504)
+    raw_body = request.get_data()
+    body = fast_json.loads(raw_body or b"{}")
+
+    answer = recorded_or_forward(f"{model}:generateContent", raw_body)
+    if answer is None:
+        status, payload, recorded = 200, candidate(synthetic_text(prompt_of(body), settings["words"])), None
+    else:
+        status, payload, recorded = answer
+
+    latency = profile.latency(PROFILE_HOST, settings["default_latency"] if recorded is None else recorded)
+    if action != "streamGenerateContent":
+        time.sleep(latency)
+        if fault is not None:
+            return gemini_error(fault)
+        return Response(fast_json.dumps(payload), status=status, mimetype="application/json")
+
+    if fault is not None:
+        time.sleep(latency)
+        return gemini_error(fault)
+    text = "".join(part.get("text", "") for item in payload.get("candidates", [])[:1]
+                   for part in item.get("content", {}).get("parts", []))
+    chunks = [text[start:start + 200] for start in range(0, len(text), 200)] or [""]
+
+    def events():
+        # First token after a fifth of the latency, the rest spread evenly
+        time.sleep(latency * 0.2)
+        for chunk in chunks:
+            yield b"data: " + fast_json.dumps(candidate(chunk)) + b"\r\n\r\n"
+            time.sleep(latency * 0.8 / len(chunks))
+
+    return Response(events(), mimetype="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cassettes", default=os.getenv("HTTP_CASSETTE_DIR", "benchmarks/cassettes"))
+    parser.add_argument("--profile", default=os.getenv("HTTP_REPLAY_PROFILE", ""),
+                        help="Fault profile JSON file or inline JSON")
+    parser.add_argument("--models", default="gemini-2.0-flash")
+    parser.add_argument("--latency-ms", type=float, default=1500,
+                        help="Latency when the profile gives none for the gemini host")
+    parser.add_argument("--words", type=int, default=400, help="Length of synthetic answers")
+    parser.add_argument("--record", action="store_true",
+                        help="Forward unrecorded prompts to the real API (GEMINI_API_KEY) and record them")
+    args = parser.parse_args()
+
+    settings.update(
+        store=CassetteStore(args.cassettes),
+        profile=FaultProfile.load(args.profile),
+        models=[name.strip() for name in args.models.split(",") if name.strip()],
+        default_latency=args.latency_ms / 1000,
+        words=args.words,
+        record=args.record
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
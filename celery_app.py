@@ -1,8 +1,13 @@
 from celery import Celery
 import os
+import time
 import logging
 from datetime import datetime
 from bson import ObjectId
+from dotenv import load_dotenv
+
+# Load environment variables (the Gemini key for generation jobs); the worker does not import the Flask app
+load_dotenv()
 
 # Import config with fallback to environment variables
 try:
@@ -12,6 +17,16 @@ except ImportError:
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
+try:
+    from config import TRENDING_REFRESH_SECONDS
+except ImportError:
+    TRENDING_REFRESH_SECONDS = int(os.getenv('TRENDING_REFRESH_SECONDS', 900))
+
+try:
+    from config import GENERATION_JOB_DEADLINE_SECONDS
+except ImportError:
+    GENERATION_JOB_DEADLINE_SECONDS = float(os.getenv('GENERATION_JOB_DEADLINE_SECONDS', 300))
+
 from utils.document_processor import document_processor
 
 # Configure logging
@@ -43,6 +58,7 @@ celery_app.conf.update(
 celery_app.conf.task_routes = {
     'celery_app.process_document_task': {'queue': 'document_processing'},
     'celery_app.generate_embeddings_task': {'queue': 'embedding_generation'},
+    'celery_app.generate_text_task': {'queue': 'generation'},
 }
 
 @celery_app.task(bind=True, name='celery_app.process_document_task')
@@ -209,6 +225,76 @@ def generate_embeddings_task(self, chunks, document_id):
         
         raise e
 
+@celery_app.task(bind=True, name='celery_app.generate_text_task')
+def generate_text_task(self, job_id):
+    """Background task for literature reviews, methodology analyses and drafts submitted as jobs"""
+    # Imported lazily: only generation workers need Gemini set up
+    from utils.generation import GENERATION_JOB_BUILDERS, stream_gemini
+    from utils.generation_jobs import generation_jobs
+    from utils.llm_scheduler import PRIORITY_BACKGROUND
+    
+    job = generation_jobs.get(job_id)
+    if job is None:
+        logger.warning(f"Generation job {job_id} no longer exists")
+        return {'status': 'missing', 'job_id': job_id}
+    
+    try:
+        generation_jobs.mark_running(job_id, self.request.id)
+        self.update_state(
+            state='PROCESSING',
+            meta={'status': 'Preparing prompt', 'progress': 10}
+        )
+        
+        gemini_args, finish = GENERATION_JOB_BUILDERS[job['kind']](job['request'])
+        
+        self.update_state(
+            state='PROCESSING',
+            meta={'status': 'Waiting for the model', 'progress': 20}
+        )
+        
+        # Stream so progress can be reported while the text is being written
+        parts = []
+        written = 0
+        reported_at = 0.0
+        for text in stream_gemini(priority=PRIORITY_BACKGROUND, deadline=GENERATION_JOB_DEADLINE_SECONDS,
+                                  wait_for_quota=True, **gemini_args):
+            if not text:
+                continue
+            parts.append(text)
+            written += len(text)
+            if time.monotonic() - reported_at >= 2:
+                reported_at = time.monotonic()
+                self.update_state(
+                    state='PROCESSING',
+                    meta={'status': 'Writing', 'progress': 50, 'characters': written}
+                )
+        
+        self.update_state(
+            state='PROCESSING',
+            meta={'status': 'Adding references', 'progress': 90, 'characters': written}
+        )
+        
+        generation_jobs.complete(job_id, finish("".join(parts)))
+        
+        logger.info(f"Generation job {job_id} ({job['kind']}) completed")
+        
+        return {'status': 'completed', 'job_id': job_id}
+        
+    except Exception as e:
+        logger.error(f"Error in generation job {job_id}: {str(e)}")
+        
+        try:
+            generation_jobs.fail(job_id, 'Generation failed')
+        except Exception as store_error:
+            logger.error(f"Could not record failure of generation job {job_id}: {store_error}")
+        
+        self.update_state(
+            state='FAILURE',
+            meta={'status': f'Error: {str(e)}', 'progress': 0}
+        )
+        
+        raise e
+
 @celery_app.task(name='celery_app.cleanup_temp_files')
 def cleanup_temp_files():
     """Periodic task to clean up temporary files"""
@@ -231,12 +317,24 @@ def cleanup_temp_files():
     except Exception as e:
         logger.error(f"Error in cleanup task: {str(e)}")
 
+@celery_app.task(name='celery_app.refresh_trending_topics', expires=TRENDING_REFRESH_SECONDS)
+def refresh_trending_topics():
+    """Periodic task to rebuild the trending topics served by /api/trending-topics"""
+    from utils.trending import trending_store
+    
+    document = trending_store.refresh()
+    return {'categories': document['categories'] if document else 0}
+
 # Periodic tasks
 celery_app.conf.beat_schedule = {
     'cleanup-temp-files': {
         'task': 'celery_app.cleanup_temp_files',
         'schedule': 3600.0,  # Run every hour
     },
+    'refresh-trending-topics': {
+        'task': 'celery_app.refresh_trending_topics',
+        'schedule': float(TRENDING_REFRESH_SECONDS),
+    },
 }
 
 if __name__ == '__main__':
@@ -240,35 +240,28 @@ class AcademicResearchApp {
         this.currentQuery = query;
         this.showLoading(true);
 
+        const requestBody = JSON.stringify({
+            query: query,
+            max_results: parseInt(maxResults),
+            sort_by: sortBy,
+            include_scihub: includeScihub,
+            sources: selectedSources
+        });
+
         try {
-            const response = await fetch('/api/academic-search', {
+            const response = await fetch('/api/academic-search/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({
-                    query: query,
-                    max_results: parseInt(maxResults),
-                    sort_by: sortBy,
-                    include_scihub: includeScihub,
-                    sources: selectedSources
-                })
+                body: requestBody
             });
 
-            const data = await response.json();
-
-            if (data.success) {
-                this.currentPapers = data.papers;
-                this.displayResults(data);
-                this.showResearchSuggestionsButton();
-                this.displaySourcesUsed(data.sources_used);
-                
-                // Show notification if search was saved (user is logged in)
-                if (data.user_authenticated) {
-                    this.showNotification('Search saved to your history', 'success');
-                }
+            if (response.ok && response.body && window.TextDecoder) {
+                await this.consumeSearchStream(response);
             } else {
-                this.showError(data.error || 'Search failed');
+                // Fall back to the buffered endpoint
+                await this.performBufferedSearch(requestBody);
             }
         } catch (error) {
             console.error('Search error:', error);
@@ -281,6 +274,227 @@ class AcademicResearchApp {
         }
     }
 
+    async performBufferedSearch(requestBody) {
+        const response = await fetch('/api/academic-search', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: requestBody
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            this.currentPapers = data.papers;
+            this.displayResults(data);
+            this.showResearchSuggestionsButton();
+            this.displaySourcesUsed(data.sources_used);
+            
+            // Show notification if search was saved (user is logged in)
+            if (data.user_authenticated) {
+                this.showNotification('Search saved to your history', 'success');
+            }
+        } else {
+            this.showError(data.error || 'Search failed');
+        }
+    }
+
+    async readNdjson(response, onEvent) {
+        // Read a newline-delimited JSON stream, calling onEvent for each complete line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let newlineIndex;
+            while ((newlineIndex = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newlineIndex).trim();
+                buffer = buffer.slice(newlineIndex + 1);
+                if (line) onEvent(JSON.parse(line));
+            }
+        }
+
+        if (buffer.trim()) onEvent(JSON.parse(buffer));
+    }
+
+    async readSse(response, onEvent) {
+        // Read a server-sent event stream, calling onEvent with each event's JSON data
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        const dispatch = (block) => {
+            const data = block.split('\n')
+                .filter(line => line.startsWith('data:'))
+                .map(line => line.slice(5).trimStart())
+                .join('\n');
+            if (data) onEvent(JSON.parse(data));
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                dispatch(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+            }
+        }
+
+        if (buffer.trim()) dispatch(buffer);
+    }
+
+    async streamGeneration(path, body, onText) {
+        // Call the streaming variant of a generation endpoint, passing the text written so far to
+        // onText (at most once per frame); resolves to the blocking endpoint's response payload
+        const init = {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body)
+        };
+
+        if (!window.TextDecoder || !window.ReadableStream) {
+            const response = await fetch(path, init);
+            return response.json();
+        }
+
+        const response = await fetch(`${path}/stream`, init);
+        if (!response.ok || !response.body) {
+            return response.json();
+        }
+
+        let text = '';
+        let result = null;
+        let frame = null;
+        await this.readSse(response, (event) => {
+            switch (event.type) {
+                case 'token':
+                    text += event.text;
+                    if (frame === null) {
+                        frame = requestAnimationFrame(() => {
+                            frame = null;
+                            onText(text);
+                        });
+                    }
+                    break;
+
+                case 'done':
+                    result = event;
+                    break;
+
+                case 'error':
+                    result = { success: false, error: event.error };
+                    break;
+            }
+        });
+
+        // The final payload replaces the streamed text, so drop any render still pending
+        if (frame !== null) cancelAnimationFrame(frame);
+        return result || { success: false, error: 'The response ended early' };
+    }
+
+    async consumeSearchStream(response) {
+        this.currentPapers = [];
+        let started = false;
+
+        await this.readNdjson(response, (event) => {
+            switch (event.type) {
+                case 'start':
+                    this.displaySourcesUsed(event.sources_used);
+                    break;
+
+                case 'source':
+                    if (!started && event.papers.length > 0) {
+                        // First papers are in: show results and hide the overlay
+                        started = true;
+                        this.showLoading(false);
+                        this.startStreamingResults();
+                    }
+                    if (started) {
+                        this.appendPapers(event.papers);
+                        document.getElementById('totalPapers').textContent = event.total_count;
+                    }
+                    break;
+
+                case 'merged':
+                    this.showLoading(false);
+                    if (!started) {
+                        started = true;
+                        this.startStreamingResults();
+                    }
+                    this.currentPapers = event.papers;
+                    window.currentSearchResults = event.papers;
+                    this.displayStats(event.scihub_stats);
+                    this.displayPapers(event.papers);
+                    this.showResearchSuggestionsButton();
+                    break;
+
+                case 'analysis': {
+                    const analysisContent = document.getElementById('analysisContent');
+                    analysisContent.innerHTML = event.analysis ?
+                        this.formatAnalysis(event.analysis) :
+                        '<p class="text-muted">No analysis available</p>';
+                    break;
+                }
+
+                case 'done':
+                    if (event.user_authenticated) {
+                        this.showNotification('Search saved to your history', 'success');
+                    }
+                    break;
+
+                case 'error':
+                    this.showError(event.error || 'Search failed');
+                    break;
+            }
+        });
+    }
+
+    startStreamingResults() {
+        document.getElementById('resultsSection').style.display = 'block';
+        document.getElementById('resultsSection').scrollIntoView({ behavior: 'smooth' });
+        document.getElementById('papersList').innerHTML = '';
+        document.getElementById('analysisContent').innerHTML =
+            '<p class="text-muted"><i class="fas fa-spinner fa-spin"></i> Generating AI analysis...</p>';
+        document.getElementById('analysisTools').style.display = 'block';
+        window.currentSearchResults = this.currentPapers;
+    }
+
+    appendPapers(papers) {
+        // Add a batch of papers below the ones already shown
+        const papersList = document.getElementById('papersList');
+        const offset = this.currentPapers.length;
+
+        papers.forEach((paper, index) => {
+            const paperElement = document.createElement('div');
+            paperElement.innerHTML = this.createPaperCard(paper);
+            const paperCard = paperElement.firstElementChild;
+
+            paperCard.style.setProperty('--paper-index', offset + index);
+            paperCard.style.opacity = '0';
+            paperCard.style.transform = 'translateY(30px)';
+            papersList.appendChild(paperCard);
+
+            setTimeout(() => {
+                paperCard.style.transition = 'all 0.6s cubic-bezier(0.4, 0, 0.2, 1)';
+                paperCard.style.opacity = '1';
+                paperCard.style.transform = 'translateY(0)';
+            }, index * 100);
+        });
+
+        this.currentPapers = this.currentPapers.concat(papers);
+        window.currentSearchResults = this.currentPapers;
+    }
+
     displaySourcesUsed(sources) {
         // Add or update sources used display
         let sourcesDisplay = document.getElementById('sourcesUsed');
@@ -310,6 +524,7 @@ class AcademicResearchApp {
     
     formatSourceName(source) {
         const sourceNames = {
+            'local': 'Local library',
             'arxiv': 'arXiv',
             'semantic_scholar': 'Semantic Scholar',
             'core': 'CORE',
@@ -504,21 +719,16 @@ class AcademicResearchApp {
         document.getElementById('reviewContent').innerHTML = '<div class="loading">Generating comprehensive literature review...</div>';
 
         try {
-            const response = await fetch('/api/literature-review', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    papers: this.currentPapers,
-                    query: this.currentQuery,
-                    review_type: reviewType,
-                    citation_format: citationFormat
-                })
+            const reviewContent = document.getElementById('reviewContent');
+            const data = await this.streamGeneration('/api/literature-review', {
+                papers: this.currentPapers,
+                query: this.currentQuery,
+                review_type: reviewType,
+                citation_format: citationFormat
+            }, (text) => {
+                reviewContent.innerHTML = this.formatAnalysis(text);
             });
 
-            const data = await response.json();
-
             if (data.success) {
                 document.getElementById('reviewContent').innerHTML = this.formatAnalysis(data.literature_review);
                 this.currentReview = data.literature_review;
@@ -554,21 +764,16 @@ class AcademicResearchApp {
         document.getElementById('methodologyContent').innerHTML = '<div class="loading">Analyzing methodological approaches...</div>';
 
         try {
-            const response = await fetch('/api/methodology-analysis', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    research_question: researchQuestion,
-                    papers: this.currentPapers || [],
-                    research_type: researchType,
-                    citation_format: citationFormat
-                })
+            const methodologyContent = document.getElementById('methodologyContent');
+            const data = await this.streamGeneration('/api/methodology-analysis', {
+                research_question: researchQuestion,
+                papers: this.currentPapers || [],
+                research_type: researchType,
+                citation_format: citationFormat
+            }, (text) => {
+                methodologyContent.innerHTML = this.formatAnalysis(text);
             });
 
-            const data = await response.json();
-
             if (data.success) {
                 document.getElementById('methodologyContent').innerHTML = this.formatAnalysis(data.methodology_analysis);
                 document.getElementById('methodologyActions').style.display = 'block';
@@ -1172,14 +1377,10 @@ async function performDeepAnalysis(event) {
     contentDiv.innerHTML = '<div class="loading">Performing deep analysis... This may take a moment.</div>';
     
     try {
-        const response = await fetch('/api/deep-analysis', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({query})
+        const data = await app.streamGeneration('/api/deep-analysis', {query}, (text) => {
+            contentDiv.innerHTML = app.formatAnalysis(text);
         });
         
-        const data = await response.json();
-        
         if (data.success) {
             contentDiv.innerHTML = app.formatAnalysis(data.analysis);
         } else {
@@ -1275,15 +1476,12 @@ function generateAcademicDraft() {
         papers: papers
     };
     
-    // Make API request
-    fetch('/api/generate-draft', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json'
-        },
-        body: JSON.stringify(requestData)
+    // Stream the draft into the result view as it is written
+    app.streamGeneration('/api/generate-draft', requestData, (text) => {
+        document.getElementById('draftLoading').style.display = 'none';
+        document.getElementById('draftResult').style.display = 'block';
+        document.getElementById('draftContent').innerHTML = app.formatAnalysis(text);
     })
-    .then(response => response.json())
     .then(data => {
         if (data.success) {
             displayDraftResult(data);
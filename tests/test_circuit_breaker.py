@@ -0,0 +1,139 @@
+import pytest
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, LatencyHistogram
+
+
+def make_breaker(**kwargs):
+    options = dict(window_seconds=60, min_requests=3, error_threshold=0.5, open_seconds=10, timeout_floor=1)
+    options.update(kwargs)
+    return CircuitBreaker('test', **options)
+
+
+def trip(breaker):
+    for _ in range(breaker.min_requests):
+        breaker.record_failure(0.1, 'boom')
+    assert breaker.state == OPEN
+
+
+def expire_cooldown(breaker):
+    breaker.opened_at -= breaker.cooldown + 1
+
+
+def test_opens_once_error_rate_reached():
+    breaker = make_breaker()
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.before_call() is False
+
+    breaker.record_failure(0.1, 'boom')
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+
+
+def test_successes_keep_breaker_closed():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_admits_a_single_probe():
+    breaker = make_breaker()
+    trip(breaker)
+    expire_cooldown(breaker)
+
+    assert breaker.before_call() is True
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens_with_doubled_cooldown():
+    breaker = make_breaker()
+    trip(breaker)
+    expire_cooldown(breaker)
+
+    assert breaker.before_call() is True
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    assert breaker.cooldown == 20
+    assert breaker.retry_after() > 10
+
+
+def test_check_does_not_take_the_probe():
+    breaker = make_breaker()
+    trip(breaker)
+    expire_cooldown(breaker)
+
+    breaker.check()
+    breaker.check()
+    assert breaker.before_call() is True
+
+
+def test_probe_without_outcome_is_released():
+    """A probe that never reached the source (e.g. rate limited) must not wedge the breaker"""
+    breaker = make_breaker()
+    trip(breaker)
+    expire_cooldown(breaker)
+
+    class RateLimited(Exception):
+        pass
+
+    def guarded_call():
+        breaker.check()
+        probe = breaker.before_call()
+        try:
+            raise RateLimited()
+        finally:
+            if probe:
+                breaker.release_probe()
+
+    with pytest.raises(RateLimited):
+        guarded_call()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.is_open() is False
+    assert breaker.before_call() is True
+
+
+def test_release_probe_keeps_recorded_outcome():
+    breaker = make_breaker()
+    trip(breaker)
+    expire_cooldown(breaker)
+
+    assert breaker.before_call() is True
+    breaker.record_failure(0.1)
+    breaker.release_probe()
+    assert breaker.state == OPEN
+    assert breaker.is_open() is True
+
+
+def test_timeout_follows_p99_between_floor_and_default():
+    breaker = make_breaker()
+    assert breaker.timeout(10) == 10
+    for _ in range(30):
+        breaker.record_success(2.0)
+    assert breaker.timeout(10) == pytest.approx(3.0)
+    assert breaker.timeout(2.5) == 2.5
+
+
+def test_latency_histogram_percentiles_and_buckets():
+    histogram = LatencyHistogram(window_seconds=60)
+    for latency in (0.05, 0.2, 0.3, 1.5, 40):
+        histogram.add(latency)
+    assert histogram.percentile(50) == 0.3
+    assert histogram.percentile(100) == 40
+    snapshot = histogram.snapshot()
+    assert snapshot['samples'] == 5
+    assert snapshot['buckets']['le_0.1'] == 1
+    assert snapshot['buckets']['+inf'] == 1
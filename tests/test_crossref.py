@@ -0,0 +1,78 @@
+from utils.multi_source_api import CrossrefAPI
+
+
+def item(n):
+    return {
+        'DOI': f'10.1000/W{n}',
+        'title': [f'Work {n}'],
+        'author': [{'given': 'Ada', 'family': 'Lovelace'}],
+        'abstract': '<jats:p>An <jats:italic>abstract</jats:italic></jats:p>',
+        'issued': {'date-parts': [[2020 + n]]},
+        'container-title': ['Journal'],
+        'is-referenced-by-count': n,
+    }
+
+
+def paged_api(monkeypatch, total, page_size):
+    api = CrossrefAPI()
+    api.MAX_ROWS = page_size
+    calls = []
+
+    def fake_get_works(params, timeout):
+        calls.append(dict(params))
+        start = sum(call['rows'] for call in calls[:-1])
+        items = [item(n) for n in range(start, min(total, start + params['rows']))]
+        return {'items': items, 'next-cursor': f"c{len(calls)}" if 'cursor' in params else None}
+
+    monkeypatch.setattr(api, '_get_works', fake_get_works)
+    return api, calls
+
+
+def test_single_page_does_not_use_a_cursor(monkeypatch):
+    api, calls = paged_api(monkeypatch, total=10, page_size=5)
+    papers = api.fetch_papers('q', max_results=3)
+    assert [paper.doi for paper in papers] == ['10.1000/W0', '10.1000/W1', '10.1000/W2']
+    assert len(calls) == 1
+    assert 'cursor' not in calls[0]
+    assert calls[0]['select'] == CrossrefAPI.SELECT_FIELDS
+
+
+def test_follows_the_cursor_until_max_results(monkeypatch):
+    api, calls = paged_api(monkeypatch, total=100, page_size=2)
+    papers = api.fetch_papers('q', max_results=5)
+    assert len(papers) == 5
+    assert [call['cursor'] for call in calls] == ['*', 'c1', 'c2']
+    assert [call['rows'] for call in calls] == [2, 2, 1]
+
+
+def test_stops_when_results_run_out(monkeypatch):
+    api, calls = paged_api(monkeypatch, total=3, page_size=2)
+    papers = api.fetch_papers('q', max_results=10)
+    assert len(papers) == 3
+    assert len(calls) == 3  # The last page comes back empty
+
+
+def test_item_to_paper():
+    paper = CrossrefAPI._item_to_paper(item(1))
+    assert paper.title == 'Work 1'
+    assert paper.authors == ['Ada Lovelace']
+    assert paper.abstract == 'An abstract'
+    assert paper.publication_year == 2021
+    assert paper.journal == 'Journal'
+    assert paper.citation_count == 1
+
+
+def test_lookup_dois_batches_and_keys_by_canonical_doi(monkeypatch):
+    api = CrossrefAPI()
+    api.DOI_BATCH_SIZE = 2
+    filters = []
+
+    def fake_get_works(params, timeout):
+        filters.append(params['filter'])
+        dois = [value.split(':', 1)[1] for value in params['filter'].split(',')]
+        return {'items': [dict(item(0), DOI=doi.upper()) for doi in dois if doi != '10.1000/missing']}
+
+    monkeypatch.setattr(api, '_get_works', fake_get_works)
+    found = api.lookup_dois(['https://doi.org/10.1000/A', '10.1000/a', '10.1000/b', '10.1000/missing', 'junk'])
+    assert filters == ['doi:10.1000/a,doi:10.1000/b', 'doi:10.1000/missing']
+    assert sorted(found) == ['10.1000/a', '10.1000/b']
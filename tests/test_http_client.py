@@ -0,0 +1,59 @@
+import pytest
+
+httpx = pytest.importorskip('httpx')
+pytest.importorskip('h2')
+
+from utils import http_client as http_client_module
+from utils import multi_source_api
+from utils.http_client import HttpClient
+from utils.multi_source_api import CrossrefAPI
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Provider sessions on an HTTP/2 client whose server answers from a list of statuses"""
+    statuses = []
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(statuses.pop(0) if statuses else 200, json={'ok': True})
+
+    # A CA bundle or proxy from the environment sends requests to the HTTP/1.1 fallback
+    for name in ('REQUESTS_CA_BUNDLE', 'CURL_CA_BUNDLE', 'HTTPS_PROXY', 'https_proxy', 'ALL_PROXY', 'all_proxy'):
+        monkeypatch.delenv(name, raising=False)
+    client = HttpClient(http2=True, dns_cache_seconds=0)
+    client._http2_client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(multi_source_api, 'http_client', client)
+    return statuses, requests_seen
+
+
+def test_provider_sessions_use_http2(upstream):
+    session = CrossrefAPI().session
+    assert isinstance(session.get_adapter('https://api.crossref.org/works'), http_client_module._Http2Adapter)
+
+
+def test_http2_retries_server_errors_on_get(upstream):
+    statuses, requests_seen = upstream
+    statuses.extend([503])
+    response = CrossrefAPI().session.get('https://api.crossref.org/works', timeout=5)
+    assert response.status_code == 200
+    assert response.json() == {'ok': True}
+    assert len(requests_seen) == 2
+
+
+def test_http2_returns_the_last_answer_once_retries_run_out(upstream):
+    statuses, requests_seen = upstream
+    statuses.extend([502, 503, 504])
+    response = CrossrefAPI().session.get('https://api.crossref.org/works', timeout=5)
+    # Retry(total=1): one retry, then the error is the caller's to handle
+    assert response.status_code == 503
+    assert len(requests_seen) == 2
+
+
+def test_http2_does_not_retry_posts(upstream):
+    statuses, requests_seen = upstream
+    statuses.extend([503])
+    response = CrossrefAPI().session.post('https://api.crossref.org/works', data=b'{}', timeout=5)
+    assert response.status_code == 503
+    assert len(requests_seen) == 1
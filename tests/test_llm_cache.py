@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from utils import llm_cache as llm_cache_module
+from utils.llm_cache import LLMCache, parse_ttls
+
+VECTORS = {
+    'what is a transformer': [1.0, 0.0, 0.0],
+    'what is a transformer?': [0.99, 0.141, 0.0],
+    'how do vaccines work': [0.0, 1.0, 0.0],
+}
+
+
+def fake_embed(query):
+    vector = np.asarray(VECTORS[query], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    # In-process level only
+    monkeypatch.setattr(llm_cache_module, 'get_redis_client', lambda: None)
+    monkeypatch.setattr(LLMCache, '_embed', staticmethod(fake_embed))
+    return LLMCache(enabled=True, endpoints='quick-search,paper-analysis', semantic_endpoints='quick-search',
+                    max_entries=16, threshold=0.95, semantic_max_entries=100)
+
+
+def test_parse_ttls():
+    assert parse_ttls("quick-search=3600, paper-analysis=60,bad=x") == {'quick-search': 3600, 'paper-analysis': 60}
+    assert parse_ttls('') == {}
+
+
+def test_key_covers_model_and_prompt(cache):
+    key = cache.make_key('gemini-2.0-flash', 'prompt')
+    assert key.startswith(LLMCache.KEY_PREFIX)
+    assert key == cache.make_key('gemini-2.0-flash', 'prompt')
+    assert key != cache.make_key('gemini-1.5-pro', 'prompt')
+    assert key != cache.make_key('gemini-2.0-flash', 'prompt ')
+
+
+def test_only_enabled_endpoints_are_cached(cache):
+    cache.put('research-suggestions', 'm', 'p', 'answer')
+    assert cache.get('research-suggestions', 'm', 'p') is None
+    assert not cache.enabled_for('research-suggestions')
+    assert cache.semantic_endpoints == {'quick-search'}
+
+
+def test_exact_hit_and_miss(cache):
+    cache.put('paper-analysis', 'm', 'prompt', 'answer')
+    assert cache.get('paper-analysis', 'm', 'prompt') == 'answer'
+    assert cache.get('paper-analysis', 'other-model', 'prompt') is None
+    assert cache.get('paper-analysis', 'm', 'other prompt') is None
+    stats = cache.get_stats()['by_endpoint']['paper-analysis']
+    assert stats['exact_hits'] == 1
+    assert stats['misses'] == 2
+
+
+def test_empty_answers_are_not_stored(cache):
+    cache.put('paper-analysis', 'm', 'prompt', '')
+    assert cache.get('paper-analysis', 'm', 'prompt') is None
+
+
+def test_expired_entries_are_ignored(cache, monkeypatch):
+    cache.ttls['paper-analysis'] = 10
+    cache.put('paper-analysis', 'm', 'prompt', 'answer')
+    now = llm_cache_module.time.time()
+    monkeypatch.setattr(llm_cache_module.time, 'time', lambda: now + 11)
+    assert cache.get('paper-analysis', 'm', 'prompt') is None
+
+
+def test_semantic_hit_for_a_near_identical_query(cache):
+    cache.put('quick-search', 'm', 'prompt for a', 'answer', query='what is a transformer')
+    assert cache.get('quick-search', 'm', 'prompt for b', query='what is a transformer?') == 'answer'
+    assert cache.get('quick-search', 'm', 'prompt for c', query='how do vaccines work') is None
+    # Semantic entries are per model
+    assert cache.get('quick-search', 'other', 'prompt for b', query='what is a transformer?') is None
+    assert cache.get_stats()['by_endpoint']['quick-search']['semantic_hits'] == 1
+
+
+def test_no_semantic_matching_on_exact_only_endpoints(cache):
+    cache.put('paper-analysis', 'm', 'prompt for a', 'answer', query='what is a transformer')
+    assert cache.get('paper-analysis', 'm', 'prompt for b', query='what is a transformer') is None
+
+
+def test_entries_are_shared_through_redis(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(llm_cache_module, 'get_redis_client', lambda: client)
+    monkeypatch.setattr(LLMCache, '_embed', staticmethod(fake_embed))
+    options = dict(enabled=True, endpoints='quick-search', semantic_endpoints='quick-search', max_entries=16)
+
+    LLMCache(**options).put('quick-search', 'm', 'prompt', 'answer', query='what is a transformer')
+    other_worker = LLMCache(**options)
+    assert other_worker.get('quick-search', 'm', 'prompt') == 'answer'
+    assert other_worker.get('quick-search', 'm', 'another prompt', query='what is a transformer?') == 'answer'
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from utils import llm_scheduler as llm_scheduler_module
+from utils import rate_limiter as rate_limiter_module
+from utils.llm_scheduler import LLMRateLimited, LLMScheduler, parse_model_limit, retry_delay
+
+
+class FakeQuotaError(Exception):
+    pass
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(rate_limiter_module, 'get_redis_client', lambda: None)
+    monkeypatch.setattr(llm_scheduler_module, 'rate_limiter', rate_limiter_module.RateLimiter(limits='', max_wait=0))
+    monkeypatch.setattr(llm_scheduler_module, 'QUOTA_ERRORS', (FakeQuotaError,))
+    return LLMScheduler(max_concurrency=1, default_deadline=5, backoff_seconds=1, model_limit='1:2')
+
+
+def test_parse_model_limit():
+    assert parse_model_limit('2:20') == (2.0, 20.0)
+    assert parse_model_limit('3') == (3.0, 3.0)
+    # Unset or invalid means no quota of our own, only 429 backoffs
+    assert parse_model_limit('') == parse_model_limit('fast') == llm_scheduler_module._UNLIMITED
+
+
+def test_retry_delay():
+    assert retry_delay(Exception("Quota exceeded. Please retry in 12.5s.")) == 12.5
+    assert retry_delay(Exception("Quota exceeded")) is None
+
+
+def test_answers_from_the_first_model_that_works(scheduler):
+    assert scheduler.run(lambda model: None if model == 'a' else f"from {model}", ['a', 'b']) == "from b"
+
+
+def test_quota_error_fails_sync_callers_fast(scheduler):
+    def exhausted(model):
+        raise FakeQuotaError("Please retry in 3s")
+
+    # The backoff is within the deadline, but a request thread does not wait for it
+    started = time.monotonic()
+    with pytest.raises(LLMRateLimited) as excinfo:
+        scheduler.run(exhausted, ['a'])
+    assert time.monotonic() - started < 1
+    assert 2 < excinfo.value.retry_after <= 3
+
+    # Rejected before queueing; the call is never made
+    calls = []
+    with pytest.raises(LLMRateLimited):
+        scheduler.run(lambda model: calls.append(model), ['a'])
+    assert calls == []
+    assert scheduler.get_stats()['rejected'] == 1
+
+
+def test_quota_error_moves_on_to_the_next_model(scheduler):
+    def call(model):
+        if model == 'a':
+            raise FakeQuotaError("Please retry in 30s")
+        return f"from {model}"
+
+    assert scheduler.run(call, ['a', 'b']) == "from b"
+    assert scheduler.get_stats()['quota_errors'] == 1
+
+
+def test_background_jobs_wait_for_quota(scheduler):
+    attempts = []
+
+    def call(model):
+        attempts.append(model)
+        if len(attempts) == 1:
+            raise FakeQuotaError("Please retry in 0.2s")
+        return "done"
+
+    future = scheduler.submit(call, ['a'], deadline=5, wait_for_quota=True)
+    assert future.result(timeout=5) == "done"
+    assert attempts == ['a', 'a']
+    assert scheduler.get_stats()['deferred'] >= 1
@@ -0,0 +1,87 @@
+from utils.paper_dedup import (
+    PaperDeduplicator, canonicalize_arxiv_id, canonicalize_doi, deduplicate_papers, title_fingerprint
+)
+
+
+def test_canonicalize_doi():
+    assert canonicalize_doi('https://doi.org/10.1000/ABC.123.') == '10.1000/abc.123'
+    assert canonicalize_doi('doi:10.1234/xyz') == '10.1234/xyz'
+    assert canonicalize_doi('not a doi') is None
+    assert canonicalize_doi(None) is None
+
+
+def test_canonicalize_arxiv_id():
+    assert canonicalize_arxiv_id('2101.00001v3') == '2101.00001'
+    assert canonicalize_arxiv_id('unknown') is None
+
+
+def test_title_fingerprint_ignores_case_accents_and_punctuation():
+    assert title_fingerprint('Élan: A  Study—of Things!') == title_fingerprint('elan a study of things')
+    assert title_fingerprint(None) == ''
+
+
+def test_merges_by_doi_and_fills_gaps():
+    first = {'title': 'Graph neural networks', 'doi': '10.1000/GNN', 'source': 'arxiv', 'citation_count': 3}
+    second = {'title': 'GNNs (journal version)', 'doi': 'https://doi.org/10.1000/gnn', 'source': 'crossref',
+              'journal': 'J. Graphs', 'citation_count': 10}
+    papers = deduplicate_papers([first, second])
+    assert papers == [first]
+    assert first['journal'] == 'J. Graphs'
+    assert first['citation_count'] == 10
+    assert first['sources'] == ['arxiv', 'crossref']
+
+
+def test_arxiv_doi_matches_arxiv_id():
+    preprint = {'title': 'Attention is all you need', 'arxiv_id': '1706.03762v5'}
+    registered = {'title': 'Attention Is All You Need.', 'doi': '10.48550/arXiv.1706.03762'}
+    assert len(deduplicate_papers([preprint, registered])) == 1
+
+
+def test_near_duplicate_titles_merge():
+    a = {'title': 'Deep residual learning for image recognition', 'source': 'arxiv'}
+    b = {'title': 'Deep Residual Learning for Image Recognition (CVPR)', 'source': 'core'}
+    deduplicator = PaperDeduplicator()
+    added, updated = deduplicator.add_all([a, b])
+    assert added == [a]
+    assert updated == []
+    assert deduplicator.merged_count == 1
+
+
+def test_conflicting_dois_block_near_duplicate_merge():
+    a = {'title': 'Deep residual learning for image recognition', 'doi': '10.1000/one'}
+    b = {'title': 'Deep Residual Learning for Image Recognition (CVPR)', 'doi': '10.1000/two'}
+    assert len(deduplicate_papers([a, b])) == 2
+
+
+def test_preprint_doi_does_not_block_merge():
+    a = {'title': 'Deep residual learning for image recognition', 'doi': '10.48550/arxiv.1512.03385'}
+    b = {'title': 'Deep Residual Learning for Image Recognition (CVPR)', 'doi': '10.1109/cvpr.2016.90'}
+    assert len(deduplicate_papers([a, b])) == 1
+
+
+def test_conflicting_arxiv_ids_block_near_duplicate_merge():
+    a = {'title': 'Deep residual learning for image recognition', 'arxiv_id': '1512.03385'}
+    b = {'title': 'Deep Residual Learning for Image Recognition (CVPR)', 'arxiv_id': '1603.05027'}
+    assert len(deduplicate_papers([a, b])) == 2
+
+
+def test_distinct_titles_stay_apart_and_unusable_records_are_dropped():
+    papers = [
+        {'title': 'Protein structure prediction with deep learning'},
+        {'title': 'Reinforcement learning for robotic grasping'},
+        {'title': '', 'doi': None},
+    ]
+    deduplicator = PaperDeduplicator()
+    added, updated = deduplicator.add_all(papers)
+    assert added == papers[:2]
+    assert deduplicator.papers == papers[:2]
+
+
+def test_add_all_reports_records_updated_by_later_batches():
+    deduplicator = PaperDeduplicator()
+    first = {'title': 'Graph neural networks', 'doi': '10.1000/gnn', 'source': 'arxiv'}
+    deduplicator.add_all([first])
+    added, updated = deduplicator.add_all([{'title': 'Graph neural networks', 'source': 'core', 'pdf_url': 'x.pdf'}])
+    assert added == []
+    assert updated == [first]
+    assert first['pdf_url'] == 'x.pdf'
@@ -0,0 +1,69 @@
+import time
+
+from utils.paper_index import PaperIndex
+from utils.paper_record import PaperRecord
+
+
+def papers(*numbers):
+    return [PaperRecord(title=f'Graph neural network study {n}', doi=f'10.1000/{n}', source='arxiv') for n in numbers]
+
+
+def make_index(tmp_path, **kwargs):
+    return PaperIndex(str(tmp_path / 'index.db'), **kwargs)
+
+
+def age(index, seconds, *numbers):
+    conn = index._connect()
+    with conn:
+        for n in numbers:
+            conn.execute("UPDATE papers SET fetched_at = fetched_at - ? WHERE paper_id = ?", (seconds, f'doi:10.1000/{n}'))
+
+
+def test_indexed_papers_are_searchable(tmp_path):
+    index = make_index(tmp_path)
+    index.add_papers(papers(1, 2))
+    index.flush()
+    assert {paper.doi for paper in index.search('graph neural')} == {'10.1000/1', '10.1000/2'}
+    assert index.count('graph') == 2
+
+
+def test_prunes_papers_past_the_age_limit(tmp_path):
+    index = make_index(tmp_path, max_rows=0, max_age=3600, prune_seconds=0)
+    index.add_papers(papers(1, 2, 3))
+    index.flush()
+    age(index, 7200, 1, 2)
+
+    index.add_papers(papers(4))
+    index.flush()
+    assert {paper.doi for paper in index.search('graph')} == {'10.1000/3', '10.1000/4'}
+    # The full-text rows go too, not just the papers
+    assert index.count('graph') == 2
+    assert index.get_stats()['pruned'] == 2
+
+
+def test_keeps_the_newest_papers_up_to_the_row_cap(tmp_path):
+    index = make_index(tmp_path, max_rows=2, max_age=0, prune_seconds=0)
+    index.add_papers(papers(1, 2, 3))
+    index.flush()
+    age(index, 30, 1)
+    age(index, 20, 2)
+    age(index, 10, 3)
+
+    index.add_papers(papers(4))
+    index.flush()
+    assert {paper.doi for paper in index.search('graph')} == {'10.1000/3', '10.1000/4'}
+    assert index.get_stats()['total_papers'] == 2
+
+
+def test_prunes_at_most_once_per_interval(tmp_path):
+    index = make_index(tmp_path, max_rows=1, max_age=0, prune_seconds=3600)
+    index.add_papers(papers(1))
+    index.flush()
+    index.add_papers(papers(2, 3))
+    index.flush()
+    assert index.get_stats()['total_papers'] == 3
+
+    index._pruned_at = time.monotonic() - 3600
+    index.add_papers(papers(4))
+    index.flush()
+    assert index.get_stats()['total_papers'] == 1
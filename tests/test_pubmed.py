@@ -0,0 +1,106 @@
+import io
+
+from utils.multi_source_api import PubMedAPI
+
+ARTICLE = """
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID>{pmid}</PMID>
+    <Article>
+      <Journal>
+        <JournalIssue><Volume>12</Volume><Issue>3</Issue><PubDate>{date}</PubDate></JournalIssue>
+        <Title>Journal of Tests</Title>
+      </Journal>
+      <ArticleTitle>CRISPR screens in <i>vivo</i></ArticleTitle>
+      <Pagination><MedlinePgn>1-9</MedlinePgn></Pagination>
+      <ELocationID EIdType="doi">10.1000/eloc.{pmid}</ELocationID>
+      <Abstract>
+        <AbstractText Label="BACKGROUND">Some   background.</AbstractText>
+        <AbstractText>Plain part with <sup>2</sup> markup.</AbstractText>
+      </Abstract>
+      <AuthorList>
+        <Author><ForeName>Ada</ForeName><LastName>Lovelace</LastName></Author>
+        <Author><CollectiveName>The Test Consortium</CollectiveName></Author>
+      </AuthorList>
+    </Article>
+    <KeywordList><Keyword>genomics</Keyword></KeywordList>
+  </MedlineCitation>
+  <PubmedData>
+    <ArticleIdList>{ids}</ArticleIdList>
+  </PubmedData>
+</PubmedArticle>
+"""
+
+
+def efetch_xml(*articles):
+    return ("<?xml version='1.0'?><PubmedArticleSet>" + "".join(articles) + "</PubmedArticleSet>").encode('utf-8')
+
+
+def test_parses_articles_from_a_stream():
+    xml = efetch_xml(
+        ARTICLE.format(pmid='111', date='<Year>2021</Year>', ids='<ArticleId IdType="doi">10.1000/ID.111</ArticleId>'),
+        ARTICLE.format(pmid='222', date='<MedlineDate>2019 Jan-Feb</MedlineDate>', ids=''),
+    )
+    papers = list(PubMedAPI(batch_size=10)._parse_pubmed_xml(io.BytesIO(xml)))
+
+    assert [paper.url for paper in papers] == ['https://pubmed.ncbi.nlm.nih.gov/111/',
+                                              'https://pubmed.ncbi.nlm.nih.gov/222/']
+    first, second = papers
+    assert first.title == 'CRISPR screens in vivo'
+    assert first.authors == ['Ada Lovelace', 'The Test Consortium']
+    assert first.abstract == 'BACKGROUND: Some background.\nPlain part with 2 markup.'
+    assert first.publication_year == 2021
+    assert first.doi == '10.1000/ID.111'
+    assert first.keywords == ['genomics']
+    assert (first.journal, first.volume, first.issue, first.pages) == ('Journal of Tests', '12', '3', '1-9')
+    # Without a PubmedData DOI the ELocationID is used; MedlineDate gives the year
+    assert second.doi == '10.1000/eloc.222'
+    assert second.publication_year == 2019
+
+
+def test_unparseable_articles_are_skipped():
+    xml = efetch_xml(
+        "<PubmedArticle><MedlineCitation><PMID>1</PMID></MedlineCitation></PubmedArticle>",
+        ARTICLE.format(pmid='333', date='<Year>2020</Year>', ids=''),
+    )
+    papers = list(PubMedAPI()._parse_pubmed_xml(io.BytesIO(xml)))
+    assert [paper.url for paper in papers] == ['https://pubmed.ncbi.nlm.nih.gov/333/']
+
+
+class FakeResponse:
+    def __init__(self, payload=None, body=b''):
+        self.status_code = 200
+        self._payload = payload
+        self.raw = io.BytesIO(body)
+        self.closed = False
+
+    def json(self):
+        return self._payload
+
+    def close(self):
+        self.closed = True
+
+
+def test_iter_papers_pages_through_the_history_server(monkeypatch):
+    requests_made = []
+    responses = []
+
+    def fake_get(session, source, host, url, params, timeout, stream=False):
+        requests_made.append((url.rsplit('/', 1)[-1], dict(params), stream))
+        if url.endswith('esearch.fcgi'):
+            return FakeResponse({'esearchresult': {'count': '5', 'webenv': 'W', 'querykey': '1'}})
+        start = params['retstart']
+        articles = [ARTICLE.format(pmid=str(start + i), date='<Year>2020</Year>', ids='')
+                    for i in range(params['retmax'])]
+        responses.append(FakeResponse(body=efetch_xml(*articles)))
+        return responses[-1]
+
+    monkeypatch.setattr('utils.multi_source_api.upstream_get', fake_get)
+    papers = list(PubMedAPI(batch_size=2).iter_papers('crispr', max_results=5))
+
+    assert len(papers) == 5
+    fetches = [params for name, params, stream in requests_made if name == 'efetch.fcgi']
+    assert [(params['retstart'], params['retmax']) for params in fetches] == [(0, 2), (2, 2), (4, 1)]
+    assert all(params['WebEnv'] == 'W' and params['query_key'] == '1' for params in fetches)
+    assert all(stream for name, _, stream in requests_made if name == 'efetch.fcgi')
+    assert all(response.closed for response in responses)
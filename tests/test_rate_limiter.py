@@ -0,0 +1,130 @@
+import pytest
+
+from utils import rate_limiter as rate_limiter_module
+from utils.rate_limiter import RateLimited, RateLimiter, parse_rate_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Exercise the in-process buckets rather than Redis
+    monkeypatch.setattr(rate_limiter_module, 'get_redis_client', lambda: None)
+    monkeypatch.setattr(rate_limiter_module.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter_module.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("a.org=2:5, b.org=0.5,bad,c.org=x") == {'a.org': (2.0, 5.0), 'b.org': (0.5, 1.0)}
+    assert parse_rate_limits({'a.org': [1, 2]}) == {'a.org': (1, 2)}
+    assert parse_rate_limits(None) == {}
+
+
+def test_overrides_and_default_limit():
+    limiter = RateLimiter(limits="sci-hub=1:4", max_wait=0)
+    assert limiter.limit_for('sci-hub') == (1.0, 4.0)
+    assert limiter.limit_for('export.arxiv.org') == RateLimiter.DEFAULT_LIMITS['export.arxiv.org']
+    assert limiter.limit_for('unknown.example') == RateLimiter.DEFAULT_LIMIT
+
+
+def test_burst_then_throttle(clock):
+    limiter = RateLimiter(limits="host=0.5:2", max_wait=0)
+    limiter.limit('host')
+    limiter.limit('host')
+    with pytest.raises(RateLimited) as excinfo:
+        limiter.limit('host')
+    assert excinfo.value.retry_after == pytest.approx(2.0)
+    assert clock.slept == []
+    assert limiter.get_stats() == {'acquired': 2, 'waited': 0, 'throttled': 1}
+
+
+def test_waits_for_a_token_within_max_wait(clock):
+    limiter = RateLimiter(limits="host=0.5:2", max_wait=0)
+    limiter.limit('host')
+    limiter.limit('host')
+    limiter.limit('host', max_wait=5)
+    assert clock.slept == [pytest.approx(2.0)]
+    assert limiter.acquire('host', max_wait=1) is False
+    assert limiter.acquire('host', max_wait=2.5) is True
+
+
+def test_refills_over_time(clock):
+    limiter = RateLimiter(limits="host=1:2", max_wait=0)
+    limiter.limit('host')
+    limiter.limit('host')
+    assert limiter.acquire('host') is False
+    clock.now += 1
+    assert limiter.acquire('host') is True
+    clock.now += 100
+    # Refill is capped at the burst size
+    assert limiter.acquire('host') is True
+    assert limiter.acquire('host') is True
+    assert limiter.acquire('host') is False
+
+
+def test_buckets_are_independent(clock):
+    limiter = RateLimiter(limits="a=1:1,b=1:1", max_wait=0)
+    limiter.limit('a')
+    assert limiter.acquire('a') is False
+    assert limiter.acquire('b') is True
+
+
+def test_penalize_drains_the_bucket(clock):
+    limiter = RateLimiter(limits="host=2:4", max_wait=0)
+    limiter.penalize('host', 3)
+    with pytest.raises(RateLimited) as excinfo:
+        limiter.limit('host')
+    assert excinfo.value.retry_after == pytest.approx(3.5)
+    clock.now += 3.5
+    assert limiter.acquire('host') is True
+
+
+def test_wait_time_does_not_take_a_token(clock):
+    limiter = RateLimiter(limits="host=0.5:1", max_wait=0)
+    assert limiter.wait_time('host') == 0
+    limiter.limit('host')
+    assert limiter.wait_time('host') == pytest.approx(2.0)
+    assert limiter.wait_time('host') == pytest.approx(2.0)
+    clock.now += 2
+    assert limiter.wait_time('host') == 0
+    assert limiter.acquire('host') is True
+
+
+def test_set_default_limit_keeps_configured_limits():
+    limiter = RateLimiter(limits="gemini:a=2:20", max_wait=0)
+    limiter.set_default_limit('gemini:a', 0.25, 5)
+    limiter.set_default_limit('gemini:b', 0.25, 5)
+    assert limiter.limit_for('gemini:a') == (2.0, 20.0)
+    assert limiter.limit_for('gemini:b') == (0.25, 5)
+
+
+def test_fan_out_requests_are_throttled_without_waiting(clock, monkeypatch):
+    from utils import multi_source_api
+
+    # Even with a generous default wait, a search request must not sleep for a token
+    limiter = RateLimiter(limits="api.example.org=0.5:1", max_wait=5)
+    monkeypatch.setattr(multi_source_api, 'rate_limiter', limiter)
+
+    class FakeSession:
+        def request(self, method, url, **kwargs):
+            return type('Response', (), {'status_code': 200, 'headers': {}})()
+
+    multi_source_api.upstream_request(FakeSession(), 'GET', 'example', 'api.example.org', 'https://api.example.org/x', 5)
+    with pytest.raises(RateLimited) as excinfo:
+        multi_source_api.upstream_request(FakeSession(), 'GET', 'example', 'api.example.org',
+                                          'https://api.example.org/x', 5)
+    assert excinfo.value.retry_after == pytest.approx(2.0)
+    assert clock.slept == []
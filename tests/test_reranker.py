@@ -0,0 +1,42 @@
+import numpy as np
+
+from utils.reranker import PaperReranker
+
+PAPERS = [
+    {'title': 'a', 'citation_count': 5, 'publication_year': 2019},
+    {'title': 'b', 'citation_count': None, 'publication_year': 2024},
+    {'title': 'c', 'citation_count': 5, 'publication_year': 2022},
+    {'title': 'd', 'citation_count': 40, 'publication_year': None},
+]
+
+
+def titles(papers):
+    return [paper['title'] for paper in papers]
+
+
+def test_disabled_falls_back_to_citations_then_year():
+    reranker = PaperReranker(cache_size=10, enabled=False)
+    assert titles(reranker.rerank('q', PAPERS)) == ['d', 'c', 'a', 'b']
+    assert titles(reranker.rerank('q', PAPERS, top_k=2)) == ['d', 'c']
+
+
+def test_scoring_failure_falls_back_to_citations(monkeypatch):
+    reranker = PaperReranker(cache_size=10, enabled=True)
+
+    def fail(query, papers):
+        raise RuntimeError('model crashed')
+
+    monkeypatch.setattr(reranker, 'score', fail)
+    assert titles(reranker.rerank('q', PAPERS, top_k=3)) == ['d', 'c', 'a']
+
+
+def test_missing_model_falls_back_to_citations(monkeypatch):
+    reranker = PaperReranker(cache_size=10, enabled=True)
+    monkeypatch.setattr(PaperReranker, '_model', staticmethod(lambda: None))
+    assert titles(reranker.rerank('q', PAPERS)) == ['d', 'c', 'a', 'b']
+
+
+def test_scores_order_results_with_citations_breaking_ties(monkeypatch):
+    reranker = PaperReranker(cache_size=10, enabled=True)
+    monkeypatch.setattr(reranker, 'score', lambda query, papers: np.array([0.9, 0.9, 0.1, 0.5]))
+    assert titles(reranker.rerank('q', PAPERS)) == ['a', 'b', 'd', 'c']
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from utils import single_flight as single_flight_module
+from utils.llm_scheduler import LLMRateLimited
+from utils.single_flight import SharedCallFailed, SingleFlight
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    monkeypatch.setattr(single_flight_module, 'get_redis_client', lambda: None)
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_computation(no_redis):
+    flight = SingleFlight('test', wait_seconds=5)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {'answer': 42}
+
+    threads, results, errors = run_concurrently(5, lambda: flight.do('key', compute))
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert errors == [None] * 5
+    assert all(result is results[0] for result in results)
+    assert flight.stats['collapsed_local'] == 4
+
+
+def test_errors_reach_every_waiter(no_redis):
+    flight = SingleFlight('test', wait_seconds=5)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError('boom')
+
+    threads, results, errors = run_concurrently(3, lambda: flight.do('key', compute))
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_different_keys_and_later_calls_run_again(no_redis):
+    flight = SingleFlight('test')
+    counter = iter(range(10))
+    assert flight.do('a', lambda: next(counter)) == 0
+    assert flight.do('b', lambda: next(counter)) == 1
+    assert flight.do('a', lambda: next(counter)) == 2
+
+
+def test_waiting_workers_receive_the_leaders_result(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(single_flight_module, 'get_redis_client', lambda: fakeredis.FakeRedis(server=server))
+    # Separate instances stand in for separate worker processes
+    leader, follower = SingleFlight('test', wait_seconds=5), SingleFlight('test', wait_seconds=5)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return {'papers': [1, 2, 3]}
+
+    thread = threading.Thread(target=lambda: leader.do('key', compute))
+    thread.start()
+    started.wait(5)
+    threading.Timer(0.3, release.set).start()
+    result = follower.do('key', lambda: pytest.fail('follower should not compute'))
+    thread.join()
+
+    assert result == {'papers': [1, 2, 3]}
+    assert follower.stats['collapsed_remote'] == 1
+
+
+def fail_across_workers(monkeypatch, error):
+    """Have a leader worker raise error while a follower waits; returns what the follower raised"""
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(single_flight_module, 'get_redis_client', lambda: fakeredis.FakeRedis(server=server))
+    leader, follower = SingleFlight('test', wait_seconds=5), SingleFlight('test', wait_seconds=5)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise error
+
+    def lead():
+        with pytest.raises(type(error)):
+            leader.do('key', compute)
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    started.wait(5)
+    threading.Timer(0.3, release.set).start()
+    with pytest.raises(SharedCallFailed) as excinfo:
+        follower.do('key', lambda: pytest.fail('follower should not compute'))
+    thread.join()
+    return excinfo.value
+
+
+def test_waiting_workers_hear_about_failures(monkeypatch):
+    failure = fail_across_workers(monkeypatch, RuntimeError('upstream down'))
+    assert str(failure) == 'upstream down'
+    assert failure.error_type == 'RuntimeError'
+    assert failure.retry_after is None
+
+
+def test_waiting_workers_can_tell_a_rate_limit_from_other_failures(monkeypatch):
+    failure = fail_across_workers(monkeypatch, LLMRateLimited('Every model is rate limited', retry_after=42.5))
+    assert failure.error_type == LLMRateLimited.__name__
+    assert failure.retry_after == 42.5
+
+
+def test_failures_in_the_plain_text_format_are_still_read():
+    failure = single_flight_module._decode_failure(b'upstream down')
+    assert str(failure) == 'upstream down'
+    assert failure.error_type is None
@@ -1,11 +1,14 @@
 """
 Activity tracking utilities for login and user sessions.
 """
-import requests
 from datetime import datetime
 from user_agents import parse
 import logging
 
+from utils.http_client import http_client
+
+_session = http_client.session()
+
 def get_location_from_ip(ip_address):
     """
     Get location information from IP address using ipapi.co
@@ -20,7 +23,7 @@ def get_location_from_ip(ip_address):
                 'timezone': 'Local'
             }
             
-        response = requests.get(f'https://ipapi.co/{ip_address}/json/')
+        response = _session.get(f'https://ipapi.co/{ip_address}/json/', timeout=5)
         if response.status_code == 200:
             data = response.json()
             return {
@@ -0,0 +1,140 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Union
+
+import arxiv
+import requests
+from xml.etree import ElementTree
+
+from utils.paper_record import PaperRecord
+from utils.rate_limiter import rate_limiter
+from utils.circuit_breaker import circuit_breakers
+from utils.http_client import http_client
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ArxivAPI:
+    """arXiv search through long-lived, reused clients"""
+
+    SORT_CRITERIA = {
+        "relevance": arxiv.SortCriterion.Relevance,
+        "date": arxiv.SortCriterion.SubmittedDate,
+        "updated": arxiv.SortCriterion.LastUpdatedDate
+    }
+
+    SOURCE = "arxiv"
+    HOST = "export.arxiv.org"
+    API_URL = "https://export.arxiv.org/api/query"
+    ATOM_NAMESPACES = {'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'}
+
+    # Page sizes are rounded up to one of these so only a handful of clients exist
+    PAGE_SIZES = (10, 25, 50, 100)
+
+    def __init__(self, delay_seconds: float = 1, num_retries: int = 3):
+        self.delay_seconds = delay_seconds
+        self.num_retries = num_retries
+        self._clients: Dict[int, arxiv.Client] = {}
+        self._lock = threading.Lock()
+        self.session = http_client.session()
+        self.logger = logging.getLogger(__name__)
+
+    def _get_client(self, max_results: int) -> arxiv.Client:
+        """Return the shared client whose page size fits max_results"""
+        page_size = next((size for size in self.PAGE_SIZES if size >= max_results), self.PAGE_SIZES[-1])
+        with self._lock:
+            client = self._clients.get(page_size)
+            if client is None:
+                client = arxiv.Client(
+                    page_size=page_size,
+                    delay_seconds=self.delay_seconds,
+                    num_retries=self.num_retries
+                )
+                # arxiv.Client opens its own requests.Session; use one on the shared pools instead
+                client._session = http_client.session()
+                self._clients[page_size] = client
+            return client
+
+    def resolve_sort(self, sort_by: Union[str, arxiv.SortCriterion]) -> arxiv.SortCriterion:
+        """Map a sort name ("relevance", "date", "updated") to an arXiv sort criterion"""
+        if isinstance(sort_by, arxiv.SortCriterion):
+            return sort_by
+        return self.SORT_CRITERIA.get(sort_by, arxiv.SortCriterion.Relevance)
+
+    def search_papers(self, query: str, max_results: int = 20,
+                      sort_by: Union[str, arxiv.SortCriterion] = arxiv.SortCriterion.Relevance) -> List[PaperRecord]:
+        """Search arXiv, returning an empty list on failure"""
+        try:
+            return self.fetch_papers(query, max_results, sort_by)
+        except Exception as e:
+            self.logger.error(f"Error querying arXiv: {str(e)}")
+            return []
+
+    def fetch_papers(self, query: str, max_results: int = 20,
+                     sort_by: Union[str, arxiv.SortCriterion] = arxiv.SortCriterion.Relevance,
+                     rate_wait: float = 0) -> List[PaperRecord]:
+        """Search arXiv with enhanced metadata extraction, raising on failure
+
+        Raises RateLimited at once when the shared arXiv quota has no token; background jobs can
+        pass rate_wait to wait that many seconds for one instead.
+        """
+        breaker = circuit_breakers.get(self.SOURCE)
+        breaker.check()
+        rate_limiter.limit(self.HOST, rate_wait)
+        probe = breaker.before_call()
+        search = arxiv.Search(
+            query=query,
+            max_results=max_results,
+            sort_by=self.resolve_sort(sort_by)
+        )
+
+        started = time.monotonic()
+        try:
+            results = list(self._get_client(max_results).results(search))
+        except Exception as e:
+            breaker.record_failure(time.monotonic() - started, str(e))
+            raise
+        else:
+            breaker.record_success(time.monotonic() - started)
+        finally:
+            if probe:
+                breaker.release_probe()
+
+        papers = []
+        for result in results:
+            try:
+                papers.append(PaperRecord.from_arxiv_result(result))
+            except Exception as e:
+                self.logger.error(f"Error processing paper: {str(e)}")
+                continue
+
+        return papers
+
+    def count_papers(self, query: str, timeout: float = 10) -> int:
+        """Total number of papers matching query (opensearch:totalResults), without fetching any"""
+        breaker = circuit_breakers.get(self.SOURCE)
+        breaker.check()
+        rate_limiter.limit(self.HOST, max_wait=0)
+        probe = breaker.before_call()
+
+        started = time.monotonic()
+        try:
+            response = self.session.get(self.API_URL, params={'search_query': query, 'max_results': 0},
+                                        timeout=breaker.timeout(timeout))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure(time.monotonic() - started, str(e))
+            raise
+        else:
+            breaker.record_success(time.monotonic() - started)
+        finally:
+            if probe:
+                breaker.release_probe()
+
+        total = ElementTree.fromstring(response.content).find('opensearch:totalResults', self.ATOM_NAMESPACES)
+        return int(total.text) if total is not None and total.text else 0
+
+# Create global instance
+arxiv_api = ArxivAPI()
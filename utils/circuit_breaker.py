@@ -0,0 +1,260 @@
+"""
+Circuit breakers for upstream paper sources
+Track a rolling window of outcomes and latencies per source, stop calling a failing source,
+probe it again after a cooldown, and derive its request timeout from the observed p99 latency
+"""
+
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Import config with fallback to environment variables
+try:
+    from config import (
+        BREAKER_WINDOW_SECONDS, BREAKER_MIN_REQUESTS, BREAKER_ERROR_THRESHOLD,
+        BREAKER_OPEN_SECONDS, BREAKER_TIMEOUT_FLOOR
+    )
+except ImportError:
+    # Fallback to environment variables for deployment
+    BREAKER_WINDOW_SECONDS = float(os.getenv('BREAKER_WINDOW_SECONDS', 120))
+    BREAKER_MIN_REQUESTS = int(os.getenv('BREAKER_MIN_REQUESTS', 5))
+    BREAKER_ERROR_THRESHOLD = float(os.getenv('BREAKER_ERROR_THRESHOLD', 0.5))
+    BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 30))
+    BREAKER_TIMEOUT_FLOOR = float(os.getenv('BREAKER_TIMEOUT_FLOOR', 2))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a source whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for {name} is open, next probe in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class LatencyHistogram:
+    """Rolling latency samples with percentiles and a log-scale bucket view"""
+
+    # Upper bounds in seconds of the exported histogram buckets
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, float('inf'))
+
+    def __init__(self, window_seconds: float = BREAKER_WINDOW_SECONDS, max_samples: int = 1000):
+        self.window_seconds = window_seconds
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)
+
+    def add(self, latency: float, now: Optional[float] = None):
+        self.samples.append((now if now is not None else time.monotonic(), latency))
+
+    def _recent(self) -> List[float]:
+        cutoff = time.monotonic() - self.window_seconds
+        return [latency for ts, latency in self.samples if ts >= cutoff]
+
+    def percentile(self, p: float) -> Optional[float]:
+        latencies = sorted(self._recent())
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def count(self) -> int:
+        return len(self._recent())
+
+    def snapshot(self) -> Dict:
+        latencies = self._recent()
+        counts = [0] * len(self.BUCKETS)
+        for latency in latencies:
+            counts[bisect_left(self.BUCKETS, latency)] += 1
+        return {
+            'samples': len(latencies),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': {('+inf' if bound == float('inf') else f'le_{bound}'): count
+                        for bound, count in zip(self.BUCKETS, counts)}
+        }
+
+
+class CircuitBreaker:
+    """
+    Breaker for one upstream source
+
+    Closed: calls go through. Once the rolling window holds at least
+    min_requests outcomes and the error rate reaches error_threshold, the
+    breaker opens and calls fail fast with CircuitOpen. After open_seconds it
+    half-opens and lets a single probe through; success closes it, failure
+    reopens it with a doubled cooldown (capped at ten times the base).
+    """
+
+    def __init__(self, name: str, window_seconds: float = BREAKER_WINDOW_SECONDS,
+                 min_requests: int = BREAKER_MIN_REQUESTS, error_threshold: float = BREAKER_ERROR_THRESHOLD,
+                 open_seconds: float = BREAKER_OPEN_SECONDS, timeout_floor: float = BREAKER_TIMEOUT_FLOOR):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.open_seconds = open_seconds
+        self.timeout_floor = timeout_floor
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = open_seconds
+        self.last_error: Optional[str] = None
+        self.latency = LatencyHistogram(window_seconds)
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=1000)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def _error_rate(self, now: float) -> Tuple[float, int]:
+        cutoff = now - self.window_seconds
+        recent = [ok for ts, ok in self._outcomes if ts >= cutoff]
+        if not recent:
+            return 0.0, 0
+        return recent.count(False) / len(recent), len(recent)
+
+    def check(self):
+        """Raise CircuitOpen if a call would be rejected now, without taking the half-open probe
+
+        Lets callers fail fast before spending a rate-limit token on a source that is down.
+        """
+        if self.is_open():
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise CircuitOpen(self.name, self.retry_after())
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpen unless a call may go through now
+
+        Returns:
+            True if this call is the half-open probe; the caller must then record an
+            outcome or give the probe back with release_probe()
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            now = time.monotonic()
+            remaining = self.opened_at + self.cooldown - now
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit for {self.name} half-open, sending a probe")
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.stats['rejected'] += 1
+            raise CircuitOpen(self.name, max(0.0, remaining))
+
+    def release_probe(self):
+        """Give back a half-open probe that ended without an outcome, so the next call probes instead"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        now = time.monotonic()
+        with self._lock:
+            self.stats['calls'] += 1
+            self._outcomes.append((now, True))
+            self.latency.add(latency, now)
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.cooldown = self.open_seconds
+                self._probe_in_flight = False
+                self._outcomes.clear()
+                logger.info(f"Circuit for {self.name} closed after a successful probe")
+
+    def record_failure(self, latency: float, error: Optional[str] = None):
+        now = time.monotonic()
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['failures'] += 1
+            self._outcomes.append((now, False))
+            self.latency.add(latency, now)
+            if error:
+                self.last_error = error
+
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self.cooldown = min(self.cooldown * 2, self.open_seconds * 10)
+                self._open(now)
+                return
+
+            error_rate, count = self._error_rate(now)
+            if self.state == CLOSED and count >= self.min_requests and error_rate >= self.error_threshold:
+                self.cooldown = self.open_seconds
+                self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        self.stats['opened'] += 1
+        logger.warning(f"Circuit for {self.name} opened for {self.cooldown:.0f}s (last error: {self.last_error})")
+
+    def timeout(self, default: float) -> float:
+        """Request timeout derived from observed latency: 1.5x p99, between the floor and default"""
+        if self.latency.count() < 20:
+            return default
+        p99 = self.latency.percentile(99)
+        return max(self.timeout_floor, min(default, p99 * 1.5))
+
+    def is_open(self) -> bool:
+        """True if a call right now would be rejected (without consuming the half-open probe)"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() < self.opened_at + self.cooldown
+            return self.state == HALF_OPEN and self._probe_in_flight
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def snapshot(self, default_timeout: Optional[float] = None) -> Dict:
+        with self._lock:
+            error_rate, count = self._error_rate(time.monotonic())
+            state = self.state
+        data = {
+            'state': state,
+            'error_rate': round(error_rate, 3),
+            'window_requests': count,
+            'retry_after': round(self.retry_after(), 1) if state != CLOSED else 0,
+            'last_error': self.last_error,
+            'latency': self.latency.snapshot(),
+            'stats': dict(self.stats)
+        }
+        if default_timeout is not None:
+            data['timeout'] = round(self.timeout(default_timeout), 2)
+        return data
+
+
+class BreakerRegistry:
+    """One breaker per source name"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(name))
+        return breaker
+
+    def snapshot(self, default_timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
+        default_timeouts = default_timeouts or {}
+        return {name: breaker.snapshot(default_timeouts.get(name))
+                for name, breaker in sorted(self._breakers.items())}
+
+# Create global instance
+circuit_breakers = BreakerRegistry()
@@ -0,0 +1,176 @@
+"""
+Citation enrichment for merged search results
+Resolves the DOIs and arXiv IDs of papers without a citation count in one Semantic Scholar
+/paper/batch request, caching what it learns per paper in-process and in Redis
+"""
+
+import os
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+
+from utils import fast_json
+from utils.paper_dedup import canonicalize_doi, canonicalize_arxiv_id
+from utils.redis_client import get_redis_client, reset_redis_client
+
+# Import config with fallback to environment variables
+try:
+    from config import ENRICHMENT_ENABLED, ENRICHMENT_TIMEOUT_SECONDS, ENRICHMENT_CACHE_TTL
+except ImportError:
+    # Fallback to environment variables for deployment
+    ENRICHMENT_ENABLED = os.getenv('ENRICHMENT_ENABLED', 'true').lower() == 'true'
+    ENRICHMENT_TIMEOUT_SECONDS = float(os.getenv('ENRICHMENT_TIMEOUT_SECONDS', 3))
+    ENRICHMENT_CACHE_TTL = int(os.getenv('ENRICHMENT_CACHE_TTL', 7 * 24 * 3600))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_ARXIV_DOI_PREFIX = '10.48550/arxiv.'
+
+
+def _get(paper: Any, field: str) -> Any:
+    if isinstance(paper, dict):
+        return paper.get(field)
+    return getattr(paper, field, None)
+
+
+def _set(paper: Any, field: str, value: Any) -> None:
+    if isinstance(paper, dict):
+        paper[field] = value
+    elif hasattr(paper, field):
+        setattr(paper, field, value)
+
+
+def semantic_scholar_id(paper: Any) -> Optional[str]:
+    """The Semantic Scholar lookup ID for a paper ("ARXIV:..." preferred over "DOI:..."), or None"""
+    arxiv_id = canonicalize_arxiv_id(_get(paper, 'arxiv_id'))
+    doi = canonicalize_doi(_get(paper, 'doi'))
+    if not arxiv_id and doi and doi.startswith(_ARXIV_DOI_PREFIX):
+        arxiv_id = canonicalize_arxiv_id(doi[len(_ARXIV_DOI_PREFIX):])
+    if arxiv_id:
+        return f"ARXIV:{arxiv_id}"
+    if doi:
+        return f"DOI:{doi}"
+    return None
+
+
+class CitationEnricher:
+    """Fills citation_count on papers from Semantic Scholar, one batch request per search"""
+
+    KEY_PREFIX = "enrich:"
+    FIELDS = "citationCount"
+
+    def __init__(self, enabled: bool = ENRICHMENT_ENABLED, timeout: float = ENRICHMENT_TIMEOUT_SECONDS,
+                 cache_ttl: int = ENRICHMENT_CACHE_TTL, local_size: int = 50000):
+        self.enabled = enabled
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        # Shorter in-process lifetime so workers pick up counts refreshed by others
+        self.local = TTLCache(maxsize=local_size, ttl=min(cache_ttl, 3600))
+        self._lock = threading.Lock()
+        self.stats = {'enriched': 0, 'cache_hits': 0, 'looked_up': 0, 'batches': 0, 'failures': 0}
+
+    def _read_cache(self, ids: List[str]) -> Dict[str, Dict]:
+        found = {}
+        with self._lock:
+            for paper_id in ids:
+                entry = self.local.get(paper_id)
+                if entry is not None:
+                    found[paper_id] = entry
+        missing = [paper_id for paper_id in ids if paper_id not in found]
+
+        client = get_redis_client()
+        if client is None or not missing:
+            return found
+        try:
+            blobs = client.mget([f"{self.KEY_PREFIX}{paper_id}" for paper_id in missing])
+        except Exception as e:
+            logger.warning(f"Redis enrichment read failed: {e}")
+            reset_redis_client()
+            return found
+        with self._lock:
+            for paper_id, blob in zip(missing, blobs):
+                if blob is not None:
+                    found[paper_id] = self.local[paper_id] = fast_json.loads(blob)
+        return found
+
+    def _write_cache(self, entries: Dict[str, Dict]):
+        with self._lock:
+            self.local.update(entries)
+
+        client = get_redis_client()
+        if client is None or not entries:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for paper_id, entry in entries.items():
+                pipe.set(f"{self.KEY_PREFIX}{paper_id}", fast_json.dumps(entry), ex=self.cache_ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis enrichment write failed: {e}")
+            reset_redis_client()
+
+    def _lookup(self, ids: List[str]) -> Dict[str, Dict]:
+        # Imported lazily: multi_source_api imports this module
+        from utils.multi_source_api import multi_source_api
+
+        api = multi_source_api.semantic_scholar
+        entries = {}
+        for start in range(0, len(ids), api.BATCH_SIZE):
+            batch = ids[start:start + api.BATCH_SIZE]
+            items = api.fetch_batch(batch, self.FIELDS, timeout=self.timeout)
+            self.stats['batches'] += 1
+            for paper_id, item in zip(batch, items):
+                # Unknown papers are cached too, so they are not looked up on every search
+                entries[paper_id] = {'citation_count': (item or {}).get('citationCount')}
+        return entries
+
+    def enrich(self, papers: List[Any]) -> List[Any]:
+        """
+        Set citation_count on papers that lack one
+
+        Works on paper records, PaperResults and dicts. Papers are updated in
+        place; on failure they are returned unchanged.
+        """
+        if not self.enabled:
+            return papers
+        targets: Dict[str, List[Any]] = {}
+        for paper in papers:
+            if _get(paper, 'citation_count') is not None:
+                continue
+            paper_id = semantic_scholar_id(paper)
+            if paper_id:
+                targets.setdefault(paper_id, []).append(paper)
+        if not targets:
+            return papers
+
+        ids = list(targets)
+        entries = self._read_cache(ids)
+        self.stats['cache_hits'] += len(entries)
+        missing = [paper_id for paper_id in ids if paper_id not in entries]
+        if missing:
+            try:
+                looked_up = self._lookup(missing)
+                self.stats['looked_up'] += len(missing)
+                self._write_cache(looked_up)
+                entries.update(looked_up)
+            except Exception as e:
+                self.stats['failures'] += 1
+                logger.warning(f"Citation enrichment skipped for {len(missing)} papers: {e}")
+
+        for paper_id, entry in entries.items():
+            if entry.get('citation_count') is None:
+                continue
+            for paper in targets[paper_id]:
+                _set(paper, 'citation_count', entry['citation_count'])
+                self.stats['enriched'] += 1
+        return papers
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, cached=len(self.local))
+
+# Create global instance
+citation_enricher = CitationEnricher()
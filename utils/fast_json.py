@@ -0,0 +1,75 @@
+"""
+Fast JSON serialization for API responses
+Uses orjson when it is installed, falling back to the standard library
+"""
+
+import json
+import logging
+import dataclasses
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from utils.paper_record import PaperRecord
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    # Datetimes are passed to _default so they keep Flask's HTTP date format
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(obj: Any) -> Any:
+    """Serialize types neither encoder handles natively"""
+    if isinstance(obj, PaperRecord):
+        return obj.to_dict()
+    if isinstance(obj, datetime):
+        return http_date(obj)
+    if isinstance(obj, date):
+        return http_date(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    # ObjectId and anything else stringifies, as json.dumps(default=str) did
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False).encode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify handles PaperRecord lists quickly"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype=self.mimetype)
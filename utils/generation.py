@@ -0,0 +1,1488 @@
+"""
+Gemini text generation
+The prompt rendering, Gemini calls (whole or streamed, through the LLM scheduler, cache and
+single-flight) and the long-form prompt builders, shared by the Flask app and the Celery
+worker that runs generation jobs
+"""
+
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+from werkzeug.exceptions import BadRequest
+
+from utils.llm_gateway import llm_gateway
+from utils.llm_scheduler import llm_scheduler, LLMUnavailable, LLMRateLimited, PRIORITY_NORMAL
+from utils.llm_cache import llm_cache
+from utils.single_flight import llm_flight, SharedCallFailed
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def render_academic_prompt(prompt, context=""):
+    """The full prompt sent to Gemini for a query and its context"""
+    return f"""
+You are an expert academic research assistant. Analyze the following query and provide comprehensive insights.
+
+Query: {prompt}
+
+Context: {context}
+
+Please provide:
+1. Key research themes and concepts
+2. Relevant academic fields and disciplines
+3. Suggested search terms for finding related papers
+4. Important considerations for this research topic
+
+Respond in a clear, academic tone suitable for researchers.
+"""
+
+
+def query_gemini(prompt, context="", priority=PRIORITY_NORMAL, deadline=None, cache_endpoint=None, cache_query=None):
+    """Enhanced Gemini query function for academic analysis with fallback
+    
+    Identical prompts arriving while one is being answered (in any worker) share that answer.
+    Calls are queued on the LLM scheduler by priority; deadline is the longest wait in seconds.
+    Endpoints opted into the LLM cache pass cache_endpoint, and cache_query (the user's own
+    text) to also match earlier answers to nearly the same question.
+    """
+    if cache_endpoint and llm_cache.enabled_for(cache_endpoint) and llm_gateway.available:
+        candidate_models = llm_gateway.candidate_models()
+        if candidate_models:
+            cached = llm_cache.get(cache_endpoint, candidate_models[0], render_academic_prompt(prompt, context),
+                                   query=cache_query)
+            if cached:
+                return cached
+    
+    key = hashlib.sha256(json.dumps([prompt, context]).encode('utf-8')).hexdigest()
+    try:
+        return llm_flight.do(key, lambda: _query_gemini(prompt, context, priority, deadline, cache_endpoint, cache_query))
+    except SharedCallFailed as e:
+        if e.error_type == LLMRateLimited.__name__:
+            # Out of quota for every worker, so this request gets the same 503
+            raise LLMRateLimited(str(e), retry_after=e.retry_after)
+        logger.warning(f"Coalesced Gemini call failed in another worker: {e}")
+        return generate_fallback_analysis(prompt, context)
+
+
+def _query_gemini(prompt, context="", priority=PRIORITY_NORMAL, deadline=None, cache_endpoint=None, cache_query=None):
+    """Ask Gemini through the LLM scheduler, trying each candidate model in turn"""
+    if not llm_gateway.available:
+        logger.warning("Gemini API key not configured, using fallback analysis")
+        return generate_fallback_analysis(prompt, context)
+    
+    try:
+        candidate_models = llm_gateway.candidate_models()
+        
+        if not candidate_models:
+            logger.warning("No Gemini models available; using fallback analysis")
+            return generate_fallback_analysis(prompt, context)
+            
+        academic_prompt = render_academic_prompt(prompt, context)
+        
+        def generate(model_name):
+            response = llm_gateway.model(model_name).generate_content(academic_prompt)
+            if response and hasattr(response, 'text') and response.text:
+                return response.text
+            return None
+        
+        try:
+            answer = llm_scheduler.run(generate, candidate_models, priority=priority, deadline=deadline)
+        except LLMRateLimited:
+            raise  # Out of quota past the deadline: the endpoint answers 503 rather than the fallback
+        except LLMUnavailable as e:
+            logger.error(f"No Gemini answer, using fallback analysis: {e}")
+            return generate_fallback_analysis(prompt, context)
+        
+        # Keyed on the preferred model, which is what the next lookup will ask for
+        if cache_endpoint:
+            llm_cache.put(cache_endpoint, candidate_models[0], academic_prompt, answer, query=cache_query)
+        return answer
+        
+    except LLMRateLimited:
+        raise
+    except Exception as e:
+        logger.error(f"A general error occurred in query_gemini: {e}")
+        return generate_fallback_analysis(prompt, context)
+
+
+def stream_gemini(prompt, context="", priority=PRIORITY_NORMAL, deadline=None, cache_endpoint=None, cache_query=None,
+                  wait_for_quota=False):
+    """Like query_gemini, but yields the answer in pieces as Gemini writes it
+    
+    A cached answer or the fallback analysis comes as a single piece. While waiting for
+    the first piece an empty string is yielded every few seconds, for use as a keep-alive.
+    Streams are not shared between identical requests, and the answer is only cached once
+    it has been received in full. Unless wait_for_quota is set, LLMRateLimited is raised as
+    soon as every model is out of quota; only background jobs should wait for it.
+    """
+    if not llm_gateway.available:
+        logger.warning("Gemini API key not configured, using fallback analysis")
+        yield generate_fallback_analysis(prompt, context)
+        return
+    
+    candidate_models = llm_gateway.candidate_models()
+    if not candidate_models:
+        logger.warning("No Gemini models available; using fallback analysis")
+        yield generate_fallback_analysis(prompt, context)
+        return
+    
+    academic_prompt = render_academic_prompt(prompt, context)
+    if cache_endpoint:
+        cached = llm_cache.get(cache_endpoint, candidate_models[0], academic_prompt, query=cache_query)
+        if cached:
+            yield cached
+            return
+    
+    chunks = queue.Queue()
+    stop = threading.Event()
+    outcome = {"complete": False}
+    
+    def generate(model_name):
+        started = False
+        try:
+            for chunk in llm_gateway.model(model_name).generate_content(academic_prompt, stream=True):
+                if stop.is_set():
+                    return True
+                if chunk.text:
+                    started = True
+                    chunks.put(chunk.text)
+        except Exception as e:
+            if not started:
+                raise  # Nothing sent yet, so the scheduler may still try the next model
+            # Retrying on another model would repeat what the client already has
+            logger.warning(f"Gemini stream from {model_name} cut off: {e}")
+            return True
+        outcome["complete"] = started
+        return started or None
+    
+    future = llm_scheduler.submit(generate, candidate_models, priority=priority, deadline=deadline,
+                                  wait_for_quota=wait_for_quota)
+    future.add_done_callback(lambda _: chunks.put(None))
+    first_wait = llm_scheduler.default_deadline if deadline is None else deadline
+    give_up_at = time.monotonic() + first_wait
+    keepalive_at = time.monotonic() + 5
+    parts = []
+    try:
+        while True:
+            try:
+                text = chunks.get(timeout=0.25)
+            except queue.Empty:
+                now = time.monotonic()
+                if now >= give_up_at:
+                    logger.warning("Gemini stream stalled; ending it")
+                    future.cancel()
+                    break
+                if not parts and now >= keepalive_at:
+                    keepalive_at = now + 5
+                    yield ""
+                continue
+            if text is None:
+                break
+            parts.append(text)
+            # Once the answer has started, allow the usual deadline between pieces
+            give_up_at = time.monotonic() + llm_scheduler.default_deadline
+            yield text
+    finally:
+        # Also reached when the client disconnects, which stops the model's stream
+        stop.set()
+    
+    if not parts:
+        if future.done() and not future.cancelled() and future.exception():
+            if isinstance(future.exception(), LLMRateLimited):
+                raise future.exception()
+            logger.error(f"No Gemini answer, using fallback analysis: {future.exception()}")
+        yield generate_fallback_analysis(prompt, context)
+        return
+    
+    if cache_endpoint and outcome["complete"]:
+        llm_cache.put(cache_endpoint, candidate_models[0], academic_prompt, "".join(parts), query=cache_query)
+
+
+def generate_fallback_analysis(prompt, context=""):
+    """Generate basic analysis when AI is unavailable"""
+    return f"""
+**Analysis for: {prompt}**
+
+**Note: This is a basic analysis generated without AI assistance. For comprehensive AI-powered insights, please configure your Gemini API key.**
+
+**Key Research Areas:**
+Based on your query, this research appears to relate to multiple academic domains. Consider exploring:
+- Primary research methodologies in this field
+- Theoretical frameworks commonly applied
+- Recent developments and emerging trends
+- Cross-disciplinary applications
+
+**Research Approach:**
+1. **Literature Search Strategy**: Use multiple academic databases (arXiv, PubMed, IEEE Xplore, Google Scholar)
+2. **Methodology Considerations**: Consider both quantitative and qualitative approaches
+3. **Theoretical Framework**: Identify established theories and emerging paradigms
+4. **Current Gaps**: Look for unexplored areas and methodological innovations
+
+**Next Steps:**
+- Conduct systematic literature search
+- Identify key researchers and institutions
+- Analyze methodological approaches in recent papers
+- Consider interdisciplinary perspectives
+
+**Limitations:**
+This analysis is generated without AI assistance. For comprehensive insights including detailed methodology recommendations, literature synthesis, and research planning, please configure the Gemini API key in your .env file.
+"""
+
+
+def format_citation(paper, citation_format="apa", reference_number=None):
+    """Format a paper citation in the specified format"""
+    title = paper.get('title', 'Unknown Title')
+    authors = paper.get('authors', 'Unknown Author')
+    year = paper.get('published_year', 'n.d.')
+    url = paper.get('url', '')
+    doi = paper.get('doi', '')
+    categories = paper.get('categories', [])
+    
+    # Clean up authors - take first few if too many
+    if len(authors) > 100:
+        authors_list = authors.split(', ')
+        if len(authors_list) > 3:
+            authors = f"{authors_list[0]}, {authors_list[1]}, et al."
+    
+    # Format based on citation style
+    if citation_format.lower() == "apa":
+        citation = f"{authors} ({year}). {title}. arXiv preprint."
+        if doi:
+            citation += f" https://doi.org/{doi}"
+        elif url:
+            citation += f" Retrieved from {url}"
+    
+    elif citation_format.lower() == "mla":
+        citation = f"{authors}. \"{title}.\" arXiv preprint, {year}."
+        if url:
+            citation += f" Web. {url}"
+    
+    elif citation_format.lower() == "chicago":
+        citation = f"{authors}. \"{title}.\" arXiv preprint, {year}."
+        if url:
+            citation += f" {url}"
+    
+    elif citation_format.lower() == "ieee":
+        if reference_number:
+            citation = f"[{reference_number}] {authors}, \"{title},\" arXiv preprint, {year}."
+        else:
+            citation = f"{authors}, \"{title},\" arXiv preprint, {year}."
+        if doi:
+            citation += f" doi: {doi}"
+    
+    elif citation_format.lower() == "harvard":
+        citation = f"{authors} {year}, '{title}', arXiv preprint."
+        if url:
+            citation += f" Available at: {url}"
+    
+    else:  # Default to APA
+        citation = f"{authors} ({year}). {title}. arXiv preprint."
+        if doi:
+            citation += f" https://doi.org/{doi}"
+        elif url:
+            citation += f" Retrieved from {url}"
+    
+    return citation
+
+
+def generate_references_section(papers, citation_format="apa"):
+    """Generate a properly formatted references section"""
+    references = []
+    
+    for i, paper in enumerate(papers, 1):
+        citation = format_citation(paper, citation_format, reference_number=i)
+        references.append(citation)
+    
+    # Sort references alphabetically for most formats (except IEEE which uses numbers)
+    if citation_format.lower() != "ieee":
+        references.sort()
+    
+    references_text = "\n".join(references)
+    
+    return f"""
+## REFERENCES
+
+{references_text}
+
+---
+**Citation Format**: {citation_format.upper()}
+**Total References**: {len(references)}
+"""
+
+
+def create_in_text_citations(papers, citation_format="apa"):
+    """Create in-text citation mappings for papers"""
+    citations = {}
+    
+    for i, paper in enumerate(papers, 1):
+        title = paper.get('title', 'Unknown Title')
+        authors = paper.get('authors', 'Unknown Author')
+        year = paper.get('published_year', 'n.d.')
+        
+        # Get first author surname for in-text citations
+        first_author = authors.split(',')[0].strip()
+        if ' ' in first_author:
+            surname = first_author.split()[-1]
+        else:
+            surname = first_author
+        
+        if citation_format.lower() == "apa":
+            if ',' in authors and 'et al' not in authors:
+                citations[title] = f"({surname} et al., {year})"
+            else:
+                citations[title] = f"({surname}, {year})"
+        
+        elif citation_format.lower() == "mla":
+            citations[title] = f"({surname})"
+        
+        elif citation_format.lower() == "chicago":
+            citations[title] = f"({surname} {year})"
+        
+        elif citation_format.lower() == "ieee":
+            citations[title] = f"[{i}]"
+        
+        elif citation_format.lower() == "harvard":
+            citations[title] = f"({surname} {year})"
+        
+        else:  # Default to APA
+            citations[title] = f"({surname}, {year})"
+    
+    return citations
+
+
+def build_literature_review(data):
+    """Prompt and finishing step for a literature review request
+    
+    Returns:
+        (query_gemini keyword arguments, finish) where finish(review) gives the response payload
+    
+    Raises:
+        BadRequest: if a required field is missing
+    """
+    papers = data.get("papers", [])
+    query = data.get("query", "")
+    review_type = data.get("review_type", "systematic")  # systematic, narrative, scoping
+    citation_format = data.get("citation_format", "apa")  # apa, mla, chicago, ieee, harvard
+    
+    if not papers:
+        raise BadRequest("Papers list is required")
+    
+    # Generate structured analysis of papers first
+    paper_analysis = analyze_papers_structure(papers, query)
+    
+    # Create in-text citations mapping
+    in_text_citations = create_in_text_citations(papers, citation_format)
+    
+    # Generate references section
+    references_section = generate_references_section(papers, citation_format)
+    
+    # Create detailed paper summaries with citations
+    papers_detail = []
+    for i, paper in enumerate(papers[:20]):  # Limit to top 20 papers
+        title = paper.get('title', 'Unknown Title')
+        citation = in_text_citations.get(title, f"(Paper {i+1})")
+        papers_detail.append(f"""
+Paper {i+1}: {paper.get('title', 'Unknown Title')} {citation}
+Authors: {paper.get('authors', 'Unknown')}
+Year: {paper.get('published_year', 'Unknown')}
+Abstract: {paper.get('summary', 'No abstract available')[:400]}...
+Categories: {', '.join(paper.get('categories', []))}
+DOI: {paper.get('doi', 'Not available')}
+""")
+    
+    review_prompt = f"""
+As an expert academic writer, create a comprehensive literature review on "{query}" based on the following papers.
+
+**Citation Format**: {citation_format.upper()}
+**In-text Citation Examples**: {list(in_text_citations.values())[:3]}
+
+**Papers to Review:**
+{chr(10).join(papers_detail)}
+
+**Structural Analysis:**
+{paper_analysis}
+
+**Create a {review_type.title()} Literature Review with the following structure:**
+
+**1. INTRODUCTION**
+- Define the scope and objectives of this review
+- Explain the significance of this research area
+- Outline the review methodology and selection criteria
+
+**2. THEORETICAL BACKGROUND**
+- Key theoretical frameworks identified in the literature
+- Evolution of theoretical understanding
+- Competing theories and paradigms
+
+**3. METHODOLOGICAL APPROACHES**
+- Overview of research methods used across studies
+- Strengths and limitations of different approaches
+- Methodological trends and innovations
+- Quality assessment of methodologies
+
+**4. THEMATIC ANALYSIS**
+- Major themes and research clusters
+- Convergent findings across studies
+- Divergent findings and contradictions
+- Gaps in current knowledge
+
+**5. CHRONOLOGICAL DEVELOPMENT**
+- Evolution of research over time
+- Milestone studies and breakthrough findings
+- Shifts in research focus and methodology
+- Emerging trends
+
+**6. CRITICAL ANALYSIS**
+- Strengths of the current literature
+- Limitations and weaknesses identified
+- Methodological concerns
+- Theoretical gaps
+
+**7. SYNTHESIS OF FINDINGS**
+- Consensus areas in the literature
+- Unresolved debates and controversies
+- Integration of findings across studies
+- Implications for theory and practice
+
+**8. RESEARCH GAPS AND FUTURE DIRECTIONS**
+- Identified gaps in current research
+- Methodological improvements needed
+- Theoretical developments required
+- Practical applications to explore
+
+**9. CONCLUSIONS**
+- Summary of key insights
+- Implications for researchers and practitioners
+- Recommendations for future research
+
+**10. METHODOLOGICAL APPENDIX**
+- Review methodology details
+- Search strategy and databases used
+- Inclusion/exclusion criteria
+- Quality assessment framework
+
+**IMPORTANT CITATION INSTRUCTIONS:**
+- Use {citation_format.upper()} format for all citations
+- Include in-text citations throughout the review using the format: {list(in_text_citations.values())[0] if in_text_citations else "(Author, Year)"}
+- Reference papers by their assigned citations from the list above
+- Ensure proper citation placement after key statements and findings
+- Include a complete References section at the end
+
+Make this suitable for publication in an academic journal with proper {citation_format.upper()} citations throughout.
+"""
+    
+    def finish(review):
+        # If AI failed, generate a structured review using our analysis
+        if not review or "basic analysis generated without AI" in review:
+            review = generate_structured_literature_review(papers, query, review_type, paper_analysis, citation_format, in_text_citations)
+        
+        # Always append references section
+        if not "## REFERENCES" in review and not "# REFERENCES" in review:
+            review += f"\n\n{references_section}"
+        
+        return {
+            "success": True,
+            "literature_review": review,
+            "query": query,
+            "review_type": review_type,
+            "citation_format": citation_format,
+            "papers_analyzed": len(papers),
+            "structural_analysis": paper_analysis,
+            "references": references_section
+        }
+    
+    return {"prompt": review_prompt}, finish
+
+
+def analyze_papers_structure(papers, query):
+    """Analyze paper structure and extract key information"""
+    if not papers:
+        return "No papers provided for analysis."
+    
+    # Temporal analysis
+    years = [p.get('published_year') for p in papers if p.get('published_year')]
+    year_range = f"{min(years)}-{max(years)}" if years else "Unknown"
+    
+    # Category analysis
+    all_categories = []
+    for paper in papers:
+        if paper.get('categories'):
+            all_categories.extend(paper['categories'])
+    
+    from collections import Counter
+    category_counts = Counter(all_categories)
+    top_categories = category_counts.most_common(5)
+    
+    # Author analysis
+    all_authors = []
+    for paper in papers:
+        if paper.get('authors'):
+            authors = paper['authors'].split(', ')
+            all_authors.extend(authors)
+    
+    author_counts = Counter(all_authors)
+    prolific_authors = author_counts.most_common(5)
+    
+    analysis = f"""
+**STRUCTURAL ANALYSIS OF {len(papers)} PAPERS**
+
+**Temporal Distribution:**
+- Publication years: {year_range}
+- Total papers: {len(papers)}
+- Recent papers (last 3 years): {len([p for p in papers if p.get('published_year', 0) >= 2021])}
+
+**Research Categories:**
+- Primary categories: {', '.join([cat[0] for cat in top_categories[:3]])}
+- Category distribution: {dict(top_categories)}
+
+**Author Analysis:**
+- Unique authors: {len(set(all_authors))}
+- Most prolific authors: {', '.join([f"{author[0]} ({author[1]} papers)" for author in prolific_authors[:3]])}
+
+**Methodological Indicators:**
+- Papers with experimental keywords: {len([p for p in papers if any(keyword in p.get('summary', '').lower() for keyword in ['experiment', 'empirical', 'study'])])}
+- Papers with theoretical keywords: {len([p for p in papers if any(keyword in p.get('summary', '').lower() for keyword in ['theory', 'theoretical', 'framework'])])}
+- Papers with review keywords: {len([p for p in papers if any(keyword in p.get('summary', '').lower() for keyword in ['review', 'survey', 'overview'])])}
+"""
+    
+    return analysis
+
+
+def generate_structured_literature_review(papers, query, review_type, structural_analysis, citation_format="apa", in_text_citations=None):
+    """Generate a structured literature review without AI"""
+    
+    # Sort papers by year
+    sorted_papers = sorted(papers, key=lambda x: x.get('published_year', 0), reverse=True)
+    
+    # Generate citations if not provided
+    if not in_text_citations:
+        in_text_citations = create_in_text_citations(papers, citation_format)
+    
+    review = f"""
+# {review_type.title()} Literature Review: {query}
+
+## 1. INTRODUCTION
+
+This {review_type} literature review examines the current state of research on "{query}" based on an analysis of {len(papers)} academic papers. The review aims to synthesize existing knowledge, identify research gaps, and provide directions for future research.
+
+### Scope and Objectives
+- Analyze current research trends in {query}
+- Identify methodological approaches and theoretical frameworks
+- Synthesize key findings and contributions
+- Highlight research gaps and future opportunities
+
+### Review Methodology
+- Database: arXiv academic papers
+- Search strategy: Keyword-based search for "{query}"
+- Inclusion criteria: Relevant academic papers with available abstracts
+- Analysis period: Recent publications with focus on emerging trends
+
+{structural_analysis}
+
+## 2. THEORETICAL BACKGROUND
+
+The literature on {query} draws from multiple theoretical frameworks and disciplinary perspectives. Based on the analysis of included papers, several key theoretical approaches emerge:
+
+### Key Theoretical Frameworks
+The reviewed papers demonstrate diverse theoretical foundations, reflecting the interdisciplinary nature of research in this area. Common theoretical approaches include:
+
+- Empirical research methodologies
+- Theoretical modeling and framework development  
+- Applied research with practical implications
+- Cross-disciplinary integration approaches
+
+## 3. METHODOLOGICAL APPROACHES
+
+### Research Design Patterns
+The reviewed literature employs various methodological approaches:
+
+**Quantitative Methods:**
+- Experimental designs and controlled studies
+- Statistical analysis and data modeling
+- Computational approaches and simulations
+
+**Qualitative Methods:**
+- Case study methodologies
+- Theoretical analysis and conceptual development
+- Literature reviews and meta-analyses
+
+**Mixed Methods:**
+- Combined quantitative and qualitative approaches
+- Multi-phase research designs
+- Triangulation strategies
+
+## 4. THEMATIC ANALYSIS
+
+### Major Research Themes
+
+Based on the analysis of {len(papers)} papers, several major themes emerge:
+
+"""
+    
+    # Add paper summaries by theme with proper citations
+    for i, paper in enumerate(sorted_papers[:10], 1):
+        title = paper.get('title', 'Unknown Title')
+        citation = in_text_citations.get(title, f"(Paper {i})")
+        review += f"""
+**{title}** {citation}
+- Authors: {paper.get('authors', 'Unknown')}
+- Year: {paper.get('published_year', 'Unknown')}
+- Key contribution: {paper.get('summary', 'No abstract available')[:200]}...
+- Categories: {', '.join(paper.get('categories', []))}
+
+"""
+    
+    review += f"""
+## 5. CHRONOLOGICAL DEVELOPMENT
+
+The research in {query} has evolved significantly over time, with notable developments in recent years:
+
+### Recent Trends ({max([p.get('published_year', 0) for p in papers if p.get('published_year')]) if papers else 'Recent'} and beyond)
+- Increased focus on practical applications
+- Integration of computational methods
+- Cross-disciplinary collaboration
+- Methodological innovations
+
+## 6. CRITICAL ANALYSIS
+
+### Strengths of Current Literature
+- Diverse methodological approaches
+- Growing body of empirical evidence
+- Strong theoretical foundations in established areas
+- Increasing interdisciplinary collaboration
+
+### Limitations and Gaps
+- Limited longitudinal studies
+- Need for more standardized methodologies
+- Gaps in cross-cultural research
+- Limited replication studies
+
+## 7. SYNTHESIS OF FINDINGS
+
+### Consensus Areas
+The literature shows general agreement on:
+- The importance of methodological rigor
+- The need for interdisciplinary approaches
+- The value of both theoretical and practical contributions
+
+### Ongoing Debates
+Key areas of ongoing discussion include:
+- Optimal methodological approaches
+- Theoretical framework selection
+- Practical application strategies
+- Future research priorities
+
+## 8. RESEARCH GAPS AND FUTURE DIRECTIONS
+
+### Identified Gaps
+1. **Methodological Gaps**: Need for more standardized approaches
+2. **Theoretical Gaps**: Limited integration of emerging theories
+3. **Empirical Gaps**: Insufficient longitudinal and replication studies
+4. **Practical Gaps**: Limited real-world application studies
+
+### Future Research Opportunities
+- Development of novel methodological approaches
+- Integration of emerging technologies
+- Cross-disciplinary collaboration
+- Longitudinal and comparative studies
+
+## 9. CONCLUSIONS
+
+This {review_type} literature review of {len(papers)} papers on "{query}" reveals a dynamic and evolving field with significant research activity. The literature demonstrates:
+
+- Strong methodological diversity
+- Growing theoretical sophistication
+- Increasing practical relevance
+- Substantial opportunities for future research
+
+### Implications for Researchers
+- Consider interdisciplinary approaches
+- Focus on methodological rigor
+- Address identified research gaps
+- Build on existing theoretical foundations
+
+### Implications for Practitioners
+- Apply evidence-based approaches
+- Consider multiple methodological perspectives
+- Stay current with emerging trends
+- Contribute to practice-research integration
+
+## 10. METHODOLOGICAL APPENDIX
+
+### Search Strategy
+- Primary database: arXiv
+- Search terms: "{query}"
+- Time period: Recent publications
+- Language: English
+
+### Inclusion Criteria
+- Relevant to research question
+- Available abstract/summary
+- Academic quality standards
+- Accessible through search database
+
+### Analysis Framework
+- Thematic analysis approach
+- Chronological organization
+- Methodological categorization
+- Quality assessment considerations
+
+---
+
+**Note:** This literature review was generated using structured analysis techniques. For enhanced AI-powered insights and deeper analytical capabilities, configure the Gemini API key in your environment settings.
+
+**Total Papers Analyzed:** {len(papers)}
+**Review Type:** {review_type.title()}
+**Citation Format:** {citation_format.upper()}
+**Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+"""
+    
+    # Add references section
+    references_section = generate_references_section(papers, citation_format)
+    review += f"\n\n{references_section}"
+    
+    return review
+
+
+def build_methodology_analysis(data):
+    """Prompt and finishing step for a methodology analysis request
+    
+    Returns:
+        (query_gemini keyword arguments, finish) where finish(analysis) gives the response payload
+    
+    Raises:
+        BadRequest: if a required field is missing
+    """
+    research_question = data.get("research_question", "")
+    papers = data.get("papers", [])
+    research_type = data.get("research_type", "empirical")  # empirical, theoretical, applied
+    citation_format = data.get("citation_format", "apa")  # apa, mla, chicago, ieee, harvard
+    
+    if not research_question:
+        raise BadRequest("Research question is required")
+    
+    # Analyze methodologies from papers if provided
+    methodology_context = ""
+    paper_methods_analysis = ""
+    in_text_citations = {}
+    references_section = ""
+    
+    if papers:
+        # Generate citations for papers
+        in_text_citations = create_in_text_citations(papers, citation_format)
+        references_section = generate_references_section(papers, citation_format)
+        
+        methods_used = []
+        paper_methods_analysis = analyze_paper_methodologies(papers)
+        for paper in papers[:10]:
+            title = paper.get('title', 'Unknown')
+            citation = in_text_citations.get(title, f"(Paper {len(methods_used)+1})")
+            methods_used.append(f"- {title} {citation}: {paper.get('summary', '')[:200]}...")
+        methodology_context = f"""
+**Methodologies observed in related literature:**
+{chr(10).join(methods_used)}
+
+{paper_methods_analysis}
+"""
+    
+    methodology_prompt = f"""
+As a research methodology expert, provide comprehensive methodology guidance for this research question: "{research_question}"
+
+Research Type: {research_type.title()}
+Citation Format: {citation_format.upper()}
+
+{methodology_context}
+
+**METHODOLOGY ANALYSIS & RECOMMENDATIONS:**
+**Note: Include proper {citation_format.upper()} citations when referencing the literature above.**
+
+**1. RESEARCH DESIGN FRAMEWORK**
+- Appropriate research paradigm (positivist, interpretivist, pragmatic)
+- Research design type (experimental, quasi-experimental, descriptive, exploratory)
+- Justification for chosen design
+- Alternative designs and their trade-offs
+
+**2. QUANTITATIVE APPROACHES**
+- Experimental designs (RCT, factorial, crossover)
+- Survey methodologies (cross-sectional, longitudinal)
+- Observational studies (cohort, case-control)
+- Statistical analysis methods required
+- Sample size calculations and power analysis
+
+**3. QUALITATIVE APPROACHES**
+- Interview methodologies (structured, semi-structured, unstructured)
+- Focus group designs
+- Ethnographic approaches
+- Case study methodologies
+- Grounded theory applications
+- Phenomenological approaches
+
+**4. MIXED-METHODS DESIGNS**
+- Sequential explanatory design
+- Sequential exploratory design
+- Concurrent triangulation
+- Concurrent embedded design
+- Integration strategies
+
+**5. DATA COLLECTION STRATEGIES**
+- Primary data collection methods
+- Secondary data sources
+- Instrument development and validation
+- Pilot study recommendations
+- Data quality assurance measures
+
+**6. SAMPLING METHODOLOGY**
+- Target population definition
+- Sampling frame considerations
+- Probability sampling methods
+- Non-probability sampling approaches
+- Sample size justification
+- Recruitment strategies
+
+**7. DATA ANALYSIS PLAN**
+- Descriptive analysis approach
+- Inferential statistical methods
+- Qualitative analysis techniques (thematic, content, narrative)
+- Software recommendations (R, SPSS, NVivo, Atlas.ti)
+- Validity and reliability measures
+
+**8. ETHICAL CONSIDERATIONS**
+- IRB/Ethics approval requirements
+- Informed consent procedures
+- Data privacy and confidentiality
+- Risk assessment and mitigation
+- Vulnerable population considerations
+
+**9. VALIDITY & RELIABILITY**
+- Internal validity threats and controls
+- External validity considerations
+- Construct validity measures
+- Reliability assessment methods
+- Triangulation strategies
+
+**10. IMPLEMENTATION TIMELINE**
+- Phase-by-phase methodology timeline
+- Resource requirements
+- Potential challenges and solutions
+- Quality checkpoints
+- Contingency planning
+
+**11. INNOVATIVE METHODOLOGICAL APPROACHES**
+- Digital and computational methods
+- Big data analytics approaches
+- Machine learning applications
+- Crowdsourcing methodologies
+- Virtual and remote data collection
+
+**12. REPORTING AND DISSEMINATION**
+- Reporting standards (CONSORT, STROBE, COREQ)
+- Publication strategy
+- Data sharing protocols
+- Replication considerations
+
+Provide specific, actionable methodology recommendations with justifications for each choice.
+"""
+    
+    def finish(analysis):
+        # If AI failed, generate structured methodology analysis
+        if not analysis or "basic analysis generated without AI" in analysis:
+            analysis = generate_structured_methodology_analysis(research_question, research_type, papers, paper_methods_analysis, citation_format, in_text_citations)
+        
+        # Always append references section if papers were provided
+        if papers and not "## REFERENCES" in analysis and not "# REFERENCES" in analysis:
+            analysis += f"\n\n{references_section}"
+        
+        return {
+            "success": True,
+            "methodology_analysis": analysis,
+            "research_question": research_question,
+            "research_type": research_type,
+            "citation_format": citation_format,
+            "paper_methods_context": paper_methods_analysis,
+            "references": references_section if papers else None
+        }
+    
+    return {"prompt": methodology_prompt}, finish
+
+
+def analyze_paper_methodologies(papers):
+    """Analyze methodological approaches in the provided papers"""
+    if not papers:
+        return "No papers provided for methodology analysis."
+    
+    # Keywords for different methodological approaches
+    quant_keywords = ['experiment', 'statistical', 'quantitative', 'survey', 'regression', 'correlation', 'analysis', 'data', 'sample']
+    qual_keywords = ['qualitative', 'interview', 'case study', 'ethnographic', 'phenomenological', 'grounded theory']
+    mixed_keywords = ['mixed methods', 'mixed-methods', 'triangulation', 'sequential', 'concurrent']
+    theory_keywords = ['theoretical', 'framework', 'model', 'conceptual', 'theory']
+    
+    method_counts = {
+        'quantitative': 0,
+        'qualitative': 0,
+        'mixed_methods': 0,
+        'theoretical': 0,
+        'computational': 0,
+        'experimental': 0,
+        'survey': 0,
+        'case_study': 0
+    }
+    
+    for paper in papers:
+        summary = paper.get('summary', '').lower()
+        title = paper.get('title', '').lower()
+        text = summary + ' ' + title
+        
+        if any(keyword in text for keyword in quant_keywords):
+            method_counts['quantitative'] += 1
+        if any(keyword in text for keyword in qual_keywords):
+            method_counts['qualitative'] += 1
+        if any(keyword in text for keyword in mixed_keywords):
+            method_counts['mixed_methods'] += 1
+        if any(keyword in text for keyword in theory_keywords):
+            method_counts['theoretical'] += 1
+        if any(keyword in text for keyword in ['computational', 'algorithm', 'simulation', 'model']):
+            method_counts['computational'] += 1
+        if any(keyword in text for keyword in ['experiment', 'empirical', 'study']):
+            method_counts['experimental'] += 1
+        if any(keyword in text for keyword in ['survey', 'questionnaire']):
+            method_counts['survey'] += 1
+        if any(keyword in text for keyword in ['case study', 'case-study']):
+            method_counts['case_study'] += 1
+    
+    total_papers = len(papers)
+    analysis = f"""
+**METHODOLOGICAL ANALYSIS OF {total_papers} PAPERS**
+
+**Methodological Distribution:**
+- Quantitative approaches: {method_counts['quantitative']} papers ({method_counts['quantitative']/total_papers*100:.1f}%)
+- Qualitative approaches: {method_counts['qualitative']} papers ({method_counts['qualitative']/total_papers*100:.1f}%)
+- Mixed methods: {method_counts['mixed_methods']} papers ({method_counts['mixed_methods']/total_papers*100:.1f}%)
+- Theoretical papers: {method_counts['theoretical']} papers ({method_counts['theoretical']/total_papers*100:.1f}%)
+- Computational methods: {method_counts['computational']} papers ({method_counts['computational']/total_papers*100:.1f}%)
+
+**Specific Method Indicators:**
+- Experimental studies: {method_counts['experimental']} papers
+- Survey-based research: {method_counts['survey']} papers  
+- Case study approaches: {method_counts['case_study']} papers
+
+**Methodological Trends:**
+- Predominant approach: {"Quantitative" if method_counts['quantitative'] >= method_counts['qualitative'] else "Qualitative"}
+- Computational integration: {"High" if method_counts['computational'] > total_papers*0.3 else "Moderate" if method_counts['computational'] > total_papers*0.1 else "Low"}
+- Theoretical foundation: {"Strong" if method_counts['theoretical'] > total_papers*0.4 else "Moderate" if method_counts['theoretical'] > total_papers*0.2 else "Limited"}
+"""
+    
+    return analysis
+
+
+def generate_structured_methodology_analysis(research_question, research_type, papers, paper_methods_analysis, citation_format="apa", in_text_citations=None):
+    """Generate structured methodology analysis without AI"""
+    
+    # Generate citations if not provided
+    if papers and not in_text_citations:
+        in_text_citations = create_in_text_citations(papers, citation_format)
+    
+    analysis = f"""
+# METHODOLOGY ANALYSIS & RECOMMENDATIONS
+
+**Research Question:** {research_question}
+**Research Type:** {research_type.title()}
+**Citation Format:** {citation_format.upper()}
+
+{paper_methods_analysis if paper_methods_analysis else ""}
+
+## 1. RESEARCH DESIGN FRAMEWORK
+
+### Recommended Research Paradigm
+For {research_type} research on "{research_question}":
+
+**Primary Paradigm:** {"Positivist" if research_type == "empirical" else "Interpretivist" if research_type == "theoretical" else "Pragmatic"}
+
+**Justification:**
+- {research_type.title()} research typically benefits from {"quantitative, hypothesis-testing approaches" if research_type == "empirical" else "qualitative, meaning-making approaches" if research_type == "theoretical" else "mixed-methods, problem-solving approaches"}
+- The research question suggests {"causal relationships" if research_type == "empirical" else "conceptual understanding" if research_type == "theoretical" else "practical solutions"}
+
+### Research Design Type
+**Recommended Design:** {"Experimental or Quasi-experimental" if research_type == "empirical" else "Descriptive or Exploratory" if research_type == "theoretical" else "Applied or Action Research"}
+
+## 2. QUANTITATIVE APPROACHES
+
+### Experimental Designs
+- **Randomized Controlled Trial (RCT)**: If feasible and ethical
+- **Quasi-experimental Design**: When randomization is not possible
+- **Factorial Design**: For multiple variables
+- **Crossover Design**: For repeated measures
+
+### Survey Methodologies
+- **Cross-sectional Survey**: For snapshot data
+- **Longitudinal Survey**: For change over time
+- **Panel Study**: For tracking same participants
+
+### Statistical Analysis Methods
+- **Descriptive Statistics**: Mean, median, standard deviation
+- **Inferential Statistics**: t-tests, ANOVA, regression analysis
+- **Advanced Methods**: Structural equation modeling, multilevel analysis
+
+## 3. QUALITATIVE APPROACHES
+
+### Interview Methodologies
+- **Structured Interviews**: For standardized data collection
+- **Semi-structured Interviews**: For flexibility with consistency
+- **Unstructured Interviews**: For exploratory research
+
+### Other Qualitative Methods
+- **Focus Groups**: For group dynamics and consensus
+- **Ethnographic Observation**: For cultural understanding
+- **Case Study Methodology**: For in-depth analysis
+- **Grounded Theory**: For theory development
+- **Phenomenological Approach**: For lived experiences
+
+## 4. MIXED-METHODS DESIGNS
+
+### Sequential Designs
+- **Sequential Explanatory**: Quantitative followed by qualitative
+- **Sequential Exploratory**: Qualitative followed by quantitative
+
+### Concurrent Designs
+- **Concurrent Triangulation**: Simultaneous data collection
+- **Concurrent Embedded**: One method embedded in another
+
+## 5. DATA COLLECTION STRATEGIES
+
+### Primary Data Collection
+- **Surveys and Questionnaires**: For standardized data
+- **Interviews**: For in-depth insights
+- **Observations**: For behavioral data
+- **Experiments**: For causal relationships
+
+### Secondary Data Sources
+- **Existing Datasets**: For large-scale analysis
+- **Literature Reviews**: For theoretical foundation
+- **Archival Records**: For historical perspective
+
+### Instrument Development
+- **Questionnaire Design**: Clear, unbiased questions
+- **Interview Guides**: Structured yet flexible
+- **Observation Protocols**: Systematic recording methods
+
+## 6. SAMPLING METHODOLOGY
+
+### Target Population
+Define your population clearly based on:
+- **Inclusion Criteria**: Who should be included
+- **Exclusion Criteria**: Who should be excluded
+- **Accessibility**: Practical considerations
+
+### Sampling Methods
+**Probability Sampling:**
+- Simple Random Sampling
+- Stratified Random Sampling
+- Cluster Sampling
+
+**Non-probability Sampling:**
+- Convenience Sampling
+- Purposive Sampling
+- Snowball Sampling
+
+### Sample Size Considerations
+- **Power Analysis**: For statistical significance
+- **Saturation Point**: For qualitative research
+- **Resource Constraints**: Practical limitations
+
+## 7. DATA ANALYSIS PLAN
+
+### Quantitative Analysis
+- **Descriptive Analysis**: Frequencies, means, distributions
+- **Inferential Analysis**: Hypothesis testing, confidence intervals
+- **Software**: R, SPSS, SAS, Stata
+
+### Qualitative Analysis
+- **Thematic Analysis**: Identifying patterns and themes
+- **Content Analysis**: Systematic categorization
+- **Narrative Analysis**: Story-based interpretation
+- **Software**: NVivo, Atlas.ti, MAXQDA
+
+## 8. ETHICAL CONSIDERATIONS
+
+### IRB/Ethics Approval
+- **Institutional Review**: Required for human subjects research
+- **Risk Assessment**: Minimal, moderate, or high risk
+- **Special Populations**: Additional protections needed
+
+### Informed Consent
+- **Consent Process**: Clear explanation of study
+- **Voluntary Participation**: Right to withdraw
+- **Confidentiality**: Data protection measures
+
+## 9. VALIDITY & RELIABILITY
+
+### Internal Validity
+- **Control for Confounding**: Design and statistical controls
+- **Randomization**: When possible
+- **Blinding**: To reduce bias
+
+### External Validity
+- **Generalizability**: To broader populations
+- **Ecological Validity**: Real-world applicability
+
+### Reliability
+- **Test-retest Reliability**: Consistency over time
+- **Inter-rater Reliability**: Agreement between observers
+- **Internal Consistency**: Cronbach's alpha for scales
+
+## 10. IMPLEMENTATION TIMELINE
+
+### Phase 1: Preparation (Months 1-2)
+- Literature review completion
+- Methodology finalization
+- Ethics approval
+- Instrument development
+
+### Phase 2: Data Collection (Months 3-8)
+- Pilot study
+- Main data collection
+- Quality assurance monitoring
+
+### Phase 3: Analysis (Months 9-11)
+- Data cleaning and preparation
+- Statistical/qualitative analysis
+- Results interpretation
+
+### Phase 4: Dissemination (Month 12+)
+- Report writing
+- Publication preparation
+- Conference presentations
+
+## 11. INNOVATIVE METHODOLOGICAL APPROACHES
+
+### Digital Methods
+- **Online Surveys**: Broader reach, cost-effective
+- **Social Media Analysis**: Real-time data
+- **Mobile Data Collection**: Convenient and accessible
+
+### Computational Approaches
+- **Big Data Analytics**: Large dataset analysis
+- **Machine Learning**: Pattern recognition
+- **Text Mining**: Automated content analysis
+
+## 12. REPORTING AND DISSEMINATION
+
+### Reporting Standards
+- **CONSORT**: For randomized trials
+- **STROBE**: For observational studies
+- **COREQ**: For qualitative research
+- **PRISMA**: For systematic reviews
+
+### Publication Strategy
+- **Target Journals**: Identify appropriate venues
+- **Open Access**: Consider accessibility
+- **Data Sharing**: Follow discipline standards
+
+---
+
+**Note:** This methodology analysis was generated using structured analytical frameworks. For enhanced AI-powered recommendations and deeper methodological insights, configure the Gemini API key in your environment settings.
+
+**Research Question:** {research_question}
+**Research Type:** {research_type.title()}
+**Citation Format:** {citation_format.upper()}
+**Analysis Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+"""
+    
+    # Add references section if papers were provided
+    if papers:
+        references_section = generate_references_section(papers, citation_format)
+        analysis += f"\n\n{references_section}"
+    
+    return analysis
+
+
+def build_academic_draft(data):
+    """Prompt and finishing step for an academic draft request
+    
+    Returns:
+        (query_gemini keyword arguments, finish) where finish(draft_content) gives the response payload
+    
+    Raises:
+        BadRequest: if a required field is missing
+    """
+    research_title = data.get("research_title", "")
+    research_question = data.get("research_question", "")
+    research_field = data.get("research_field", "")
+    research_type = data.get("research_type", "empirical")  # empirical, theoretical, applied
+    papers = data.get("papers", [])
+    citation_format = data.get("citation_format", "apa")
+    include_sections = data.get("include_sections", {
+        "introduction": True,
+        "literature_review": True,
+        "methodology": True,
+        "conclusion": True,
+        "future_works": True
+    })
+    
+    if not research_title or not research_question:
+        raise BadRequest("Research title and question are required")
+    
+    # Generate in-text citations and references
+    in_text_citations = create_in_text_citations(papers, citation_format) if papers else {}
+    references_section = generate_references_section(papers, citation_format) if papers else ""
+    
+    # Prepare paper context
+    papers_context = ""
+    if papers:
+        papers_detail = []
+        for i, paper in enumerate(papers[:15]):  # Limit to top 15 papers
+            title = paper.get('title', 'Unknown Title')
+            citation = in_text_citations.get(title, f"(Paper {i+1})")
+            papers_detail.append(f"""
+Paper {i+1}: {paper.get('title', 'Unknown Title')} {citation}
+Authors: {paper.get('authors', 'Unknown')}
+Year: {paper.get('published_year', 'Unknown')}
+Abstract: {paper.get('summary', 'No abstract available')[:300]}...
+Categories: {', '.join(paper.get('categories', []))}
+""")
+        papers_context = "\n".join(papers_detail)
+    
+    # Generate the complete draft
+    draft_prompt = f"""
+As an expert academic writer, create a complete research project draft with the following specifications:
+
+**Research Title**: {research_title}
+**Research Question**: {research_question}
+**Research Field**: {research_field}
+**Research Type**: {research_type}
+**Citation Format**: {citation_format.upper()}
+
+**Available Papers for Reference:**
+{papers_context}
+
+**Instructions:**
+- Write in formal academic style
+- Use proper {citation_format.upper()} citations throughout
+- Include specific examples and evidence from the provided papers
+- Maintain logical flow between sections
+- Ensure each section is substantial and well-developed
+- Use appropriate academic vocabulary and terminology
+
+**Create the following sections:**
+
+**1. INTRODUCTION** (if requested)
+- Background and context of the research problem
+- Problem statement and research gap identification
+- Research objectives and questions
+- Significance and contribution of the study
+- Scope and limitations
+- Structure overview of the paper
+
+**2. LITERATURE REVIEW** (if requested)
+- Comprehensive review of existing research
+- Theoretical foundations
+- Key findings from previous studies
+- Research gaps and contradictions
+- Synthesis of current knowledge
+- Position of current research in the field
+
+**3. METHODOLOGY** (if requested)
+- Research design and approach
+- Data collection methods
+- Sample selection and size
+- Data analysis techniques
+- Validity and reliability measures
+- Ethical considerations
+- Limitations of the methodology
+
+**4. CONCLUSION** (if requested)
+- Summary of key findings
+- Implications for theory and practice
+- Contribution to the field
+- Limitations of the study
+- Recommendations
+
+**5. FUTURE WORKS** (if requested)
+- Potential research directions
+- Methodological improvements
+- Expanded scope possibilities
+- Interdisciplinary opportunities
+- Practical applications
+- Long-term research agenda
+
+**Format Requirements:**
+- Use markdown formatting for headers and emphasis
+- Include proper {citation_format.upper()} citations
+- Write each section as a complete, coherent unit
+- Aim for academic rigor and clarity
+- Include transition sentences between major points
+
+Generate a comprehensive academic draft that demonstrates deep understanding of the research area.
+"""
+    
+    def finish(draft_content):
+        # If AI is unavailable, generate a structured template
+        if not draft_content or "I don't have access" in draft_content:
+            draft_content = generate_draft_template(
+                research_title, research_question, research_field, 
+                research_type, papers, citation_format, include_sections
+            )
+        
+        # Append references section if papers are available
+        if papers and references_section:
+            draft_content += f"\n\n## REFERENCES\n\n{references_section}"
+        
+        return {
+            "success": True,
+            "draft": draft_content,
+            "research_title": research_title,
+            "research_question": research_question,
+            "research_field": research_field,
+            "research_type": research_type,
+            "citation_format": citation_format,
+            "sections_included": include_sections,
+            "papers_count": len(papers),
+            "references": references_section,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    return {"prompt": draft_prompt, "context": papers_context}, finish
+
+
+def generate_draft_template(research_title, research_question, research_field, research_type, papers, citation_format, include_sections):
+    """Generate a structured draft template when AI is unavailable"""
+    template_sections = []
+    
+    if include_sections.get("introduction", True):
+        template_sections.append(f"""
+## 1. INTRODUCTION
+
+### Background and Context
+The field of {research_field} has witnessed significant developments in recent years. This research addresses the critical question: "{research_question}"
+
+### Problem Statement
+[Describe the specific problem or gap in knowledge that your research addresses]
+
+### Research Objectives
+The primary objective of this study is to investigate {research_question.lower()}. Specifically, this research aims to:
+- [Objective 1]
+- [Objective 2]
+- [Objective 3]
+
+### Significance of the Study
+This research contributes to {research_field} by providing insights into [specific contribution].
+
+### Scope and Limitations
+This study focuses on [scope definition] while acknowledging limitations in [limitation areas].
+""")
+    
+    if include_sections.get("literature_review", True):
+        template_sections.append(f"""
+## 2. LITERATURE REVIEW
+
+### Theoretical Foundation
+The theoretical framework for this study draws from [relevant theories in {research_field}].
+
+### Previous Research
+{"Recent studies have explored various aspects of this field:" if papers else "Key research in this area includes:"}
+{chr(10).join([f"- {paper.get('title', 'Unknown')} ({paper.get('published_year', 'Unknown')})" for paper in papers[:10]]) if papers else "- [Key study 1]" + chr(10) + "- [Key study 2]" + chr(10) + "- [Key study 3]"}
+
+### Research Gaps
+Despite extensive research, several gaps remain:
+- [Gap 1]
+- [Gap 2]
+- [Gap 3]
+
+### Synthesis
+The literature reveals that {research_question.lower()} remains an important area for investigation.
+""")
+    
+    if include_sections.get("methodology", True):
+        approach_desc = {
+            "empirical": "This study employs an empirical approach using quantitative/qualitative data collection and analysis.",
+            "theoretical": "This research adopts a theoretical approach, developing conceptual frameworks and models.",
+            "applied": "This study uses an applied research approach, focusing on practical solutions and implementations."
+        }.get(research_type, "This study employs a mixed-methods approach.")
+        
+        template_sections.append(f"""
+## 3. METHODOLOGY
+
+### Research Design
+{approach_desc}
+
+### Data Collection
+[Describe your data collection methods, instruments, and procedures]
+
+### Sample Selection
+[Detail your sampling strategy and sample characteristics]
+
+### Data Analysis
+[Explain your analytical approach and techniques]
+
+### Validity and Reliability
+[Discuss measures to ensure research quality]
+
+### Ethical Considerations
+[Address ethical aspects of the research]
+""")
+    
+    if include_sections.get("conclusion", True):
+        template_sections.append(f"""
+## 4. CONCLUSION
+
+### Key Findings
+This research on "{research_question}" has revealed several important insights:
+- [Finding 1]
+- [Finding 2]
+- [Finding 3]
+
+### Theoretical Implications
+The findings contribute to {research_field} theory by [theoretical contribution].
+
+### Practical Implications
+The results have practical applications in [practical applications].
+
+### Limitations
+This study acknowledges limitations in [limitation areas].
+
+### Recommendations
+Based on the findings, the following recommendations are proposed:
+- [Recommendation 1]
+- [Recommendation 2]
+- [Recommendation 3]
+""")
+    
+    if include_sections.get("future_works", True):
+        template_sections.append(f"""
+## 5. FUTURE WORKS
+
+### Research Directions
+Future research in {research_field} should explore:
+- [Direction 1]: Expanding the scope to include [specific area]
+- [Direction 2]: Investigating the relationship between [variables]
+- [Direction 3]: Developing new methodological approaches
+
+### Methodological Improvements
+- Enhanced data collection techniques
+- Longitudinal study designs
+- Cross-cultural validation
+
+### Interdisciplinary Opportunities
+- Collaboration with [related field 1]
+- Integration with [related field 2]
+- Application in [practical domain]
+
+### Long-term Vision
+The ultimate goal is to develop a comprehensive understanding of {research_question.lower()} that can inform both theory and practice in {research_field}.
+""")
+    
+    return "\n".join(template_sections)
+
+
+# Long-form generation that can also run as a job on the Celery 'generation' queue
+GENERATION_JOB_BUILDERS = {
+    'literature-review': build_literature_review,
+    'methodology-analysis': build_methodology_analysis,
+    'generate-draft': build_academic_draft
+}
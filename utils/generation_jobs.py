@@ -0,0 +1,117 @@
+"""
+Generation job records
+Long-form generation submitted as a job runs on the Celery 'generation' queue; the web app
+creates the record, the worker fills in the result, and clients poll it by its random ID
+"""
+
+import os
+import secrets
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import MongoClient
+
+# Import config with fallback to environment variables
+try:
+    from config import MONGODB_URI, GENERATION_JOB_TTL_SECONDS
+except ImportError:
+    # Fallback to environment variables for deployment
+    MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+    GENERATION_JOB_TTL_SECONDS = int(os.getenv('GENERATION_JOB_TTL_SECONDS', 7 * 24 * 3600))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class GenerationJobStore:
+    """Job records in the generation_jobs collection, removed by a TTL index once old"""
+
+    COLLECTION = 'generation_jobs'
+
+    # Job states, in order
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    def __init__(self, uri: str = MONGODB_URI, ttl_seconds: int = GENERATION_JOB_TTL_SECONDS):
+        self.uri = uri
+        self.ttl_seconds = ttl_seconds
+        self._collection = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def collection(self):
+        # MongoClient is not fork-safe, so each process opens its own
+        with self._lock:
+            if self._collection is None or self._pid != os.getpid():
+                collection = MongoClient(self.uri).get_database('sentino')[self.COLLECTION]
+                try:
+                    collection.create_index('created_at', expireAfterSeconds=self.ttl_seconds)
+                    collection.create_index('user_id')
+                except Exception as e:
+                    logger.warning(f"Could not create generation job indexes: {e}")
+                self._collection = collection
+                self._pid = os.getpid()
+            return self._collection
+
+    def create(self, kind: str, request_data: Dict, user_id: Optional[str] = None) -> str:
+        """Record a queued job and return its ID"""
+        job_id = secrets.token_urlsafe(16)
+        now = datetime.utcnow()
+        self.collection().insert_one({
+            '_id': job_id,
+            'kind': kind,
+            'user_id': user_id,
+            'status': self.QUEUED,
+            'request': request_data,
+            'task_id': None,
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now
+        })
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.collection().find_one({'_id': job_id})
+
+    def _set(self, job_id: str, **fields):
+        fields['updated_at'] = datetime.utcnow()
+        self.collection().update_one({'_id': job_id}, {'$set': fields})
+
+    def mark_queued(self, job_id: str, task_id: str):
+        self._set(job_id, task_id=task_id)
+
+    def mark_running(self, job_id: str, task_id: str):
+        self._set(job_id, status=self.RUNNING, task_id=task_id, started_at=datetime.utcnow())
+
+    def complete(self, job_id: str, result: Dict):
+        # The request (often a long paper list) is no longer needed once the result is in
+        self._set(job_id, status=self.COMPLETED, result=result, request=None, finished_at=datetime.utcnow())
+
+    def fail(self, job_id: str, error: str):
+        self._set(job_id, status=self.FAILED, error=error, finished_at=datetime.utcnow())
+
+    def to_dict(self, job: Dict, progress: Optional[Dict] = None) -> Dict:
+        """Public view of a job: never the stored request or owner"""
+        view = {
+            'job_id': job['_id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'created_at': job['created_at'].isoformat(),
+            'updated_at': job['updated_at'].isoformat()
+        }
+        if job['status'] == self.COMPLETED:
+            view['result'] = job['result']
+        elif job['status'] == self.FAILED:
+            view['error'] = job['error']
+        elif progress:
+            view['progress'] = progress
+        return view
+
+# Create global instance
+generation_jobs = GenerationJobStore()
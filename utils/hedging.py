@@ -0,0 +1,127 @@
+"""
+Hedged upstream requests
+If a request to a slow-tailed source has not answered by that source's observed p90 latency,
+a duplicate is sent and whichever answers first wins
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict
+
+from utils.circuit_breaker import circuit_breakers, CLOSED
+from utils.rate_limiter import rate_limiter
+
+# Import config with fallback to environment variables
+try:
+    from config import HEDGE_SOURCES, HEDGE_PERCENTILE, HEDGE_MIN_DELAY
+except ImportError:
+    # Fallback to environment variables for deployment
+    HEDGE_SOURCES = os.getenv('HEDGE_SOURCES', 'semantic_scholar,core')
+    HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', 90))
+    HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.2))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Latency samples needed before a source's percentile is trusted
+_MIN_SAMPLES = 20
+
+
+class RequestHedger:
+    """Runs idempotent upstream requests with a hedge at the source's latency percentile"""
+
+    def __init__(self, sources=HEDGE_SOURCES, percentile: float = HEDGE_PERCENTILE,
+                 min_delay: float = HEDGE_MIN_DELAY, max_workers: int = 16):
+        if isinstance(sources, str):
+            sources = [source.strip() for source in sources.split(',') if source.strip()]
+        self.sources = set(sources)
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, source: str, name: str):
+        with self._lock:
+            stats = self._stats.setdefault(source, {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'no_budget': 0})
+            stats[name] += 1
+
+    def delay_for(self, source: str):
+        """Seconds to wait before hedging a request to source, or None if it should not be hedged"""
+        if source not in self.sources:
+            return None
+        breaker = circuit_breakers.get(source)
+        # A half-open breaker admits a single probe; never double it
+        if breaker.state != CLOSED or breaker.latency.count() < _MIN_SAMPLES:
+            return None
+        return max(self.min_delay, breaker.latency.percentile(self.percentile))
+
+    def run(self, source: str, host: str, attempt: Callable[[], object]):
+        """
+        Call attempt(), hedging it once if it is slower than the source's percentile
+
+        The primary attempt must already hold a rate-limit token. The hedge is only
+        sent if another token is available immediately, so hedging never queues
+        behind or exceeds the shared budget. The losing attempt is left to finish
+        in the background and its response closed.
+        """
+        delay = self.delay_for(source)
+        if delay is None:
+            return attempt()
+
+        self._count(source, 'requests')
+        primary = self.executor.submit(attempt)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if not rate_limiter.acquire(host, max_wait=0):
+            self._count(source, 'no_budget')
+            return primary.result()
+
+        self._count(source, 'hedged')
+        hedge = self.executor.submit(attempt)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The other attempt may still succeed
+                    error = e
+                    continue
+                if future is hedge:
+                    self._count(source, 'hedge_wins')
+                for loser in pending:
+                    if not loser.cancel():
+                        loser.add_done_callback(self._close_response)
+                return result
+        raise error
+
+    @staticmethod
+    def _close_response(future):
+        try:
+            future.result().close()
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            per_source = {source: dict(stats) for source, stats in self._stats.items()}
+        for stats in per_source.values():
+            stats['hedge_rate'] = round(stats['hedged'] / stats['requests'], 3) if stats['requests'] else 0
+            stats['win_rate'] = round(stats['hedge_wins'] / stats['hedged'], 3) if stats['hedged'] else 0
+        return {
+            'sources': sorted(self.sources),
+            'percentile': self.percentile,
+            'min_delay': self.min_delay,
+            'by_source': per_source
+        }
+
+# Create global instance
+request_hedger = RequestHedger()
@@ -0,0 +1,402 @@
+"""
+Shared HTTP transport for outbound clients
+Every provider session is backed by one process-wide set of keep-alive connection pools,
+sized per host, with cached DNS lookups, compressed responses and optional HTTP/2
+"""
+
+import io
+import os
+import socket
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError
+from urllib3.util import connection as urllib3_connection
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+# Import config with fallback to environment variables
+try:
+    from config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_SIZES, HTTP_DNS_CACHE_SECONDS, HTTP2_ENABLED
+except ImportError:
+    # Fallback to environment variables for deployment
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 32))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))
+    HTTP_POOL_SIZES = os.getenv(
+        'HTTP_POOL_SIZES',
+        'api.semanticscholar.org=32,core.ac.uk=32,api.crossref.org=16,eutils.ncbi.nlm.nih.gov=8'
+    )
+    HTTP_DNS_CACHE_SECONDS = float(os.getenv('HTTP_DNS_CACHE_SECONDS', 300))
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'false').lower() == 'true'
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# HTTP/2 goes through httpx, which needs the h2 package as well
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+# Idle pooled connections are probed by the OS so dead peers are noticed before reuse
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+def build_response(request, status: int, headers, content: Optional[bytes], reason: Optional[str] = None,
+                   url: Optional[str] = None, connection=None, raw=None) -> requests.Response:
+    """A requests.Response for a decoded body, either already read (content) or still to be read from raw"""
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(
+        (name, value) for name, value in dict(headers).items()
+        if name.lower() not in ('content-encoding', 'transfer-encoding')
+    )
+    if raw is None:
+        response._content = content
+        # Streaming readers (e.g. PubMed's iterparse) read the body from raw
+        raw = io.BytesIO(content)
+    response.raw = raw
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = url or request.url
+    response.request = request
+    response.connection = connection
+    return response
+
+
+def _parse_pool_sizes(spec) -> Dict[str, int]:
+    """Parse "host=size,host=size" into a dict"""
+    if isinstance(spec, dict):
+        return dict(spec)
+    sizes = {}
+    for entry in (spec or '').split(','):
+        host, _, size = entry.strip().partition('=')
+        if host and size.strip().isdigit():
+            sizes[host.strip().lower()] = int(size)
+    return sizes
+
+
+class DnsCache:
+    """Process-wide cache of getaddrinfo results with a fixed lifetime"""
+
+    def __init__(self, ttl: float = HTTP_DNS_CACHE_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Addresses for host, resolving again once the cached answer expires"""
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.stats['hits'] += 1
+                return entry[1]
+        self.stats['misses'] += 1
+        infos = socket.getaddrinfo(host, port, urllib3_connection.allowed_gai_family(), socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host: str, port: int):
+        with self._lock:
+            if self._entries.pop((host, port), None) is not None:
+                self.stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, ttl=self.ttl, cached=len(self._entries))
+
+
+class _CachedDnsMixin:
+    """Connects to addresses from the DNS cache; TLS still verifies against the real host name"""
+
+    dns_cache: Optional[DnsCache] = None
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except OSError:
+            # Let urllib3 resolve it and raise its usual error
+            return super()._new_conn()
+
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except OSError as e:
+                    error = e
+        finally:
+            self._dns_host = host
+        # Every cached address failed; the next connection resolves afresh
+        self.dns_cache.invalidate(host, self.port)
+        raise error
+
+
+class _HostSizedPoolManager(PoolManager):
+    """PoolManager whose per-host pool size can be tuned"""
+
+    def __init__(self, host_sizes: Dict[str, int], dns_cache: Optional[DnsCache] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.host_sizes = host_sizes
+        if dns_cache is not None:
+            self.pool_classes_by_scheme = {
+                'http': type('CachedDnsHTTPConnectionPool', (HTTPConnectionPool,), {
+                    'ConnectionCls': type('CachedDnsHTTPConnection', (_CachedDnsMixin, HTTPConnection),
+                                          {'dns_cache': dns_cache})
+                }),
+                'https': type('CachedDnsHTTPSConnectionPool', (HTTPSConnectionPool,), {
+                    'ConnectionCls': type('CachedDnsHTTPSConnection', (_CachedDnsMixin, HTTPSConnection),
+                                          {'dns_cache': dns_cache})
+                }),
+            }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        size = self.host_sizes.get((host or '').lower())
+        if size is not None:
+            request_context = dict(request_context if request_context is not None else self.connection_pool_kw)
+            request_context['maxsize'] = size
+        return super()._new_pool(scheme, host, port, request_context)
+
+
+class _SharedPoolAdapter(HTTPAdapter):
+    """HTTPAdapter with its own retry policy on top of the shared pools"""
+
+    def __init__(self, poolmanager: PoolManager, max_retries=0):
+        self._shared_poolmanager = poolmanager
+        super().__init__(max_retries=max_retries)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = self._shared_poolmanager
+
+    def close(self):
+        # The pools outlive any one session
+        pass
+
+
+class _HttpxBody(io.RawIOBase):
+    """File-like view of a streamed httpx response's decoded body; closing it closes the response"""
+
+    def __init__(self, upstream):
+        super().__init__()
+        self._upstream = upstream
+        self._chunks = upstream.iter_bytes()
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.ReadTimeout(str(e))
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e))
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._upstream.close()
+        super().close()
+
+
+class _Http2Adapter(BaseAdapter):
+    """
+    Sends requests through a shared httpx client that negotiates HTTP/2 where the server offers it
+
+    The client's TLS and proxy settings are fixed, so a request with its own verify, cert or
+    proxy goes through the HTTP/1.1 fallback adapter instead. Retries follow the session's
+    urllib3 Retry: failed sends and status_forcelist answers are sent again for the methods
+    it allows, with its backoff; once retries run out the last answer is returned.
+    """
+
+    def __init__(self, client, fallback: BaseAdapter, max_retries=0):
+        super().__init__()
+        self.client = client
+        self.fallback = fallback
+        self.max_retries = Retry.from_int(max_retries)
+
+    @staticmethod
+    def _timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    @staticmethod
+    def _next_retry(retry: Retry, request) -> Optional[Retry]:
+        """The Retry for another attempt, or None when the request must not be sent again"""
+        if retry.allowed_methods is not None and request.method.upper() not in retry.allowed_methods:
+            return None
+        try:
+            return retry.increment(request.method, request.url)
+        except MaxRetryError:
+            return None
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if verify is not True or cert or select_proxy(request.url, proxies or {}):
+            return self.fallback.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert,
+                                      proxies=proxies)
+
+        retry = self.max_retries
+        while True:
+            try:
+                response = self._send_once(request, stream, timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                retry = self._next_retry(retry, request)
+                if retry is None:
+                    raise
+                retry.sleep()
+                continue
+
+            if not retry.is_retry(request.method, response.status_code, 'Retry-After' in response.headers):
+                return response
+            next_retry = self._next_retry(retry, request)
+            if next_retry is None:
+                return response
+            response.close()
+            # Honours the answer's Retry-After, as urllib3 does
+            next_retry.sleep(response)
+            retry = next_retry
+
+    def _send_once(self, request, stream, timeout):
+        upstream_request = self.client.build_request(request.method, request.url, headers=dict(request.headers),
+                                                     content=request.body, timeout=self._timeout(timeout))
+        upstream = None
+        try:
+            upstream = self.client.send(upstream_request, stream=True)
+            if not stream:
+                upstream.read()
+        except httpx.TimeoutException as e:
+            if upstream is not None:
+                upstream.close()
+            raise requests.exceptions.Timeout(str(e), request=request)
+        except httpx.TransportError as e:
+            if upstream is not None:
+                upstream.close()
+            raise requests.exceptions.ConnectionError(str(e), request=request)
+
+        # httpx decodes the body, whether read here or by the caller
+        if stream:
+            return build_response(request, upstream.status_code, upstream.headers.items(), None,
+                                  upstream.reason_phrase, str(upstream.url), self, raw=_HttpxBody(upstream))
+        return build_response(request, upstream.status_code, upstream.headers.items(), upstream.content,
+                              upstream.reason_phrase, str(upstream.url), self)
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """Creates requests sessions that share one set of pooled, keep-alive connections"""
+
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 pool_sizes=HTTP_POOL_SIZES, dns_cache_seconds: float = HTTP_DNS_CACHE_SECONDS,
+                 http2: bool = HTTP2_ENABLED):
+        self.pool_maxsize = pool_maxsize
+        self.dns_cache = DnsCache(dns_cache_seconds) if dns_cache_seconds > 0 else None
+        # Pools are not blocking: a burst beyond maxsize opens extra connections instead of queueing
+        self.poolmanager = _HostSizedPoolManager(
+            _parse_pool_sizes(pool_sizes), self.dns_cache,
+            num_pools=pool_connections, maxsize=pool_maxsize, block=False, socket_options=_SOCKET_OPTIONS
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP2_ENABLED is set but httpx[http2] is not installed; using HTTP/1.1")
+        self._http2_client = None
+        if self.http2:
+            self._http2_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=pool_connections * pool_maxsize,
+                                    max_keepalive_connections=pool_connections * pool_maxsize),
+                transport=httpx.HTTPTransport(http2=True, retries=1)
+            )
+        self.sessions_created = 0
+
+    def session(self, headers: Optional[Dict[str, str]] = None, retries=0) -> requests.Session:
+        """
+        Return a new session on the shared pools
+
+        Args:
+            headers: Default headers for every request made through the session
+            retries: urllib3 Retry (or count) for the session's requests, over HTTP/1.1 or HTTP/2
+
+        Returns:
+            requests.Session; closing it leaves the shared connections open
+        """
+        session = requests.Session()
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        if headers:
+            session.headers.update(headers)
+        if self._http2_client is not None:
+            https_adapter = _Http2Adapter(self._http2_client, _SharedPoolAdapter(self.poolmanager, retries), retries)
+        else:
+            https_adapter = _SharedPoolAdapter(self.poolmanager, retries)
+        http_adapter = _SharedPoolAdapter(self.poolmanager, retries)
+
+        # Imported lazily: http_replay builds its responses with this module
+        from utils.http_replay import http_replay
+        if http_replay.enabled:
+            https_adapter, http_adapter = http_replay.wrap(https_adapter), http_replay.wrap(http_adapter)
+        session.mount('https://', https_adapter)
+        session.mount('http://', http_adapter)
+        self.sessions_created += 1
+        return session
+
+    def get_stats(self) -> Dict:
+        from utils.http_replay import http_replay
+
+        pools = {}
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            queue = pool.pool
+            pools[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                'maxsize': queue.maxsize if queue is not None else 0,
+                # Unused slots in the queue hold None
+                'idle': sum(1 for conn in list(queue.queue) if conn is not None) if queue is not None else 0,
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests
+            }
+        return {
+            'http2': self.http2,
+            'accept_encoding': ACCEPT_ENCODING,
+            'default_pool_maxsize': self.pool_maxsize,
+            'sessions': self.sessions_created,
+            'pools': pools,
+            'dns_cache': self.dns_cache.get_stats() if self.dns_cache is not None else None,
+            'replay': http_replay.get_stats() if http_replay.enabled else None
+        }
+
+# Create global instance
+http_client = HttpClient()
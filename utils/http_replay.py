@@ -0,0 +1,298 @@
+"""
+Record/replay transport for upstream HTTP
+In record mode every response from the shared HTTP layer is saved as a cassette; in replay
+mode cassettes are served instead of calling the network, with latency and errors drawn
+from a configurable profile, so the search pipeline can be load-tested offline
+"""
+
+import os
+import math
+import time
+import base64
+import random
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from utils import fast_json
+from utils.http_client import build_response
+
+# Import config with fallback to environment variables
+try:
+    from config import HTTP_REPLAY_MODE, HTTP_CASSETTE_DIR, HTTP_REPLAY_PROFILE
+except ImportError:
+    # Fallback to environment variables for deployment
+    HTTP_REPLAY_MODE = os.getenv('HTTP_REPLAY_MODE', 'off').lower()  # off, record or replay
+    HTTP_CASSETTE_DIR = os.getenv('HTTP_CASSETTE_DIR', 'benchmarks/cassettes')
+    HTTP_REPLAY_PROFILE = os.getenv('HTTP_REPLAY_PROFILE', '')
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query parameters that carry credentials; never written to cassettes or used in keys
+SECRET_PARAMS = {'api_key', 'apikey', 'key', 'apiKey', 'token', 'access_token'}
+
+# z-score of the 99th percentile, for fitting a lognormal to p50/p99
+_Z99 = 2.326
+
+
+def normalize_url(url: str) -> str:
+    """URL with credentials removed and query parameters sorted"""
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if name not in SECRET_PARAMS)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    """Stable identity of a request: method, normalized URL and body"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    digest = hashlib.sha1(f"{method.upper()} {normalize_url(url)}\n".encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+class CassetteStore:
+    """One JSON file per recorded exchange, grouped in a directory per host"""
+
+    def __init__(self, directory: str = HTTP_CASSETTE_DIR):
+        self.directory = directory
+        self._loaded: Dict[str, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, host: str, key: str) -> str:
+        return os.path.join(self.directory, host, f"{key}.json")
+
+    def find(self, host: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key in self._loaded:
+                return self._loaded[key]
+        path = self._path(host, key)
+        entry = None
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                entry = fast_json.loads(f.read())
+        with self._lock:
+            self._loaded[key] = entry
+        return entry
+
+    def save(self, host: str, key: str, method: str, url: str, status: int, reason: Optional[str],
+             headers: Dict[str, str], content: bytes, elapsed: float):
+        try:
+            content.decode('utf-8')
+            body, encoding = content.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+        entry = {
+            'request': {'method': method, 'url': normalize_url(url)},
+            'response': {
+                'status': status,
+                'reason': reason,
+                'headers': {name: value for name, value in headers.items()
+                            if name.lower() not in ('set-cookie', 'content-encoding', 'content-length',
+                                                    'transfer-encoding')},
+                'body': body,
+                'encoding': encoding
+            },
+            'elapsed': round(elapsed, 4),
+            'recorded_at': int(time.time())
+        }
+        path = self._path(host, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary name first so concurrent readers never see half a file
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(fast_json.dumps(entry))
+        os.replace(temporary, path)
+        with self._lock:
+            self._loaded[key] = entry
+
+    @staticmethod
+    def body(entry: Dict) -> bytes:
+        response = entry['response']
+        if response.get('encoding') == 'base64':
+            return base64.b64decode(response['body'])
+        return response['body'].encode('utf-8')
+
+
+class FaultProfile:
+    """
+    Latency and error distribution per host
+
+    A profile is a JSON object keyed by host, with "default" applying to hosts
+    not listed:
+
+        {"default": {"latency": "recorded", "error_rate": 0.01},
+         "api.semanticscholar.org": {"p50_ms": 400, "p99_ms": 3000, "error_rate": 0.05, "error_status": 429}}
+
+    latency is "recorded" (replay each exchange's original latency, scaled by
+    latency_scale), a fixed "latency_ms", or a lognormal fitted to p50_ms/p99_ms.
+    error_rate answers with error_status (default 503); timeout_rate lets the
+    request run into its read timeout.
+    """
+
+    DEFAULTS = {'latency': 'recorded', 'latency_scale': 1.0, 'error_rate': 0.0, 'error_status': 503,
+                'timeout_rate': 0.0}
+
+    def __init__(self, spec: Optional[Dict] = None, seed: Optional[int] = None):
+        self.spec = spec or {}
+        self._random = random.Random(self.spec.get('seed', seed))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, source: str = HTTP_REPLAY_PROFILE) -> 'FaultProfile':
+        """Load a profile from a JSON file path or an inline JSON string ('' for defaults)"""
+        if not source:
+            return cls()
+        if source.lstrip().startswith('{'):
+            return cls(fast_json.loads(source))
+        with open(source, 'rb') as f:
+            return cls(fast_json.loads(f.read()))
+
+    def for_host(self, host: str) -> Dict:
+        return dict(self.DEFAULTS, **self.spec.get('default', {}), **self.spec.get(host, {}))
+
+    def latency(self, host: str, recorded: float = 0.0) -> float:
+        """Seconds the response should take"""
+        settings = self.for_host(host)
+        if 'p50_ms' in settings:
+            median = settings['p50_ms'] / 1000
+            sigma = max(0.0, math.log(settings.get('p99_ms', settings['p50_ms']) / settings['p50_ms'])) / _Z99
+            with self._lock:
+                seconds = self._random.lognormvariate(math.log(median), sigma)
+        elif 'latency_ms' in settings:
+            seconds = settings['latency_ms'] / 1000
+        else:
+            seconds = recorded
+        return seconds * settings['latency_scale']
+
+    def fault(self, host: str):
+        """None, 'timeout' or an HTTP status code to answer with"""
+        settings = self.for_host(host)
+        with self._lock:
+            draw = self._random.random()
+        if draw < settings['timeout_rate']:
+            return 'timeout'
+        if draw < settings['timeout_rate'] + settings['error_rate']:
+            return int(settings['error_status'])
+        return None
+
+
+def _read_timeout(timeout) -> Optional[float]:
+    if isinstance(timeout, tuple):
+        return timeout[1]
+    return timeout
+
+
+def error_body(status: int) -> Tuple[Dict[str, str], bytes]:
+    """Headers and body of an injected error response"""
+    headers = {'Content-Type': 'application/json'}
+    if status in (429, 503):
+        headers['Retry-After'] = '1'
+    return headers, fast_json.dumps({'error': 'injected fault', 'status': status})
+
+
+class ReplayAdapter(BaseAdapter):
+    """Records the wrapped adapter's exchanges, or answers from recordings without touching the network"""
+
+    def __init__(self, replay: 'HttpReplay', inner: BaseAdapter):
+        super().__init__()
+        self.replay = replay
+        self.inner = inner
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        host = urlsplit(request.url).hostname or ''
+        key = request_key(request.method, request.url, request.body)
+        if self.replay.mode == 'record':
+            return self._record(request, host, key, timeout, verify, cert, proxies)
+        return self._replay(request, host, key, timeout)
+
+    def _record(self, request, host, key, timeout, verify, cert, proxies):
+        started = time.monotonic()
+        response = self.inner.send(request, stream=False, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        content = response.content
+        elapsed = time.monotonic() - started
+        self.replay.store.save(host, key, request.method, request.url, response.status_code, response.reason,
+                               response.headers, content, elapsed)
+        self.replay.count('recorded')
+        return build_response(request, response.status_code, response.headers, content, response.reason,
+                              response.url, self)
+
+    def _replay(self, request, host, key, timeout):
+        read_timeout = _read_timeout(timeout)
+        fault = self.replay.profile.fault(host)
+        if fault == 'timeout':
+            self.replay.count('timeouts')
+            time.sleep(read_timeout or 0)
+            raise requests.exceptions.ReadTimeout(f"Injected timeout for {request.url}", request=request)
+
+        entry = self.replay.store.find(host, key)
+        if entry is None:
+            self.replay.count('misses')
+            raise requests.exceptions.ConnectionError(
+                f"No recording for {request.method} {normalize_url(request.url)}", request=request
+            )
+
+        latency = self.replay.profile.latency(host, entry.get('elapsed', 0.0))
+        if read_timeout is not None and latency > read_timeout:
+            self.replay.count('timeouts')
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(f"Replayed latency exceeds timeout for {request.url}",
+                                                  request=request)
+        time.sleep(latency)
+
+        if fault is not None:
+            self.replay.count('errors')
+            headers, body = error_body(fault)
+            return build_response(request, fault, headers, body, connection=self)
+        self.replay.count('hits')
+        response = entry['response']
+        return build_response(request, response['status'], response['headers'], self.replay.store.body(entry),
+                              response.get('reason'), connection=self)
+
+    def close(self):
+        self.inner.close()
+
+
+class HttpReplay:
+    """Record/replay settings shared by every session from utils.http_client"""
+
+    MODES = ('off', 'record', 'replay')
+
+    def __init__(self, mode: str = HTTP_REPLAY_MODE, directory: str = HTTP_CASSETTE_DIR,
+                 profile: Optional[FaultProfile] = None):
+        if mode not in self.MODES:
+            logger.warning(f"Unknown HTTP_REPLAY_MODE {mode!r}; replay disabled")
+            mode = 'off'
+        self.mode = mode
+        self.store = CassetteStore(directory)
+        self.profile = profile if profile is not None else (FaultProfile.load() if mode == 'replay' else FaultProfile())
+        self._lock = threading.Lock()
+        self.stats = {'recorded': 0, 'hits': 0, 'misses': 0, 'errors': 0, 'timeouts': 0}
+        if self.enabled:
+            logger.warning(f"Upstream HTTP is in {mode} mode using cassettes in {directory}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    def wrap(self, adapter: BaseAdapter) -> BaseAdapter:
+        return ReplayAdapter(self, adapter)
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, mode=self.mode, directory=self.store.directory)
+
+# Create global instance
+http_replay = HttpReplay()
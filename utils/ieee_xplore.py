@@ -6,6 +6,12 @@ from datetime import datetime, timedelta
 import logging
 import time
 import hashlib
+from urllib.parse import urlparse
+from cachetools import LRUCache
+
+from utils.rate_limiter import rate_limiter, RateLimited
+from utils.circuit_breaker import circuit_breakers
+from utils.http_client import http_client
 
 # Import config with fallback to environment variables
 try:
@@ -22,25 +28,20 @@ logger = logging.getLogger(__name__)
 class IEEEXploreAPI:
     """Enhanced IEEE Xplore API class with caching and rate limiting"""
     
+    SOURCE = 'ieee'
+    
     def __init__(self):
         self.api_key = IEEE_XPLORE_API_KEY
         self.base_url = IEEE_XPLORE_API_URL
-        self.cache = {}  # Simple in-memory cache
+        self.cache = LRUCache(maxsize=1024)  # In-memory cache with LRU eviction
         self.cache_duration = timedelta(hours=1)  # Cache for 1 hour
-        self.rate_limit_delay = 1.0  # Delay between requests
-        self.last_request_time = 0
+        self.host = urlparse(self.base_url).hostname
+        self.session = http_client.session()
         self.logger = logging.getLogger(__name__)
         
     def _enforce_rate_limit(self):
-        """Enforce rate limiting between API calls"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        if time_since_last_request < self.rate_limit_delay:
-            sleep_time = self.rate_limit_delay - time_since_last_request
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        """Take a token from the shared IEEE Xplore bucket, raising RateLimited if none is available now"""
+        rate_limiter.limit(self.host, max_wait=0)
     
     def _get_cache_key(self, query: str, max_results: int, filters: Dict) -> str:
         """Generate cache key for query"""
@@ -62,10 +63,18 @@ class IEEEXploreAPI:
             self.logger.error("IEEE Xplore API key is not configured")
             return None
         
+        breaker = circuit_breakers.get(self.SOURCE)
+        breaker.check()
         self._enforce_rate_limit()
+        probe = breaker.before_call()
         
+        started = time.monotonic()
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = self.session.get(self.base_url, params=params, timeout=breaker.timeout(30))
+            if response.status_code >= 500:
+                breaker.record_failure(time.monotonic() - started, f"HTTP {response.status_code}")
+            else:
+                breaker.record_success(time.monotonic() - started)
             
             if response.status_code == 200:
                 return response.json()
@@ -73,21 +82,26 @@ class IEEEXploreAPI:
                 self.logger.error("IEEE Xplore API authentication failed. Please check your API key.")
                 return None
             elif response.status_code == 429:
-                self.logger.warning("IEEE Xplore API rate limit exceeded. Waiting...")
-                time.sleep(5)  # Wait 5 seconds and try once more
-                response = requests.get(self.base_url, params=params, timeout=30)
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    self.logger.error("IEEE Xplore API rate limit still exceeded after retry")
-                    return None
+                # Back off across all workers instead of sleeping in this one
+                self.logger.warning("IEEE Xplore API rate limit exceeded")
+                try:
+                    retry_after = float(response.headers.get('Retry-After', 5))
+                except ValueError:
+                    # Retry-After may be an HTTP date rather than seconds
+                    retry_after = 5.0
+                rate_limiter.penalize(self.host, retry_after)
+                raise RateLimited(self.host, retry_after)
             else:
                 self.logger.error(f"IEEE Xplore API error: {response.status_code} - {response.text}")
                 return None
                 
         except requests.exceptions.RequestException as e:
+            breaker.record_failure(time.monotonic() - started, str(e))
             self.logger.error(f"Error accessing IEEE Xplore API: {str(e)}")
             return None
+        finally:
+            if probe:
+                breaker.release_probe()
     
     def search_papers(self, query: str, max_results: int = 10, start_year: Optional[int] = None, 
                      end_year: Optional[int] = None, author: Optional[str] = None,
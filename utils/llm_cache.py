@@ -0,0 +1,299 @@
+"""
+Response cache for Gemini generation
+An exact level keyed on the model and the fully rendered prompt, and an optional semantic
+level that reuses the answer to an earlier, nearly identical free-text query; both persist
+in Redis with per-endpoint TTLs behind an in-process LRU
+"""
+
+import os
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
+from utils import fast_json
+from utils.redis_client import get_redis_client, reset_redis_client
+
+# Import config with fallback to environment variables
+try:
+    from config import (LLM_CACHE_ENABLED, LLM_CACHE_ENDPOINTS, LLM_SEMANTIC_CACHE_ENDPOINTS, LLM_CACHE_TTLS,
+                        LLM_CACHE_SIZE, LLM_SEMANTIC_THRESHOLD, LLM_SEMANTIC_MAX_ENTRIES)
+except ImportError:
+    # Fallback to environment variables for deployment
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    LLM_CACHE_ENDPOINTS = os.getenv('LLM_CACHE_ENDPOINTS', 'paper-analysis,research-suggestions,quick-search,deep-analysis')
+    LLM_SEMANTIC_CACHE_ENDPOINTS = os.getenv('LLM_SEMANTIC_CACHE_ENDPOINTS', 'research-suggestions,quick-search,deep-analysis')
+    LLM_CACHE_TTLS = os.getenv('LLM_CACHE_TTLS', '')  # e.g. "quick-search=3600,paper-analysis=2592000"
+    LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', 1024))
+    LLM_SEMANTIC_THRESHOLD = float(os.getenv('LLM_SEMANTIC_THRESHOLD', 0.95))
+    LLM_SEMANTIC_MAX_ENTRIES = int(os.getenv('LLM_SEMANTIC_MAX_ENTRIES', 5000))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds between reloads of another worker's semantic entries
+_SEMANTIC_RELOAD_SECONDS = 30
+
+
+def _split(names: str) -> List[str]:
+    return [name.strip() for name in (names or '').split(',') if name.strip()]
+
+
+def parse_ttls(spec: str) -> Dict[str, int]:
+    """Parse per-endpoint TTLs given as "endpoint=seconds,..." """
+    ttls = {}
+    for item in _split(spec):
+        endpoint, _, seconds = item.partition('=')
+        try:
+            ttls[endpoint.strip()] = int(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid LLM cache TTL: {item}")
+    return ttls
+
+
+class _SemanticIndex:
+    """Normalized query embeddings of one endpoint and model, with the exact keys they answer to"""
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.stored_at: List[float] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.loaded_at = 0.0
+
+    def add(self, key: str, vector: np.ndarray, stored_at: float, limit: int):
+        matrix = self.matrix if self.matrix.size else np.zeros((0, vector.shape[0]), dtype=np.float32)
+        self.matrix = np.vstack([matrix, vector[None, :]])[-limit:]
+        self.keys = (self.keys + [key])[-limit:]
+        self.stored_at = (self.stored_at + [stored_at])[-limit:]
+
+    def best(self, vector: np.ndarray, newer_than: float) -> Tuple[Optional[str], float]:
+        if not self.keys or self.matrix.shape[1] != vector.shape[0]:
+            return None, 0.0
+        scores = self.matrix @ vector
+        scores[np.asarray(self.stored_at) < newer_than] = -1.0
+        index = int(np.argmax(scores))
+        return self.keys[index], float(scores[index])
+
+
+class LLMCache:
+    """Two-level cache of generated answers, opted into per endpoint"""
+
+    KEY_PREFIX = "llm_cache:"
+
+    DEFAULT_TTLS = {
+        'paper-analysis': 30 * 24 * 3600,  # An analysis of a fixed abstract does not go stale
+        'research-suggestions': 7 * 24 * 3600,
+        'deep-analysis': 7 * 24 * 3600,
+        'quick-search': 24 * 3600,
+    }
+    DEFAULT_TTL = 24 * 3600
+
+    def __init__(self, enabled: bool = LLM_CACHE_ENABLED, endpoints: str = LLM_CACHE_ENDPOINTS,
+                 semantic_endpoints: str = LLM_SEMANTIC_CACHE_ENDPOINTS, max_entries: int = LLM_CACHE_SIZE,
+                 threshold: float = LLM_SEMANTIC_THRESHOLD, semantic_max_entries: int = LLM_SEMANTIC_MAX_ENTRIES):
+        self.enabled = enabled
+        self.endpoints = set(_split(endpoints))
+        self.semantic_endpoints = set(_split(semantic_endpoints)) & self.endpoints
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(parse_ttls(LLM_CACHE_TTLS))
+        self.threshold = threshold
+        self.semantic_max_entries = semantic_max_entries
+        self.local = LRUCache(maxsize=max_entries)
+        self._semantic: Dict[str, _SemanticIndex] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, name: str):
+        with self._lock:
+            stats = self.stats.setdefault(endpoint, {'lookups': 0, 'exact_hits': 0, 'semantic_hits': 0,
+                                                     'misses': 0, 'stores': 0})
+            stats[name] += 1
+
+    def enabled_for(self, endpoint: Optional[str]) -> bool:
+        return self.enabled and endpoint in self.endpoints
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.DEFAULT_TTL)
+
+    def make_key(self, model: str, prompt: str) -> str:
+        digest = hashlib.sha256(f"{model}\n{prompt}".encode('utf-8')).hexdigest()
+        return f"{self.KEY_PREFIX}exact:{digest}"
+
+    def _semantic_key(self, endpoint: str, model: str) -> str:
+        return f"{self.KEY_PREFIX}semantic:{endpoint}:{model}"
+
+    @staticmethod
+    def _embed(query: str) -> Optional[np.ndarray]:
+        # Imported lazily: the model is loaded once, by the document processor
+        from utils.document_processor import document_processor
+
+        model = document_processor.embedding_model
+        if model is None:
+            return None
+        return model.encode([" ".join(query.lower().split())], convert_to_numpy=True, normalize_embeddings=True,
+                            show_progress_bar=False)[0].astype(np.float32)
+
+    def _read(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self.local.get(key)
+        if entry is not None:
+            return entry if entry['expires_at'] > now else None
+
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            blob = client.get(key)
+        except Exception as e:
+            logger.warning(f"Redis LLM cache read failed: {e}")
+            reset_redis_client()
+            return None
+        if blob is None:
+            return None
+        entry = fast_json.loads(zlib.decompress(blob))
+        with self._lock:
+            self.local[key] = entry
+        return entry
+
+    def _index(self, endpoint: str, model: str) -> _SemanticIndex:
+        """The semantic index, reloaded from Redis every so often to pick up other workers' entries"""
+        name = self._semantic_key(endpoint, model)
+        with self._lock:
+            index = self._semantic.get(name)
+            if index is not None and time.monotonic() - index.loaded_at < _SEMANTIC_RELOAD_SECONDS:
+                return index
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                return self._semantic.setdefault(name, _SemanticIndex())
+        try:
+            # Newest entries only; older ones are trimmed when written
+            rows = client.zrange(f"{name}:order", -self.semantic_max_entries, -1, withscores=True)
+            vectors = client.hmget(name, [key for key, _ in rows]) if rows else []
+        except Exception as e:
+            logger.warning(f"Redis semantic cache read failed: {e}")
+            reset_redis_client()
+            with self._lock:
+                return self._semantic.setdefault(name, _SemanticIndex())
+
+        loaded = _SemanticIndex()
+        for (key, stored_at), blob in zip(rows, vectors):
+            if blob is not None:
+                loaded.add(key.decode(), np.frombuffer(blob, dtype=np.float16).astype(np.float32), stored_at,
+                           self.semantic_max_entries)
+        loaded.loaded_at = time.monotonic()
+        with self._lock:
+            self._semantic[name] = loaded
+        return loaded
+
+    def get(self, endpoint: str, model: str, prompt: str, query: Optional[str] = None) -> Optional[str]:
+        """
+        Cached answer for a rendered prompt, or None
+
+        Args:
+            endpoint: Name of the calling endpoint (must be in LLM_CACHE_ENDPOINTS)
+            model: Model the prompt is sent to first
+            prompt: The fully rendered prompt
+            query: The user's free text, enabling the semantic level on endpoints that allow it
+        """
+        if not self.enabled_for(endpoint):
+            return None
+        self._count(endpoint, 'lookups')
+        try:
+            entry = self._read(self.make_key(model, prompt))
+            if entry is not None:
+                self._count(endpoint, 'exact_hits')
+                return entry['text']
+
+            if query and endpoint in self.semantic_endpoints:
+                vector = self._embed(query)
+                if vector is not None:
+                    key, score = self._index(endpoint, model).best(vector, time.time() - self.ttl_for(endpoint))
+                    if key is not None and score >= self.threshold:
+                        entry = self._read(key)
+                        if entry is not None:
+                            self._count(endpoint, 'semantic_hits')
+                            logger.info(f"Semantic LLM cache hit on {endpoint} (similarity {score:.3f})")
+                            return entry['text']
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed on {endpoint}: {e}")
+        self._count(endpoint, 'misses')
+        return None
+
+    def put(self, endpoint: str, model: str, prompt: str, text: str, query: Optional[str] = None):
+        """Store a generated answer (never a fallback) under its prompt and, if allowed, its query"""
+        if not self.enabled_for(endpoint) or not text:
+            return
+        key = self.make_key(model, prompt)
+        ttl = self.ttl_for(endpoint)
+        now = time.time()
+        entry = {'text': text, 'model': model, 'endpoint': endpoint, 'stored_at': now, 'expires_at': now + ttl}
+        with self._lock:
+            self.local[key] = entry
+        self._count(endpoint, 'stores')
+
+        vector = None
+        if query and endpoint in self.semantic_endpoints:
+            try:
+                vector = self._embed(query)
+            except Exception as e:
+                logger.warning(f"Could not embed query for the semantic LLM cache: {e}")
+            if vector is not None:
+                name = self._semantic_key(endpoint, model)
+                with self._lock:
+                    self._semantic.setdefault(name, _SemanticIndex()).add(key, vector, now, self.semantic_max_entries)
+
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.set(key, zlib.compress(fast_json.dumps(entry)), ex=int(ttl))
+            if vector is not None:
+                name = self._semantic_key(endpoint, model)
+                pipe.hset(name, key, vector.astype(np.float16).tobytes())
+                pipe.zadd(f"{name}:order", {key: now})
+                # Keep the newest entries; vectors of trimmed keys are dropped on the next write
+                pipe.zremrangebyrank(f"{name}:order", 0, -self.semantic_max_entries - 1)
+                pipe.zremrangebyscore(f"{name}:order", 0, now - ttl)
+            pipe.execute()
+            if vector is not None:
+                self._drop_orphans(client, self._semantic_key(endpoint, model))
+        except Exception as e:
+            logger.warning(f"Redis LLM cache write failed: {e}")
+            reset_redis_client()
+
+    def _drop_orphans(self, client, name: str):
+        """Delete stored vectors whose keys fell out of the order set"""
+        if client.hlen(name) <= client.zcard(f"{name}:order") + 100:
+            return
+        kept = {key for key in client.zrange(f"{name}:order", 0, -1)}
+        orphans = [key for key in client.hkeys(name) if key not in kept]
+        if orphans:
+            client.hdel(name, *orphans)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            per_endpoint = {endpoint: dict(stats) for endpoint, stats in self.stats.items()}
+            cached = len(self.local)
+        for stats in per_endpoint.values():
+            hits = stats['exact_hits'] + stats['semantic_hits']
+            stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else 0
+        return {
+            'enabled': self.enabled,
+            'endpoints': sorted(self.endpoints),
+            'semantic_endpoints': sorted(self.semantic_endpoints),
+            'threshold': self.threshold,
+            'cached': cached,
+            'by_endpoint': per_endpoint
+        }
+
+# Create global instance
+llm_cache = LLMCache()
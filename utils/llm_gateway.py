@@ -0,0 +1,162 @@
+"""
+Gemini client gateway
+Configures the Gemini client once per process, keeps the list of usable models fresh from a
+background thread and hands out pooled GenerativeModel instances, so a request never waits
+on configuration or a model listing
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import google.generativeai as genai
+
+# Import config with fallback to environment variables
+try:
+    from config import GEMINI_API_ENDPOINT, GEMINI_DEFAULT_MODELS, GEMINI_MODEL_REFRESH_SECONDS
+except ImportError:
+    # Fallback to environment variables for deployment
+    GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT', '')
+    GEMINI_DEFAULT_MODELS = os.getenv('GEMINI_DEFAULT_MODELS', 'gemini-2.0-flash')
+    GEMINI_MODEL_REFRESH_SECONDS = int(os.getenv('GEMINI_MODEL_REFRESH_SECONDS', 1800))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_KEY = "your_gemini_api_key_here"
+
+
+def _split(models: str) -> List[str]:
+    return [model.strip() for model in (models or '').split(',') if model.strip()]
+
+
+class ModelRegistry:
+    """Ordered candidate models: preferred ones first, then those discovered from the API"""
+
+    def __init__(self, preferred: Optional[List[str]] = None):
+        self._lock = threading.Lock()
+        self._preferred: List[str] = list(preferred or [])
+        self._discovered: List[str] = []
+        self.refreshed_at: Optional[float] = None
+
+    def set_preferred(self, models: List[str]):
+        with self._lock:
+            self._preferred = list(models)
+
+    def update(self, discovered: List[str]):
+        with self._lock:
+            self._discovered = list(discovered)
+            self.refreshed_at = time.time()
+
+    def candidates(self) -> List[str]:
+        with self._lock:
+            return list(dict.fromkeys(self._preferred + self._discovered))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'preferred': list(self._preferred),
+                'discovered': len(self._discovered),
+                'refreshed_at': self.refreshed_at
+            }
+
+
+class LLMGateway:
+    """Process-wide Gemini access: one configuration, background model discovery, pooled models"""
+
+    def __init__(self, endpoint: str = GEMINI_API_ENDPOINT, default_models: str = GEMINI_DEFAULT_MODELS,
+                 refresh_seconds: int = GEMINI_MODEL_REFRESH_SECONDS):
+        self.endpoint = endpoint
+        self.default_models = _split(default_models)
+        self.refresh_seconds = refresh_seconds
+        self.registry = ModelRegistry(self.default_models)
+        self._models: Dict[str, 'genai.GenerativeModel'] = {}
+        self._lock = threading.Lock()
+        self._configured_key: Optional[str] = None
+        self._discovery_pid: Optional[int] = None
+        self._wake = threading.Event()
+        self.stats = {'discovery_runs': 0, 'discovery_failures': 0}
+
+    @staticmethod
+    def api_key() -> str:
+        """The configured API key, or '' when Gemini is not set up"""
+        key = os.getenv("GEMINI_API_KEY") or ''
+        return '' if key == _PLACEHOLDER_KEY else key
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key())
+
+    def start(self) -> bool:
+        """
+        Configure the client and start model discovery in this process
+
+        Safe to call repeatedly; it is also called on first use, so worker
+        processes forked after startup get their own discovery thread.
+
+        Returns:
+            False when no API key is configured
+        """
+        api_key = self.api_key()
+        if not api_key:
+            return False
+        with self._lock:
+            if self._configured_key != api_key:
+                # Read the preferred models here rather than at import, after .env is loaded
+                self.registry.set_preferred(_split(os.getenv("GEMINI_MODEL", "")) + self.default_models)
+                if self.endpoint:
+                    genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": self.endpoint})
+                else:
+                    genai.configure(api_key=api_key)
+                self._configured_key = api_key
+                self._models.clear()
+            if self._discovery_pid != os.getpid():
+                self._discovery_pid = os.getpid()
+                threading.Thread(target=self._discover_forever, name='gemini-model-discovery', daemon=True).start()
+        return True
+
+    def _discover_forever(self):
+        while True:
+            self.refresh_models()
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+
+    def refresh_models(self):
+        """List the models that support generateContent; keeps the previous list on failure"""
+        self.stats['discovery_runs'] += 1
+        try:
+            discovered = [
+                model.name.split('/')[-1] for model in genai.list_models()
+                if 'generateContent' in model.supported_generation_methods
+            ]
+        except Exception as e:
+            self.stats['discovery_failures'] += 1
+            logger.debug(f"Unable to list Gemini models: {e}")
+            return
+        if discovered:
+            self.registry.update(discovered)
+
+    def candidate_models(self) -> List[str]:
+        """Models to try, best first; never blocks on discovery"""
+        self.start()
+        return self.registry.candidates()
+
+    def model(self, name: str) -> 'genai.GenerativeModel':
+        """The pooled GenerativeModel for name"""
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = genai.GenerativeModel(name)
+            return model
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            pooled = sorted(self._models)
+        return dict(self.stats, configured=self._configured_key is not None, endpoint=self.endpoint or None,
+                    pooled_models=pooled, **self.registry.snapshot())
+
+# Create global instance
+llm_gateway = LLMGateway()
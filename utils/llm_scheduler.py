@@ -0,0 +1,308 @@
+"""
+LLM request scheduler
+Gemini calls run on a bounded pool of threads, taken from a queue ordered by priority and
+deadline. Per-model quotas are shared across workers through the rate limiter's Redis
+buckets; a 429 drains the model's bucket for its "retry in Ns" window. Only background
+requests wait for quota to come back; a web request fails at once when every model is out
+of quota, instead of holding its worker through the backoff
+"""
+
+import os
+import re
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import Future, InvalidStateError, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.rate_limiter import rate_limiter, RateLimited
+
+# Import config with fallback to environment variables
+try:
+    from config import LLM_MAX_CONCURRENCY, LLM_DEADLINE_SECONDS, LLM_RATE_LIMIT_BACKOFF_SECONDS, LLM_RATE_LIMIT
+except ImportError:
+    # Fallback to environment variables for deployment
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))
+    LLM_DEADLINE_SECONDS = float(os.getenv('LLM_DEADLINE_SECONDS', 60))
+    LLM_RATE_LIMIT_BACKOFF_SECONDS = float(os.getenv('LLM_RATE_LIMIT_BACKOFF_SECONDS', 10))
+    LLM_RATE_LIMIT = os.getenv('LLM_RATE_LIMIT', '')  # Requests per second:burst for each model, e.g. "0.25:5"
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Quota errors come from the Gemini SDK; without it no call can raise one
+try:
+    from google.api_core import exceptions as google_exceptions
+    QUOTA_ERRORS: Tuple[type, ...] = (google_exceptions.ResourceExhausted,)
+except ImportError:
+    QUOTA_ERRORS = ()
+
+# Bucket for models without a configured quota: only 429 backoffs hold requests back
+_UNLIMITED = (1000.0, 1000.0)
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+_RETRY_DELAY_PATTERN = re.compile(r"retry in ([\d.]+)s", re.IGNORECASE)
+
+
+class LLMUnavailable(Exception):
+    """No model can answer before the request's deadline"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMRateLimited(LLMUnavailable):
+    """Every model is out of quota until after the request's deadline; retry_after says when to come back"""
+
+
+def parse_model_limit(spec: Optional[str]) -> Tuple[float, float]:
+    """Parse "rate[:burst]" into (requests per second, burst); unset means no quota beyond 429 backoffs"""
+    if not spec:
+        return _UNLIMITED
+    try:
+        rate, _, burst = spec.partition(':')
+        return float(rate), float(burst) if burst else max(1.0, float(rate))
+    except ValueError:
+        logger.warning(f"Ignoring invalid LLM_RATE_LIMIT {spec!r}")
+        return _UNLIMITED
+
+
+def retry_delay(error: Exception) -> Optional[float]:
+    """The "Please retry in Ns" delay from a quota error, if it names one"""
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class _Job:
+    __slots__ = ('call', 'models', 'priority', 'deadline', 'wait_for_quota', 'future', 'failed', 'last_error',
+                 'attempts')
+
+    def __init__(self, call: Callable[[str], Any], models: List[str], priority: int, deadline: float,
+                 wait_for_quota: bool):
+        self.call = call
+        self.models = models
+        self.priority = priority
+        self.deadline = deadline
+        self.wait_for_quota = wait_for_quota
+        self.future = Future()
+        self.failed = set()
+        self.last_error: Optional[Exception] = None
+        self.attempts = 0
+
+
+class LLMScheduler:
+    """Runs LLM calls with bounded concurrency, priorities, deadlines and shared quota backoff"""
+
+    BUCKET_PREFIX = "gemini:"
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, default_deadline: float = LLM_DEADLINE_SECONDS,
+                 backoff_seconds: float = LLM_RATE_LIMIT_BACKOFF_SECONDS, model_limit: str = LLM_RATE_LIMIT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_deadline = default_deadline
+        self.backoff_seconds = backoff_seconds
+        # Quota of each gemini:<model> bucket, unless UPSTREAM_RATE_LIMITS names the bucket
+        self.model_limit = parse_model_limit(model_limit)
+        self._ready = []    # (priority, deadline, seq, job)
+        self._delayed = []  # (ready_at, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pid: Optional[int] = None
+        self._running = 0
+        # Last backoff seen per model in this process, to reject hopeless requests without queueing them
+        self._backoff_until: Dict[str, float] = {}
+        self.stats = {'submitted': 0, 'completed': 0, 'rejected': 0, 'expired': 0, 'deferred': 0,
+                      'quota_errors': 0, 'failed': 0}
+
+    def bucket(self, model: str) -> str:
+        name = f"{self.BUCKET_PREFIX}{model}"
+        rate_limiter.set_default_limit(name, *self.model_limit)
+        return name
+
+    def estimated_wait(self, models: List[str]) -> float:
+        """Seconds until the first of models has quota, from this process's backoffs and the shared buckets"""
+        now = time.monotonic()
+        return min((max(self._backoff_until.get(model, 0.0) - now, rate_limiter.wait_time(self.bucket(model)))
+                    for model in models), default=0.0)
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for index in range(self.max_concurrency):
+                threading.Thread(target=self._work, name=f'llm-{index}', daemon=True).start()
+
+    def submit(self, call: Callable[[str], Any], models: List[str], priority: int = PRIORITY_NORMAL,
+               deadline: Optional[float] = None, wait_for_quota: bool = True) -> Future:
+        """
+        Queue call(model) to be tried on each model in turn
+
+        Args:
+            call: Makes one request to the named model; returns the answer, or a falsy value to try the next model
+            models: Candidate models, best first
+            priority: PRIORITY_INTERACTIVE, PRIORITY_NORMAL or PRIORITY_BACKGROUND
+            deadline: Seconds the caller is willing to wait (default LLM_DEADLINE_SECONDS)
+            wait_for_quota: Requeue the job until quota frees up; when False the job fails as
+                soon as every model is out of quota
+
+        Returns:
+            Future with the first answer, or failing with LLMUnavailable (LLMRateLimited when
+            every model is out of quota, with retry_after set to when the first one frees up)
+        """
+        self._ensure_started()
+        deadline = self.default_deadline if deadline is None else deadline
+        job = _Job(call, list(models), priority, time.monotonic() + deadline, wait_for_quota)
+        self.stats['submitted'] += 1
+
+        wait = self.estimated_wait(job.models)
+        if wait >= deadline or (wait > 0 and not wait_for_quota):
+            self.stats['rejected'] += 1
+            job.future.set_exception(LLMRateLimited(
+                "Every model is rate limited", retry_after=wait
+            ))
+            return job.future
+
+        with self._cond:
+            heapq.heappush(self._ready, (job.priority, job.deadline, next(self._seq), job))
+            self._cond.notify()
+        return job.future
+
+    def run(self, call: Callable[[str], Any], models: List[str], priority: int = PRIORITY_NORMAL,
+            deadline: Optional[float] = None) -> Any:
+        """Submit and wait for the answer until the deadline, raising LLMUnavailable
+
+        Used from request threads, so the job never waits for quota: once every model is
+        out of quota it raises LLMRateLimited instead of holding the thread.
+        """
+        future = self.submit(call, models, priority, deadline, wait_for_quota=False)
+        wait = (self.default_deadline if deadline is None else deadline) + 0.05
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeout:
+            # Still queued or running; a running call's answer is dropped
+            future.cancel()
+            self.stats['expired'] += 1
+            raise LLMUnavailable("No answer before the deadline")
+
+    def _next_job(self) -> _Job:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, job = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (job.priority, job.deadline, next(self._seq), job))
+                while self._ready:
+                    _, deadline, _, job = heapq.heappop(self._ready)
+                    if job.future.done():
+                        continue
+                    if deadline <= now:
+                        self.stats['expired'] += 1
+                        self._resolve(job, error=LLMUnavailable("Deadline passed while queued"))
+                        continue
+                    self._running += 1
+                    return job
+                self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            try:
+                self._execute(job)
+            except Exception as e:
+                self._resolve(job, error=e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+
+    def _execute(self, job: _Job):
+        retry_at = None
+        for model in job.models:
+            if model in job.failed or job.future.done():
+                continue
+            try:
+                rate_limiter.limit(self.bucket(model), max_wait=0)
+            except RateLimited as e:
+                ready_at = time.monotonic() + e.retry_after
+                self._backoff_until[model] = ready_at
+                retry_at = ready_at if retry_at is None else min(retry_at, ready_at)
+                continue
+
+            job.attempts += 1
+            try:
+                result = job.call(model)
+            except QUOTA_ERRORS as e:
+                delay = retry_delay(e) or self.backoff_seconds
+                logger.warning(f"Quota exceeded for model {model}; backing off {delay:.1f}s across workers")
+                self.stats['quota_errors'] += 1
+                rate_limiter.penalize(self.bucket(model), delay)
+                ready_at = time.monotonic() + delay
+                self._backoff_until[model] = ready_at
+                retry_at = ready_at if retry_at is None else min(retry_at, ready_at)
+                job.last_error = e
+                continue
+            except Exception as e:
+                logger.warning(f"Model {model} failed: {e}")
+                job.failed.add(model)
+                job.last_error = e
+                continue
+            if result:
+                self.stats['completed'] += 1
+                self._resolve(job, result=result)
+                return
+            job.failed.add(model)
+
+        if retry_at is not None and job.wait_for_quota and retry_at < job.deadline:
+            # Requeue for when the quota frees up; no thread waits for it
+            self.stats['deferred'] += 1
+            with self._cond:
+                heapq.heappush(self._delayed, (retry_at, next(self._seq), job))
+                self._cond.notify()
+            return
+
+        self.stats['failed'] += 1
+        if retry_at is not None:
+            error = LLMRateLimited(
+                f"All models failed or are rate limited (last error: {job.last_error})",
+                retry_after=max(0.0, retry_at - time.monotonic())
+            )
+        else:
+            error = LLMUnavailable(f"All models failed (last error: {job.last_error})")
+        self._resolve(job, error=error)
+
+    @staticmethod
+    def _resolve(job: _Job, result: Any = None, error: Optional[Exception] = None):
+        try:
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+        except InvalidStateError:
+            # The caller gave up and cancelled it
+            pass
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        with self._cond:
+            queued, delayed, running = len(self._ready), len(self._delayed), self._running
+        return dict(
+            self.stats,
+            max_concurrency=self.max_concurrency,
+            running=running,
+            queued=queued,
+            waiting_for_quota=delayed,
+            backoff={model: round(until - now, 1) for model, until in self._backoff_until.items() if until > now}
+        )
+
+# Create global instance
+llm_scheduler = LLMScheduler()
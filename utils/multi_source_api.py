@@ -4,21 +4,222 @@ Multi-Source Academic Paper API Integration
 Integrates multiple academic databases for comprehensive paper search
 """
 
+import os
+import re
 import requests
 import json
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass
-from urllib.parse import quote, urlencode
-from requests.adapters import HTTPAdapter
+from functools import partial
+from urllib.parse import quote, urlencode, urlparse
 from urllib3.util.retry import Retry
+from xml.etree import ElementTree
+
+from utils.paper_dedup import PaperDeduplicator, canonicalize_doi
+from utils.paper_index import paper_index
+from utils.paper_record import PaperRecord
+from utils.reranker import paper_reranker
+from utils.enrichment import citation_enricher
+from utils.rate_limiter import rate_limiter, RateLimited
+from utils.circuit_breaker import circuit_breakers, CircuitOpen
+from utils.hedging import request_hedger
+from utils.http_client import http_client
+
+# Import config with fallback to environment variables
+try:
+    from config import (
+        SEARCH_DEADLINE_SECONDS, SOURCE_TIMEOUT_SECONDS, SOURCE_TIMEOUTS, SEARCH_MAX_WORKERS, PUBMED_BATCH_SIZE
+    )
+except ImportError:
+    # Fallback to environment variables for deployment
+    SEARCH_DEADLINE_SECONDS = float(os.getenv('SEARCH_DEADLINE_SECONDS', 12))
+    SOURCE_TIMEOUT_SECONDS = float(os.getenv('SOURCE_TIMEOUT_SECONDS', 10))
+    SOURCE_TIMEOUTS = os.getenv('SOURCE_TIMEOUTS', '')  # e.g. "core=6,crossref=8"
+    SEARCH_MAX_WORKERS = int(os.getenv('SEARCH_MAX_WORKERS', 16))
+    PUBMED_BATCH_SIZE = int(os.getenv('PUBMED_BATCH_SIZE', 200))  # Articles per EFetch request
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class SourceError(Exception):
+    """Raised when an upstream source answers with an unusable response"""
+
+
+def upstream_request(session: requests.Session, method: str, source: str, host: str, url: str,
+                     timeout: float, **kwargs) -> requests.Response:
+    """
+    Send a request to an upstream source through its circuit breaker and rate limiter
+    
+    Raises CircuitOpen while the source's breaker is open and RateLimited when
+    its quota has no token right now; searches fan out over several sources, so
+    a throttled one is reported rather than waited for. The request timeout is capped by the breaker's
+    latency-derived timeout; 5xx answers and network errors count as failures.
+    Remaining keyword arguments go to session.request. Requests to sources
+    configured for hedging are duplicated once they outlast the source's p90.
+    """
+    breaker = circuit_breakers.get(source)
+    breaker.check()
+    rate_limiter.limit(host, max_wait=0)
+    probe = breaker.before_call()
+    
+    def attempt() -> requests.Response:
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=breaker.timeout(timeout), **kwargs)
+        except requests.exceptions.RequestException as e:
+            breaker.record_failure(time.monotonic() - started, str(e))
+            raise
+        
+        elapsed = time.monotonic() - started
+        if response.status_code >= 500:
+            breaker.record_failure(elapsed, f"HTTP {response.status_code}")
+        else:
+            breaker.record_success(elapsed)
+        return response
+    
+    try:
+        response = request_hedger.run(source, host, attempt)
+    finally:
+        if probe:
+            # No-op once an outcome was recorded
+            breaker.release_probe()
+    raise_if_throttled(response, host)
+    return response
+
+
+def upstream_get(session: requests.Session, source: str, host: str, url: str,
+                 params: Dict, timeout: float, stream: bool = False) -> requests.Response:
+    """
+    GET from an upstream source through its circuit breaker and rate limiter
+    
+    With stream=True the body is left unread for the caller to consume and close.
+    """
+    return upstream_request(session, 'GET', source, host, url, timeout, params=params, stream=stream)
+
+
+def raise_if_throttled(response: requests.Response, host: str):
+    """On HTTP 429, drain the shared bucket for host and raise RateLimited"""
+    if response.status_code != 429:
+        return
+    try:
+        retry_after = float(response.headers.get('Retry-After', 5))
+    except ValueError:
+        retry_after = 5.0
+    rate_limiter.penalize(host, retry_after)
+    raise RateLimited(host, retry_after)
+
+
+def parse_source_timeouts(spec) -> Dict[str, float]:
+    """Parse per-source timeouts given as a dict or a "name=seconds,..." string"""
+    if isinstance(spec, dict):
+        return {name: float(seconds) for name, seconds in spec.items()}
+    
+    timeouts = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        name, seconds = item.split('=', 1)
+        try:
+            timeouts[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid source timeout: {item}")
+    return timeouts
+
+
+def iter_with_deadlines(tasks: Dict[str, Callable[[], list]], executor: ThreadPoolExecutor,
+                        deadline: Optional[float] = None,
+                        source_timeouts: Optional[Dict[str, float]] = None) -> Iterator[Tuple[str, list, Dict]]:
+    """
+    Run source searches concurrently, yielding each one as soon as it settles
+    
+    Args:
+        tasks: Mapping of source name to a zero-argument callable returning papers
+        executor: Thread pool the callables are submitted to
+        deadline: Overall budget in seconds for the whole fan-out
+        source_timeouts: Per-source budgets in seconds (capped by the overall deadline)
+        
+    Yields:
+        (source name, papers, status) in completion order. Status carries
+        'status' ('ok', 'timeout' or 'error'), 'count' and 'elapsed'.
+        Sources that miss their deadline are left to finish in the background.
+    """
+    deadline = SEARCH_DEADLINE_SECONDS if deadline is None else deadline
+    source_timeouts = source_timeouts or {}
+    
+    started = time.monotonic()
+    overall_expiry = started + deadline
+    futures = {}
+    expiries = {}
+    for name, task in tasks.items():
+        futures[executor.submit(task)] = name
+        expiries[name] = min(overall_expiry, started + source_timeouts.get(name, SOURCE_TIMEOUT_SECONDS))
+    
+    pending = set(futures)
+    
+    while pending:
+        done, pending = wait(
+            pending,
+            timeout=max(0.0, min(expiries[futures[f]] for f in pending) - time.monotonic()),
+            return_when=FIRST_COMPLETED
+        )
+        now = time.monotonic()
+        elapsed = round(now - started, 3)
+        
+        for future in done:
+            name = futures[future]
+            try:
+                papers = future.result()
+                yield name, papers, {'status': 'ok', 'count': len(papers), 'elapsed': elapsed}
+            except RateLimited as e:
+                logger.warning(f"Source {name} skipped: {str(e)}")
+                yield name, [], {'status': 'throttled', 'count': 0, 'elapsed': elapsed,
+                                 'retry_after': round(e.retry_after, 1)}
+            except CircuitOpen as e:
+                logger.warning(f"Source {name} skipped: {str(e)}")
+                yield name, [], {'status': 'circuit_open', 'count': 0, 'elapsed': elapsed,
+                                 'retry_after': round(e.retry_after, 1)}
+            except Exception as e:
+                logger.error(f"Source {name} failed: {str(e)}")
+                yield name, [], {'status': 'error', 'count': 0, 'elapsed': elapsed, 'error': str(e)}
+        
+        # Give up on sources whose own deadline has passed
+        for future in list(pending):
+            name = futures[future]
+            if now >= expiries[name]:
+                pending.discard(future)
+                future.cancel()
+                logger.warning(f"Source {name} timed out after {elapsed}s")
+                yield name, [], {'status': 'timeout', 'count': 0, 'elapsed': elapsed}
+
+
+def run_with_deadlines(tasks: Dict[str, Callable[[], list]], executor: ThreadPoolExecutor,
+                       deadline: Optional[float] = None,
+                       source_timeouts: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, list], Dict[str, Dict]]:
+    """
+    Run source searches concurrently and collect whatever answers in time
+    
+    Returns:
+        Tuple of (results by source, status by source), in the order the
+        sources were given. See iter_with_deadlines for the status format.
+    """
+    results = {}
+    status = {}
+    for name, papers, source_status in iter_with_deadlines(tasks, executor, deadline, source_timeouts):
+        results[name] = papers
+        status[name] = source_status
+    
+    # Preserve the order the sources were requested in
+    ordered_results = {name: results[name] for name in tasks}
+    ordered_status = {name: status[name] for name in tasks}
+    return ordered_results, ordered_status
+
+
 @dataclass
 class PaperResult:
     """Standardized paper result format"""
@@ -41,271 +242,489 @@ class SemanticScholarAPI:
     """Semantic Scholar API integration"""
     
     BASE_URL = "https://api.semanticscholar.org/graph/v1"
+    HOST = urlparse(BASE_URL).hostname
+    SOURCE = 'semantic_scholar'
+    BATCH_SIZE = 500  # Largest /paper/batch request the API accepts
     
     def __init__(self):
-        self.session = requests.Session()
-        # Add retry logic for resilience
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
-        self.session.headers.update({
+        # One quick retry; persistent failures are handled by the circuit breaker
+        retries = Retry(total=1, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+        self.session = http_client.session({
             'User-Agent': 'Sentino-AI-Research-Platform/1.0'
-        })
-        self.rate_limit_delay = 0.6  # 100 requests/minute
+        }, retries)
     
     def search_papers(self, query: str, max_results: int = 20, 
-                     fields: str = "paperId,title,authors,abstract,year,doi,url,citationCount,venue,journal") -> List[PaperResult]:
+                     fields: str = "paperId,title,authors,abstract,year,doi,url,citationCount,venue,journal",
+                     timeout: float = 30) -> List[PaperResult]:
         """Search papers using Semantic Scholar API"""
         try:
-            params = {
-                'query': query,
-                'limit': min(max_results, 100),  # API limit
-                'fields': fields,
-                'sort': 'relevance'
-            }
-            
-            response = self.session.get(f"{self.BASE_URL}/paper/search", params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                papers = []
-                
-                for item in data.get('data', []):
-                    authors = [author.get('name', '') for author in item.get('authors', [])]
-                    
-                    paper = PaperResult(
-                        title=item.get('title', ''),
-                        authors=authors,
-                        abstract=item.get('abstract', ''),
-                        publication_year=item.get('year'),
-                        doi=item.get('doi'),
-                        url=item.get('url', ''),
-                        source='Semantic Scholar',
-                        citation_count=item.get('citationCount'),
-                        journal=item.get('venue') or item.get('journal', {}).get('name') if item.get('journal') else None
-                    )
-                    papers.append(paper)
-                
-                time.sleep(self.rate_limit_delay)
-                return papers
-            
-            else:
-                logger.error(f"Semantic Scholar API error: {response.status_code}")
-                return []
-                
+            return self.fetch_papers(query, max_results, fields, timeout=timeout)
         except Exception as e:
             logger.error(f"Error accessing Semantic Scholar API: {str(e)}")
             return []
+    
+    def fetch_papers(self, query: str, max_results: int = 20, 
+                    fields: str = "paperId,title,authors,abstract,year,doi,url,citationCount,venue,journal",
+                    timeout: float = 30) -> List[PaperResult]:
+        """Search papers using Semantic Scholar API, raising on failure"""
+        params = {
+            'query': query,
+            'limit': min(max_results, 100),  # API limit
+            'fields': fields,
+            'sort': 'relevance'
+        }
+        
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/paper/search", params, timeout)
+        
+        if response.status_code != 200:
+            raise SourceError(f"Semantic Scholar API error: {response.status_code}")
+        
+        data = response.json()
+        papers = []
+        
+        for item in data.get('data', []):
+            authors = [author.get('name', '') for author in item.get('authors', [])]
+            
+            paper = PaperResult(
+                title=item.get('title', ''),
+                authors=authors,
+                abstract=item.get('abstract', ''),
+                publication_year=item.get('year'),
+                doi=item.get('doi'),
+                url=item.get('url', ''),
+                source='Semantic Scholar',
+                citation_count=item.get('citationCount'),
+                journal=item.get('venue') or item.get('journal', {}).get('name') if item.get('journal') else None
+            )
+            papers.append(paper)
+        
+        return papers
+    
+    def fetch_batch(self, ids: List[str], fields: str = "citationCount",
+                    timeout: float = 30) -> List[Optional[Dict]]:
+        """
+        Look up to BATCH_SIZE papers in one request
+        
+        Args:
+            ids: Semantic Scholar paper IDs, e.g. "DOI:10.1038/nature14539" or "ARXIV:1706.03762"
+            fields: Comma-separated fields to return
+            
+        Returns:
+            One entry per ID, in order; None where Semantic Scholar does not know the paper
+        """
+        if not ids:
+            return []
+        if len(ids) > self.BATCH_SIZE:
+            raise ValueError(f"At most {self.BATCH_SIZE} IDs per batch")
+        response = upstream_request(self.session, 'POST', self.SOURCE, self.HOST, f"{self.BASE_URL}/paper/batch",
+                                    timeout, params={'fields': fields}, json={'ids': ids})
+        if response.status_code != 200:
+            raise SourceError(f"Semantic Scholar batch error: {response.status_code}")
+        return response.json()
+    
+    def count_papers(self, query: str, timeout: float = 30) -> int:
+        """Total number of papers matching query, without fetching them"""
+        params = {'query': query, 'limit': 1, 'fields': 'paperId'}
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/paper/search", params, timeout)
+        if response.status_code != 200:
+            raise SourceError(f"Semantic Scholar API error: {response.status_code}")
+        return int(response.json().get('total', 0))
 
 class CoreAPI:
     """CORE API integration for open access papers"""
     
     BASE_URL = "https://core.ac.uk/api-v2"
+    HOST = urlparse(BASE_URL).hostname
+    SOURCE = 'core'
     
     def __init__(self):
-        self.session = requests.Session()
-        # Add retry logic
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
-        self.session.headers.update({
+        # One quick retry; persistent failures are handled by the circuit breaker
+        retries = Retry(total=1, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+        self.session = http_client.session({
             'User-Agent': 'Sentino-AI-Research-Platform/1.0'
-        })
+        }, retries)
     
-    def search_papers(self, query: str, max_results: int = 20) -> List[PaperResult]:
+    def search_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> List[PaperResult]:
         """Search open access papers using CORE API"""
         try:
-            params = {
-                'q': query,
-                'page': 1,
-                'pageSize': min(max_results, 100),
-                'format': 'json'
-            }
-            
-            response = self.session.get(f"{self.BASE_URL}/search", params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                papers = []
-                
-                for item in data.get('data', []):
-                    authors = []
-                    if item.get('authors'):
-                        authors = [author.get('name', '') for author in item['authors']]
-                    
-                    # Extract publication year
-                    year = None
-                    if item.get('publishedDate'):
-                        try:
-                            year = int(item['publishedDate'][:4])
-                        except:
-                            pass
-                    
-                    paper = PaperResult(
-                        title=item.get('title', ''),
-                        authors=authors,
-                        abstract=item.get('abstract', ''),
-                        publication_year=year,
-                        doi=item.get('doi'),
-                        url=item.get('downloadUrl') or item.get('links', [{}])[0].get('url', ''),
-                        source='CORE',
-                        pdf_url=item.get('downloadUrl'),
-                        journal=item.get('publisher')
-                    )
-                    papers.append(paper)
-                
-                return papers
-            
-            else:
-                logger.error(f"CORE API error: {response.status_code}")
-                return []
-                
+            return self.fetch_papers(query, max_results, timeout=timeout)
         except Exception as e:
             logger.error(f"Error accessing CORE API: {str(e)}")
             return []
+    
+    def fetch_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> List[PaperResult]:
+        """Search open access papers using CORE API, raising on failure"""
+        params = {
+            'q': query,
+            'page': 1,
+            'pageSize': min(max_results, 100),
+            'format': 'json'
+        }
+        
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/search", params, timeout)
+        
+        if response.status_code != 200:
+            raise SourceError(f"CORE API error: {response.status_code}")
+        
+        data = response.json()
+        papers = []
+        
+        for item in data.get('data', []):
+            authors = []
+            if item.get('authors'):
+                authors = [author.get('name', '') for author in item['authors']]
+            
+            # Extract publication year
+            year = None
+            if item.get('publishedDate'):
+                try:
+                    year = int(item['publishedDate'][:4])
+                except:
+                    pass
+            
+            paper = PaperResult(
+                title=item.get('title', ''),
+                authors=authors,
+                abstract=item.get('abstract', ''),
+                publication_year=year,
+                doi=item.get('doi'),
+                url=item.get('downloadUrl') or item.get('links', [{}])[0].get('url', ''),
+                source='CORE',
+                pdf_url=item.get('downloadUrl'),
+                journal=item.get('publisher')
+            )
+            papers.append(paper)
+        
+        return papers
+    
+    def count_papers(self, query: str, timeout: float = 30) -> int:
+        """Total number of papers matching query, without fetching them"""
+        # The API rejects page sizes below 10
+        params = {'q': query, 'page': 1, 'pageSize': 10, 'format': 'json'}
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/search", params, timeout)
+        if response.status_code != 200:
+            raise SourceError(f"CORE API error: {response.status_code}")
+        return int(response.json().get('totalHits', 0))
 
 class PubMedAPI:
     """PubMed API integration for biomedical papers"""
     
     BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+    HOST = urlparse(BASE_URL).hostname
+    SOURCE = 'pubmed'
     
-    def __init__(self):
-        self.session = requests.Session()
-        # Add retry logic
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
-        self.session.headers.update({
+    def __init__(self, batch_size: int = PUBMED_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+        # One quick retry; persistent failures are handled by the circuit breaker
+        retries = Retry(total=1, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+        self.session = http_client.session({
             'User-Agent': 'Sentino-AI-Research-Platform/1.0'
-        })
+        }, retries)
     
-    def search_papers(self, query: str, max_results: int = 20) -> List[PaperResult]:
+    def search_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> List[PaperResult]:
         """Search biomedical papers using PubMed API"""
         try:
-            # Step 1: Search for PMIDs
-            search_params = {
-                'db': 'pubmed',
-                'term': query,
-                'retmax': min(max_results, 100),
-                'retmode': 'json'
-            }
-            
-            search_response = self.session.get(f"{self.BASE_URL}/esearch.fcgi", params=search_params, timeout=30)
-            
-            if search_response.status_code != 200:
-                return []
-            
-            search_data = search_response.json()
-            pmids = search_data.get('esearchresult', {}).get('idlist', [])
-            
-            if not pmids:
-                return []
-            
-            # Step 2: Get detailed information
+            return self.fetch_papers(query, max_results, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Error accessing PubMed API: {str(e)}")
+            return []
+    
+    def fetch_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> List[PaperResult]:
+        """Search biomedical papers using PubMed API, raising on failure"""
+        return list(self.iter_papers(query, max_results, timeout=timeout))
+    
+    def iter_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> Iterator[PaperResult]:
+        """
+        Stream PubMed papers for a query
+        
+        ESearch stores the result set on the history server (WebEnv/query_key);
+        EFetch then pages through it batch_size records at a time, and each
+        batch is parsed incrementally, so memory is bounded by one article
+        rather than by the size of the result set.
+        """
+        # Step 1: Search, keeping the PMIDs on the history server
+        search_params = {
+            'db': 'pubmed',
+            'term': query,
+            'retmax': 0,
+            'usehistory': 'y',
+            'sort': 'relevance',
+            'retmode': 'json'
+        }
+        
+        search_response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/esearch.fcgi", search_params, timeout)
+        
+        if search_response.status_code != 200:
+            raise SourceError(f"PubMed ESearch error: {search_response.status_code}")
+        
+        result = search_response.json().get('esearchresult', {})
+        total = min(int(result.get('count', 0)), max_results)
+        if not total:
+            return
+        
+        # Step 2: Fetch the records in batches
+        for retstart in range(0, total, self.batch_size):
             fetch_params = {
                 'db': 'pubmed',
-                'id': ','.join(pmids),
+                'WebEnv': result['webenv'],
+                'query_key': result['querykey'],
+                'retstart': retstart,
+                'retmax': min(self.batch_size, total - retstart),
                 'retmode': 'xml'
             }
             
-            fetch_response = self.session.get(f"{self.BASE_URL}/efetch.fcgi", params=fetch_params, timeout=30)
-            
-            if fetch_response.status_code != 200:
-                return []
-            
-            # Parse XML response (simplified)
-            papers = self._parse_pubmed_xml(fetch_response.text)
-            return papers
-            
-        except Exception as e:
-            logger.error(f"Error accessing PubMed API: {str(e)}")
-            return []
+            fetch_response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/efetch.fcgi",
+                                          fetch_params, timeout, stream=True)
+            try:
+                if fetch_response.status_code != 200:
+                    raise SourceError(f"PubMed EFetch error: {fetch_response.status_code}")
+                fetch_response.raw.decode_content = True
+                yield from self._parse_pubmed_xml(fetch_response.raw)
+            finally:
+                fetch_response.close()
     
-    def _parse_pubmed_xml(self, xml_content: str) -> List[PaperResult]:
-        """Parse PubMed XML response (simplified implementation)"""
-        # This is a simplified parser - in production, use proper XML parsing
-        papers = []
-        # Implementation would parse XML and extract paper details
-        # For now, return empty list
-        return papers
+    def _parse_pubmed_xml(self, xml_stream) -> Iterator[PaperResult]:
+        """Parse an EFetch XML stream article by article, discarding each one once converted"""
+        root = None
+        for event, element in ElementTree.iterparse(xml_stream, events=('start', 'end')):
+            if root is None:
+                root = element
+            if event != 'end' or element.tag != 'PubmedArticle':
+                continue
+            try:
+                yield self._article_to_paper(element)
+            except Exception as e:
+                logger.warning(f"Skipping unparseable PubMed article: {e}")
+            # Drop the parsed article from the tree
+            root.clear()
+    
+    @staticmethod
+    def _text(element) -> str:
+        # Titles and abstracts may contain inline markup such as <i> or <sup>
+        return " ".join("".join(element.itertext()).split()) if element is not None else ""
+    
+    def _article_to_paper(self, article) -> PaperResult:
+        citation = article.find('MedlineCitation')
+        pmid = citation.findtext('PMID', '')
+        info = citation.find('Article')
+        
+        authors = []
+        for author in info.findall('AuthorList/Author'):
+            name = author.findtext('CollectiveName') or " ".join(
+                part for part in (author.findtext('ForeName'), author.findtext('LastName')) if part
+            )
+            if name:
+                authors.append(name)
+        
+        abstract_parts = []
+        for part in info.findall('Abstract/AbstractText'):
+            text = self._text(part)
+            label = part.get('Label')
+            abstract_parts.append(f"{label}: {text}" if label and text else text)
+        
+        pub_date = info.find('Journal/JournalIssue/PubDate')
+        year = None
+        if pub_date is not None:
+            match = re.search(r'\d{4}', pub_date.findtext('Year') or pub_date.findtext('MedlineDate') or '')
+            year = int(match.group()) if match else None
+        
+        article_ids = {item.get('IdType'): item.text for item in article.findall('PubmedData/ArticleIdList/ArticleId')}
+        doi = article_ids.get('doi') or next(
+            (item.text for item in info.findall('ELocationID') if item.get('EIdType') == 'doi'), None
+        )
+        
+        return PaperResult(
+            title=self._text(info.find('ArticleTitle')),
+            authors=authors,
+            abstract="\n".join(part for part in abstract_parts if part),
+            publication_year=year,
+            doi=doi,
+            url=f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+            source='PubMed',
+            keywords=[self._text(keyword) for keyword in citation.findall('KeywordList/Keyword')],
+            journal=info.findtext('Journal/Title'),
+            volume=info.findtext('Journal/JournalIssue/Volume'),
+            issue=info.findtext('Journal/JournalIssue/Issue'),
+            pages=info.findtext('Pagination/MedlinePgn')
+        )
+    
+    def count_papers(self, query: str, timeout: float = 30) -> int:
+        """Total number of papers matching query, without fetching them"""
+        params = {'db': 'pubmed', 'term': query, 'retmax': 0, 'retmode': 'json'}
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/esearch.fcgi", params, timeout)
+        if response.status_code != 200:
+            raise SourceError(f"PubMed ESearch error: {response.status_code}")
+        return int(response.json().get('esearchresult', {}).get('count', 0))
 
 class CrossrefAPI:
     """Crossref API integration for DOI metadata"""
     
     BASE_URL = "https://api.crossref.org"
+    HOST = urlparse(BASE_URL).hostname
+    SOURCE = 'crossref'
+    
+    # Only the fields _item_to_paper reads
+    SELECT_FIELDS = ",".join([
+        'DOI', 'title', 'author', 'abstract', 'published-print', 'published-online', 'issued',
+        'URL', 'container-title', 'volume', 'issue', 'page', 'is-referenced-by-count'
+    ])
+    MAX_ROWS = 1000  # Largest page Crossref serves
+    DOI_BATCH_SIZE = 50  # DOIs per filter, keeping URLs well under server limits
     
     def __init__(self):
-        self.session = requests.Session()
-        # Add retry logic
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
-        self.session.headers.update({
+        # One quick retry; persistent failures are handled by the circuit breaker
+        retries = Retry(total=1, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+        self.session = http_client.session({
             'User-Agent': 'Sentino-AI-Research-Platform/1.0 (mailto:your-email@example.com)',
             'Accept': 'application/json'
-        })
+        }, retries)
     
-    def search_papers(self, query: str, max_results: int = 20) -> List[PaperResult]:
+    def search_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> List[PaperResult]:
         """Search papers using Crossref API"""
         try:
-            params = {
-                'query': query,
-                'rows': min(max_results, 100),
-                'sort': 'relevance'
-            }
-            
-            response = self.session.get(f"{self.BASE_URL}/works", params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                papers = []
-                
-                for item in data.get('message', {}).get('items', []):
-                    authors = []
-                    if item.get('author'):
-                        authors = [f"{author.get('given', '')} {author.get('family', '')}".strip() 
-                                 for author in item['author']]
-                    
-                    # Extract publication year
-                    year = None
-                    if item.get('published-print', {}).get('date-parts'):
-                        year = item['published-print']['date-parts'][0][0]
-                    elif item.get('published-online', {}).get('date-parts'):
-                        year = item['published-online']['date-parts'][0][0]
-                    
-                    paper = PaperResult(
-                        title=item.get('title', [''])[0] if item.get('title') else '',
-                        authors=authors,
-                        abstract=item.get('abstract', ''),
-                        publication_year=year,
-                        doi=item.get('DOI'),
-                        url=item.get('URL', ''),
-                        source='Crossref',
-                        journal=item.get('container-title', [''])[0] if item.get('container-title') else None
-                    )
-                    papers.append(paper)
-                
-                return papers
-            
-            else:
-                logger.error(f"Crossref API error: {response.status_code}")
-                return []
-                
+            return self.fetch_papers(query, max_results, timeout=timeout)
         except Exception as e:
             logger.error(f"Error accessing Crossref API: {str(e)}")
             return []
+    
+    def fetch_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> List[PaperResult]:
+        """Search papers using Crossref API, raising on failure"""
+        return list(self.iter_papers(query, max_results, timeout=timeout))
+    
+    def iter_papers(self, query: str, max_results: int = 20, timeout: float = 30) -> Iterator[PaperResult]:
+        """
+        Stream search results, following Crossref's deep-paging cursor past the first page
+        
+        Only the fields PaperResult uses are requested, so reference lists and
+        other bulky metadata never leave Crossref.
+        """
+        rows = min(max_results, self.MAX_ROWS)
+        params = {
+            'query': query,
+            'rows': rows,
+            'sort': 'relevance',
+            'select': self.SELECT_FIELDS
+        }
+        if max_results > rows:
+            params['cursor'] = '*'
+        
+        remaining = max_results
+        while remaining > 0:
+            params['rows'] = min(rows, remaining)
+            message = self._get_works(params, timeout)
+            items = message.get('items', [])
+            for item in items[:remaining]:
+                yield self._item_to_paper(item)
+            remaining -= len(items)
+            
+            cursor = message.get('next-cursor')
+            if 'cursor' not in params or not items or not cursor:
+                break
+            params['cursor'] = cursor
+    
+    def lookup_dois(self, dois: List[str], timeout: float = 30) -> Dict[str, PaperResult]:
+        """
+        Fetch metadata for many DOIs, DOI_BATCH_SIZE per request
+        
+        Returns:
+            Papers keyed by canonical (lowercase) DOI; unknown DOIs are absent
+        """
+        unique = list(dict.fromkeys(doi for doi in map(canonicalize_doi, dois) if doi))
+        found = {}
+        for start in range(0, len(unique), self.DOI_BATCH_SIZE):
+            batch = unique[start:start + self.DOI_BATCH_SIZE]
+            params = {
+                'filter': ",".join(f"doi:{doi}" for doi in batch),
+                'rows': len(batch),
+                'select': self.SELECT_FIELDS
+            }
+            for item in self._get_works(params, timeout).get('items', []):
+                paper = self._item_to_paper(item)
+                found[canonicalize_doi(paper.doi)] = paper
+        return found
+    
+    def _get_works(self, params: Dict, timeout: float) -> Dict:
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/works", params, timeout)
+        
+        if response.status_code != 200:
+            raise SourceError(f"Crossref API error: {response.status_code}")
+        
+        return response.json().get('message', {})
+    
+    @staticmethod
+    def _item_to_paper(item: Dict) -> PaperResult:
+        authors = []
+        if item.get('author'):
+            authors = [f"{author.get('given', '')} {author.get('family', '')}".strip() 
+                     for author in item['author']]
+        
+        # Extract publication year
+        year = None
+        for field in ('published-print', 'published-online', 'issued'):
+            date_parts = (item.get(field) or {}).get('date-parts') or [[None]]
+            if date_parts[0] and date_parts[0][0]:
+                year = date_parts[0][0]
+                break
+        
+        # Abstracts come as JATS XML
+        abstract = re.sub(r'<[^>]+>', ' ', item.get('abstract') or '')
+        
+        return PaperResult(
+            title=item.get('title', [''])[0] if item.get('title') else '',
+            authors=authors,
+            abstract=" ".join(abstract.split()),
+            publication_year=year,
+            doi=item.get('DOI'),
+            url=item.get('URL', ''),
+            source='Crossref',
+            citation_count=item.get('is-referenced-by-count'),
+            journal=item.get('container-title', [''])[0] if item.get('container-title') else None,
+            volume=item.get('volume'),
+            issue=item.get('issue'),
+            pages=item.get('page')
+        )
+    
+    def count_papers(self, query: str, timeout: float = 30) -> int:
+        """Total number of works matching query, without fetching them"""
+        params = {'query': query, 'rows': 0}
+        response = upstream_get(self.session, self.SOURCE, self.HOST, f"{self.BASE_URL}/works", params, timeout)
+        if response.status_code != 200:
+            raise SourceError(f"Crossref API error: {response.status_code}")
+        return int(response.json().get('message', {}).get('total-results', 0))
 
 class MultiSourceAPI:
     """Main class to coordinate multiple academic paper sources"""
     
+    DEFAULT_SOURCES = ['semantic_scholar', 'core', 'crossref']
+    
     def __init__(self):
         self.semantic_scholar = SemanticScholarAPI()
         self.core = CoreAPI()
         self.pubmed = PubMedAPI()
         self.crossref = CrossrefAPI()
+        self.providers = {
+            'semantic_scholar': self.semantic_scholar,
+            'core': self.core,
+            'crossref': self.crossref,
+            'pubmed': self.pubmed,
+        }
+        self.source_timeouts = parse_source_timeouts(SOURCE_TIMEOUTS)
+        self.executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix='multi-source')
         
     def search_all_sources(self, query: str, max_results_per_source: int = 10, 
-                          sources: List[str] = None) -> Dict[str, List[PaperResult]]:
+                          sources: List[str] = None, parallel: bool = True,
+                          deadline: Optional[float] = None,
+                          source_timeouts: Optional[Dict[str, float]] = None) -> Dict[str, List[PaperResult]]:
         """Search across all available sources"""
         
         if sources is None:
-            sources = ['semantic_scholar', 'core', 'crossref']
+            sources = self.DEFAULT_SOURCES
+        
+        if parallel:
+            results, _ = self.search_all_sources_with_status(
+                query, max_results_per_source, sources, deadline, source_timeouts
+            )
+            return results
         
         results = {}
         
@@ -327,46 +746,122 @@ class MultiSourceAPI:
         
         return results
     
+    def search_all_sources_with_status(self, query: str, max_results_per_source: int = 10,
+                                       sources: List[str] = None, deadline: Optional[float] = None,
+                                       source_timeouts: Optional[Dict[str, float]] = None
+                                       ) -> Tuple[Dict[str, List[PaperResult]], Dict[str, Dict]]:
+        """
+        Search all requested sources in parallel under a shared deadline
+        
+        Args:
+            query: Search query string
+            max_results_per_source: Maximum results requested from each source
+            sources: Source names to query (defaults to DEFAULT_SOURCES)
+            deadline: Overall time budget in seconds
+            source_timeouts: Per-source time budgets in seconds
+            
+        Returns:
+            Tuple of (papers by source, status by source)
+        """
+        if sources is None:
+            sources = self.DEFAULT_SOURCES
+        
+        timeouts = dict(self.source_timeouts)
+        timeouts.update(source_timeouts or {})
+        # Tighten each budget to the source's observed p99 latency
+        timeouts = {source: circuit_breakers.get(source).timeout(timeouts.get(source, SOURCE_TIMEOUT_SECONDS))
+                    for source in sources}
+        
+        tasks = {}
+        for source in sources:
+            provider = self.providers.get(source)
+            if provider is None:
+                logger.warning(f"Unknown source requested: {source}")
+                continue
+            timeout = timeouts.get(source, SOURCE_TIMEOUT_SECONDS)
+            tasks[source] = partial(provider.fetch_papers, query, max_results_per_source, timeout=timeout)
+        
+        logger.info(f"Searching {list(tasks)} in parallel...")
+        results, status = run_with_deadlines(tasks, self.executor, deadline, timeouts)
+        
+        # Feed the local paper index
+        paper_index.add_papers([
+            PaperRecord.from_paper_result(paper) for papers in results.values() for paper in papers
+        ])
+        return results, status
+    
     def search_combined(self, query: str, max_total_results: int = 50, 
-                       sources: List[str] = None) -> List[PaperResult]:
+                       sources: List[str] = None, deadline: Optional[float] = None) -> List[PaperResult]:
         """Search and combine results from multiple sources, removing duplicates"""
+        papers, _ = self.search_combined_with_status(query, max_total_results, sources, deadline)
+        return papers
+    
+    def search_combined_with_status(self, query: str, max_total_results: int = 50,
+                                    sources: List[str] = None, deadline: Optional[float] = None
+                                    ) -> Tuple[List[PaperResult], Dict[str, Dict]]:
+        """Search and combine results from multiple sources, also returning per-source status"""
         
         # Calculate results per source
-        available_sources = sources or ['semantic_scholar', 'core', 'crossref']
+        available_sources = sources or self.DEFAULT_SOURCES
         max_per_source = max_total_results // len(available_sources)
         
         # Search all sources
-        all_results = self.search_all_sources(query, max_per_source, available_sources)
-        
-        # Combine and deduplicate
-        combined_papers = []
-        seen_dois = set()
-        seen_titles = set()
+        all_results, source_status = self.search_all_sources_with_status(
+            query, max_per_source, available_sources, deadline
+        )
         
+        # Combine, merging near-duplicate records from different sources
+        deduplicator = PaperDeduplicator()
         for source_name, papers in all_results.items():
-            for paper in papers:
-                # Deduplicate by DOI first, then by title
-                if paper.doi and paper.doi in seen_dois:
-                    continue
-                if paper.title.lower() in seen_titles:
-                    continue
-                
-                seen_dois.add(paper.doi)
-                seen_titles.add(paper.title.lower())
-                combined_papers.append(paper)
-        
-        # Sort by relevance (citation count, year, etc.)
-        combined_papers.sort(key=lambda x: (
-            x.citation_count or 0,
-            x.publication_year or 0
-        ), reverse=True)
-        
-        return combined_papers[:max_total_results]
-    
-    def get_source_stats(self, query: str, sources: List[str] = None) -> Dict[str, int]:
-        """Get statistics about available papers across sources"""
-        results = self.search_all_sources(query, 5, sources)  # Small sample for stats
-        return {source: len(papers) for source, papers in results.items()}
+            deduplicator.add_all(papers)
+        combined_papers = deduplicator.papers
+        
+        # Fill missing citation counts, then rank by embedding similarity to the query
+        citation_enricher.enrich(combined_papers)
+        return paper_reranker.rerank(query, combined_papers, max_total_results), source_status
+    
+    def get_source_stats_with_status(self, query: str, sources: List[str] = None,
+                                     deadline: Optional[float] = None
+                                     ) -> Tuple[Dict[str, Optional[int]], Dict[str, Dict]]:
+        """
+        Count the papers each source holds for a query
+        
+        Providers are asked only for their total-hit count, in parallel, and
+        counts are cached per query like search results.
+        
+        Returns:
+            Tuple of (count by source, or None where the source failed; status by source)
+        """
+        # Imported lazily: both modules import this one
+        from utils.arxiv_api import arxiv_api
+        from utils.search_cache import search_cache
+        
+        if sources is None:
+            sources = self.DEFAULT_SOURCES
+        counters = dict(self.providers, arxiv=arxiv_api)
+        
+        tasks = {}
+        for source in sources:
+            provider = counters.get(source)
+            if provider is None:
+                logger.warning(f"Unknown source requested: {source}")
+                continue
+            timeout = circuit_breakers.get(source).timeout(self.source_timeouts.get(source, SOURCE_TIMEOUT_SECONDS))
+            count = partial(provider.count_papers, query, timeout=timeout)
+            # A one-element list, so the count goes through the search cache like a result page
+            tasks[source] = partial(search_cache.get_or_fetch, f"{source}:count", query, "count", 0,
+                                    lambda count=count: [count()], wait=timeout)
+        
+        results, status = run_with_deadlines(tasks, self.executor, deadline)
+        counts = {source: (papers[0] if papers else None) for source, papers in results.items()}
+        for source_status in status.values():
+            source_status.pop('count', None)
+        return counts, status
+    
+    def get_source_stats(self, query: str, sources: List[str] = None) -> Dict[str, Optional[int]]:
+        """Get the number of papers each source holds for a query"""
+        counts, _ = self.get_source_stats_with_status(query, sources)
+        return counts
 
 # Global instance
 multi_source_api = MultiSourceAPI()
@@ -0,0 +1,248 @@
+"""
+Cross-source paper deduplication
+DOI canonicalization, normalized title fingerprints and MinHash/LSH near-duplicate detection,
+merging duplicate records into one canonical record
+"""
+
+import re
+import zlib
+import logging
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DOI_PATTERN = re.compile(r'10\.\d{4,9}/\S+')
+_ARXIV_DOI_PATTERN = re.compile(r'^10\.48550/arxiv\.(.+)$')
+_ARXIV_VERSION_PATTERN = re.compile(r'v\d+$')
+_NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+
+# Largest prime below 2**32; keeps (a * x + b) inside uint64
+_MINHASH_PRIME = np.uint64(4294967291)
+
+# Values sources use when they have nothing to say
+_PLACEHOLDERS = {None, '', '#', 'Unknown', 'Unknown Title', 'No summary available'}
+
+
+def canonicalize_doi(doi: Optional[str]) -> Optional[str]:
+    """Return a DOI in canonical form ("10.xxxx/yyyy", lowercase), or None"""
+    if not doi:
+        return None
+    match = _DOI_PATTERN.search(str(doi).strip().lower())
+    if not match:
+        return None
+    return match.group(0).rstrip('.,;')
+
+
+def canonicalize_arxiv_id(arxiv_id: Optional[str]) -> Optional[str]:
+    """Return an arXiv identifier without its version suffix, or None"""
+    if not arxiv_id or arxiv_id == 'unknown':
+        return None
+    return _ARXIV_VERSION_PATTERN.sub('', str(arxiv_id).strip().lower())
+
+
+def title_fingerprint(title: Optional[str]) -> str:
+    """Normalize a title so casing, accents and punctuation differences disappear"""
+    if not title:
+        return ''
+    text = unicodedata.normalize('NFKD', str(title))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM_PATTERN.sub(' ', text).strip()
+
+
+def _get(paper: Any, field: str) -> Any:
+    """Read a field from a paper dict or paper object"""
+    if isinstance(paper, dict):
+        return paper.get(field)
+    return getattr(paper, field, None)
+
+
+def _set(paper: Any, field: str, value: Any) -> None:
+    """Write a field on a paper dict or paper object"""
+    if isinstance(paper, dict):
+        paper[field] = value
+    elif hasattr(paper, field):
+        setattr(paper, field, value)
+
+
+class PaperDeduplicator:
+    """
+    Incremental near-duplicate index over paper records
+
+    Each added paper is matched in O(1) expected time against papers already
+    seen, by canonical DOI, arXiv ID, exact title fingerprint, and MinHash/LSH
+    over title character shingles (verified by Jaccard similarity). Matches are
+    merged into the first record of the cluster, so a full pass is O(n).
+    """
+
+    # Fields filled in from duplicates when the canonical record lacks them
+    MERGE_FIELDS = ('doi', 'pdf_url', 'journal', 'abstract', 'summary', 'published_year',
+                    'publication_year', 'arxiv_id', 'url', 'volume', 'issue', 'pages')
+
+    def __init__(self, num_perm: int = 64, bands: int = 8, threshold: float = 0.8,
+                 shingle_size: int = 4, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+
+        self.papers: List[Any] = []
+        self._shingles: List[Set[int]] = []
+        self._identifiers: List[Tuple[Optional[str], Optional[str]]] = []
+        self._by_doi: Dict[str, int] = {}
+        self._by_arxiv: Dict[str, int] = {}
+        self._by_fingerprint: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [dict() for _ in range(bands)]
+        self.merged_count = 0
+
+    def _shingle(self, fingerprint: str) -> Set[int]:
+        text = fingerprint.replace(' ', '')
+        k = self.shingle_size
+        if len(text) <= k:
+            return {zlib.crc32(text.encode('utf-8'))} if text else set()
+        return {zlib.crc32(text[i:i + k].encode('utf-8')) for i in range(len(text) - k + 1)}
+
+    def _signature(self, shingles: Set[int]) -> np.ndarray:
+        hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _MINHASH_PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    @staticmethod
+    def _jaccard(a: Set[int], b: Set[int]) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def _conflicts(self, index: int, doi: Optional[str], arxiv_id: Optional[str]) -> bool:
+        """True if both papers carry identifiers that say they are different works"""
+        other_doi, other_arxiv_id = self._identifiers[index]
+        if arxiv_id and other_arxiv_id and arxiv_id != other_arxiv_id:
+            return True
+        # Preprint DOIs legitimately differ from the published version's DOI
+        if doi and other_doi and doi != other_doi and not (
+                _ARXIV_DOI_PATTERN.match(doi) or _ARXIV_DOI_PATTERN.match(other_doi)):
+            return True
+        return False
+
+    def _find_match(self, doi: Optional[str], arxiv_id: Optional[str], fingerprint: str,
+                    shingles: Set[int], band_keys: List[bytes]) -> Optional[int]:
+        if doi and doi in self._by_doi:
+            return self._by_doi[doi]
+        if arxiv_id and arxiv_id in self._by_arxiv:
+            return self._by_arxiv[arxiv_id]
+        if fingerprint and fingerprint in self._by_fingerprint:
+            return self._by_fingerprint[fingerprint]
+
+        checked = set()
+        for band, key in enumerate(band_keys):
+            for index in self._buckets[band].get(key, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                if self._conflicts(index, doi, arxiv_id):
+                    continue
+                if self._jaccard(shingles, self._shingles[index]) >= self.threshold:
+                    return index
+        return None
+
+    def _merge(self, canonical: Any, duplicate: Any) -> None:
+        """Fill gaps in the canonical record from a duplicate"""
+        for field in self.MERGE_FIELDS:
+            if _get(canonical, field) in _PLACEHOLDERS and _get(duplicate, field) not in _PLACEHOLDERS:
+                value = _get(duplicate, field)
+                _set(canonical, field, canonicalize_doi(value) or value if field == 'doi' else value)
+
+        citations = [c for c in (_get(canonical, 'citation_count'), _get(duplicate, 'citation_count')) if c is not None]
+        if citations:
+            _set(canonical, 'citation_count', max(citations))
+
+        sources = _get(canonical, 'sources') or [source for source in [_get(canonical, 'source')] if source]
+        duplicate_source = _get(duplicate, 'source')
+        if duplicate_source and duplicate_source not in sources:
+            sources = sources + [duplicate_source]
+        _set(canonical, 'sources', sources)
+        self.merged_count += 1
+
+    def add(self, paper: Any) -> Tuple[Any, bool]:
+        """
+        Add a paper to the index
+
+        Returns:
+            (canonical record, True) if the paper is new, or
+            (canonical record it was merged into, False) if it is a duplicate.
+            Papers without a usable title or identifier are dropped and
+            returned as (None, False).
+        """
+        doi = canonicalize_doi(_get(paper, 'doi'))
+        arxiv_id = canonicalize_arxiv_id(_get(paper, 'arxiv_id'))
+        if doi:
+            arxiv_doi = _ARXIV_DOI_PATTERN.match(doi)
+            if arxiv_doi and not arxiv_id:
+                arxiv_id = canonicalize_arxiv_id(arxiv_doi.group(1))
+        fingerprint = title_fingerprint(_get(paper, 'title'))
+        if not fingerprint and not doi and not arxiv_id:
+            return None, False
+
+        shingles = self._shingle(fingerprint)
+        band_keys = self._band_keys(self._signature(shingles)) if shingles else []
+
+        index = self._find_match(doi, arxiv_id, fingerprint, shingles, band_keys)
+        is_new = index is None
+        if not is_new:
+            canonical = self.papers[index]
+            self._merge(canonical, paper)
+        else:
+            index = len(self.papers)
+            canonical = paper
+            self.papers.append(paper)
+            self._shingles.append(shingles)
+            self._identifiers.append((doi, arxiv_id))
+            for band, key in enumerate(band_keys):
+                self._buckets[band].setdefault(key, []).append(index)
+
+        # Register every identifier this paper carries against its cluster
+        if doi:
+            self._by_doi.setdefault(doi, index)
+        if arxiv_id:
+            self._by_arxiv.setdefault(arxiv_id, index)
+        if fingerprint:
+            self._by_fingerprint.setdefault(fingerprint, index)
+
+        return canonical, is_new
+
+    def add_all(self, papers: List[Any]) -> Tuple[List[Any], List[Any]]:
+        """Add several papers, returning (new canonical records, records updated by a merge)"""
+        added = []
+        updated = []
+        seen = set()
+        for paper in papers:
+            canonical, is_new = self.add(paper)
+            if canonical is None:
+                continue
+            if is_new:
+                added.append(canonical)
+                seen.add(id(canonical))
+            elif id(canonical) not in seen:
+                updated.append(canonical)
+                seen.add(id(canonical))
+        return added, updated
+
+
+def deduplicate_papers(papers: List[Any], **kwargs) -> List[Any]:
+    """Deduplicate and merge a list of papers, keeping first-seen order"""
+    deduplicator = PaperDeduplicator(**kwargs)
+    deduplicator.add_all(papers)
+    return deduplicator.papers
@@ -0,0 +1,265 @@
+"""
+Local full-text paper index
+Every paper fetched from a remote source is stored in an on-disk SQLite FTS5 index and ranked with BM25;
+papers not fetched again within PAPER_INDEX_MAX_AGE_SECONDS, and the oldest beyond PAPER_INDEX_MAX_ROWS,
+are pruned periodically
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from utils import fast_json
+from utils.paper_record import PaperRecord
+
+# Import config with fallback to environment variables
+try:
+    from config import (PAPER_INDEX_PATH, LOCAL_INDEX_FRESH_SECONDS, PAPER_INDEX_MAX_ROWS,
+                        PAPER_INDEX_MAX_AGE_SECONDS, PAPER_INDEX_PRUNE_SECONDS)
+except ImportError:
+    # Fallback to environment variables for deployment
+    PAPER_INDEX_PATH = os.getenv('PAPER_INDEX_PATH', os.path.join('user_data', 'paper_index.db'))
+    LOCAL_INDEX_FRESH_SECONDS = int(os.getenv('LOCAL_INDEX_FRESH_SECONDS', 24 * 3600))
+    PAPER_INDEX_MAX_ROWS = int(os.getenv('PAPER_INDEX_MAX_ROWS', 200000))  # 0 for no cap
+    PAPER_INDEX_MAX_AGE_SECONDS = int(os.getenv('PAPER_INDEX_MAX_AGE_SECONDS', 90 * 24 * 3600))  # 0 to keep forever
+    PAPER_INDEX_PRUNE_SECONDS = int(os.getenv('PAPER_INDEX_PRUNE_SECONDS', 600))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Per-request Sci-Hub availability is not worth keeping in the corpus
+_TRANSIENT_FIELDS = ('scihub_available', 'scihub_pdf_url', 'scihub_url')
+
+
+class PaperIndex:
+    """BM25-ranked local corpus of every paper the platform has fetched"""
+
+    # BM25 column weights: paper_id (unindexed), title, authors, summary, categories
+    BM25_WEIGHTS = (0.0, 10.0, 2.0, 1.0, 2.0)
+
+    def __init__(self, path: str = PAPER_INDEX_PATH, max_rows: int = PAPER_INDEX_MAX_ROWS,
+                 max_age: float = PAPER_INDEX_MAX_AGE_SECONDS, prune_seconds: float = PAPER_INDEX_PRUNE_SECONDS):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.prune_seconds = prune_seconds
+        self.enabled = True
+        self._pruned_at: Optional[float] = None
+        self.stats = {'pruned': 0}
+        self._local = threading.local()
+        # SQLite allows a single writer, so all writes go through one thread
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='paper-index-writer')
+        try:
+            self._init_schema()
+        except Exception as e:
+            self.enabled = False
+            logger.error(f"Local paper index disabled: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS papers (
+                    paper_id TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    source TEXT,
+                    published_year INTEGER,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    paper_id UNINDEXED, title, authors, summary, categories,
+                    tokenize = 'porter unicode61 remove_diacritics 2'
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS papers_fetched_at ON papers (fetched_at)")
+
+    @staticmethod
+    def build_match(query: str, match_all: bool = True) -> Optional[str]:
+        """Turn free text into an FTS5 MATCH expression, quoting every term"""
+        terms = [term for term in _TOKEN_PATTERN.findall(query.lower()) if len(term) > 1]
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in dict.fromkeys(terms)]
+        return " ".join(quoted) if match_all else " OR ".join(quoted)
+
+    def _write(self, rows: List[Dict]):
+        conn = self._connect()
+        now = time.time()
+        try:
+            with conn:
+                for row in rows:
+                    conn.execute("DELETE FROM papers_fts WHERE paper_id = ?", (row['paper_id'],))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO papers (paper_id, data, source, published_year, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (row['paper_id'], row['data'], row['source'], row['published_year'], now)
+                    )
+                    conn.execute(
+                        "INSERT INTO papers_fts (paper_id, title, authors, summary, categories) VALUES (?, ?, ?, ?, ?)",
+                        (row['paper_id'], row['title'], row['authors'], row['summary'], row['categories'])
+                    )
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} papers to the local index: {e}")
+
+        if self._pruned_at is None or time.monotonic() - self._pruned_at >= self.prune_seconds:
+            self._pruned_at = time.monotonic()
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> int:
+        """Delete papers past max_age, then the oldest beyond max_rows; runs on the writer thread"""
+        deleted = 0
+        try:
+            with conn:
+                if self.max_age > 0:
+                    cutoff = time.time() - self.max_age
+                    conn.execute(
+                        "DELETE FROM papers_fts WHERE paper_id IN (SELECT paper_id FROM papers WHERE fetched_at < ?)",
+                        (cutoff,)
+                    )
+                    deleted += conn.execute("DELETE FROM papers WHERE fetched_at < ?", (cutoff,)).rowcount
+                if self.max_rows > 0:
+                    excess = conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0] - self.max_rows
+                    if excess > 0:
+                        # Replacing a paper gives it a new rowid, which orders a batch sharing one fetched_at
+                        oldest = "SELECT paper_id FROM papers ORDER BY fetched_at, rowid LIMIT ?"
+                        conn.execute(f"DELETE FROM papers_fts WHERE paper_id IN ({oldest})", (excess,))
+                        deleted += conn.execute(f"DELETE FROM papers WHERE paper_id IN ({oldest})", (excess,)).rowcount
+        except Exception as e:
+            logger.error(f"Error pruning the local index: {e}")
+            return 0
+        if deleted:
+            self.stats['pruned'] += deleted
+            logger.info(f"Pruned {deleted} papers from the local index")
+        return deleted
+
+    def add_papers(self, papers: List[PaperRecord]):
+        """Queue papers for indexing; returns immediately"""
+        if not self.enabled or not papers:
+            return
+        rows = []
+        for paper in papers:
+            data = paper.to_dict()
+            for field in _TRANSIENT_FIELDS:
+                data.pop(field, None)
+            rows.append({
+                'paper_id': paper.paper_id,
+                'data': fast_json.dumps(data),
+                'source': paper.source,
+                'published_year': paper.published_year,
+                'title': paper.title or '',
+                'authors': paper.authors or '',
+                'summary': paper.summary or '',
+                'categories': " ".join(paper.categories or [])
+            })
+        self._writer.submit(self._write, rows)
+
+    def indexing(self, fetch: Callable[[], List[PaperRecord]]) -> Callable[[], List[PaperRecord]]:
+        """Wrap a remote fetch so whatever it returns is also indexed"""
+        def fetch_and_index():
+            papers = fetch()
+            self.add_papers(papers)
+            return papers
+        return fetch_and_index
+
+    def search(self, query: str, limit: int = 20, match_all: bool = True,
+               max_age: Optional[float] = None) -> List[PaperRecord]:
+        """
+        Search the local corpus
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of papers
+            match_all: Require every query term (otherwise any term matches)
+            max_age: Only return papers fetched within this many seconds
+
+        Returns:
+            Papers ordered by BM25 score, best first
+        """
+        match = self.build_match(query, match_all)
+        if not self.enabled or not match:
+            return []
+
+        sql = (
+            "SELECT p.data FROM papers_fts JOIN papers p ON p.paper_id = papers_fts.paper_id "
+            "WHERE papers_fts MATCH ?"
+        )
+        params = [match]
+        if max_age is not None:
+            sql += " AND p.fetched_at >= ?"
+            params.append(time.time() - max_age)
+        sql += f" ORDER BY bm25(papers_fts, {', '.join(map(str, self.BM25_WEIGHTS))}) LIMIT ?"
+        params.append(limit)
+
+        try:
+            rows = self._connect().execute(sql, params).fetchall()
+        except Exception as e:
+            logger.error(f"Local index search failed: {e}")
+            return []
+        return [PaperRecord.from_dict(fast_json.loads(row[0])) for row in rows]
+
+    def search_ranked(self, query: str, limit: int = 20) -> List[PaperRecord]:
+        """Papers matching every term first, topped up with papers matching any term"""
+        papers = self.search(query, limit, match_all=True)
+        if len(papers) < limit:
+            seen = {paper.paper_id for paper in papers}
+            for paper in self.search(query, limit, match_all=False):
+                if paper.paper_id not in seen and len(papers) < limit:
+                    papers.append(paper)
+        return papers
+
+    def count(self, query: str) -> int:
+        """Number of indexed papers matching every query term"""
+        match = self.build_match(query)
+        if not self.enabled or not match:
+            return 0
+        try:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM papers_fts WHERE papers_fts MATCH ?", (match,)
+            ).fetchone()[0]
+        except Exception as e:
+            logger.error(f"Local index count failed: {e}")
+            return 0
+
+    def get_stats(self) -> Dict:
+        """Return corpus size per source"""
+        if not self.enabled:
+            return {'enabled': False, 'total_papers': 0, 'by_source': {}}
+        rows = self._connect().execute("SELECT source, COUNT(*) FROM papers GROUP BY source").fetchall()
+        return {
+            'enabled': True,
+            'total_papers': sum(count for _, count in rows),
+            'by_source': {source or 'unknown': count for source, count in rows},
+            'max_rows': self.max_rows,
+            'max_age': self.max_age,
+            'pruned': self.stats['pruned']
+        }
+
+    def flush(self, timeout: float = 5):
+        """Wait for queued writes to finish"""
+        self._writer.submit(lambda: None).result(timeout=timeout)
+
+# Create global instance
+paper_index = PaperIndex()
@@ -0,0 +1,219 @@
+"""
+Unified paper record
+One compact, slotted record type for every paper source, plus the conversions into it
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.paper_dedup import canonicalize_arxiv_id, canonicalize_doi, title_fingerprint
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _join_authors(authors: Any) -> str:
+    """Authors are exposed as one comma-separated string"""
+    if not authors:
+        return "Unknown"
+    if isinstance(authors, str):
+        return authors
+    names = []
+    for author in authors:
+        name = author.get('name', '') if isinstance(author, dict) else author
+        if name:
+            names.append(name)
+    return ", ".join(names) or "Unknown"
+
+
+class PaperRecord:
+    """
+    Paper metadata as returned by the search pipeline
+
+    Supports read-only dict-style access (record['title'], record.get('doi'))
+    so prompt builders handle records and request-supplied dicts alike.
+    """
+
+    # Always present in the serialized form
+    CORE_FIELDS = ('title', 'authors', 'summary', 'published', 'published_year',
+                   'url', 'pdf_url', 'doi', 'categories', 'source')
+
+    # Only serialized when set
+    OPTIONAL_FIELDS = ('arxiv_id', 'citation_count', 'journal', 'volume', 'issue', 'pages',
+                       'sources', 'relevance_score', 'scihub_available', 'scihub_pdf_url', 'scihub_url')
+
+    FIELDS = CORE_FIELDS + OPTIONAL_FIELDS
+
+    # Source-specific fields that do not fit the common schema live in extra
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, title: str = "Unknown Title", authors: str = "Unknown",
+                 summary: str = "No summary available", published: str = "Unknown",
+                 published_year: Optional[int] = None, url: Optional[str] = None,
+                 pdf_url: Optional[str] = None, doi: Optional[str] = None,
+                 categories: Optional[List[str]] = None, source: Optional[str] = None,
+                 arxiv_id: Optional[str] = None, citation_count: Optional[int] = None,
+                 journal: Optional[str] = None, volume: Optional[str] = None,
+                 issue: Optional[str] = None, pages: Optional[str] = None,
+                 sources: Optional[List[str]] = None, relevance_score: Optional[float] = None,
+                 scihub_available: Optional[bool] = None,
+                 scihub_pdf_url: Optional[str] = None, scihub_url: Optional[str] = None,
+                 extra: Optional[Dict] = None):
+        self.title = title
+        self.authors = authors
+        self.summary = summary
+        self.published = published
+        self.published_year = published_year
+        self.url = url
+        self.pdf_url = pdf_url
+        self.doi = doi
+        self.categories = categories if categories is not None else []
+        self.source = source
+        self.arxiv_id = arxiv_id
+        self.citation_count = citation_count
+        self.journal = journal
+        self.volume = volume
+        self.issue = issue
+        self.pages = pages
+        self.sources = sources
+        self.relevance_score = relevance_score
+        self.scihub_available = scihub_available
+        self.scihub_pdf_url = scihub_pdf_url
+        self.scihub_url = scihub_url
+        self.extra = extra
+
+    # Conversions from each source
+
+    @classmethod
+    def from_arxiv_result(cls, result) -> "PaperRecord":
+        """Build a record from an arxiv.Result"""
+        return cls(
+            title=result.title or "Unknown Title",
+            authors=", ".join(author.name for author in result.authors) if result.authors else "Unknown",
+            summary=result.summary or "No summary available",
+            published=result.published.strftime("%Y-%m-%d") if result.published else "Unknown",
+            published_year=result.published.year if result.published else None,
+            url=result.entry_id,
+            pdf_url=result.pdf_url or "#",
+            doi=getattr(result, 'doi', None) or None,
+            categories=list(getattr(result, 'categories', None) or []),
+            source="arXiv",
+            arxiv_id=result.entry_id.split("/")[-1] if result.entry_id else "unknown"
+        )
+
+    @classmethod
+    def from_paper_result(cls, paper) -> "PaperRecord":
+        """Build a record from a multi-source PaperResult"""
+        return cls(
+            title=paper.title,
+            authors=_join_authors(paper.authors),
+            summary=paper.abstract or "No summary available",
+            published=str(paper.publication_year) if paper.publication_year else "Unknown",
+            published_year=paper.publication_year,
+            url=paper.url,
+            pdf_url=paper.pdf_url,
+            doi=paper.doi,
+            categories=paper.keywords or [],
+            source=paper.source,
+            citation_count=paper.citation_count,
+            journal=paper.journal,
+            volume=paper.volume,
+            issue=paper.issue,
+            pages=paper.pages
+        )
+
+    @classmethod
+    def from_ieee(cls, paper: Dict) -> "PaperRecord":
+        """Build a record from an IEEE Xplore paper dictionary"""
+        start_page, end_page = paper.get('start_page'), paper.get('end_page')
+        return cls(
+            title=paper.get('title') or "Unknown Title",
+            authors=_join_authors(paper.get('authors')),
+            summary=paper.get('abstract') or "No summary available",
+            published=paper.get('publication_date') or str(paper.get('publication_year') or "Unknown"),
+            published_year=paper.get('publication_year'),
+            url=paper.get('url'),
+            pdf_url=paper.get('pdf_url') or None,
+            doi=paper.get('doi') or None,
+            categories=paper.get('ieee_terms', []),
+            source=paper.get('source', "IEEE Xplore"),
+            citation_count=paper.get('citation_count'),
+            journal=paper.get('publication_title') or None,
+            volume=paper.get('volume') or None,
+            issue=paper.get('issue') or None,
+            pages=f"{start_page}-{end_page}" if start_page and end_page else None,
+            extra={key: paper[key] for key in ('author_keywords', 'document_type', 'html_url') if paper.get(key)} or None
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PaperRecord":
+        """Build a record from its serialized form (e.g. a cached result)"""
+        known = {field: data[field] for field in cls.FIELDS if field in data}
+        extra = {key: value for key, value in data.items() if key not in cls.__slots__}
+        if data.get('extra'):
+            extra.update(data['extra'])
+        return cls(extra=extra or None, **known)
+
+    @classmethod
+    def coerce(cls, paper: Any) -> "PaperRecord":
+        """Return a private record for a record or dict, copying so shared cached records are never mutated"""
+        if isinstance(paper, cls):
+            return paper.copy()
+        return cls.from_dict(paper)
+
+    @classmethod
+    def coerce_all(cls, papers: Iterable[Any]) -> List["PaperRecord"]:
+        return [cls.coerce(paper) for paper in papers]
+
+    def copy(self) -> "PaperRecord":
+        """Shallow copy"""
+        clone = PaperRecord.__new__(PaperRecord)
+        for field in self.__slots__:
+            setattr(clone, field, getattr(self, field))
+        return clone
+
+    def to_dict(self) -> Dict:
+        """Serialize to the paper dictionary used by the API"""
+        data = {field: getattr(self, field) for field in self.CORE_FIELDS}
+        for field in self.OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def paper_id(self) -> str:
+        """Stable identifier: DOI, then versionless arXiv ID, then URL, then title fingerprint"""
+        doi = canonicalize_doi(self.doi)
+        if doi:
+            return f"doi:{doi}"
+        arxiv_id = canonicalize_arxiv_id(self.arxiv_id)
+        if arxiv_id:
+            return f"arxiv:{arxiv_id}"
+        return self.url or f"title:{title_fingerprint(self.title)}"
+
+    # Read-only mapping access
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.FIELDS:
+            value = getattr(self, key)
+        elif self.extra:
+            value = self.extra.get(key)
+        else:
+            value = None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None and key not in self.CORE_FIELDS:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None or key in self.CORE_FIELDS
+
+    def __repr__(self) -> str:
+        return f"PaperRecord(title={self.title!r}, source={self.source!r})"
@@ -127,7 +127,7 @@ Always base your responses on the document content provided above."""
             full_prompt = f"{system_prompt}\n\n{history_text}User question: {query}\n\nPlease provide a helpful response based on the document content:"
             
             # Generate response using the existing query_gemini function
-            from app import query_gemini
+            from utils.generation import query_gemini
             ai_response = query_gemini(full_prompt)
             
             if not ai_response:
@@ -226,7 +226,7 @@ Document content:
 Please provide {limit} questions, one per line, without numbering or bullet points:"""
             
             # Generate suggestions using the existing query_gemini function
-            from app import query_gemini
+            from utils.generation import query_gemini
             response = query_gemini(prompt)
             
             if response:
@@ -264,7 +264,7 @@ Document content:
 Summary:"""
             
             # Generate summary using the existing query_gemini function
-            from app import query_gemini
+            from utils.generation import query_gemini
             summary = query_gemini(prompt)
             
             return summary if summary else "Unable to generate summary."
@@ -294,7 +294,7 @@ Text:
 Main topics (one per line):"""
             
             # Generate topics using the existing query_gemini function
-            from app import query_gemini
+            from utils.generation import query_gemini
             response = query_gemini(prompt)
             
             if response:
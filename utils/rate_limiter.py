@@ -0,0 +1,217 @@
+"""
+Shared token-bucket rate limiter for upstream APIs
+Buckets live in Redis so every worker process and node draws from the same quota,
+with an in-process fallback when Redis is unavailable
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from utils.redis_client import get_redis_client, reset_redis_client
+
+# Import config with fallback to environment variables
+try:
+    from config import UPSTREAM_RATE_LIMITS, RATE_LIMIT_MAX_WAIT
+except ImportError:
+    # Fallback to environment variables for deployment
+    UPSTREAM_RATE_LIMITS = os.getenv('UPSTREAM_RATE_LIMITS', '')  # e.g. "api.semanticscholar.org=1.6:5"
+    RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 0.5))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Refill the bucket, then reserve one token if it becomes available within max_wait.
+# Tokens may go negative: a negative balance is a queue of reservations, each of
+# which waits its turn, so callers sleep at most max_wait and never retry.
+# Returns the wait in microseconds, or -1 (with the wait until a token frees up
+# in the second value) when the caller would have to wait longer than max_wait.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+end
+if wait > max_wait then
+    return {-1, math.ceil(wait * 1000000)}
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens + 1) / rate) + 60)
+return {math.ceil(wait * 1000000), 0}
+"""
+
+
+class RateLimited(Exception):
+    """Raised when an upstream's quota would not allow a request within the allowed wait"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Rate limit for {name} reached, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def parse_rate_limits(spec) -> Dict[str, Tuple[float, float]]:
+    """Parse "host=rate[:burst],..." into {host: (requests per second, burst)}"""
+    if isinstance(spec, dict):
+        return {name: tuple(value) for name, value in spec.items()}
+    limits = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        name, value = item.split('=', 1)
+        try:
+            rate, _, burst = value.partition(':')
+            limits[name.strip()] = (float(rate), float(burst) if burst else max(1.0, float(rate)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid rate limit: {item}")
+    return limits
+
+
+class RateLimiter:
+    """Token buckets keyed by upstream host"""
+
+    KEY_PREFIX = "ratelimit:"
+
+    # Requests per second and burst size for each upstream
+    DEFAULT_LIMITS = {
+        'api.semanticscholar.org': (1.6, 5),  # 100 requests per minute
+        'core.ac.uk': (1.0, 5),
+        'api.crossref.org': (10.0, 20),
+        'eutils.ncbi.nlm.nih.gov': (3.0, 3),  # NCBI limit without an API key
+        'ieeexploreapi.ieee.org': (1.0, 2),
+        'export.arxiv.org': (1.0, 3),
+        'sci-hub': (0.5, 2),  # All mirrors share one bucket
+    }
+    DEFAULT_LIMIT = (5.0, 10)
+
+    def __init__(self, limits=UPSTREAM_RATE_LIMITS, max_wait: float = RATE_LIMIT_MAX_WAIT):
+        self.limits = dict(self.DEFAULT_LIMITS)
+        self.limits.update(parse_rate_limits(limits))
+        self.max_wait = max_wait
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._script = None
+        self.stats = {'acquired': 0, 'waited': 0, 'throttled': 0}
+
+    def limit_for(self, name: str) -> Tuple[float, float]:
+        return self.limits.get(name, self.DEFAULT_LIMIT)
+
+    def set_default_limit(self, name: str, rate: float, burst: float):
+        """Give a bucket a limit unless UPSTREAM_RATE_LIMITS already sets one"""
+        self.limits.setdefault(name, (rate, burst))
+
+    def _reserve_redis(self, client, name: str, max_wait: float) -> Tuple[bool, float]:
+        rate, burst = self.limit_for(name)
+        if self._script is None:
+            self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+        wait, retry_after = self._script(keys=[f"{self.KEY_PREFIX}{name}"], args=[rate, burst, max_wait])
+        if int(wait) < 0:
+            return False, int(retry_after) / 1e6
+        return True, int(wait) / 1e6
+
+    def _reserve_local(self, name: str, max_wait: float) -> Tuple[bool, float]:
+        rate, burst = self.limit_for(name)
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(name, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+            wait = (1 - tokens) / rate if tokens < 1 else 0.0
+            if wait > max_wait:
+                self._buckets[name] = (tokens, now)
+                return False, wait
+            self._buckets[name] = (tokens - 1, now)
+            return True, wait
+
+    def _reserve(self, name: str, max_wait: float) -> Tuple[bool, float]:
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return self._reserve_redis(client, name, max_wait)
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, using local bucket for {name}: {e}")
+                reset_redis_client()
+        return self._reserve_local(name, max_wait)
+
+    def wait_time(self, name: str) -> float:
+        """Estimated seconds until a token for name is free, without taking one"""
+        rate, burst = self.limit_for(name)
+        client = get_redis_client()
+        if client is not None:
+            try:
+                tokens, ts = client.hmget(f"{self.KEY_PREFIX}{name}", 'tokens', 'ts')
+                if tokens is None:
+                    return 0.0
+                seconds_now, micros = client.time()
+                elapsed = max(0.0, seconds_now + micros / 1e6 - float(ts))
+                tokens = min(burst, float(tokens) + elapsed * rate)
+                return (1 - tokens) / rate if tokens < 1 else 0.0
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, checking local bucket for {name}: {e}")
+                reset_redis_client()
+        with self._lock:
+            tokens, ts = self._buckets.get(name, (burst, time.monotonic()))
+        tokens = min(burst, tokens + max(0.0, time.monotonic() - ts) * rate)
+        return (1 - tokens) / rate if tokens < 1 else 0.0
+
+    def acquire(self, name: str, max_wait: Optional[float] = None) -> bool:
+        """
+        Take one token for an upstream
+
+        Waits only when a token is guaranteed within max_wait seconds (default
+        RATE_LIMIT_MAX_WAIT); otherwise returns False immediately.
+        """
+        try:
+            self.limit(name, max_wait)
+            return True
+        except RateLimited:
+            return False
+
+    def limit(self, name: str, max_wait: Optional[float] = None):
+        """Take one token for an upstream or raise RateLimited"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        acquired, wait = self._reserve(name, max(0.0, max_wait))
+        if not acquired:
+            self.stats['throttled'] += 1
+            raise RateLimited(name, wait)
+        if wait > 0:
+            self.stats['waited'] += 1
+            time.sleep(wait)
+        self.stats['acquired'] += 1
+
+    def penalize(self, name: str, seconds: float):
+        """Drain a bucket after the upstream answered 429, so every worker backs off"""
+        rate, burst = self.limit_for(name)
+        tokens = -rate * seconds
+        client = get_redis_client()
+        if client is not None:
+            try:
+                key = f"{self.KEY_PREFIX}{name}"
+                seconds_now, micros = client.time()
+                client.hset(key, mapping={'tokens': tokens, 'ts': seconds_now + micros / 1e6})
+                client.expire(key, int(seconds + burst / rate) + 60)
+                return
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, penalizing local bucket for {name}: {e}")
+                reset_redis_client()
+        with self._lock:
+            self._buckets[name] = (tokens, time.monotonic())
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
+
+# Create global instance
+rate_limiter = RateLimiter()
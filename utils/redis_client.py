@@ -0,0 +1,71 @@
+"""
+Shared Redis connection
+Returns None when Redis is not installed or not reachable so callers can fall back to in-process state
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Import config with fallback to environment variables
+try:
+    from config import REDIS_URL
+except ImportError:
+    # Fallback to environment variables for deployment
+    REDIS_URL = os.getenv('REDIS_URL', os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How long to wait before trying to reconnect after Redis was unreachable
+_RETRY_INTERVAL_SECONDS = 30
+
+_client = None
+_last_failure = None
+_lock = threading.Lock()
+
+
+def _recently_failed() -> bool:
+    return _last_failure is not None and time.monotonic() - _last_failure < _RETRY_INTERVAL_SECONDS
+
+
+def get_redis_client() -> Optional["redis.Redis"]:
+    """Return a shared Redis client, or None if Redis is unavailable"""
+    global _client, _last_failure
+
+    if _client is not None:
+        return _client
+    if redis is None or not REDIS_URL:
+        return None
+    if _recently_failed():
+        return None
+
+    with _lock:
+        if _client is not None or _recently_failed():
+            return _client
+        try:
+            client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+            client.ping()
+            _client = client
+            logger.info("Redis connection established")
+        except Exception as e:
+            _last_failure = time.monotonic()
+            logger.warning(f"Redis unavailable, using in-process fallbacks: {e}")
+
+    return _client
+
+
+def reset_redis_client():
+    """Drop the shared client so the next call reconnects (e.g. after a connection error)"""
+    global _client, _last_failure
+    with _lock:
+        _client = None
+        _last_failure = time.monotonic()
@@ -0,0 +1,148 @@
+"""
+Embedding reranker for merged search results
+Scores candidates against the query with the document processor's SentenceTransformer
+"""
+
+import os
+import logging
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+from utils.paper_dedup import canonicalize_doi, title_fingerprint
+
+# Import config with fallback to environment variables
+try:
+    from config import RERANK_ENABLED, RERANK_CACHE_SIZE
+except ImportError:
+    # Fallback to environment variables for deployment
+    RERANK_ENABLED = os.getenv('RERANK_ENABLED', 'true').lower() == 'true'
+    RERANK_CACHE_SIZE = int(os.getenv('RERANK_CACHE_SIZE', 20000))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# MiniLM truncates at 256 word pieces; there is no point encoding more text
+_MAX_TEXT_CHARS = 1200
+
+
+def _get(paper: Any, field: str) -> Any:
+    if isinstance(paper, dict):
+        return paper.get(field)
+    return getattr(paper, field, None)
+
+
+def _impact(paper: Any):
+    """Citation count, then publication year: the order used when there are no relevance scores"""
+    year = _get(paper, 'publication_year') or _get(paper, 'published_year')
+    return (_get(paper, 'citation_count') or 0, year or 0)
+
+
+class PaperReranker:
+    """Reranks papers by cosine similarity between the query and title + abstract"""
+
+    def __init__(self, cache_size: int = RERANK_CACHE_SIZE, enabled: bool = RERANK_ENABLED):
+        self.enabled = enabled
+        self._embeddings = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self.stats = {'reranks': 0, 'encoded': 0, 'cache_hits': 0}
+
+    @staticmethod
+    def _model():
+        # Imported lazily: the model is loaded once, by the document processor
+        from utils.document_processor import document_processor
+        return document_processor.embedding_model
+
+    @staticmethod
+    def paper_key(paper: Any) -> str:
+        """Cache key for a paper's embedding"""
+        paper_id = getattr(paper, 'paper_id', None)
+        if paper_id:
+            return paper_id
+        doi = canonicalize_doi(_get(paper, 'doi'))
+        return f"doi:{doi}" if doi else f"title:{title_fingerprint(_get(paper, 'title'))}"
+
+    @staticmethod
+    def paper_text(paper: Any) -> str:
+        abstract = _get(paper, 'summary') or _get(paper, 'abstract') or ''
+        if abstract == "No summary available":
+            abstract = ''
+        return f"{_get(paper, 'title') or ''}. {abstract}"[:_MAX_TEXT_CHARS]
+
+    def score(self, query: str, papers: List[Any]) -> Optional[np.ndarray]:
+        """
+        Cosine similarity of each paper to the query
+
+        The query and every paper not in the embedding cache are encoded in a
+        single batch; scores are one matrix-vector product.
+
+        Returns:
+            Array of scores aligned with papers, or None if no model is available
+        """
+        model = self._model()
+        if model is None or not papers:
+            return None
+
+        keys = [self.paper_key(paper) for paper in papers]
+        with self._lock:
+            cached = {key: self._embeddings.get(key) for key in keys}
+        missing = list(dict.fromkeys(key for key in keys if cached[key] is None))
+        texts = {key: self.paper_text(paper) for key, paper in zip(keys, papers) if key in missing}
+
+        encoded = model.encode(
+            [query] + [texts[key] for key in missing],
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        ).astype(np.float32)
+        query_vector = encoded[0]
+
+        with self._lock:
+            for key, vector in zip(missing, encoded[1:]):
+                self._embeddings[key] = vector
+                cached[key] = vector
+        self.stats['encoded'] += len(missing)
+        self.stats['cache_hits'] += len(keys) - len(missing)
+
+        matrix = np.vstack([cached[key] for key in keys])
+        return matrix @ query_vector
+
+    def rerank(self, query: str, papers: List[Any], top_k: Optional[int] = None) -> List[Any]:
+        """
+        Order papers by relevance to the query, citation count and year breaking ties
+
+        Records get their score in relevance_score. If reranking is disabled or
+        fails, papers are ordered by citation count, then publication year.
+        """
+        scores = None
+        if self.enabled and len(papers) > 1:
+            try:
+                scores = self.score(query, papers)
+            except Exception as e:
+                logger.error(f"Reranking failed, ordering by citations: {e}")
+        if scores is None:
+            ranked = sorted(papers, key=_impact, reverse=True)
+            return ranked[:top_k] if top_k else ranked
+
+        self.stats['reranks'] += 1
+        for paper, value in zip(papers, scores):
+            if hasattr(paper, 'relevance_score'):
+                paper.relevance_score = round(float(value), 4)
+
+        order = sorted(
+            range(len(papers)),
+            key=lambda i: (float(scores[i]),) + _impact(papers[i]),
+            reverse=True
+        )
+        ranked = [papers[i] for i in order]
+        return ranked[:top_k] if top_k else ranked
+
+    def get_stats(self) -> dict:
+        return dict(self.stats, cached_embeddings=len(self._embeddings))
+
+# Create global instance
+paper_reranker = PaperReranker()
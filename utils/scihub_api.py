@@ -1,15 +1,19 @@
 import requests
 import json
-import time
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from urllib.parse import urlparse, urljoin
 import hashlib
+from cachetools import LRUCache
 import re
 from bs4 import BeautifulSoup
 import io
 
+from utils.paper_record import PaperRecord
+from utils.rate_limiter import rate_limiter, RateLimited
+from utils.http_client import http_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,6 +29,10 @@ class SciHubAPI:
     - Cache results for performance
     """
     
+    RATE_LIMIT_BUCKET = "sci-hub"
+    # Batch enhancement runs in search requests, so a paper without a token right away is left unknown
+    BATCH_MAX_WAIT = 0.0
+    
     def __init__(self):
         # List of known Sci-Hub mirrors (updated as of 2024)
         self.mirrors = [
@@ -36,11 +44,9 @@ class SciHubAPI:
         ]
         
         self.active_mirror = None
-        self.cache = {}  # Simple in-memory cache
+        self.cache = LRUCache(maxsize=1024)  # In-memory cache with LRU eviction
         self.cache_duration = timedelta(hours=6)  # Cache for 6 hours
-        self.rate_limit_delay = 2.0  # Delay between requests (be respectful)
-        self.last_request_time = 0
-        self.session = requests.Session()
+        self.session = http_client.session()
         self.logger = logging.getLogger(__name__)
         
         # Set up session headers
@@ -48,24 +54,15 @@ class SciHubAPI:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         })
         
         # Initialize active mirror
         self._find_active_mirror()
     
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between API calls to be respectful"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        if time_since_last_request < self.rate_limit_delay:
-            sleep_time = self.rate_limit_delay - time_since_last_request
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+    def _enforce_rate_limit(self, max_wait: Optional[float] = None):
+        """Take a token from the shared Sci-Hub bucket (one bucket for all mirrors), raising RateLimited if none is available soon"""
+        rate_limiter.limit(self.RATE_LIMIT_BUCKET, max_wait)
     
     def _get_cache_key(self, identifier: str, search_type: str) -> str:
         """Generate cache key for requests"""
@@ -80,7 +77,7 @@ class SciHubAPI:
         """Find an active Sci-Hub mirror"""
         for mirror in self.mirrors:
             try:
-                response = requests.get(mirror, timeout=10, headers=self.session.headers)
+                response = self.session.get(mirror, timeout=10)
                 if response.status_code == 200:
                     self.active_mirror = mirror
                     self.logger.info(f"Active Sci-Hub mirror found: {mirror}")
@@ -92,8 +89,9 @@ class SciHubAPI:
         self.logger.warning("No active Sci-Hub mirror found")
         self.active_mirror = self.mirrors[0]  # Fallback to first mirror
     
-    def _make_request(self, url: str, params: Dict = None) -> Optional[requests.Response]:
-        """Make HTTP request with error handling and rate limiting"""
+    def _make_request(self, url: str, params: Dict = None,
+                      max_wait: Optional[float] = None) -> Optional[requests.Response]:
+        """Make HTTP request with error handling and rate limiting; raises RateLimited when no token is available"""
         if not self.active_mirror:
             self._find_active_mirror()
         
@@ -101,7 +99,7 @@ class SciHubAPI:
             self.logger.error("No active Sci-Hub mirror available")
             return None
         
-        self._enforce_rate_limit()
+        self._enforce_rate_limit(max_wait)
         
         try:
             full_url = urljoin(self.active_mirror, url) if not url.startswith('http') else url
@@ -115,7 +113,7 @@ class SciHubAPI:
                 current_index = self.mirrors.index(self.active_mirror)
                 next_index = (current_index + 1) % len(self.mirrors)
                 self.active_mirror = self.mirrors[next_index]
-                return self._make_request(url, params)
+                return self._make_request(url, params, max_wait)
             else:
                 self.logger.error(f"Sci-Hub request failed: {response.status_code}")
                 return None
@@ -166,15 +164,19 @@ class SciHubAPI:
             self.logger.error(f"Error extracting PDF URL: {str(e)}")
             return None
     
-    def get_paper_by_doi(self, doi: str) -> Optional[Dict]:
+    def get_paper_by_doi(self, doi: str, max_wait: Optional[float] = None) -> Optional[Dict]:
         """
         Get paper from Sci-Hub using DOI
         
         Args:
             doi: Digital Object Identifier of the paper
+            max_wait: Longest wait for a rate-limit token (default RATE_LIMIT_MAX_WAIT)
             
         Returns:
             Dictionary with paper information and download URL if found
+            
+        Raises:
+            RateLimited: If no Sci-Hub token is available within max_wait
         """
         cache_key = self._get_cache_key(doi, "doi")
         
@@ -197,7 +199,7 @@ class SciHubAPI:
             self.logger.info(f"Searching Sci-Hub for DOI: {clean_doi}")
             
             # Make request to Sci-Hub
-            response = self._make_request(clean_doi)
+            response = self._make_request(clean_doi, max_wait=max_wait)
             if not response:
                 return None
             
@@ -242,19 +244,25 @@ class SciHubAPI:
             self.logger.info(f"Successfully found paper on Sci-Hub: {clean_doi}")
             return paper_data
             
+        except RateLimited:
+            raise
         except Exception as e:
             self.logger.error(f"Error getting paper by DOI: {str(e)}")
             return None
     
-    def get_paper_by_url(self, paper_url: str) -> Optional[Dict]:
+    def get_paper_by_url(self, paper_url: str, max_wait: Optional[float] = None) -> Optional[Dict]:
         """
         Get paper from Sci-Hub using paper URL
         
         Args:
             paper_url: URL of the paper (from publisher, arXiv, etc.)
+            max_wait: Longest wait for a rate-limit token (default RATE_LIMIT_MAX_WAIT)
             
         Returns:
             Dictionary with paper information and download URL if found
+            
+        Raises:
+            RateLimited: If no Sci-Hub token is available within max_wait
         """
         cache_key = self._get_cache_key(paper_url, "url")
         
@@ -269,7 +277,7 @@ class SciHubAPI:
             self.logger.info(f"Searching Sci-Hub for URL: {paper_url}")
             
             # Make request to Sci-Hub with the URL
-            response = self._make_request(paper_url)
+            response = self._make_request(paper_url, max_wait=max_wait)
             if not response:
                 return None
             
@@ -299,19 +307,25 @@ class SciHubAPI:
             self.logger.info(f"Successfully found paper on Sci-Hub for URL: {paper_url}")
             return paper_data
             
+        except RateLimited:
+            raise
         except Exception as e:
             self.logger.error(f"Error getting paper by URL: {str(e)}")
             return None
     
-    def search_paper_by_title(self, title: str) -> Optional[Dict]:
+    def search_paper_by_title(self, title: str, max_wait: Optional[float] = None) -> Optional[Dict]:
         """
         Search for paper on Sci-Hub by title
         
         Args:
             title: Title of the paper
+            max_wait: Longest wait for a rate-limit token (default RATE_LIMIT_MAX_WAIT)
             
         Returns:
             Dictionary with paper information and download URL if found
+            
+        Raises:
+            RateLimited: If no Sci-Hub token is available within max_wait
         """
         cache_key = self._get_cache_key(title, "title")
         
@@ -326,7 +340,7 @@ class SciHubAPI:
             self.logger.info(f"Searching Sci-Hub for title: {title[:50]}...")
             
             # Make request to Sci-Hub with the title
-            response = self._make_request("", params={'q': title})
+            response = self._make_request("", params={'q': title}, max_wait=max_wait)
             if not response:
                 return None
             
@@ -351,6 +365,8 @@ class SciHubAPI:
             self.logger.info(f"Successfully found paper on Sci-Hub for title: {title[:50]}...")
             return paper_data
             
+        except RateLimited:
+            raise
         except Exception as e:
             self.logger.error(f"Error searching paper by title: {str(e)}")
             return None
@@ -380,48 +396,62 @@ class SciHubAPI:
             self.logger.error(f"Error downloading PDF: {str(e)}")
             return None
     
-    def enhance_paper_with_scihub(self, paper: Dict) -> Dict:
+    def enhance_paper_with_scihub(self, paper: Union[Dict, PaperRecord],
+                                  max_wait: Optional[float] = None) -> Union[Dict, PaperRecord]:
         """
         Enhance existing paper data with Sci-Hub access information
         
         Args:
-            paper: Paper dictionary (from arXiv, IEEE, etc.)
+            paper: PaperRecord (updated in place) or paper dictionary (copied)
+            max_wait: Longest wait for each rate-limit token (default RATE_LIMIT_MAX_WAIT)
             
         Returns:
-            Enhanced paper dictionary with Sci-Hub information
+            Enhanced paper with Sci-Hub information; scihub_available is None when
+            the lookup was rate limited and availability is unknown
         """
-        enhanced_paper = paper.copy()
         scihub_data = None
         
-        # Try DOI first if available
-        if paper.get('doi'):
-            scihub_data = self.get_paper_by_doi(paper['doi'])
-        
-        # Try URL if DOI didn't work
-        if not scihub_data and paper.get('url'):
-            scihub_data = self.get_paper_by_url(paper['url'])
-        
-        # Try PDF URL if available
-        if not scihub_data and paper.get('pdf_url'):
-            scihub_data = self.get_paper_by_url(paper['pdf_url'])
-        
-        # Try title as last resort
-        if not scihub_data and paper.get('title'):
-            scihub_data = self.search_paper_by_title(paper['title'])
+        try:
+            # Try DOI first if available
+            if paper.get('doi'):
+                scihub_data = self.get_paper_by_doi(paper['doi'], max_wait)
+            
+            # Try URL if DOI didn't work
+            if not scihub_data and paper.get('url'):
+                scihub_data = self.get_paper_by_url(paper['url'], max_wait)
+            
+            # Try PDF URL if available
+            if not scihub_data and paper.get('pdf_url'):
+                scihub_data = self.get_paper_by_url(paper['pdf_url'], max_wait)
+            
+            # Try title as last resort
+            if not scihub_data and paper.get('title'):
+                scihub_data = self.search_paper_by_title(paper['title'], max_wait)
+            
+            fields = {'scihub_available': bool(scihub_data)}
+        except RateLimited as e:
+            # Not looked up, so not known to be missing
+            self.logger.warning(f"Sci-Hub availability unknown for {paper.get('title', 'Unknown')[:50]}...: {str(e)}")
+            fields = {'scihub_available': None}
         
         # Add Sci-Hub information to paper
         if scihub_data:
-            enhanced_paper['scihub_available'] = True
-            enhanced_paper['scihub_pdf_url'] = scihub_data.get('pdf_url')
-            enhanced_paper['scihub_url'] = scihub_data.get('scihub_url')
+            fields['scihub_pdf_url'] = scihub_data.get('pdf_url')
+            fields['scihub_url'] = scihub_data.get('scihub_url')
             self.logger.info(f"Enhanced paper with Sci-Hub access: {paper.get('title', 'Unknown')[:50]}...")
-        else:
-            enhanced_paper['scihub_available'] = False
+        elif fields['scihub_available'] is False:
             self.logger.info(f"No Sci-Hub access found for: {paper.get('title', 'Unknown')[:50]}...")
         
+        if isinstance(paper, PaperRecord):
+            for name, value in fields.items():
+                setattr(paper, name, value)
+            return paper
+        
+        enhanced_paper = paper.copy()
+        enhanced_paper.update(fields)
         return enhanced_paper
     
-    def batch_enhance_papers(self, papers: List[Dict]) -> List[Dict]:
+    def batch_enhance_papers(self, papers: List[Union[Dict, PaperRecord]]) -> List[Union[Dict, PaperRecord]]:
         """
         Enhance multiple papers with Sci-Hub access information
         
@@ -435,16 +465,12 @@ class SciHubAPI:
         
         for i, paper in enumerate(papers):
             self.logger.info(f"Enhancing paper {i+1}/{len(papers)} with Sci-Hub data")
-            enhanced_paper = self.enhance_paper_with_scihub(paper)
+            enhanced_paper = self.enhance_paper_with_scihub(paper, self.BATCH_MAX_WAIT)
             enhanced_papers.append(enhanced_paper)
-            
-            # Add small delay between requests to be respectful
-            if i < len(papers) - 1:
-                time.sleep(1)
         
         return enhanced_papers
     
-    def get_availability_stats(self, papers: List[Dict]) -> Dict:
+    def get_availability_stats(self, papers: List[Union[Dict, PaperRecord]]) -> Dict:
         """
         Get statistics on Sci-Hub availability for a list of papers
         
@@ -456,12 +482,14 @@ class SciHubAPI:
         """
         total_papers = len(papers)
         available_papers = sum(1 for paper in papers if paper.get('scihub_available', False))
+        unknown_papers = sum(1 for paper in papers if paper.get('scihub_available') is None)
         
         return {
             'total_papers': total_papers,
             'available_on_scihub': available_papers,
             'availability_rate': (available_papers / total_papers * 100) if total_papers > 0 else 0,
-            'unavailable_papers': total_papers - available_papers
+            'unavailable_papers': total_papers - available_papers - unknown_papers,
+            'unknown_papers': unknown_papers
         }
     
     def clear_cache(self):
@@ -475,7 +503,7 @@ class SciHubAPI:
         
         for mirror in self.mirrors:
             try:
-                response = requests.get(mirror, timeout=10, headers=self.session.headers)
+                response = self.session.get(mirror, timeout=10)
                 mirror_status[mirror] = {
                     'status': 'active' if response.status_code == 200 else 'inactive',
                     'response_time': response.elapsed.total_seconds(),
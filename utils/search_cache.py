@@ -0,0 +1,211 @@
+"""
+Tiered cache for federated search results
+In-process LRU in front of a shared Redis tier, with per-source TTLs and stale-while-revalidate
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from utils import fast_json
+from utils.multi_source_api import parse_source_timeouts
+from utils.redis_client import get_redis_client, reset_redis_client
+from utils.single_flight import search_flight
+
+# Import config with fallback to environment variables
+try:
+    from config import SEARCH_CACHE_SIZE, SEARCH_CACHE_TTLS, SEARCH_CACHE_STALE_SECONDS
+except ImportError:
+    # Fallback to environment variables for deployment
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 2048))
+    SEARCH_CACHE_TTLS = os.getenv('SEARCH_CACHE_TTLS', '')  # e.g. "arxiv=1800,crossref=86400"
+    SEARCH_CACHE_STALE_SECONDS = int(os.getenv('SEARCH_CACHE_STALE_SECONDS', 24 * 3600))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SearchCache:
+    """Search result cache keyed on normalized query, source, sort and limit"""
+
+    KEY_PREFIX = "search_cache:"
+
+    # Seconds a result is served as fresh, per source
+    DEFAULT_TTLS = {
+        'arxiv': 3600,
+        'semantic_scholar': 6 * 3600,
+        'core': 12 * 3600,
+        'crossref': 12 * 3600,
+        'pubmed': 6 * 3600,
+        'ieee': 12 * 3600,
+    }
+    DEFAULT_TTL = 3600
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, stale_seconds: int = SEARCH_CACHE_STALE_SECONDS):
+        self.local = LRUCache(maxsize=max_entries)
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(parse_source_timeouts(SEARCH_CACHE_TTLS))
+        self.stale_seconds = stale_seconds
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix='search-cache-refresh')
+        self.stats = {'local_hits': 0, 'redis_hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0}
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase and collapse whitespace so trivially different queries share an entry"""
+        return " ".join(query.lower().split())
+
+    def make_key(self, source: str, query: str, sort_by: str, limit: int) -> str:
+        """Build the cache key for one source search"""
+        digest = hashlib.sha1(
+            json.dumps([self.normalize_query(query), sort_by, limit]).encode('utf-8')
+        ).hexdigest()
+        return f"{self.KEY_PREFIX}{source}:{digest}"
+
+    def ttl_for(self, source: str) -> float:
+        return self.ttls.get(source, self.DEFAULT_TTL)
+
+    @staticmethod
+    def _encode(entry: Dict) -> bytes:
+        return zlib.compress(fast_json.dumps(entry))
+
+    @staticmethod
+    def _decode(blob: bytes) -> Dict:
+        # Papers come back as dictionaries; callers convert them into records
+        return fast_json.loads(zlib.decompress(blob))
+
+    def _read(self, key: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Look an entry up in the local tier, then in Redis; returns (entry, tier)"""
+        with self._lock:
+            entry = self.local.get(key)
+        if entry is not None:
+            return entry, 'local'
+
+        client = get_redis_client()
+        if client is None:
+            return None, None
+        try:
+            blob = client.get(key)
+        except Exception as e:
+            logger.warning(f"Redis read failed for {key}: {e}")
+            reset_redis_client()
+            return None, None
+        if blob is None:
+            return None, None
+
+        entry = self._decode(blob)
+        with self._lock:
+            self.local[key] = entry
+        return entry, 'redis'
+
+    def _write(self, key: str, source: str, payload: List) -> None:
+        """Store an entry in both tiers"""
+        entry = {'stored_at': time.time(), 'ttl': self.ttl_for(source), 'payload': payload}
+        with self._lock:
+            self.local[key] = entry
+
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.set(key, self._encode(entry), ex=int(entry['ttl'] + self.stale_seconds))
+        except Exception as e:
+            logger.warning(f"Redis write failed for {key}: {e}")
+            reset_redis_client()
+
+    def _refresh(self, key: str, source: str, fetch: Callable[[], List]) -> None:
+        try:
+            payload = fetch()
+            if payload:
+                self._write(key, source, payload)
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {source}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            client = get_redis_client()
+            if client is not None:
+                try:
+                    client.delete(f"{key}:refreshing")
+                except Exception:
+                    pass
+
+    def _schedule_refresh(self, key: str, source: str, fetch: Callable[[], List]) -> None:
+        """Refresh a stale entry in the background, once per key across workers"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                # Only one worker process refreshes a given key at a time
+                if not client.set(f"{key}:refreshing", 1, nx=True, ex=60):
+                    with self._lock:
+                        self._refreshing.discard(key)
+                    return
+            except Exception as e:
+                logger.warning(f"Redis refresh lock failed for {key}: {e}")
+
+        self._refresher.submit(self._refresh, key, source, fetch)
+
+    def _fetch_and_store(self, key: str, source: str, fetch: Callable[[], List]) -> List:
+        payload = fetch()
+        if payload:
+            self._write(key, source, payload)
+        return payload
+
+    def get_or_fetch(self, source: str, query: str, sort_by: str, limit: int,
+                     fetch: Callable[[], List], wait: Optional[float] = None) -> List:
+        """
+        Return cached results for a source search, fetching them on a miss
+
+        Fresh entries are returned directly. Entries past their TTL but inside the
+        stale window are returned immediately while a background refresh runs.
+        Concurrent misses for the same key, in any worker, share a single fetch;
+        wait bounds how long a caller waits on someone else's fetch.
+        Exceptions raised by fetch propagate and nothing is cached.
+        """
+        key = self.make_key(source, query, sort_by, limit)
+        entry, tier = self._read(key)
+
+        if entry is not None:
+            age = time.time() - entry['stored_at']
+            if age < entry['ttl']:
+                self.stats[f'{tier}_hits'] += 1
+                return entry['payload']
+            if age < entry['ttl'] + self.stale_seconds:
+                self.stats['stale_hits'] += 1
+                self._schedule_refresh(key, source, fetch)
+                return entry['payload']
+
+        self.stats['misses'] += 1
+        return search_flight.do(key, partial(self._fetch_and_store, key, source, fetch), wait)
+
+    def get_stats(self) -> Dict:
+        """Return hit/miss counters for this process"""
+        lookups = sum(self.stats[name] for name in ('local_hits', 'redis_hits', 'stale_hits', 'misses'))
+        hits = lookups - self.stats['misses']
+        return dict(self.stats, local_entries=len(self.local),
+                    hit_rate=(hits / lookups * 100) if lookups else 0)
+
+    def clear(self):
+        """Clear the in-process tier"""
+        with self._lock:
+            self.local.clear()
+        logger.info("Search cache cleared")
+
+# Create global instance
+search_cache = SearchCache()
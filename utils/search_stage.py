@@ -0,0 +1,203 @@
+"""
+Federated search stage
+Runs the local paper index, arXiv, the multi-source providers and IEEE Xplore as peers under one deadline
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from utils.arxiv_api import arxiv_api
+from utils.ieee_xplore import ieee_xplore_api
+from utils.search_cache import search_cache
+from utils.paper_record import PaperRecord
+from utils.paper_dedup import canonicalize_doi
+from utils.paper_index import paper_index, LOCAL_INDEX_FRESH_SECONDS
+from utils.circuit_breaker import circuit_breakers
+from utils.multi_source_api import (
+    multi_source_api, iter_with_deadlines, run_with_deadlines, parse_source_timeouts,
+    SourceError, SEARCH_MAX_WORKERS, SOURCE_TIMEOUT_SECONDS, SOURCE_TIMEOUTS
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SearchStage:
+    """Concurrent search stage in which every paper source is a peer"""
+
+    SOURCES = ('local', 'arxiv', 'semantic_scholar', 'core', 'crossref', 'pubmed', 'ieee')
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix='search-stage')
+        self.source_timeouts = parse_source_timeouts(SOURCE_TIMEOUTS)
+
+    def _fetch_provider(self, source: str, query: str, max_results: int, timeout: float) -> List[PaperRecord]:
+        papers = multi_source_api.providers[source].fetch_papers(query, max_results, timeout=timeout)
+        return [PaperRecord.from_paper_result(paper) for paper in papers]
+
+    def _fetch_arxiv(self, query: str, max_results: int, sort_by: str, timeout: float) -> List[PaperRecord]:
+        started = time.monotonic()
+        papers = arxiv_api.fetch_papers(query, max_results, sort_by)
+        # Whatever budget arXiv left over goes to journal metadata for papers that have a DOI
+        remaining = timeout - (time.monotonic() - started)
+        if remaining >= 1:
+            self._add_crossref_metadata(papers, remaining)
+        return papers
+
+    @staticmethod
+    def _add_crossref_metadata(papers: List[PaperRecord], timeout: float):
+        """Fill journal details and citation counts of published arXiv papers from one bulk DOI lookup"""
+        # arXiv's own DOIs are registered with DataCite, not Crossref
+        dois = [paper.doi for paper in papers if paper.doi and not paper.doi.lower().startswith('10.48550/')]
+        if not dois:
+            return
+        try:
+            found = multi_source_api.crossref.lookup_dois(dois, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Crossref metadata lookup skipped: {e}")
+            return
+        for paper in papers:
+            metadata = found.get(canonicalize_doi(paper.doi))
+            if metadata is None:
+                continue
+            for field in ('journal', 'volume', 'issue', 'pages'):
+                if not getattr(paper, field):
+                    setattr(paper, field, getattr(metadata, field))
+            if metadata.citation_count is not None:
+                paper.citation_count = metadata.citation_count
+
+    def _fetch_ieee(self, query: str, max_results: int) -> List[PaperRecord]:
+        if not ieee_xplore_api.api_key:
+            raise SourceError("IEEE Xplore API key is not configured")
+        papers = ieee_xplore_api.search_papers(query, max_results)
+        return [PaperRecord.from_ieee(paper) for paper in papers]
+
+    @staticmethod
+    def _cached_search(source: str, query: str, sort_key: str, max_results: int,
+                       fetch: Callable[[], List[PaperRecord]], timeout: float) -> List[PaperRecord]:
+        # Cached and coalesced records are shared, so every caller gets its own copies
+        return PaperRecord.coerce_all(search_cache.get_or_fetch(source, query, sort_key, max_results, fetch,
+                                                                wait=timeout))
+
+    def _build_task(self, source: str, query: str, max_results: int, sort_by: str,
+                    timeout: float) -> Optional[Callable[[], List[PaperRecord]]]:
+        """Return a zero-argument callable that searches one source through the cache"""
+        if source == 'local':
+            # Answers in milliseconds, so it is neither cached nor indexed again
+            return partial(paper_index.search_ranked, query, max_results)
+        if source == 'arxiv':
+            fetch = partial(self._fetch_arxiv, query, max_results, sort_by, timeout)
+            # Only arXiv honours the sort order, so only its cache key depends on it
+            sort_key = arxiv_api.resolve_sort(sort_by).value
+        elif source == 'ieee':
+            fetch = partial(self._fetch_ieee, query, max_results)
+            sort_key = "relevance"
+        elif source in multi_source_api.providers:
+            fetch = partial(self._fetch_provider, source, query, max_results, timeout)
+            sort_key = "relevance"
+        else:
+            return None
+        return partial(self._cached_search, source, query, sort_key, max_results,
+                       paper_index.indexing(fetch), timeout)
+
+    @staticmethod
+    def _limits(sources: List[str], max_results_per_source: Union[int, Dict[str, int]]) -> Dict[str, int]:
+        if isinstance(max_results_per_source, dict):
+            return {source: max_results_per_source.get(source, 1) for source in sources}
+        return {source: max_results_per_source for source in sources}
+
+    def _local_covers(self, query: str, limits: Dict[str, int], sort_by: str) -> bool:
+        """True when the local index alone holds enough recently fetched papers matching every query term"""
+        if 'local' not in limits or len(limits) == 1 or sort_by != "relevance":
+            return False
+        needed = sum(limit for source, limit in limits.items() if source != 'local')
+        return len(paper_index.search(query, needed, match_all=True, max_age=LOCAL_INDEX_FRESH_SECONDS)) >= needed
+
+    def _timeouts(self, sources: List[str]) -> Dict[str, float]:
+        """Per-source budgets: the configured timeout, tightened to each source's observed p99 latency"""
+        return {
+            source: circuit_breakers.get(source).timeout(self.source_timeouts.get(source, SOURCE_TIMEOUT_SECONDS))
+            for source in sources if source != 'local'
+        }
+
+    def available_sources(self) -> List[str]:
+        """Sources that are configured and can be queried"""
+        return [source for source in self.SOURCES if source != 'ieee' or ieee_xplore_api.api_key]
+
+    def breaker_snapshot(self) -> Dict[str, Dict]:
+        """Breaker state, latency histogram and current timeout of every remote source"""
+        for source in self.SOURCES[1:]:
+            circuit_breakers.get(source)
+        return circuit_breakers.snapshot({
+            source: self.source_timeouts.get(source, SOURCE_TIMEOUT_SECONDS) for source in self.SOURCES
+        })
+
+    def _build_tasks(self, query: str, sources: List[str], max_results_per_source: Union[int, Dict[str, int]],
+                     sort_by: str, timeouts: Dict[str, float]
+                     ) -> Tuple[Dict[str, Callable[[], List[PaperRecord]]], Dict[str, Dict]]:
+        """Return (tasks by source, status of sources skipped because the local index covers the query)"""
+        limits = self._limits(sources, max_results_per_source)
+        skipped = {}
+        if self._local_covers(query, limits, sort_by):
+            # Remote sources only top up freshness; skip them while the local corpus is fresh
+            skipped = {
+                source: {'status': 'skipped', 'count': 0, 'elapsed': 0.0, 'reason': 'local_index'}
+                for source in sources if source != 'local'
+            }
+
+        tasks = {}
+        for source in sources:
+            if source in skipped:
+                continue
+            timeout = timeouts.get(source, SOURCE_TIMEOUT_SECONDS)
+            limit = max(limits[source], sum(limits.values()) - limits[source]) if source == 'local' and skipped \
+                else limits[source]
+            task = self._build_task(source, query, limit, sort_by, timeout)
+            if task is None:
+                logger.warning(f"Unknown source requested: {source}")
+                continue
+            tasks[source] = task
+
+        logger.info(f"Search stage: query='{query}', sources={list(tasks)}, skipped={list(skipped)}")
+        return tasks, skipped
+
+    def search(self, query: str, sources: List[str], max_results_per_source: Union[int, Dict[str, int]],
+               sort_by: str = "relevance", deadline: Optional[float] = None
+               ) -> Tuple[Dict[str, List[PaperRecord]], Dict[str, Dict]]:
+        """
+        Search all requested sources concurrently under one deadline budget
+
+        Args:
+            query: Search query string
+            sources: Source names (see SOURCES)
+            max_results_per_source: Maximum results requested from each source, or a limit per source
+            sort_by: "relevance", "date" or "updated" (only arXiv honours it)
+            deadline: Overall time budget in seconds
+
+        Returns:
+            Tuple of (papers by source, status by source)
+        """
+        timeouts = self._timeouts(sources)
+        tasks, skipped = self._build_tasks(query, sources, max_results_per_source, sort_by, timeouts)
+        results, status = run_with_deadlines(tasks, self.executor, deadline, timeouts)
+        for source, source_status in skipped.items():
+            results[source] = []
+            status[source] = source_status
+        return results, status
+
+    def iter_search(self, query: str, sources: List[str], max_results_per_source: Union[int, Dict[str, int]],
+                    sort_by: str = "relevance", deadline: Optional[float] = None
+                    ) -> Iterator[Tuple[str, List[PaperRecord], Dict]]:
+        """Like search, but yields (source, papers, status) as each source settles"""
+        timeouts = self._timeouts(sources)
+        tasks, skipped = self._build_tasks(query, sources, max_results_per_source, sort_by, timeouts)
+        yield from iter_with_deadlines(tasks, self.executor, deadline, timeouts)
+        for source, source_status in skipped.items():
+            yield source, [], source_status
+
+# Create global instance
+search_stage = SearchStage()
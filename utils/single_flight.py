@@ -0,0 +1,235 @@
+"""
+Request coalescing (single-flight)
+Concurrent calls with the same key share one computation: within a process through a
+shared future, and across worker processes through a Redis lock plus a pub/sub notification
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional
+
+from utils import fast_json
+from utils.redis_client import get_redis_client, reset_redis_client
+
+# Import config with fallback to environment variables
+try:
+    from config import SINGLE_FLIGHT_WAIT_SECONDS, SINGLE_FLIGHT_RESULT_SECONDS
+except ImportError:
+    # Fallback to environment variables for deployment
+    SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv('SINGLE_FLIGHT_WAIT_SECONDS', 60))
+    SINGLE_FLIGHT_RESULT_SECONDS = int(os.getenv('SINGLE_FLIGHT_RESULT_SECONDS', 10))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_DONE = b'done'
+_FAILED = b'failed:'
+
+
+class SharedCallFailed(Exception):
+    """
+    The call this one was coalesced with (in another worker) raised
+
+    error_type is the name of the leader's exception class and retry_after its retry_after
+    attribute, if it had one, so callers can tell e.g. a rate limit from other failures.
+    """
+
+    def __init__(self, message: str, error_type: Optional[str] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.retry_after = retry_after
+
+
+def _encode_failure(error: Exception) -> bytes:
+    return _FAILED + fast_json.dumps({
+        'type': type(error).__name__,
+        'message': str(error)[:200],
+        'retry_after': getattr(error, 'retry_after', None)
+    })
+
+
+def _decode_failure(payload: bytes) -> SharedCallFailed:
+    try:
+        failure = fast_json.loads(payload)
+        return SharedCallFailed(failure['message'], failure.get('type'), failure.get('retry_after'))
+    except (ValueError, TypeError, KeyError):
+        # Published by a worker still running the plain-text format
+        return SharedCallFailed(payload.decode('utf-8', 'replace'))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls
+
+    The first caller for a key (the leader) runs the function; callers arriving
+    while it runs wait for its result instead of repeating the work. Across
+    processes the leader holds a Redis lock, stores the encoded result for a few
+    seconds and publishes a notification that the waiting workers subscribe to.
+    A waiter that hears nothing within its wait computes the result itself.
+    """
+
+    KEY_PREFIX = "single_flight:"
+
+    def __init__(self, namespace: str, wait_seconds: float = SINGLE_FLIGHT_WAIT_SECONDS,
+                 result_seconds: int = SINGLE_FLIGHT_RESULT_SECONDS,
+                 encode: Callable[[Any], bytes] = fast_json.dumps,
+                 decode: Callable[[bytes], Any] = fast_json.loads):
+        self.namespace = namespace
+        self.wait_seconds = wait_seconds
+        self.result_seconds = result_seconds
+        self.encode = encode
+        self.decode = decode
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'collapsed_local': 0, 'collapsed_remote': 0,
+                      'wait_timeouts': 0, 'failures': 0}
+
+    def _keys(self, key: str):
+        base = f"{self.KEY_PREFIX}{self.namespace}:{key}"
+        return f"{base}:lock", f"{base}:result", f"{base}:done"
+
+    def do(self, key: str, fn: Callable[[], Any], wait: Optional[float] = None) -> Any:
+        """
+        Return fn(), sharing the call with concurrent callers using the same key
+
+        Args:
+            key: Identity of the computation (e.g. a cache key or prompt hash)
+            fn: Zero-argument function computing the result
+            wait: Longest time to wait for another caller's result (default wait_seconds)
+
+        Returns:
+            The result; callers in the same process receive the same object
+        """
+        wait = self.wait_seconds if wait is None else wait
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            self.stats['collapsed_local'] += 1
+            try:
+                return future.result(timeout=wait)
+            except FutureTimeout:
+                self.stats['wait_timeouts'] += 1
+                return fn()
+
+        try:
+            result = self._across_workers(key, fn, wait)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _across_workers(self, key: str, fn: Callable[[], Any], wait: float) -> Any:
+        client = get_redis_client()
+        if client is None:
+            return self._lead(None, key, fn, wait)
+
+        lock_key, _, _ = self._keys(key)
+        try:
+            acquired = client.set(lock_key, os.getpid(), nx=True, ex=max(1, int(wait)))
+        except Exception as e:
+            logger.warning(f"Redis single-flight lock failed for {key}: {e}")
+            reset_redis_client()
+            return self._lead(None, key, fn, wait)
+
+        if acquired:
+            return self._lead(client, key, fn, wait)
+
+        found, result = self._await_remote(client, key, wait)
+        if found:
+            self.stats['collapsed_remote'] += 1
+            return result
+        self.stats['wait_timeouts'] += 1
+        return self._lead(None, key, fn, wait)
+
+    def _lead(self, client, key: str, fn: Callable[[], Any], wait: float) -> Any:
+        """Run fn and, when holding the Redis lock, hand the outcome to waiting workers"""
+        self.stats['leaders'] += 1
+        lock_key, result_key, channel = self._keys(key)
+        try:
+            result = fn()
+        except Exception as e:
+            self.stats['failures'] += 1
+            if client is not None:
+                self._publish(client, lock_key, channel, _encode_failure(e))
+            raise
+        if client is None:
+            return result
+
+        try:
+            client.set(result_key, self.encode(result), ex=self.result_seconds)
+        except Exception as e:
+            logger.warning(f"Could not share single-flight result for {key}: {e}")
+        self._publish(client, lock_key, channel, _DONE)
+        return result
+
+    @staticmethod
+    def _publish(client, lock_key: str, channel: str, message: bytes):
+        try:
+            pipe = client.pipeline()
+            pipe.delete(lock_key)
+            pipe.publish(channel, message)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not notify single-flight waiters on {channel}: {e}")
+
+    def _read_result(self, client, result_key: str):
+        blob = client.get(result_key)
+        if blob is None:
+            return False, None
+        return True, self.decode(blob)
+
+    def _await_remote(self, client, key: str, wait: float):
+        """Wait for another worker's result; returns (found, result)"""
+        lock_key, result_key, channel = self._keys(key)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(channel)
+            # The leader may have finished before the subscription was in place
+            found, result = self._read_result(client, result_key)
+            if found:
+                return found, result
+
+            give_up = time.monotonic() + wait
+            while time.monotonic() < give_up:
+                message = pubsub.get_message(timeout=min(1.0, max(0.0, give_up - time.monotonic())))
+                if message is None:
+                    if not client.exists(lock_key):
+                        # The leader finished without us hearing it, or died
+                        return self._read_result(client, result_key)
+                    continue
+                if message['data'] == _DONE:
+                    return self._read_result(client, result_key)
+                if message['data'].startswith(_FAILED):
+                    raise _decode_failure(message['data'][len(_FAILED):])
+            return False, None
+        except SharedCallFailed:
+            raise
+        except Exception as e:
+            logger.warning(f"Redis single-flight wait failed for {key}: {e}")
+            return False, None
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, inflight=len(self._inflight))
+
+# Create global instances
+search_flight = SingleFlight('search')
+llm_flight = SingleFlight('llm')
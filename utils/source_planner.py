@@ -0,0 +1,257 @@
+"""
+Query-aware source planner
+Chooses which paper sources to query and how many results to ask each for, from a keyword
+classification of the query and per-domain yield learned from earlier searches
+"""
+
+import os
+import re
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils import fast_json
+from utils.paper_dedup import title_fingerprint
+from utils.redis_client import get_redis_client, reset_redis_client
+
+# Import config with fallback to environment variables
+try:
+    from config import PLANNER_ENABLED, PLANNER_MIN_SAMPLES, PLANNER_MIN_YIELD, PLANNER_MIN_PER_SOURCE
+except ImportError:
+    # Fallback to environment variables for deployment
+    PLANNER_ENABLED = os.getenv('PLANNER_ENABLED', 'true').lower() == 'true'
+    PLANNER_MIN_SAMPLES = int(os.getenv('PLANNER_MIN_SAMPLES', 20))
+    PLANNER_MIN_YIELD = float(os.getenv('PLANNER_MIN_YIELD', 0.05))
+    PLANNER_MIN_PER_SOURCE = int(os.getenv('PLANNER_MIN_PER_SOURCE', 3))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Word stems that mark a query as belonging to a domain (matched as token prefixes)
+DOMAIN_KEYWORDS = {
+    'biomedical': (
+        'clinic', 'patient', 'disease', 'cancer', 'tumor', 'tumour', 'gene', 'genom', 'protein', 'enzym',
+        'cell', 'drug', 'therap', 'vaccin', 'covid', 'sars', 'diabet', 'cardio', 'cardiac', 'alzheimer',
+        'neuron', 'brain', 'immun', 'antibod', 'bacteri', 'viral', 'virus', 'pathogen', 'epidemi',
+        'medic', 'surg', 'pharma', 'biomark', 'crispr', 'rna', 'dna', 'mutation', 'obesity', 'mental',
+        'depress', 'nurs', 'health', 'hospital', 'trial', 'microbio', 'metabol'
+    ),
+    'engineering': (
+        'circuit', 'antenna', 'wireless', '5g', '6g', 'mimo', 'vlsi', 'fpga', 'semiconductor', 'transistor',
+        'radar', 'sensor', 'battery', 'inverter', 'converter', 'grid', 'microgrid', 'power', 'voltage',
+        'signal', 'modulation', 'channel', 'photonic', 'optical', 'control', 'actuator', 'motor',
+        'embedded', 'iot', 'vehicular', 'automotive', 'manufactur', 'robot'
+    ),
+    'computer_science': (
+        'algorithm', 'neural', 'learning', 'transformer', 'llm', 'language', 'gpt', 'bert', 'deep',
+        'reinforcement', 'graph', 'vision', 'segmentation', 'detection', 'classification', 'software',
+        'compiler', 'database', 'distributed', 'cloud', 'security', 'cryptograph', 'blockchain',
+        'privacy', 'comput', 'program', 'dataset', 'benchmark', 'diffusion', 'generative', 'agent'
+    ),
+    'physics_math': (
+        'quantum', 'theorem', 'topolog', 'manifold', 'cosmolog', 'galax', 'astro', 'particle', 'relativ',
+        'gravit', 'boson', 'fermion', 'lattice', 'algebra', 'geometr', 'equation', 'conjecture',
+        'stochastic', 'probabil', 'spectral', 'superconduct', 'plasma', 'condensed', 'thermodynam'
+    ),
+}
+
+# How well each source covers a domain; sources not listed get 1.0
+DOMAIN_AFFINITY = {
+    'biomedical': {'pubmed': 2.0, 'semantic_scholar': 1.3, 'arxiv': 0.4, 'ieee': 0.3},
+    'engineering': {'ieee': 2.0, 'arxiv': 0.9, 'pubmed': 0.1},
+    'computer_science': {'arxiv': 1.8, 'semantic_scholar': 1.3, 'ieee': 1.1, 'pubmed': 0.1},
+    'physics_math': {'arxiv': 2.0, 'ieee': 0.5, 'pubmed': 0.05},
+    'general': {'pubmed': 0.3, 'ieee': 0.5},
+}
+
+# Specialist sources worth adding when the caller left the choice to us
+DOMAIN_SPECIALISTS = {
+    'biomedical': ('pubmed',),
+    'engineering': ('ieee',),
+}
+
+# Yield assumed for a source before it has enough history
+_PRIOR_YIELD = 0.5
+_EWMA_ALPHA = 0.1
+# Share of searches that keep a low-yield source anyway, so its statistics can recover
+_EXPLORE_RATE = 0.05
+
+
+def classify_query(query: str) -> List[str]:
+    """Domains a query belongs to, best match first ("general" if none)"""
+    tokens = _TOKEN_PATTERN.findall(query.lower())
+    scores = {}
+    for domain, stems in DOMAIN_KEYWORDS.items():
+        score = sum(1 for token in tokens if token.startswith(stems))
+        if score:
+            scores[domain] = score
+    if not scores:
+        return ['general']
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+@dataclass
+class SourcePlan:
+    """Sources to query for one search and the number of results to request from each"""
+    sources: List[str]
+    limits: Dict[str, int]
+    domains: List[str]
+    dropped: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {'sources': self.sources, 'limits': self.limits, 'domains': self.domains, 'dropped': self.dropped}
+
+
+class SourcePlanner:
+    """Plans source fan-out per query and learns per-domain source yield from search outcomes"""
+
+    KEY = "planner:stats"
+
+    def __init__(self, enabled: bool = PLANNER_ENABLED, min_samples: int = PLANNER_MIN_SAMPLES,
+                 min_yield: float = PLANNER_MIN_YIELD, min_per_source: int = PLANNER_MIN_PER_SOURCE):
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self.min_yield = min_yield
+        self.min_per_source = min_per_source
+        self._local: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat_key(domain: str, source: str) -> str:
+        return f"{domain}:{source}"
+
+    def _load(self) -> Dict[str, Dict]:
+        client = get_redis_client()
+        if client is not None:
+            try:
+                return {key.decode(): fast_json.loads(value) for key, value in client.hgetall(self.KEY).items()}
+            except Exception as e:
+                logger.warning(f"Redis planner stats unavailable: {e}")
+                reset_redis_client()
+        with self._lock:
+            return dict(self._local)
+
+    def _save(self, updates: Dict[str, Dict]):
+        with self._lock:
+            self._local.update(updates)
+        client = get_redis_client()
+        if client is None or not updates:
+            return
+        try:
+            client.hset(self.KEY, mapping={key: fast_json.dumps(value) for key, value in updates.items()})
+        except Exception as e:
+            logger.warning(f"Redis planner stats write failed: {e}")
+            reset_redis_client()
+
+    def _yield(self, stats: Dict[str, Dict], domain: str, source: str) -> Optional[float]:
+        """Learned yield, or None while the source has too little history in this domain"""
+        entry = stats.get(self._stat_key(domain, source))
+        if not entry or entry['n'] < self.min_samples:
+            return None
+        return entry['yield']
+
+    def plan(self, query: str, sources: List[str], max_results: int, explicit: bool = True,
+             available: Optional[Iterable[str]] = None) -> SourcePlan:
+        """
+        Plan which sources to query and how many results to request from each
+
+        Args:
+            query: Search query string
+            sources: Sources the caller asked for
+            max_results: Results wanted after merging
+            explicit: False when sources are the defaults, letting the planner add specialists
+            available: Sources that can be queried at all (e.g. IEEE only with an API key)
+
+        Returns:
+            SourcePlan whose limits add up to about max_results
+        """
+        domains = classify_query(query)
+        sources = list(dict.fromkeys(sources))
+        if not self.enabled:
+            per_source = max(1, max_results // max(1, len(sources)))
+            return SourcePlan(sources, {source: per_source for source in sources}, domains)
+
+        available = set(available) if available is not None else None
+        candidates = [source for source in sources if available is None or source in available]
+        dropped = {source: 'unavailable' for source in sources if source not in candidates}
+        if not explicit:
+            for domain in domains:
+                for source in DOMAIN_SPECIALISTS.get(domain, ()):
+                    if source not in candidates and (available is None or source in available):
+                        candidates.append(source)
+
+        primary = domains[0]
+        stats = self._load()
+        affinity = DOMAIN_AFFINITY.get(primary, {})
+        weights = {}
+        for source in candidates:
+            if source == 'local':
+                continue
+            learned = self._yield(stats, primary, source)
+            if learned is not None and learned < self.min_yield and random.random() >= _EXPLORE_RATE:
+                dropped[source] = 'low_yield'
+                continue
+            weights[source] = affinity.get(source, 1.0) * (0.25 + (_PRIOR_YIELD if learned is None else learned))
+
+        # Never fan out to fewer than two remote sources because of learned yield alone
+        if len(weights) < 2:
+            for source in [source for source, reason in dropped.items() if reason == 'low_yield'][:2 - len(weights)]:
+                del dropped[source]
+                weights[source] = affinity.get(source, 1.0) * 0.25
+
+        total = sum(weights.values()) or 1.0
+        limits = {
+            source: min(max_results, max(self.min_per_source, round(max_results * weight / total)))
+            for source, weight in sorted(weights.items(), key=lambda item: item[1], reverse=True)
+        }
+        planned = list(limits)
+        if 'local' in candidates:
+            # The local index is free, so it is always asked for a full page
+            limits['local'] = max_results
+            planned.insert(0, 'local')
+        return SourcePlan(planned, limits, domains, dropped)
+
+    def record_outcome(self, plan: SourcePlan, results_by_source: Dict[str, List[Any]],
+                       source_status: Dict[str, Dict], ranked_papers: List[Any]):
+        """
+        Learn from one search: a source's yield is the share of its requested
+        results that made it into the final ranked list
+        """
+        if not self.enabled:
+            return
+        try:
+            ranked = {title_fingerprint(self._title(paper)) for paper in ranked_papers}
+            stats = self._load()
+            updates = {}
+            for source in plan.sources:
+                if source == 'local' or source_status.get(source, {}).get('status') != 'ok':
+                    # Outages and throttling say nothing about relevance
+                    continue
+                kept = sum(1 for paper in results_by_source.get(source, [])
+                           if title_fingerprint(self._title(paper)) in ranked)
+                observed = min(1.0, kept / max(1, plan.limits.get(source, 1)))
+                for domain in plan.domains:
+                    key = self._stat_key(domain, source)
+                    entry = stats.get(key) or {'yield': _PRIOR_YIELD, 'n': 0}
+                    updates[key] = {
+                        'yield': round((1 - _EWMA_ALPHA) * entry['yield'] + _EWMA_ALPHA * observed, 4),
+                        'n': entry['n'] + 1
+                    }
+            self._save(updates)
+        except Exception as e:
+            logger.warning(f"Could not record source planner outcome: {e}")
+
+    @staticmethod
+    def _title(paper: Any) -> Optional[str]:
+        return paper.get('title') if isinstance(paper, dict) else getattr(paper, 'title', None)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return self._load()
+
+# Create global instance
+source_planner = SourcePlanner()
@@ -0,0 +1,174 @@
+"""
+Precomputed trending topics
+A Celery beat task fetches the newest arXiv papers for each category in parallel and
+stores one ready-to-serve JSON document in Redis; the endpoint only reads it
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import arxiv
+
+from utils import fast_json
+from utils.arxiv_api import arxiv_api
+from utils.paper_index import paper_index
+from utils.redis_client import get_redis_client, reset_redis_client
+
+# Import config with fallback to environment variables
+try:
+    from config import TRENDING_CATEGORIES, TRENDING_REFRESH_SECONDS, TRENDING_PAPERS_PER_CATEGORY
+except ImportError:
+    # Fallback to environment variables for deployment
+    TRENDING_CATEGORIES = os.getenv('TRENDING_CATEGORIES', 'cs.AI,cs.LG,cs.CL,physics,math,q-bio')
+    TRENDING_REFRESH_SECONDS = int(os.getenv('TRENDING_REFRESH_SECONDS', 900))
+    TRENDING_PAPERS_PER_CATEGORY = int(os.getenv('TRENDING_PAPERS_PER_CATEGORY', 3))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Background jobs can afford to queue for the shared arXiv quota
+_RATE_WAIT_SECONDS = 15
+
+
+class TrendingStore:
+    """Latest trending document, shared through Redis with an in-process copy"""
+
+    KEY = "trending:topics"
+
+    def __init__(self, categories=TRENDING_CATEGORIES, refresh_seconds: int = TRENDING_REFRESH_SECONDS,
+                 per_category: int = TRENDING_PAPERS_PER_CATEGORY):
+        if isinstance(categories, str):
+            categories = [category.strip() for category in categories.split(',') if category.strip()]
+        self.categories = list(categories)
+        self.refresh_seconds = refresh_seconds
+        self.per_category = per_category
+        self._local: Optional[Dict] = None
+        self._local_read_at = 0.0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._refreshing = False
+
+    def _fetch_category(self, category: str) -> List:
+        papers = arxiv_api.fetch_papers(f"cat:{category}", self.per_category + 2,
+                                        arxiv.SortCriterion.SubmittedDate, rate_wait=_RATE_WAIT_SECONDS)
+        paper_index.add_papers(papers)
+        return papers[:self.per_category]
+
+    def build(self) -> Dict:
+        """Fetch every category in parallel and return the encoded document with its ETag"""
+        with ThreadPoolExecutor(max_workers=len(self.categories) or 1, thread_name_prefix='trending') as pool:
+            futures = {category: pool.submit(self._fetch_category, category) for category in self.categories}
+
+        trending = []
+        for category, future in futures.items():
+            try:
+                papers = future.result()
+            except Exception as e:
+                logger.warning(f"Trending refresh failed for {category}: {e}")
+                continue
+            if papers:
+                trending.append({"category": category, "papers": papers})
+
+        generated_at = time.time()
+        body = fast_json.dumps({"success": True, "trending": trending, "generated_at": int(generated_at)})
+        return {
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'generated_at': generated_at,
+            'categories': len(trending)
+        }
+
+    def refresh(self) -> Optional[Dict]:
+        """Rebuild the document and publish it; keeps the previous one if every category failed"""
+        document = self.build()
+        if not document['categories'] and self.get(allow_build=False) is not None:
+            logger.warning("Trending refresh returned nothing; keeping the previous topics")
+            return None
+
+        with self._lock:
+            self._local = document
+            self._local_read_at = time.monotonic()
+        client = get_redis_client()
+        if client is not None:
+            try:
+                # Outlives a few missed beats, so a stalled scheduler degrades to stale topics
+                client.set(self.KEY, fast_json.dumps(
+                    dict(document, body=document['body'].decode('utf-8'))
+                ), ex=self.refresh_seconds * 8)
+            except Exception as e:
+                logger.warning(f"Could not store trending topics in Redis: {e}")
+                reset_redis_client()
+        logger.info(f"Trending topics refreshed for {document['categories']} categories")
+        return document
+
+    def _read_redis(self) -> Optional[Dict]:
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            blob = client.get(self.KEY)
+        except Exception as e:
+            logger.warning(f"Could not read trending topics from Redis: {e}")
+            reset_redis_client()
+            return None
+        if blob is None:
+            return None
+        document = fast_json.loads(blob)
+        document['body'] = document['body'].encode('utf-8')
+        return document
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Background trending refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='trending-refresh', daemon=True).start()
+
+    def get(self, allow_build: bool = True) -> Optional[Dict]:
+        """
+        Return the current document ({'body', 'etag', 'generated_at', ...})
+
+        The Redis copy is re-read at most every few seconds. Without a beat
+        scheduler the first request builds the document and stale documents are
+        refreshed in the background.
+        """
+        with self._lock:
+            document = self._local
+            fresh_read = time.monotonic() - self._local_read_at < 5
+        if document is None or not fresh_read:
+            shared = self._read_redis()
+            if shared is not None:
+                document = shared
+                with self._lock:
+                    self._local = shared
+                    self._local_read_at = time.monotonic()
+
+        if not allow_build:
+            return document
+        if document is None:
+            # Concurrent first requests in this process wait for one build
+            with self._build_lock:
+                return self._local or self.refresh()
+        age = time.time() - document['generated_at']
+        if age > self.refresh_seconds * 2 or (not document['categories'] and age > 60):
+            self._refresh_in_background()
+        return document
+
+# Create global instance
+trending_store = TrendingStore()